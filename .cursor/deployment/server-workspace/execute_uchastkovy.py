@@ -3,10 +3,38 @@ import json
 import os
 import datetime
 import hashlib
+import sys
+import threading
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "lobster", "common"))
+import host_probe
+from incident_writer import IncidentWriter
+from journal_tail import JournalTail
+from probe_pool import Probe, probe_summary, run_probes
+
+# Incidents go through the group-commit writer (one locked O_APPEND write per batch).
+INCIDENTS_PATH = os.path.expanduser("~/.openclaw/workspace/data/incidents.jsonl")
+# Probe results/latencies, one record per tick (same file as lobster/uchastkovy/runner_real.py).
+METRICS_PATH = os.path.expanduser("~/.openclaw/.runtime/uchastkovy-lobster-metrics.jsonl")
+# Same setting as lobster/uchastkovy/runner_real.py; the skill's default_api probes run serially, hence the longer default.
+try:
+    PROBE_DEADLINE_S = float(os.environ.get("UCHASTKOVY_PROBE_DEADLINE_S", "40"))
+except ValueError:
+    PROBE_DEADLINE_S = 40.0
+
+
+def append_metrics(rec):
+    try:
+        os.makedirs(os.path.dirname(METRICS_PATH), exist_ok=True)
+        with open(METRICS_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    except Exception as e:
+        print(f"Error writing metrics: {e}")
+
 def execute_uchastkovy_skill():
     incidents = []
+    writer = IncidentWriter(INCIDENTS_PATH)
     current_time_utc = datetime.datetime.utcnow()
     # Current time in Almaty (UTC+5)
     current_time_almaty = current_time_utc + datetime.timedelta(hours=5)
@@ -14,35 +42,111 @@ def execute_uchastkovy_skill():
     # Шаг 1. Сбор данных
     print("Executing Шаг 1. Сбор данных")
 
-    # 1. cron(action=list) -> список задач
-    # Read from data/cron-jobs-snapshot.json
-    cron_jobs = []
-    try:
-        cron_jobs_raw = default_api.read(file_path="data/cron-jobs-snapshot.json")
-        cron_jobs = json.loads(cron_jobs_raw.get("read_response", {}).get("output", "{\"jobs\": []}"))["jobs"]
-        print(f"Cron jobs loaded: {len(cron_jobs)} jobs")
-    except Exception as e:
-        print(f"Error reading cron-jobs-snapshot.json: {e}")
+    # Probes 1-8 run through probe_pool for latency metrics and the PROBE_DEADLINE_S
+    # total. default_api is not known to be thread-safe: the probes that go through it
+    # run serially, the in-process ones (gateway, disk, RSS, journal) concurrently, and
+    # their shell fallbacks take api_lock so default_api never sees two calls at once.
+    sunday_window = current_time_almaty.weekday() == 6 and 3 <= current_time_almaty.hour < 12
+    api_lock = threading.Lock()
+
+    def exec_output(command, default=""):
+        with api_lock:
+            return default_api.exec(command=command).get("exec_response", {}).get("output", default).strip()
+
+    def read_json(file_path, default):
+        with api_lock:
+            raw = default_api.read(file_path=file_path)
+        return json.loads(raw.get("read_response", {}).get("output", default))
+
+    # Gateway state, disk and RSS are read in-process (cgroupfs, os.statvfs, /proc; see
+    # lobster/common/host_probe.py); the shell commands below are the fallback.
+    def gateway_status():
+        if host_probe.cgroup_active("openclaw-gateway"):
+            return "active"
+        return exec_output("systemctl --user is-active openclaw-gateway")
+
+    def disk_percent():
+        try:
+            return host_probe.disk("/", fallback=False)["pct"]
+        except OSError:
+            parts = exec_output("df -h / | tail -1").split()
+            if len(parts) > 4 and parts[4].endswith('%'):
+                try:
+                    return int(parts[4][:-1])
+                except ValueError:
+                    pass
+            return 0  # Default to 0 if parsing fails
 
-    # 2. systemctl --user is-active openclaw-gateway -> статус gateway
-    gateway_status_output = default_api.exec(command="systemctl --user is-active openclaw-gateway").get("exec_response", {}).get("output", "").strip()
-    gateway_active = (gateway_status_output == "active")
+    def gateway_rss_kb():
+        try:
+            gw = host_probe.process("openclaw-gateway", fallback=False)
+            return gw["rss_kb"] if gw else 0
+        except host_probe.Unavailable:
+            rss_output = exec_output("ps aux | grep -E \"openclaw-gateway$\" | grep -v grep | awk '{print $6}'", "0")
+            return int(rss_output) if rss_output.isdigit() else 0
+
+    # Journal phrase counts come from the shared cursor-based tailer (lobster/common/
+    # journal_tail.py, one incremental journalctl read per tick for all consumers);
+    # journalctl | grep -c is the fallback.
+    def journal_count(phrase, seconds, since_text):
+        try:
+            tail = JournalTail("openclaw-gateway")
+            tail.refresh()
+            return sum(1 for msg in tail.messages(time.time() - seconds) if phrase in msg)
+        except Exception:
+            count_output = exec_output(f"journalctl --user -u openclaw-gateway --since \"{since_text}\" --no-pager | grep -c \"{phrase}\"", "0")
+            return int(count_output) if count_output.isdigit() else 0
+
+    local_probes = [
+        # 2. systemctl --user is-active openclaw-gateway -> статус gateway
+        Probe("gateway", gateway_status, timeout_s=10),
+        # 3. df -h / | tail -1 -> диск (% использования)
+        Probe("disk", disk_percent, timeout_s=10),
+        # 6. journalctl ... | grep -c "announce queue drain failed" -> DRAIN_COUNT
+        Probe("drain", lambda: journal_count("announce queue drain failed", 11 * 60, "11 minutes ago"), timeout_s=20),
+        # 7. ps aux | grep -E "openclaw-gateway$" | grep -v grep | awk '{print $6}' -> RSS в KB
+        Probe("gateway_rss", gateway_rss_kb, timeout_s=10),
+    ]
+    api_probes = [
+        # 1. cron(action=list) -> список задач (data/cron-jobs-snapshot.json)
+        Probe("cron_jobs", lambda: read_json("data/cron-jobs-snapshot.json", "{\"jobs\": []}")["jobs"], timeout_s=10),
+        # 4. git -C ~/Clowdbot status --short -> GIT_STATUS_RAW
+        Probe("git", lambda: exec_output("git -C ~/Clowdbot status --short"), timeout_s=15),
+        # 8. python3 ~/scripts/check-config-drift.py (writes directly to incidents.jsonl)
+        Probe("config_drift", lambda: exec_output("python3 /home/openclaw/.openclaw/workspace/scripts/check-config-drift.py"), timeout_s=30),
+    ]
+    # 5. [только если воскресенье и 03:00–12:00 Алматы]
+    if sunday_window:
+        api_probes.append(Probe("scout", lambda: read_json("data/scout-discoveries.json", "{}").get("last_run"), timeout_s=10))
+    probe_start = time.monotonic()
+    results = run_probes(local_probes, deadline_s=PROBE_DEADLINE_S)
+    results.update(run_probes(api_probes, deadline_s=max(0.0, PROBE_DEADLINE_S - (time.monotonic() - probe_start)),
+                              concurrent=False))
+    probe_latency = probe_summary(results)
+    print(f"Probe latencies (ms): {json.dumps({k: v['latency_ms'] for k, v in probe_latency.items()})}")
+
+    def probe_value(name, default):
+        r = results.get(name)
+        if r is None or not r.ok:
+            if r is not None:
+                print(f"Probe {name} failed: {r.error}")
+            return default
+        return r.value
+
+    cron_jobs = probe_value("cron_jobs", [])
+    print(f"Cron jobs loaded: {len(cron_jobs)} jobs")
+
+    # A failed gateway probe counts as not active, as an empty is-active result always did
+    # (same rule as lobster/uchastkovy/runner_real.py).
+    gateway_status_output = probe_value("gateway", "")
+    gateway_active = gateway_status_output == "active"
+    gateway_probe_error = results["gateway"].error
     print(f"Gateway status: {gateway_status_output}")
 
-    # 3. df -h / | tail -1 -> диск (% использования)
-    disk_usage_output = default_api.exec(command="df -h / | tail -1").get("exec_response", {}).get("output", "").strip()
-    disk_usage_percent = 0
-    if disk_usage_output:
-        parts = disk_usage_output.split()
-        if len(parts) > 4 and parts[4].endswith('%'):
-            try:
-                disk_usage_percent = int(parts[4][:-1])
-            except ValueError:
-                pass # Default to 0 if parsing fails
+    disk_usage_percent = probe_value("disk", 0)
     print(f"Disk usage: {disk_usage_percent}%")
 
-    # 4. git -C ~/Clowdbot status --short -> GIT_STATUS_RAW
-    git_status_raw_output = default_api.exec(command="git -C ~/Clowdbot status --short").get("exec_response", {}).get("output", "").strip()
+    git_status_raw_output = probe_value("git", "")
     git_status_filtered = []
     noise_files = [
         ".cursor/deployment/server-workspace/data/incidents.jsonl",
@@ -59,32 +163,27 @@ def execute_uchastkovy_skill():
             git_status_filtered.append(line)
     print(f"Git status filtered: {git_status_filtered}")
 
-    # 5. [только если воскресенье и 03:00–12:00 Алматы]
-    scout_last_run = None
-    if current_time_almaty.weekday() == 6 and 3 <= current_time_almaty.hour < 12:
-        try:
-            scout_discoveries_raw = default_api.read(file_path="data/scout-discoveries.json")
-            scout_discoveries = json.loads(scout_discoveries_raw.get("read_response", {}).get("output", "{}"))
-            scout_last_run = scout_discoveries.get("last_run")
-            print(f"Scout last run: {scout_last_run}")
-        except Exception as e:
-            print(f"Could not read data/scout-discoveries.json: {e}")
+    scout_last_run = probe_value("scout", None) if sunday_window else None
+    if sunday_window:
+        print(f"Scout last run: {scout_last_run}")
 
-    # 6. journalctl --user -u openclaw-gateway --since "11 minutes ago" --no-pager | grep -c "announce queue drain failed" -> DRAIN_COUNT
-    drain_count_output = default_api.exec(command="journalctl --user -u openclaw-gateway --since \"11 minutes ago\" --no-pager | grep -c \"announce queue drain failed\"").get("exec_response", {}).get("output", "0").strip()
-    drain_count = int(drain_count_output) if drain_count_output.isdigit() else 0
+    drain_count = probe_value("drain", 0)
     print(f"Drain count: {drain_count}")
 
-    # 7. ps aux | grep -E "openclaw-gateway$" | grep -v grep | awk '{print $6}' -> RSS в KB
-    gw_rss_kb_output = default_api.exec(command="ps aux | grep -E \"openclaw-gateway$\" | grep -v grep | awk '{print $6}'").get("exec_response", {}).get("output", "0").strip()
-    gw_rss_kb = int(gw_rss_kb_output) if gw_rss_kb_output.isdigit() else 0
+    gw_rss_kb = probe_value("gateway_rss", 0)
     print(f"Gateway RSS KB: {gw_rss_kb}")
 
-    # 8. python3 ~/scripts/check-config-drift.py
-    # This script writes directly to incidents.jsonl, no direct output handling needed here.
-    config_drift_output = default_api.exec(command="python3 /home/openclaw/.openclaw/workspace/scripts/check-config-drift.py").get("exec_response", {}).get("output", "").strip()
+    config_drift_output = probe_value("config_drift", "")
     print(f"Config drift check: {config_drift_output}")
 
+    append_metrics({
+        "ts": current_time_utc.isoformat(timespec='seconds') + 'Z',
+        "mode": "skill",
+        "runs_total": 1,
+        "probes_failed": sum(1 for r in results.values() if not r.ok),
+        "probes": probe_latency,
+    })
+
     # Шаг 2. Анализ
     print("Executing Шаг 2. Анализ")
 
@@ -117,7 +216,8 @@ def execute_uchastkovy_skill():
         incidents.append({
             "type": "gateway_down",
             "severity": "critical",
-            "msg": "Gateway is not active.",
+            "msg": "Gateway is not active." if gateway_probe_error is None
+                   else f"Gateway status unknown (probe failed: {gateway_probe_error}).",
             "job": "openclaw-gateway"
         })
 
@@ -171,7 +271,6 @@ def execute_uchastkovy_skill():
     # Шаг 3. Запись в журнал
     print("Executing Шаг 3. Запись в журнал")
     if incidents:
-        incidents_to_write = []
         for incident in incidents:
             timestamp = datetime.datetime.utcnow().isoformat(timespec='seconds') + 'Z'
             incident_id_string = f"{incident['type']}+{incident.get('job', '')}+{timestamp}"
@@ -187,24 +286,11 @@ def execute_uchastkovy_skill():
                 "msg": incident["msg"],
                 "resolved": False
             }
-            incidents_to_write.append(json.dumps(incident_entry, ensure_ascii=False))
-
-        # Read existing incidents to append
-        existing_incidents_content = ""
-        try:
-            existing_incidents_read = default_api.read(file_path="data/incidents.jsonl")
-            existing_incidents_content = existing_incidents_read.get("read_response", {}).get("output", "")
-        except Exception as e:
-            print(f"Could not read existing incidents.jsonl: {e}. Will create new or overwrite.")
-
-        # Ensure a newline if existing content is not empty to separate JSONL entries
-        final_content = existing_incidents_content.strip()
-        if final_content:
-            final_content += "\n"
-        final_content += "\n".join(incidents_to_write)
+            incident["id"] = incident_id
+            writer.add(incident_entry)
 
         try:
-            default_api.write(file_path="data/incidents.jsonl", content=final_content.strip())
+            writer.flush()
             print(f"Wrote {len(incidents)} incidents to data/incidents.jsonl")
         except Exception as e:
             print(f"Error writing to incidents.jsonl: {e}")
@@ -220,7 +306,7 @@ def execute_uchastkovy_skill():
                 # Common restart protocol
                 default_api.exec(command="systemctl --user restart openclaw-gateway")
                 time.sleep(5)
-                restart_status_output = default_api.exec(command="systemctl --user is-active openclaw-gateway").get("exec_response", {}).get("output", "").strip()
+                restart_status_output = gateway_status()
                 restart_successful = (restart_status_output == "active")
 
                 # Generate a unique ID for the resolved entry, not directly using the incident's ID
@@ -243,12 +329,8 @@ def execute_uchastkovy_skill():
                         "resolved": False
                     }
                     try:
-                        # Corrected: use current `final_content` logic to append properly
-                        existing_inc_content = default_api.read(file_path="data/incidents.jsonl").get("read_response", {}).get("output", "").strip()
-                        if existing_inc_content:
-                            existing_inc_content += "\n"
-                        existing_inc_content += json.dumps(failed_incident_entry, ensure_ascii=False)
-                        default_api.write(file_path="data/incidents.jsonl", content=existing_inc_content)
+                        writer.add(failed_incident_entry)
+                        writer.flush()
                     except Exception as e:
                         print(f"Error writing failed incident to incidents.jsonl: {e}")
 
@@ -266,12 +348,8 @@ def execute_uchastkovy_skill():
                         "severity": "info"
                     }
                     try:
-                        # Corrected: use current `final_content` logic to append properly
-                        existing_inc_content = default_api.read(file_path="data/incidents.jsonl").get("read_response", {}).get("output", "").strip()
-                        if existing_inc_content:
-                            existing_inc_content += "\n"
-                        existing_inc_content += json.dumps(resolved_entry, ensure_ascii=False)
-                        default_api.write(file_path="data/incidents.jsonl", content=existing_inc_content)
+                        writer.add(resolved_entry)
+                        writer.flush()
                     except Exception as e:
                         print(f"Error writing resolved entry to incidents.jsonl: {e}")
 
@@ -282,8 +360,7 @@ def execute_uchastkovy_skill():
                     if incident["type"] == "gateway_down":
                         default_api.message(action="send", message="🚨 Участковый: Gateway был упавшим — перезапущен\nСтатус: ✅ работает")
                     elif incident["type"] == "announce_queue_loop":
-                        count_after_restart_output = default_api.exec(command="journalctl --user -u openclaw-gateway --since \"10 seconds ago\" --no-pager | grep -c \"announce queue drain\"").get("exec_response", {}).get("output", "0").strip()
-                        count_after_restart = int(count_after_restart_output) if count_after_restart_output.isdigit() else 0
+                        count_after_restart = journal_count("announce queue drain", 10, "10 seconds ago")
                         if count_after_restart > 0:
                             # Log announce_queue_loop_persist
                             persist_incident_id_string = f"announce_queue_loop_persist+openclaw-gateway+{datetime.datetime.utcnow().isoformat(timespec='seconds') + 'Z'}"
@@ -299,20 +376,15 @@ def execute_uchastkovy_skill():
                                 "resolved": False
                             }
                             try:
-                                # Corrected: use current `final_content` logic to append properly
-                                existing_inc_content = default_api.read(file_path="data/incidents.jsonl").get("read_response", {}).get("output", "").strip()
-                                if existing_inc_content:
-                                    existing_inc_content += "\n"
-                                existing_inc_content += json.dumps(persist_incident_entry, ensure_ascii=False)
-                                default_api.write(file_path="data/incidents.jsonl", content=existing_inc_content)
+                                writer.add(persist_incident_entry)
+                                writer.flush()
                             except Exception as e:
                                 print(f"Error writing persistent incident to incidents.jsonl: {e}")
                             default_api.message(action="send", message=f"⚠️ Участковый: Gateway перезапущен\nПричина: announce queue loop ({drain_count} failures/10мин)\nСтатус: ❌ цикл продолжается — нужна ручная проверка")
                         else:
                             default_api.message(action="send", message=f"⚠️ Участковый: Gateway перезапущен\nПричина: announce queue loop ({drain_count} failures/10мин)\nСтатус: ✅ цикл исчез")
                     elif incident["type"] == "gateway_memory_high":
-                        new_rss_output = default_api.exec(command="ps aux | grep -E \"openclaw-gateway$\" | grep -v grep | awk '{print $6}'").get("exec_response", {}).get("output", "0").strip()
-                        new_rss = int(new_rss_output) if new_rss_output.isdigit() else 0
+                        new_rss = gateway_rss_kb()
                         if new_rss < 500000:
                             default_api.message(action="send", message=f"⚠️ Участковый: Gateway перезапущен превентивно\nПричина: RAM {gw_rss_kb / 1024:.1f} MB (лимит 1.4 GB, до OOM оставалось мало)\nСтатус: ✅ RAM сброшена до {new_rss / 1024:.1f} MB")
                         else:
@@ -381,7 +453,8 @@ def execute_uchastkovy_skill():
                     "resolved": False
                 }
                 try:
-                    default_api.write(file_path="data/incidents.jsonl", content=json.dumps(snapshot_failed_entry, ensure_ascii=False) + "\n")
+                    writer.add(snapshot_failed_entry)
+                    writer.flush()
                 except Exception as ex:
                     print(f"Error logging snapshot_update_failed incident: {ex}")
 
@@ -401,7 +474,8 @@ def execute_uchastkovy_skill():
                 "resolved": False
             }
             try:
-                default_api.write(file_path="data/incidents.jsonl", content=json.dumps(snapshot_failed_entry, ensure_ascii=False) + "\n")
+                writer.add(snapshot_failed_entry)
+                writer.flush()
             except Exception as ex:
                 print(f"Error logging snapshot_update_failed incident: {ex}")
 
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""Synthetic-load benchmark for the incidents.jsonl consumers.
+
+Generates realistic incidents.jsonl fixtures (10k / 100k / 1M / 10M lines by
+default) and measures wall time and peak RSS of every consumer on each:
+
+  chekist_runner_real       lobster/chekist/runner_real.py main()  (cold state)
+  mekhanik_runner_real      lobster/mekhanik/runner_real.py main() (cold state)
+  collect_adapter           collect_adapter.collect()              (state index, 60m)
+  chekist_aggregator        chekist_aggregator_v1.aggregate()      (last 24h)
+  gate_calc                 uchastkovy_gate_calc.compute_deltas()  (last 8h)
+  monitor_daily_aggregate   monitor_daily_aggregate.main()         (last 24h)
+  mekhanik_cutover_sanity   mekhanik_cutover_sanity.main()         (last 2h)
+  mem0_soak_classify        mem0_soak_probe.classify()             (fixture lines as a chatty journal)
+
+Fixture shape (same vocabulary as the dry-run harnesses): lines spread over
+--days ending now, ~0.1% malformed, lobster and legacy sources, some jobIds,
+and ~30% of incidents closed later by a {"type": "resolved", "ref_id": ...}
+row (resolved pairs). Fixtures are cached in --data-dir and regenerated when
+older than FIXTURE_MAX_AGE_S (windows are relative to now).
+
+Each measurement runs in a fresh child process with HOME pointed at a
+throwaway directory, so runner state (cursors, state index, rollup, metrics)
+starts cold and never touches the real ~/.openclaw; peak RSS is the child's
+ru_maxrss. Markers appended by runners are cut off again, so every target sees
+the same fixture.
+
+Results are written as JSON (--out) next to the thresholds they were checked
+against (--thresholds, thresholds.json by default):
+
+  {"<lines>": {"<target>": {"max_duration_ms": N, "max_peak_rss_kb": N}}}
+
+Any breach is listed under "regressions" and the run exits 1. Sizes/targets
+without a threshold are measured but not checked. --update-thresholds writes
+the measured values * --headroom back to the thresholds file instead.
+
+Usage:
+  python3 bench_incident_consumers.py [--sizes 10k,100k,1m,10m] [--targets a,b]
+      [--days 30] [--data-dir DIR] [--out FILE] [--thresholds FILE]
+      [--update-thresholds [--headroom 2.0]]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LOBSTER = os.path.join(HERE, "..")
+SCRIPTS = os.path.join(HERE, "..", "..", "scripts")
+
+DEFAULT_SIZES = "10k,100k,1m,10m"
+THRESHOLDS = os.path.join(HERE, "thresholds.json")
+REPORT = os.path.join(HERE, "bench-report.json")
+DATA_DIR = os.path.join(tempfile.gettempdir(), "lobster-bench")
+FIXTURE_MAX_AGE_S = 3600
+
+TYPES = [
+    "cron_error",
+    "cron_skip",
+    "gateway_down",
+    "config_drift",
+    "heartbeat_gap",
+    "snapshot_stale",
+    "message_transport_failed",
+    "rollback_applied",
+    "gateway_memory_high",
+]
+LOBSTER_SOURCES = [
+    "uchastkovy-lobster",
+    "chekist-lobster",
+    "mekhanik-lobster",
+    "git-sync-lobster",
+    "economist-lobster",
+]
+LEGACY_SOURCES = ["legacy-monitor", "main-monitor", "cron-watchdog"]
+SEVERITIES = ["critical", "warn", "warn", "info"]
+JOB_IDS = [
+    "b72fece5-c8f7-4b9b-842a-208b7efcecc2",
+    "bef4ddfa-1fd8-4c64-9495-79d851f4f5f0",
+    "305e53a4-049c-4d2e-b248-0cdbea259d3f",
+    "1c292387-c997-46f1-b8a1-e5fd40059713",
+]
+
+RESOLVED_SHARE = 0.3
+MALFORMED_EVERY = 1000
+
+
+def parse_size(s: str) -> int:
+    s = s.strip().lower()
+    mult = {"k": 1_000, "m": 1_000_000}.get(s[-1:], 1)
+    return int(s[:-1] if mult > 1 else s) * mult
+
+
+def size_label(n: int) -> str:
+    if n % 1_000_000 == 0:
+        return f"{n // 1_000_000}m"
+    if n % 1_000 == 0:
+        return f"{n // 1_000}k"
+    return str(n)
+
+
+def iso(t: float) -> str:
+    return datetime.fromtimestamp(t, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+# -- fixtures -----------------------------------------------------------------
+
+
+def generate(path: str, lines: int, days: int, end: datetime, seed: int = 42) -> None:
+    """incidents.jsonl with `lines` lines over `days` days ending at `end`."""
+    rnd = random.Random(seed)
+    span = days * 86400
+    t0 = end.timestamp() - span
+    step = span / lines
+    pending: list[tuple[int, dict]] = []  # (resolve at line i, incident)
+    with open(path, "w", encoding="utf-8") as f:
+        buf = []
+        for i in range(lines):
+            t = t0 + i * step
+            if i % MALFORMED_EVERY == MALFORMED_EVERY - 1:
+                buf.append('{"ts": "' + iso(t)[:13] + "\n")
+            elif pending and pending[0][0] <= i:
+                _, inc = pending.pop(0)
+                buf.append(
+                    json.dumps(
+                        {
+                            "ts": iso(t),
+                            "type": "resolved",
+                            "ref_id": inc["id"],
+                            "source": inc["source"],
+                            "severity": "info",
+                            "msg": f"resolved {inc['type']}",
+                        }
+                    )
+                    + "\n"
+                )
+            else:
+                src = rnd.choice(LOBSTER_SOURCES) if rnd.random() < 0.6 else rnd.choice(LEGACY_SOURCES)
+                rec = {
+                    "ts": iso(t),
+                    "id": f"inc-{seed}-{i}",
+                    "type": rnd.choice(TYPES),
+                    "source": src,
+                    "severity": rnd.choice(SEVERITIES),
+                    "msg": f"synthetic incident {i % 997}",
+                    "resolved": False,
+                }
+                if rnd.random() < 0.25:
+                    rec["jobId"] = rnd.choice(JOB_IDS)
+                    rec["job"] = f"job-{rec['jobId'][:8]}"
+                if rnd.random() < RESOLVED_SHARE:
+                    pending.append((i + rnd.randint(1, 200), rec))
+                    pending.sort(key=lambda p: p[0])
+                buf.append(json.dumps(rec, ensure_ascii=False) + "\n")
+            if len(buf) >= 10000:
+                f.write("".join(buf))
+                buf = []
+        f.write("".join(buf))
+
+
+def fixture(data_dir: str, lines: int, days: int) -> str:
+    """Cached fixture path for `lines`; regenerated when stale or shaped differently."""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"incidents-{size_label(lines)}.jsonl")
+    meta_path = path + ".meta.json"
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        fresh = (
+            meta.get("lines") == lines
+            and meta.get("days") == days
+            and meta.get("bytes") == os.path.getsize(path)
+            and time.time() - float(meta.get("end_t", 0)) < FIXTURE_MAX_AGE_S
+        )
+    except Exception:
+        fresh = False
+    if not fresh:
+        end = datetime.now(timezone.utc).replace(microsecond=0)
+        generate(path, lines, days, end)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"lines": lines, "days": days, "end_t": end.timestamp(), "bytes": os.path.getsize(path)}, f)
+    return path
+
+
+# -- targets (run inside the child process) -------------------------------------
+
+
+def _load(name: str, path: str):
+    spec = importlib.util.spec_from_file_location(name, path)
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[name] = mod
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def _runner(team: str):
+    def run(incidents: str, work: str) -> None:
+        sys.path.insert(0, os.path.join(LOBSTER, "common"))
+        mod = _load(f"{team}_runner_real", os.path.join(LOBSTER, team, "runner_real.py"))
+        import incident_state
+
+        mod.INCIDENTS = incidents
+        incident_state.INCIDENTS = incidents
+        mod.main()
+
+    return run
+
+
+def t_collect_adapter(incidents: str, work: str) -> None:
+    mod = _load("collect_adapter", os.path.join(LOBSTER, "chekist", "collect_adapter.py"))
+    cron = os.path.join(work, "cron.json")
+    with open(cron, "w", encoding="utf-8") as f:
+        json.dump({"jobs": [{"id": j, "name": f"job-{j[:8]}", "state": {"lastStatus": "ok"}} for j in JOB_IDS]}, f)
+    mod.collect(
+        mod.CollectConfig(
+            incidents_path=incidents,
+            window_minutes=60,
+            cron_json_path=cron,
+            state_path=os.path.join(work, "incident-state.json"),
+        )
+    )
+
+
+def t_chekist_aggregator(incidents: str, work: str) -> None:
+    sys.path.insert(0, SCRIPTS)
+    import chekist_aggregator_v1 as agg
+
+    agg.INCIDENTS = incidents
+    end = datetime.now(timezone.utc)
+    agg.aggregate(end - timedelta(hours=24), end)
+
+
+def t_gate_calc(incidents: str, work: str) -> None:
+    sys.path.insert(0, SCRIPTS)
+    import uchastkovy_gate_calc as gate
+
+    gate.compute_deltas(incidents_path=incidents, start_ts=iso(time.time() - 8 * 3600))
+
+
+def t_monitor_daily_aggregate(incidents: str, work: str) -> None:
+    from pathlib import Path
+
+    sys.path.insert(0, SCRIPTS)
+    import monitor_daily_aggregate as mda
+
+    mda.INCIDENTS = Path(incidents)
+    mda.OUT = Path(work) / "monitor-daily.jsonl"
+    mda.main()
+
+
+def t_mekhanik_cutover_sanity(incidents: str, work: str) -> None:
+    sys.path.insert(0, SCRIPTS)
+    import mekhanik_cutover_sanity as mcs
+
+    baseline = os.path.join(work, "baseline.json")
+    with open(baseline, "w", encoding="utf-8") as f:
+        json.dump({"startTs": iso(time.time() - 2 * 3600)}, f)
+    sys.argv = ["mekhanik_cutover_sanity.py", "--baseline", baseline, "--incidents", incidents]
+    mcs.main()
+
+
+def t_mem0_soak_classify(incidents: str, work: str) -> None:
+    sys.path.insert(0, SCRIPTS)
+    import mem0_soak_probe as soak
+
+    with open(incidents, "r", encoding="utf-8", errors="replace") as f:
+        soak.classify(line.rstrip("\n") for line in f)
+
+
+TARGETS = {
+    "chekist_runner_real": _runner("chekist"),
+    "mekhanik_runner_real": _runner("mekhanik"),
+    "collect_adapter": t_collect_adapter,
+    "chekist_aggregator": t_chekist_aggregator,
+    "gate_calc": t_gate_calc,
+    "monitor_daily_aggregate": t_monitor_daily_aggregate,
+    "mekhanik_cutover_sanity": t_mekhanik_cutover_sanity,
+    "mem0_soak_classify": t_mem0_soak_classify,
+}
+
+
+def child(target: str, incidents: str, work: str) -> None:
+    """Run one target in this (fresh) process; print {duration_ms, peak_rss_kb}."""
+    size = os.path.getsize(incidents)
+    rss_start = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    out = io.StringIO()
+    t = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(out):
+            TARGETS[target](incidents, work)
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            raise
+    finally:
+        duration_ms = (time.perf_counter() - t) * 1000
+        if os.path.getsize(incidents) > size:
+            os.truncate(incidents, size)  # runner markers: keep the fixture identical for the next target
+    print(
+        json.dumps(
+            {
+                "duration_ms": round(duration_ms, 1),
+                "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                "start_rss_kb": rss_start,
+            }
+        )
+    )
+
+
+# -- driver -------------------------------------------------------------------
+
+
+def measure(target: str, incidents: str) -> dict:
+    with tempfile.TemporaryDirectory(prefix="lobster-bench-home-") as home:
+        env = dict(os.environ, HOME=home)
+        env.pop("INCIDENT_ROLLUP_DIR", None)
+        res = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", target, "--incidents", incidents, "--work", home],
+            capture_output=True,
+            text=True,
+            env=env,
+        )
+    if res.returncode != 0:
+        return {"error": (res.stderr.strip().splitlines() or ["failed"])[-1][:400]}
+    return json.loads(res.stdout.strip().splitlines()[-1])
+
+
+def check(results: dict, thresholds: dict) -> list[dict]:
+    regressions = []
+    for label, per_target in results.items():
+        for target, m in per_target.items():
+            limits = thresholds.get(label, {}).get(target)
+            if "error" in m:
+                regressions.append({"lines": label, "target": target, "metric": "error", "value": m["error"]})
+                continue
+            if not limits:
+                continue
+            for metric, key in (("duration_ms", "max_duration_ms"), ("peak_rss_kb", "max_peak_rss_kb")):
+                if key in limits and m[metric] > limits[key]:
+                    regressions.append(
+                        {"lines": label, "target": target, "metric": metric, "value": m[metric], "limit": limits[key]}
+                    )
+    return regressions
+
+
+def load_thresholds(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default=DEFAULT_SIZES)
+    ap.add_argument("--targets", default=",".join(TARGETS))
+    ap.add_argument("--days", type=int, default=30)
+    ap.add_argument("--data-dir", default=DATA_DIR)
+    ap.add_argument("--out", default=REPORT)
+    ap.add_argument("--thresholds", default=THRESHOLDS)
+    ap.add_argument("--update-thresholds", action="store_true")
+    ap.add_argument("--headroom", type=float, default=2.0)
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    ap.add_argument("--incidents", default=None, help=argparse.SUPPRESS)
+    ap.add_argument("--work", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        child(args.child, args.incidents, args.work)
+        return
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = [t for t in targets if t not in TARGETS]
+    if unknown:
+        raise SystemExit(f"unknown targets: {unknown} (known: {sorted(TARGETS)})")
+
+    results: dict[str, dict] = {}
+    fixtures: dict[str, dict] = {}
+    for lines in (parse_size(s) for s in args.sizes.split(",") if s.strip()):
+        label = size_label(lines)
+        t = time.perf_counter()
+        path = fixture(os.path.expanduser(args.data_dir), lines, args.days)
+        fixtures[label] = {"path": path, "bytes": os.path.getsize(path), "ready_s": round(time.perf_counter() - t, 2)}
+        results[label] = {target: measure(target, path) for target in targets}
+
+    thresholds = load_thresholds(args.thresholds)
+    if args.update_thresholds:
+        for label, per_target in results.items():
+            for target, m in per_target.items():
+                if "error" in m:
+                    continue
+                thresholds.setdefault(label, {})[target] = {
+                    "max_duration_ms": int(m["duration_ms"] * args.headroom) + 1,
+                    "max_peak_rss_kb": int(m["peak_rss_kb"] * args.headroom) + 1,
+                }
+        with open(args.thresholds, "w", encoding="utf-8") as f:
+            json.dump(thresholds, f, indent=2, sort_keys=True)
+            f.write("\n")
+
+    regressions = check(results, thresholds)
+    report = {
+        "ts": iso(time.time()),
+        "python": sys.version.split()[0],
+        "cpus": os.cpu_count(),
+        "fixtures": fixtures,
+        "results": results,
+        "thresholds": args.thresholds,
+        "regressions": regressions,
+        "ok": not regressions,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    print(json.dumps({"ok": report["ok"], "out": args.out, "regressions": regressions}, indent=2))
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
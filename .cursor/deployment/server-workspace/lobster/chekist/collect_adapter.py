@@ -2,7 +2,12 @@
 """Read-only collect adapter for Lobster Chekist.
 
 - Reads incidents.jsonl and selects records from last N minutes
-- Applies resolved filtering (resolved events close incidents)
+  (incrementally via a per-consumer cursor when `cursor_consumer` is set;
+  opt-in from the CLI with CHEKIST_CURSOR=<consumer name>)
+- Applies resolved filtering (resolved events close incidents); with `state_path`
+  set, open/resolved state comes from the materialized index instead
+  (lobster/common/incident_state.py, alias matching for the close_key refs),
+  including resolutions older than the window
 - Fetches cron state (either from injected JSON for tests, or via `openclaw cron list --json`)
 - Emits normalized JSON for downstream rules
 
@@ -14,10 +19,17 @@ from __future__ import annotations
 import json
 import os
 import subprocess
+import sys
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from incident_cursor import STATE_DIR as CURSOR_STATE_DIR
+from incident_cursor import IncidentWindow
+from incident_state import ALIAS_STATE_PATH as INCIDENT_STATE_PATH
+from incident_state import IncidentIndex
+
 
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
@@ -43,6 +55,12 @@ class CollectConfig:
     incidents_path: str = "/home/openclaw/.openclaw/workspace/data/incidents.jsonl"
     window_minutes: int = 60
     cron_json_path: str | None = None  # for tests
+    # Incremental read: only lines appended since the previous run are parsed.
+    # None => full read (tests/harnesses use throwaway files).
+    cursor_consumer: str | None = None
+    cursor_state_dir: str = CURSOR_STATE_DIR
+    # Alias-matching resolved-state index file; when set it replaces window read + resolved_filter.
+    state_path: str | None = None
 
 
 def read_jsonl(path: str) -> list[dict[str, Any]]:
@@ -143,20 +161,32 @@ def collect(config: CollectConfig) -> dict[str, Any]:
     now = _utcnow()
     since = now - timedelta(minutes=config.window_minutes)
 
-    all_events = read_jsonl(config.incidents_path)
-    recent = []
-    for e in all_events:
-        ts = e.get("ts")
-        if not isinstance(ts, str):
-            continue
-        try:
-            dt = parse_ts(ts)
-        except Exception:
-            continue
-        if dt >= since:
-            recent.append(e)
+    if config.state_path:
+        index = IncidentIndex(config.incidents_path, config.state_path, aliases=True)
+        index.refresh(now.timestamp())
+        recent_active = index.active(since=since.timestamp())
+    elif config.cursor_consumer:
+        window = IncidentWindow(
+            config.cursor_consumer,
+            config.incidents_path,
+            config.window_minutes * 60,
+            state_dir=config.cursor_state_dir,
+        )
+        recent_active = resolved_filter(window.refresh(now.timestamp()))
+    else:
+        recent = []
+        for e in read_jsonl(config.incidents_path):
+            ts = e.get("ts")
+            if not isinstance(ts, str):
+                continue
+            try:
+                dt = parse_ts(ts)
+            except Exception:
+                continue
+            if dt >= since:
+                recent.append(e)
+        recent_active = resolved_filter(recent)
 
-    recent_active = resolved_filter(recent)
     cron_jobs = fetch_cron_jobs(config.cron_json_path)
 
     ts_out = now.isoformat().replace("+00:00", "Z")
@@ -168,6 +198,8 @@ def main() -> None:
         incidents_path=os.environ.get("CHEKIST_INCIDENTS", CollectConfig.incidents_path),
         window_minutes=int(os.environ.get("CHEKIST_WINDOW_MIN", "60")),
         cron_json_path=os.environ.get("CHEKIST_CRON_JSON"),
+        cursor_consumer=os.environ.get("CHEKIST_CURSOR") or None,
+        state_path=os.environ.get("CHEKIST_STATE_INDEX", INCIDENT_STATE_PATH) or None,
     )
     state = collect(cfg)
     print(json.dumps({"ok": True, "state": state}, ensure_ascii=False))
@@ -12,24 +12,21 @@ from __future__ import annotations
 
 import json
 import os
+import sys
 import time
 from datetime import datetime, timezone
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
 from collect_adapter import CollectConfig, collect as collect_state, parse_ts, floor_time
+from ttl_dedupe import TTLDedupe
 
 
-class WindowDedupe:
+class WindowDedupe(TTLDedupe):
+    """In-memory dedupe over a fixed window; expiry is amortized O(1) (lobster/common/ttl_dedupe.py)."""
+
     def __init__(self, window_s: int):
+        super().__init__(ttl_s=window_s)
         self.window_s = window_s
-        self.seen: dict[tuple, float] = {}
-
-    def allow(self, k: tuple, now: float) -> bool:
-        cut = now - self.window_s
-        self.seen = {kk: ts for kk, ts in self.seen.items() if ts >= cut}
-        if k in self.seen:
-            return False
-        self.seen[k] = now
-        return True
 
 
 def alert_key(alert_type: str, scope_id: str, ts_iso: str, bucket_min: int = 60) -> tuple:
@@ -4,32 +4,55 @@
 Constraints:
 - NO message() calls.
 - NO cron updates/restarts.
-- Reads limited window (last 4h) to minimize context.
+- Reads limited window (last 4h) to minimize context; only lines appended since the
+  previous run are parsed (per-consumer cursor, see lobster/common/incident_cursor.py).
+- Active criticals come from the materialized resolved-state index
+  (lobster/common/incident_state.py), so resolutions older than the window still count.
 - If new lobster-scoped critical signals exist, appends ONE lobster-scoped critical incident marker.
-- Always appends metrics to ~/.openclaw/.runtime/chekist-lobster-metrics.jsonl with mode="real".
+- Always appends metrics to ~/.openclaw/.runtime/chekist-lobster-metrics.jsonl with mode="real",
+  including per-stage duration_ms and peak_rss_kb (lobster/common/run_metrics.py).
+- Each detected signal key is written to chekist-critical-signals.jsonl once; repeats in
+  later runs are suppressed via a persisted TTL dedupe (lobster/common/ttl_dedupe.py).
 
 Files:
 - incidents: ~/.openclaw/workspace/data/incidents.jsonl
 - metrics:  ~/.openclaw/.runtime/chekist-lobster-metrics.jsonl
 - heartbeat: ~/.openclaw/runtime/monitor-heartbeat.jsonl
+- signals:  ~/.openclaw/.runtime/chekist-critical-signals.jsonl (+ chekist-signal-dedupe.json)
 """
 
 from __future__ import annotations
 
 import json
 import os
+import sys
 import time
 from datetime import datetime, timezone
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from bounded_log import BoundedLog
+from incident_cursor import IncidentWindow
+from incident_state import IncidentIndex
+from run_metrics import RunPerf
+from ttl_dedupe import TTLDedupe
+from warm_cache import shared
+
 INCIDENTS = os.path.expanduser('~/.openclaw/workspace/data/incidents.jsonl')
 METRICS = os.path.expanduser('~/.openclaw/.runtime/chekist-lobster-metrics.jsonl')
 HEARTBEAT = os.path.expanduser('~/.openclaw/runtime/monitor-heartbeat.jsonl')
 CRITICAL_SIGNALS = os.path.expanduser('~/.openclaw/.runtime/chekist-critical-signals.jsonl')
 SOURCE = 'chekist-lobster'
+CURSOR_CONSUMER = 'chekist-lobster'
 
-# Keep the observability file bounded
+# Keep the observability file bounded (two-segment log, see lobster/common/bounded_log.py:
+# the file itself holds the newest records, the previous segment is <file>.1)
 CRITICAL_SIGNALS_MAX_LINES = 5000
 
+# Cross-run signal dedupe: a (ts, jobId, type) key is written to CRITICAL_SIGNALS once;
+# the TTL outlives the 4h window the key can be re-detected in.
+SIGNAL_DEDUPE = os.path.expanduser('~/.openclaw/.runtime/chekist-signal-dedupe.json')
+SIGNAL_DEDUPE_TTL_S = 5 * 3600
+
 CRITICAL_TYPES = {
   'cron_error',
   'config_drift',
@@ -51,6 +74,14 @@ def parse_ts(ts: str) -> float:
 
 
 def read_recent_jsonl(path: str, tail_n: int = 6000, window_h: int = 4) -> list[dict]:
+    try:
+        win = shared(('window', CURSOR_CONSUMER, path, window_h), lambda: IncidentWindow(CURSOR_CONSUMER, path, window_h*3600))
+        return win.refresh()[-tail_n:]
+    except Exception:
+        return read_recent_jsonl_tail(path, tail_n=tail_n, window_h=window_h)
+
+
+def read_recent_jsonl_tail(path: str, tail_n: int = 6000, window_h: int = 4) -> list[dict]:
     if not os.path.exists(path):
         return []
     now = time.time()
@@ -97,11 +128,22 @@ def active_critical(events: list[dict]) -> list[dict]:
             continue
         if isinstance(e.get('id'),str) and e['id'] in resolved:
             continue
-        if e.get('severity')=='critical' or e.get('type') in CRITICAL_TYPES:
+        if is_critical(e):
             out.append(e)
     return out
 
 
+def is_critical(e: dict) -> bool:
+    return e.get('severity')=='critical' or e.get('type') in CRITICAL_TYPES
+
+
+def active_critical_indexed(window_h: int = 4) -> list[dict]:
+    # O(open incidents): rows of still-open incidents from the state index
+    idx = shared(('index', INCIDENTS), lambda: IncidentIndex(INCIDENTS))
+    idx.refresh()
+    return idx.active(since=time.time() - window_h*3600, predicate=is_critical)
+
+
 def append_jsonl(path: str, rec: dict) -> None:
     os.makedirs(os.path.dirname(path), exist_ok=True)
     with open(path, 'a', encoding='utf-8') as f:
@@ -109,25 +151,12 @@ def append_jsonl(path: str, rec: dict) -> None:
 
 
 def append_jsonl_bounded(path: str, recs: list[dict], max_lines: int) -> None:
-    """Append records to a JSONL file and keep only the last max_lines lines."""
-    if not recs:
-        return
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    existing: list[str] = []
-    if os.path.exists(path):
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                existing = [ln.rstrip('\n') for ln in f if ln.strip()]
-        except Exception:
-            existing = []
+    """Append records to a bounded JSONL log; the last max_lines records stay readable.
 
-    new_lines = [json.dumps(r, ensure_ascii=False) for r in recs]
-    merged = (existing + new_lines)[-max_lines:]
-
-    tmp = path + '.tmp'
-    with open(tmp, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(merged) + ('\n' if merged else ''))
-    os.replace(tmp, path)
+    O(new records): the active segment rotates to <path>.1 when full instead of
+    the whole file being rewritten (lobster/common/bounded_log.py).
+    """
+    BoundedLog(path, max_lines).append(recs)
 
 
 def classify_scope(e: dict) -> str:
@@ -142,63 +171,67 @@ def classify_scope(e: dict) -> str:
 
 
 def main() -> None:
+    perf = RunPerf()
     ts = iso_now()
     window_start_ts = datetime.fromtimestamp(time.time() - 4 * 3600, timezone.utc).isoformat().replace('+00:00', 'Z')
 
-    events = read_recent_jsonl(INCIDENTS, window_h=4)
-    crit = active_critical(events)
+    with perf.stage('read'):
+        try:
+            crit = active_critical_indexed(window_h=4)
+        except Exception:
+            events = read_recent_jsonl(INCIDENTS, window_h=4)
+            crit = active_critical(events)
 
-    # Observability: write full list of detected signal keys
-    dedup_keys: set[tuple[str, str, str]] = set()
+    # Observability: write detected signal keys not already written by a previous run
     signal_recs: list[dict] = []
-    for e in crit:
-        ets = e.get('ts') if isinstance(e.get('ts'), str) else ts
-        job_id = e.get('jobId') if isinstance(e.get('jobId'), str) else None
-        typ = str(e.get('type') or 'unknown_type')
-        key = (ets, job_id or '', typ)
-        if key in dedup_keys:
-            continue
-        dedup_keys.add(key)
-        signal_recs.append({
-            'ts': ets,
-            'window_start_ts': window_start_ts,
-            'jobId': job_id,
-            'type': typ,
-            'severity': e.get('severity') or ('critical' if typ in CRITICAL_TYPES else None),
-            'source': e.get('source'),
-            'scope': classify_scope(e),
-        })
-
-    # Ensure file exists even if no signals in this run
-    os.makedirs(os.path.dirname(CRITICAL_SIGNALS), exist_ok=True)
-    if not os.path.exists(CRITICAL_SIGNALS):
-        open(CRITICAL_SIGNALS, 'a', encoding='utf-8').close()
-
-    append_jsonl_bounded(CRITICAL_SIGNALS, signal_recs, CRITICAL_SIGNALS_MAX_LINES)
+    signals_suppressed = 0
+    BoundedLog(CRITICAL_SIGNALS, CRITICAL_SIGNALS_MAX_LINES).touch()
+    with TTLDedupe.open(SIGNAL_DEDUPE, SIGNAL_DEDUPE_TTL_S) as dedupe:
+        with perf.stage('classify'):
+            for e in crit:
+                ets = e.get('ts') if isinstance(e.get('ts'), str) else ts
+                job_id = e.get('jobId') if isinstance(e.get('jobId'), str) else None
+                typ = str(e.get('type') or 'unknown_type')
+                if not dedupe.allow((ets, job_id or '', typ)):
+                    signals_suppressed += 1
+                    continue
+                signal_recs.append({
+                    'ts': ets,
+                    'window_start_ts': window_start_ts,
+                    'jobId': job_id,
+                    'type': typ,
+                    'severity': e.get('severity') or ('critical' if typ in CRITICAL_TYPES else None),
+                    'source': e.get('source'),
+                    'scope': classify_scope(e),
+                })
+        # inside the block: if the append fails the keys are not persisted
+        with perf.stage('write'):
+            append_jsonl_bounded(CRITICAL_SIGNALS, signal_recs, CRITICAL_SIGNALS_MAX_LINES)
 
     # In controlled cutover, we only emit ONE marker if there is any active critical.
-    if crit:
-        marker={
-            'ts': ts,
-            'type': 'chekist_lobster_real_detected_critical',
-            'source': SOURCE,
-            'severity': 'critical',
-            'msg': f'Detected {len(crit)} active critical signals in last 4h (no notifications sent).',
-            'detail': {
-                'sample': [
-                    {
-                        'type': c.get('type'),
-                        'source': c.get('source'),
-                        'jobId': c.get('jobId'),
-                        'id': c.get('id'),
-                    } for c in crit[:5]
-                ]
-            },
-            'resolved': False,
-        }
-        append_jsonl(INCIDENTS, marker)
-    else:
-        append_jsonl(HEARTBEAT, {'ts': ts, 'type':'heartbeat', 'source': SOURCE, 'status':'ok', 'window':'4h-empty'})
+    with perf.stage('write'):
+        if crit:
+            marker={
+                'ts': ts,
+                'type': 'chekist_lobster_real_detected_critical',
+                'source': SOURCE,
+                'severity': 'critical',
+                'msg': f'Detected {len(crit)} active critical signals in last 4h (no notifications sent).',
+                'detail': {
+                    'sample': [
+                        {
+                            'type': c.get('type'),
+                            'source': c.get('source'),
+                            'jobId': c.get('jobId'),
+                            'id': c.get('id'),
+                        } for c in crit[:5]
+                    ]
+                },
+                'resolved': False,
+            }
+            append_jsonl(INCIDENTS, marker)
+        else:
+            append_jsonl(HEARTBEAT, {'ts': ts, 'type':'heartbeat', 'source': SOURCE, 'status':'ok', 'window':'4h-empty'})
 
     metrics={
         'ts': ts,
@@ -206,10 +239,11 @@ def main() -> None:
         'runs_total': 1,
         'active_critical_count': len(crit),
         'signals_written': len(signal_recs),
+        'signals_suppressed': signals_suppressed,
         'state_write_failed': 0,
         'message_events_total': 0,
     }
-    append_jsonl(METRICS, metrics)
+    append_jsonl(METRICS, perf.finish(metrics))
     print(json.dumps({'ok': True, **metrics}, ensure_ascii=False))
 
 
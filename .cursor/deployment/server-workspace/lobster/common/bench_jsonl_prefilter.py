@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Benchmark: ts-prefix pre-filter vs full json.loads for a window scan.
+
+Generates a synthetic incidents.jsonl (default 2M lines spread over 60 days,
+~0.1% malformed) and runs chekist_aggregator_v1.aggregate for the last 4h
+twice: once decoding every line, once with the pre-filter. Reports are
+compared (must be identical) and timings printed as JSON.
+
+Usage:
+  python3 bench_jsonl_prefilter.py [--lines 2000000] [--days 60] [--hours 4] [--path FILE]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "..", "scripts"))
+import chekist_aggregator_v1 as agg  # noqa: E402
+
+TYPES = ["cron_error", "gateway_down", "config_drift", "heartbeat_gap", "message_transport_failed", "disk_warn"]
+SOURCES = ["uchastkovy-lobster", "chekist-lobster", "mekhanik-lobster", "legacy-monitor"]
+SEVERITIES = ["critical", "warn", "info"]
+
+
+def generate(path: str, lines: int, days: int, end: datetime) -> None:
+    rnd = random.Random(42)
+    span = days * 86400
+    t0 = end.timestamp() - span
+    step = span / lines
+    with open(path, "w", encoding="utf-8") as f:
+        buf = []
+        for i in range(lines):
+            if i % 1000 == 999:
+                buf.append('{"ts": "broken\n')
+                continue
+            ts = datetime.fromtimestamp(t0 + i * step, timezone.utc).isoformat().replace("+00:00", "Z")
+            rec = {
+                "ts": ts,
+                "type": rnd.choice(TYPES),
+                "source": rnd.choice(SOURCES),
+                "severity": rnd.choice(SEVERITIES),
+                "msg": f"synthetic incident {i}",
+                "resolved": False,
+            }
+            buf.append(json.dumps(rec) + "\n")
+            if len(buf) >= 10000:
+                f.write("".join(buf))
+                buf = []
+        f.write("".join(buf))
+
+
+def timed(fn):
+    t = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--lines", type=int, default=2_000_000)
+    ap.add_argument("--days", type=int, default=60)
+    ap.add_argument("--hours", type=int, default=4)
+    ap.add_argument("--path", default=None, help="Reuse/keep the synthetic file here")
+    args = ap.parse_args()
+
+    end = datetime.now(timezone.utc).replace(microsecond=0)
+    start = end - timedelta(hours=args.hours)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.path or os.path.join(tmp, "incidents.jsonl")
+        if not os.path.exists(path):
+            generate(path, args.lines, args.days, end)
+        agg.INCIDENTS = path
+
+        full, t_full = timed(lambda: agg.aggregate(start, end, records=agg.iter_incidents(path)))
+        fast, t_fast = timed(lambda: agg.aggregate(start, end))
+
+        print(json.dumps({
+            "lines": args.lines,
+            "bytes": os.path.getsize(path),
+            "window_hours": args.hours,
+            "critical_total": fast["critical"]["total"],
+            "identical": full == fast,
+            "full_decode_s": round(t_full, 3),
+            "prefilter_s": round(t_fast, 3),
+            "speedup": round(t_full / t_fast, 2) if t_fast else None,
+        }, indent=2))
+        if full != fast:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
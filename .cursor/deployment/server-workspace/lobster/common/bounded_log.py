@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""Bounded JSONL log: two segments, rotate-and-drop.
+
+Used for observability files that must stay small (e.g. chekist-critical-signals.jsonl).
+The previous scheme read the whole file and rewrote it through tmp+rename on
+every run; appends here are O(new records):
+
+  <path>        active segment, plain JSONL, appended to
+  <path>.1      previous segment (read-only), dropped on the next rotation
+  <path>.idx    {"inode", "size", "lines"} of the active segment (line count cache)
+  <path>.lock   flock during append/rotate
+
+When a batch would push the active segment past `max_lines` lines, the segment
+is renamed to <path>.1 and a new active segment is started with the batch. Both segments
+together always hold at least the last `max_lines` records (once the log has
+that many) and never more than 2 * max_lines (an oversized plain JSONL file from
+the old scheme becomes <path>.1 on the first append and is dropped on the next rotation).
+
+Readers that only understand JSONL still work on <path> (it is plain JSONL with
+the newest records); tail() / export merge both segments in order.
+
+CLI:
+  python3 bounded_log.py tail PATH [--last N]
+  python3 bounded_log.py export PATH --out FILE [--last N]          (segments -> plain JSONL)
+  python3 bounded_log.py import PATH --from FILE --max-lines N      (plain JSONL -> segments)
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import json
+import os
+from collections import deque
+from typing import Any, Iterable, Iterator
+
+from incident_cursor import atomic_write
+
+
+class BoundedLog:
+    def __init__(self, path: str, max_lines: int):
+        if max_lines < 1:
+            raise ValueError("max_lines must be >= 1")
+        self.path = path
+        self.max_lines = max_lines
+        self.prev_path = path + ".1"
+        self.idx_path = path + ".idx"
+        self.lock_path = path + ".lock"
+
+    # -- active segment line count ------------------------------------------
+
+    def _count_lines(self) -> int:
+        try:
+            with open(self.path, "rb") as f:
+                return sum(1 for ln in f if ln.strip())
+        except FileNotFoundError:
+            return 0
+
+    def _active_lines(self) -> int:
+        """Line count of the active segment; recounted if the cache does not match the file."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return 0
+        try:
+            with open(self.idx_path, "r", encoding="utf-8") as f:
+                idx = json.load(f)
+            if idx.get("inode") == st.st_ino and idx.get("size") == st.st_size:
+                return int(idx["lines"])
+        except Exception:
+            pass
+        return self._count_lines()
+
+    def _save_idx(self, lines: int) -> None:
+        st = os.stat(self.path)
+        atomic_write(self.idx_path, json.dumps({"inode": st.st_ino, "size": st.st_size, "lines": lines}))
+
+    # -- write path ----------------------------------------------------------
+
+    def append(self, recs: Iterable[dict[str, Any]]) -> int:
+        """Append records (one write); rotates first if the batch would overflow the active segment."""
+        new_lines = [json.dumps(r, ensure_ascii=False) for r in recs][-self.max_lines :]
+        if not new_lines:
+            return 0
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            lines = self._active_lines()
+            if lines and lines + len(new_lines) > self.max_lines:
+                os.replace(self.path, self.prev_path)
+                lines = 0
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(new_lines) + "\n")
+            self._save_idx(lines + len(new_lines))
+        return len(new_lines)
+
+    def touch(self) -> None:
+        """Create an empty active segment if missing (readers expect the file to exist)."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if not os.path.exists(self.path):
+            open(self.path, "a", encoding="utf-8").close()
+
+    # -- read path -----------------------------------------------------------
+
+    def iter_lines(self) -> Iterator[str]:
+        """All retained raw lines, oldest first (previous segment, then active)."""
+        for p in (self.prev_path, self.path):
+            try:
+                with open(p, "r", encoding="utf-8") as f:
+                    for ln in f:
+                        ln = ln.rstrip("\n")
+                        if ln.strip():
+                            yield ln
+            except FileNotFoundError:
+                continue
+
+    def tail_lines(self, n: int | None = None) -> list[str]:
+        n = self.max_lines if n is None else n
+        return list(deque(self.iter_lines(), maxlen=n)) if n > 0 else []
+
+    def tail(self, n: int | None = None) -> list[dict[str, Any]]:
+        """Last n records (default max_lines) in order; malformed lines skipped."""
+        out: list[dict[str, Any]] = []
+        for ln in self.tail_lines(n):
+            try:
+                out.append(json.loads(ln))
+            except Exception:
+                continue
+        return out
+
+    # -- JSONL conversion ------------------------------------------------------
+
+    def export_jsonl(self, out_path: str, n: int | None = None) -> int:
+        """Write the last n retained lines (default: all) as one plain JSONL file."""
+        lines = list(self.iter_lines()) if n is None else self.tail_lines(n)
+        atomic_write(out_path, "".join(ln + "\n" for ln in lines))
+        return len(lines)
+
+    def import_jsonl(self, src_path: str) -> int:
+        """Replace the log with the last max_lines lines of a plain JSONL file."""
+        with open(src_path, "r", encoding="utf-8") as f:
+            lines = list(deque((ln.rstrip("\n") for ln in f if ln.strip()), maxlen=self.max_lines))
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            atomic_write(self.path, "".join(ln + "\n" for ln in lines))
+            if os.path.exists(self.prev_path):
+                os.remove(self.prev_path)
+            self._save_idx(len(lines))
+        return len(lines)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("cmd", choices=["tail", "export", "import"])
+    ap.add_argument("path")
+    ap.add_argument("--last", type=int, default=None)
+    ap.add_argument("--out", default=None, help="export: target JSONL file")
+    ap.add_argument("--from", dest="src", default=None, help="import: source JSONL file")
+    ap.add_argument("--max-lines", type=int, default=5000)
+    args = ap.parse_args()
+
+    log = BoundedLog(os.path.expanduser(args.path), args.max_lines)
+    if args.cmd == "tail":
+        for ln in log.tail_lines(args.last):
+            print(ln)
+    elif args.cmd == "export":
+        if not args.out:
+            raise SystemExit("export requires --out")
+        n = log.export_jsonl(os.path.abspath(os.path.expanduser(args.out)), args.last)
+        print(json.dumps({"ok": True, "cmd": "export", "lines": n}))
+    else:
+        if not args.src:
+            raise SystemExit("import requires --from")
+        n = log.import_jsonl(os.path.expanduser(args.src))
+        print(json.dumps({"ok": True, "cmd": "import", "lines": n}))
+
+
+if __name__ == "__main__":
+    main()
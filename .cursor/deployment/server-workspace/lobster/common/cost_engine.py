@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""Column-wise cost rollups over sessions (Economist).
+
+The collectors used to add every session into a dozen running totals (day,
+week, month, last24h, by model, by cron job, ...) inside one Python loop.
+CostColumns keeps the few fields that matter as columns, filled once while
+the registry is read; CostEngine prices all rows from one per-model price
+vector and answers each period and group-by with a mask and a grouped sum:
+
+  cols = CostColumns()
+  for key, s in iter_sessions(path):
+      cols.add(s["updatedAt"], s["model"], in_t, out_t, job=job_id, run=is_run)
+  eng = CostEngine(cols, pricing, price_keys)           # price_keys(raw) -> names to look up
+  eng.total(eng.since_ms(cut_ms))                       -> Rollup(in, out, cost, rows)
+  eng.group(eng.local_day_ge(start, 5 * 3600), "raw", normalize_model)
+                                                        -> {model: Rollup}
+
+Pricing: the caller's price_keys(raw) gives the names tried in order in
+pricing["models"] (economist_collect: the normalized name only;
+runner_plan_only: normalized, then raw), prices are per 1M tokens and cost =
+in * p_in / 1e6 + out * p_out / 1e6 evaluated per row in float64, which is
+the same value as the scalar formula. Unpriced rows cost 0.
+Cost sums use math.fsum, the correctly rounded exact sum: they do not depend
+on row order and equal the exact_sum.py totals of the incremental collector.
+
+Masks are numpy bool arrays when numpy is installed, otherwise lists of bools
+with the same & | ~ operators (same results, plain loops).
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from datetime import date
+from typing import Any, Callable, Dict, Hashable, Iterable, NamedTuple
+
+try:
+    import numpy as np
+
+    _HAS_NUMPY = True
+except ImportError:
+    np = None
+    _HAS_NUMPY = False
+
+DAY_MS = 86_400_000
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class Rollup(NamedTuple):
+    in_tokens: int
+    out_tokens: int
+    cost_usd: float
+    rows: int
+
+
+class _Mask(list):
+    """list-of-bools mask for the no-numpy path."""
+
+    def __and__(self, other: "_Mask") -> "_Mask":
+        return _Mask(a and b for a, b in zip(self, other))
+
+    def __or__(self, other: "_Mask") -> "_Mask":
+        return _Mask(a or b for a, b in zip(self, other))
+
+    def __invert__(self) -> "_Mask":
+        return _Mask(not a for a in self)
+
+
+def _fsum(values: Any) -> float:
+    # + 0.0 turns a -0.0 total (all rows -0.0) into 0.0, like an exact integer sum
+    return math.fsum(values) + 0.0
+
+
+class CostColumns:
+    """Session fields as columns; model names and cron jobs are dictionary-coded."""
+
+    def __init__(self) -> None:
+        self.updated_ms = array("q")
+        self.in_tokens = array("q")
+        self.out_tokens = array("q")
+        self.raw = array("l")  # code into raw_models
+        self.job = array("l")  # code into jobs, -1 = not a cron session
+        self.run = array("B")  # 1 = cron :run: session
+        self.raw_models: list[str] = []
+        self.jobs: list[str] = []
+        self._raw_codes: dict[str, int] = {}
+        self._job_codes: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.updated_ms)
+
+    def add(self, updated_ms: int, model_raw: str, in_t: int, out_t: int,
+            job: str | None = None, run: bool = False) -> None:
+        code = self._raw_codes.get(model_raw)
+        if code is None:
+            code = self._raw_codes[model_raw] = len(self.raw_models)
+            self.raw_models.append(model_raw)
+        if job is None:
+            jcode = -1
+        else:
+            jcode = self._job_codes.get(job)
+            if jcode is None:
+                jcode = self._job_codes[job] = len(self.jobs)
+                self.jobs.append(job)
+        self.updated_ms.append(updated_ms)
+        self.raw.append(code)
+        self.in_tokens.append(in_t)
+        self.out_tokens.append(out_t)
+        self.job.append(jcode)
+        self.run.append(1 if run else 0)
+
+
+class CostEngine:
+    """Priced CostColumns; every query is a mask plus a (grouped) sum."""
+
+    def __init__(self, cols: CostColumns, pricing: Dict[str, Any], price_keys: Callable[[str], Iterable[str]]):
+        self.cols = cols
+        self.n = len(cols)
+        models = pricing.get("models", {})
+        p_in, p_out, priced = [], [], []
+        for raw in cols.raw_models:
+            p = next((models[k] for k in price_keys(raw) if models.get(k)), None)
+            priced.append(bool(p))
+            p_in.append(float(p.get("input_per_1m", 0.0)) if p else 0.0)
+            p_out.append(float(p.get("output_per_1m", 0.0)) if p else 0.0)
+
+        if _HAS_NUMPY:
+            self._updated = np.asarray(cols.updated_ms, dtype=np.int64)
+            self._raw = np.asarray(cols.raw, dtype=np.int64)
+            self._job = np.asarray(cols.job, dtype=np.int64)
+            self._run = np.asarray(cols.run, dtype=bool)
+            self._in = np.asarray(cols.in_tokens, dtype=np.int64)
+            self._out = np.asarray(cols.out_tokens, dtype=np.int64)
+            raw_priced = np.asarray(priced, dtype=bool)
+            self.priced = raw_priced[self._raw] if self.n else np.zeros(0, dtype=bool)
+            if self.n:
+                cost = (self._in.astype(np.float64) * np.asarray(p_in)[self._raw] / 1_000_000.0) + \
+                       (self._out.astype(np.float64) * np.asarray(p_out)[self._raw] / 1_000_000.0)
+                self.cost = np.where(self.priced, cost, 0.0)
+            else:
+                self.cost = np.zeros(0, dtype=np.float64)
+        else:
+            self._updated, self._raw, self._job = cols.updated_ms, cols.raw, cols.job
+            self._run, self._in, self._out = cols.run, cols.in_tokens, cols.out_tokens
+            self.priced = _Mask(priced[r] for r in cols.raw)
+            self.cost = [
+                (i * p_in[r] / 1_000_000.0) + (o * p_out[r] / 1_000_000.0) if priced[r] else 0.0
+                for r, i, o in zip(cols.raw, cols.in_tokens, cols.out_tokens)
+            ]
+
+    # masks
+
+    def all_rows(self) -> Any:
+        return np.ones(self.n, dtype=bool) if _HAS_NUMPY else _Mask([True] * self.n)
+
+    def since_ms(self, start_ms: int) -> Any:
+        """updated_ms >= start_ms."""
+        if _HAS_NUMPY:
+            return self._updated >= start_ms
+        return _Mask(t >= start_ms for t in self._updated)
+
+    def local_day_ge(self, start: date, utc_offset_s: int) -> Any:
+        """Local calendar date (fixed UTC offset) of updated_ms on or after `start`."""
+        # local date >= start  <=>  updated_ms >= local midnight of start, in UTC ms
+        return self.since_ms((start.toordinal() - _EPOCH_ORDINAL) * DAY_MS - utc_offset_s * 1000)
+
+    def runs(self) -> Any:
+        """Cron :run: sessions."""
+        if _HAS_NUMPY:
+            return self._run.copy()
+        return _Mask(bool(r) for r in self._run)
+
+    # sums
+
+    def total(self, mask: Any) -> Rollup:
+        if _HAS_NUMPY:
+            return Rollup(int(self._in[mask].sum()), int(self._out[mask].sum()), _fsum(self.cost[mask].tolist()),
+                          int(mask.sum()))
+        in_t = out_t = 0
+        costs = []
+        for m, i, o, c in zip(mask, self._in, self._out, self.cost):
+            if m:
+                in_t += i
+                out_t += o
+                costs.append(c)
+        return Rollup(in_t, out_t, _fsum(costs), len(costs))
+
+    def group(self, mask: Any, by: str, label: Callable[[str], Hashable] | None = None) -> Dict[Hashable, Rollup]:
+        """{label(name): Rollup} over masked rows grouped by "raw" model or cron "job".
+
+        Rows without a cron job are left out of by="job". Names that map to the
+        same label are summed as one group (one exact sum, not a sum of sums).
+        """
+        names = self.cols.raw_models if by == "raw" else self.cols.jobs
+        codes = self._raw if by == "raw" else self._job
+        pos: dict[Hashable, int] = {}
+        remap = [pos.setdefault(label(n) if label else n, len(pos)) for n in names]
+        uniq = list(pos)
+
+        if _HAS_NUMPY:
+            idx = np.nonzero(mask)[0]
+            c = codes[idx]
+            if by != "raw":
+                keep = c >= 0
+                idx, c = idx[keep], c[keep]
+            if not len(idx):
+                return {}
+            g = np.asarray(remap, dtype=np.int64)[c]
+            order = np.argsort(g, kind="stable")
+            g, idx = g[order], idx[order]
+            groups, starts = np.unique(g, return_index=True)
+            in_sums = np.add.reduceat(self._in[idx], starts).tolist()
+            out_sums = np.add.reduceat(self._out[idx], starts).tolist()
+            costs = self.cost[idx].tolist()
+            bounds = starts.tolist() + [len(idx)]
+            return {
+                uniq[int(k)]: Rollup(in_sums[j], out_sums[j], _fsum(costs[bounds[j]:bounds[j + 1]]),
+                                     bounds[j + 1] - bounds[j])
+                for j, k in enumerate(groups.tolist())
+            }
+
+        acc: dict[int, list] = {}
+        for m, code, i, o, cost in zip(mask, codes, self._in, self._out, self.cost):
+            if not m or code < 0:
+                continue
+            a = acc.get(remap[code])
+            if a is None:
+                a = acc[remap[code]] = [0, 0, []]
+            a[0] += i
+            a[1] += o
+            a[2].append(cost)
+        return {uniq[k]: Rollup(a[0], a[1], _fsum(a[2]), len(a[2])) for k, a in acc.items()}
+
+    def unpriced(self, mask: Any) -> Dict[str, int]:
+        """{raw model: rows} of masked rows without a price."""
+        out: Dict[str, int] = {}
+        if _HAS_NUMPY:
+            codes, counts = np.unique(self._raw[mask & ~self.priced], return_counts=True)
+            for code, n in zip(codes.tolist(), counts.tolist()):
+                out[self.cols.raw_models[code]] = n
+            return out
+        for m, p, code in zip(mask, self.priced, self._raw):
+            if m and not p:
+                name = self.cols.raw_models[code]
+                out[name] = out.get(name, 0) + 1
+        return out
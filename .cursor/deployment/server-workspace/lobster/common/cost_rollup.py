@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""Daily cost rollup store (Economist), one small file per Almaty date.
+
+cost-summary.json only holds the latest snapshot, and every week/month figure
+used to be recomputed from the raw sessions registry. This store keeps
+mergeable per-day rows of tokens and exact cost, so any period total or
+comparison is a merge of a few dozen rows:
+
+  ~/.openclaw/.runtime/cost-rollup/
+    _state.json        {version, generation, labels, updated_at}   (generation null mid-flush)
+    2026-10-17.json    {"rows": {key: [sessions, tokens_input, tokens_output, cost]}}
+
+  key  = JSON [model, cron category, cron job]   (category/job null outside cron :run: sessions)
+  cost = exact_sum units, encode_units() text
+
+Rows are maintained incrementally by scripts/economist_collect.py --incremental:
+every session (re)costed in its memo is subtracted from / added to the row of
+its local date, so rows always equal the sum over the sessions currently in
+the registry. Re-pricing (model-pricing.json changed) re-costs the memo and
+applies the difference; backfill rebuilds every row from the memo. Neither
+reads sessions.json again. `generation` pairs the store with the collector
+state; a mismatch (crash between the two writes) or a different `labels`
+signature (cron job -> category mapping) triggers that backfill.
+
+Costs are summed as exact integers, so a merged total is the same float as a
+full-scan sum over the same sessions.
+
+CLI:
+  python3 cost_rollup.py query --from 2026-10-01 [--to 2026-10-17] [--by model,category,job] [--root DIR]
+  python3 cost_rollup.py compare [--period day|week|month] [--date 2026-10-17] [--root DIR]
+    (week: week to date vs the same weekdays of last week;
+     month: month to date vs the same days of last month)
+  python3 cost_rollup.py stats [--root DIR]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Iterable, Iterator
+
+from exact_sum import decode_units, encode_units, from_units
+from incident_cursor import atomic_write
+
+COST_ROLLUP_DIR = os.path.expanduser("~/.openclaw/.runtime/cost-rollup")
+VERSION = 1
+DIMS = ("model", "category", "job")
+ALMATY_TZ = timezone(timedelta(hours=5))
+
+
+def row_key(model: str, category: str | None, job: str | None) -> str:
+    return json.dumps([model, category, job], ensure_ascii=False, separators=(",", ":"))
+
+
+def totals_dict(acc: list[int]) -> dict[str, Any]:
+    n, in_t, out_t, units = acc
+    return {"sessions": n, "tokens_input": in_t, "tokens_output": out_t, "cost_usd": round(from_units(units), 10)}
+
+
+class CostRollup:
+    def __init__(self, root: str = COST_ROLLUP_DIR):
+        self.root = root
+        self.state = self._load_json(self._state_path(), None) or self._empty_state()
+        self._days: dict[str, dict[str, list[int]]] = {}
+        self._dirty: set[str] = set()
+        self._cleared = False
+
+    # -- layout -------------------------------------------------------------
+
+    def _state_path(self) -> str:
+        return os.path.join(self.root, "_state.json")
+
+    def _day_path(self, day: str) -> str:
+        return os.path.join(self.root, f"{day}.json")
+
+    @staticmethod
+    def _empty_state() -> dict[str, Any]:
+        return {"version": VERSION, "generation": 0, "labels": ""}
+
+    @staticmethod
+    def _load_json(path: str, default: Any) -> Any:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return default
+
+    def _disk_days(self) -> list[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(fn[: -len(".json")] for fn in os.listdir(self.root) if fn.endswith(".json") and not fn.startswith("_"))
+
+    def days(self) -> list[str]:
+        disk = [] if self._cleared else self._disk_days()
+        return sorted(set(disk) | {d for d, rows in self._days.items() if rows})
+
+    def _day(self, day: str) -> dict[str, list[int]]:
+        rows = self._days.get(day)
+        if rows is None:
+            raw = {} if self._cleared else self._load_json(self._day_path(day), {}).get("rows", {})
+            rows = self._days[day] = {k: [v[0], v[1], v[2], decode_units(v[3])] for k, v in raw.items()}
+        return rows
+
+    def matches(self, generation: int, labels: str) -> bool:
+        """True when the store reflects collector state `generation` under the same labels."""
+        return (
+            self.state.get("version") == VERSION
+            and self.state.get("generation") == generation
+            and self.state.get("labels") == labels
+        )
+
+    # -- write path ---------------------------------------------------------
+
+    def add(self, day: str, key: str, sign: int, in_t: int, out_t: int, units: int) -> None:
+        """Add (sign=1) or subtract (sign=-1) one session's contribution."""
+        rows = self._day(day)
+        acc = rows.setdefault(key, [0, 0, 0, 0])
+        acc[0] += sign
+        acc[1] += sign * in_t
+        acc[2] += sign * out_t
+        acc[3] += sign * units
+        if not acc[0]:
+            del rows[key]
+        self._dirty.add(day)
+
+    def clear(self) -> None:
+        """Drop every row (before a backfill); files go at the next flush."""
+        self._days = {}
+        self._dirty = set()
+        self._cleared = True
+
+    def flush(self, generation: int, labels: str) -> dict[str, Any]:
+        """Write touched days, then _state.json (last, so it only names complete writes)."""
+        # generation None while days are being written: a crash in between never matches
+        atomic_write(self._state_path(), json.dumps({**self.state, "generation": None}, ensure_ascii=False))
+        removed = 0
+        if self._cleared:
+            for day in self._disk_days():
+                if day not in self._days:
+                    os.remove(self._day_path(day))
+                    removed += 1
+            self._dirty |= set(self._days)
+        for day in sorted(self._dirty):
+            rows = self._days.get(day) or {}
+            if rows:
+                doc = {"rows": {k: [v[0], v[1], v[2], encode_units(v[3])] for k, v in sorted(rows.items())}}
+                atomic_write(self._day_path(day), json.dumps(doc, ensure_ascii=False, separators=(",", ":")))
+            elif os.path.exists(self._day_path(day)):
+                os.remove(self._day_path(day))
+                removed += 1
+        written = len(self._dirty)
+        self._dirty = set()
+        self._cleared = False
+        self.state = {"version": VERSION, "generation": generation, "labels": labels, "updated_at": time.time()}
+        atomic_write(self._state_path(), json.dumps(self.state, ensure_ascii=False))
+        return {"days_written": written, "days_removed": removed}
+
+    # -- read path ----------------------------------------------------------
+
+    def rows(self, start: str | None = None, end: str | None = None) -> Iterator[tuple[str, list[Any], list[int]]]:
+        """(day, [model, category, job], [sessions, in, out, units]) for start <= day <= end."""
+        for day in self.days():
+            if (start is not None and day < start) or (end is not None and day > end):
+                continue
+            for key, acc in self._day(day).items():
+                yield day, json.loads(key), acc
+
+    def query(self, start: str | None, end: str | None, by: Iterable[str] = ()) -> list[dict[str, Any]]:
+        """Merged totals over [start, end] (ISO dates, inclusive) per group of `by` dims, by cost desc."""
+        idx = [DIMS.index(d) for d in by]
+        merged: dict[tuple, list[int]] = {}
+        for _day, dims, acc in self.rows(start, end):
+            g = tuple(dims[i] for i in idx)
+            m = merged.setdefault(g, [0, 0, 0, 0])
+            for j in range(4):
+                m[j] += acc[j]
+        out = [{**{DIMS[i]: g[k] for k, i in enumerate(idx)}, **totals_dict(acc)} for g, acc in merged.items()]
+        out.sort(key=lambda r: (-r["cost_usd"], json.dumps([r.get(d) for d in DIMS])))
+        return out
+
+    def total(self, start: str | None, end: str | None) -> dict[str, Any]:
+        rows = self.query(start, end)
+        return rows[0] if rows else totals_dict([0, 0, 0, 0])
+
+    def compare(self, period: str, today: date) -> dict[str, Any]:
+        """Period to date vs the same span one period earlier."""
+        if period == "day":
+            cur, prev = (today, today), (today - timedelta(days=1),) * 2
+        elif period == "week":
+            start = today - timedelta(days=today.weekday())
+            cur, prev = (start, today), (start - timedelta(days=7), today - timedelta(days=7))
+        elif period == "month":
+            start = today.replace(day=1)
+            prev_end = start - timedelta(days=1)
+            prev_start = prev_end.replace(day=1)
+            cur, prev = (start, today), (prev_start, prev_start.replace(day=min(today.day, prev_end.day)))
+        else:
+            raise ValueError(f"unknown period: {period!r}")
+        a = self.total(cur[0].isoformat(), cur[1].isoformat())
+        b = self.total(prev[0].isoformat(), prev[1].isoformat())
+        delta = round(a["cost_usd"] - b["cost_usd"], 10)
+        return {
+            "period": period,
+            "current": {"from": cur[0].isoformat(), "to": cur[1].isoformat(), **a},
+            "previous": {"from": prev[0].isoformat(), "to": prev[1].isoformat(), **b},
+            "delta_cost_usd": delta,
+            "delta_pct": round(100.0 * delta / b["cost_usd"], 2) if b["cost_usd"] else None,
+        }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("cmd", choices=["query", "compare", "stats"])
+    ap.add_argument("--root", default=COST_ROLLUP_DIR)
+    ap.add_argument("--from", dest="start", default=None, help="query: first Almaty date (inclusive)")
+    ap.add_argument("--to", dest="end", default=None, help="query: last Almaty date (inclusive)")
+    ap.add_argument("--by", default="", help="query: comma list of model,category,job")
+    ap.add_argument("--period", default="week", choices=["day", "week", "month"])
+    ap.add_argument("--date", default=None, help="compare: reference Almaty date (default today)")
+    args = ap.parse_args()
+
+    store = CostRollup(os.path.expanduser(args.root))
+    if args.cmd == "query":
+        by = [d for d in args.by.split(",") if d.strip()]
+        for d in by:
+            if d not in DIMS:
+                ap.error(f"--by: unknown dimension {d!r}")
+        out: dict[str, Any] = {"from": args.start, "to": args.end, "by": by, "rows": store.query(args.start, args.end, by)}
+    elif args.cmd == "compare":
+        today = date.fromisoformat(args.date) if args.date else datetime.now(ALMATY_TZ).date()
+        out = store.compare(args.period, today)
+    else:
+        days = store.days()
+        out = {
+            "days": len(days),
+            "first": days[0] if days else None,
+            "last": days[-1] if days else None,
+            "rows": sum(1 for _ in store.rows()),
+            **{k: store.state.get(k) for k in ("generation", "updated_at")},
+        }
+    print(json.dumps({"ok": True, "cmd": args.cmd, **out}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Order-independent exact sums of floats.
+
+Adding floats left to right rounds after every step, so a total that is kept
+up to date incrementally (subtract the old contribution, add the new one)
+drifts away from a fresh left-to-right sum over the same values. Every finite
+double is an integer multiple of 2**-1074, so totals are kept as Python ints in
+those units: adding and subtracting are exact and order-independent, and
+from_units() is the correctly rounded double of the exact total.
+
+  s = ExactSum()
+  s.add(0.1); s.add(0.2); s.sub(0.1)
+  s.value()            # 0.2 exactly, whatever the order
+"""
+
+from __future__ import annotations
+
+UNIT_BITS = 1074
+_ONE = 1 << UNIT_BITS
+
+
+def to_units(x: float) -> int:
+    """Exact integer value of x in units of 2**-1074 (x must be finite)."""
+    n, d = float(x).as_integer_ratio()
+    return n * (_ONE // d)
+
+
+def from_units(units: int) -> float:
+    """Correctly rounded float of units * 2**-1074."""
+    return units / _ONE
+
+
+def encode_units(units: int) -> str:
+    """Compact exact text form: hex odd mantissa and power of two ("-1a3p987")."""
+    if not units:
+        return "0"
+    shift = (abs(units) & -abs(units)).bit_length() - 1
+    return f"{'-' if units < 0 else ''}{abs(units) >> shift:x}p{shift}"
+
+
+def decode_units(text: str) -> int:
+    if text == "0":
+        return 0
+    mant, _, shift = text.partition("p")
+    return int(mant, 16) << int(shift)
+
+
+class ExactSum:
+    __slots__ = ("units",)
+
+    def __init__(self, units: int = 0):
+        self.units = int(units)
+
+    def add(self, x: float) -> None:
+        self.units += to_units(x)
+
+    def sub(self, x: float) -> None:
+        self.units -= to_units(x)
+
+    def value(self) -> float:
+        return from_units(self.units)
@@ -0,0 +1,586 @@
+#!/usr/bin/env python3
+"""Declarative cutover gates evaluated in one pass over incidents.jsonl.
+
+uchastkovy_gate_calc.py and mekhanik_cutover_sanity.py each carried their own
+copy of "count lobster-scoped incidents since the baseline startTs" and each
+re-read incidents.jsonl. A gate is now data:
+
+  {
+    "name": "uchastkovy",
+    "preset": "uchastkovy_gate_calc",      # optional: sources/deltas/thresholds/format
+    "baseline": "~/.openclaw/.runtime/uchastkovy-cutover-baseline.json",
+    "startTs": "2026-03-01T10:00:00Z",     # or window_s (rolling, relative to now)
+    "sources": ["uchastkovy-lobster", "lobster-uchastkovy"],   # null = any source
+    "deltas": {"delta_critical": {"severity": "critical", "type__ne": "cron_error"}},
+    "thresholds": {"delta_critical": 0},   # FAIL when a delta exceeds its threshold
+    "format": "generic"                    # or a preset format (output of that tool)
+  }
+
+Predicates: {"field": v} (equal), field__ne, field__in, field__not_in,
+field__contains (substring of str(value or "")); several keys = all must hold;
+combine with {"any": [...]}, {"all": [...]}, {"not": {...}}.
+
+evaluate() decodes each line once (lines whose raw ts prefix is before every
+gate's start are skipped undecoded, see jsonl_prefilter) and updates all gates.
+A line after a gate's offset that fails json.loads counts as malformed unless
+its intact ts prefix is before the gate's start.
+
+Resume offset: `mark` stores an incidents.jsonl offset next to startTs in the
+baseline file (incidentsOffset/incidentsInode/incidentsSig). When startTs is
+set to now by the same call it is the end offset, taken before now is read;
+for an existing or given startTs it is the start of the first line dated at or
+after startTs (or with a corrupt body behind a ts prefix at or after it).
+Everything before that offset predates the soak, so the scan resumes there. The offset is only used when the gate starts at the baseline startTs
+and the file was not rotated, truncated or rewritten since (inode and the
+signature of the bytes before the offset, as in incident_cursor); otherwise
+the whole file is read. Malformed lines are then counted only after the offset.
+
+Presets reproduce the existing tools, JSON output and exit code included:
+- uchastkovy_gate_calc: PASS (0) / FAIL (2) / input error (3)
+- mekhanik_cutover_sanity: elapsed guardrail + deltas + metrics guards (0)
+
+CLI:
+  python3 gate_engine.py run --spec gates.json [--gate NAME] [--incidents PATH]
+  python3 gate_engine.py mark --baseline PATH [--incidents PATH] [--start-ts ISO]
+
+`run --gate NAME` prints exactly what the matching tool prints; without --gate
+all gates share one scan and the output is {ok, gates: {name: {exit_code,
+output}}} with the highest exit code.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable
+
+from incident_cursor import atomic_write, sig_at
+from jsonl_prefilter import TsWindow, raw_ts_key
+
+INCIDENTS = os.path.expanduser("~/.openclaw/workspace/data/incidents.jsonl")
+
+Predicate = Callable[[dict[str, Any]], bool]
+
+PRESETS: dict[str, dict[str, Any]] = {
+    "uchastkovy_gate_calc": {
+        "sources": ["uchastkovy-lobster", "lobster-uchastkovy"],
+        "deltas": {
+            "delta_critical": {"severity": "critical", "type__ne": "cron_error"},
+            "delta_transport": {"type": "message_transport_failed"},
+            "delta_rollback": {"type__contains": "rollback"},
+        },
+        "thresholds": {"delta_critical": 0, "delta_transport": 0, "delta_rollback": 0},
+        "format": "uchastkovy_gate_calc",
+    },
+    "mekhanik_cutover_sanity": {
+        "sources": ["mekhanik-lobster", "lobster-mekhanik"],
+        "deltas": {
+            "critical": {"severity": "critical"},
+            "transport": {"type": "message_transport_failed"},
+            "rollback": {"type__contains": "rollback"},
+        },
+        "max_elapsed_s": 8 * 3600,
+        "format": "mekhanik_cutover_sanity",
+    },
+}
+
+
+class GateInputError(ValueError):
+    """Baseline/spec problem of one gate; reported in that gate's output format."""
+
+
+def parse_iso(ts: str) -> datetime:
+    if ts.endswith("Z"):
+        ts = ts[:-1] + "+00:00"
+    return datetime.fromisoformat(ts).astimezone(timezone.utc)
+
+
+def iso_z(t: datetime) -> str:
+    return t.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+# -- predicates -------------------------------------------------------------
+
+def _leaf(key: str, want: Any) -> Predicate:
+    field, _, op = key.partition("__")
+    if op == "":
+        return lambda r: r.get(field) == want
+    if op == "ne":
+        return lambda r: r.get(field) != want
+    if op == "in":
+        values = set(want)
+        return lambda r: r.get(field) in values
+    if op == "not_in":
+        values = set(want)
+        return lambda r: r.get(field) not in values
+    if op == "contains":
+        return lambda r: want in str(r.get(field) or "")
+    raise ValueError(f"unknown predicate operator: {key}")
+
+
+def compile_predicate(spec: dict[str, Any]) -> Predicate:
+    if not isinstance(spec, dict) or not spec:
+        raise ValueError(f"predicate must be a non-empty object: {spec!r}")
+    parts: list[Predicate] = []
+    for key, want in spec.items():
+        if key == "any":
+            subs = [compile_predicate(s) for s in want]
+            parts.append(lambda r, subs=subs: any(p(r) for p in subs))
+        elif key == "all":
+            subs = [compile_predicate(s) for s in want]
+            parts.append(lambda r, subs=subs: all(p(r) for p in subs))
+        elif key == "not":
+            sub = compile_predicate(want)
+            parts.append(lambda r, sub=sub: not sub(r))
+        else:
+            parts.append(_leaf(key, want))
+    if len(parts) == 1:
+        return parts[0]
+    return lambda r: all(p(r) for p in parts)
+
+
+# -- gates ------------------------------------------------------------------
+
+class Gate:
+    def __init__(self, spec: dict[str, Any], incidents_path: str = INCIDENTS, now: datetime | None = None):
+        merged = dict(PRESETS.get(spec.get("preset") or "", {}))
+        merged.update(spec)
+        self.spec = merged
+        self.name = str(merged.get("name") or merged.get("preset") or "gate")
+        self.format = merged.get("format") or "generic"
+        self.incidents_path = incidents_path
+        self.now = now or datetime.now(timezone.utc)
+        sources = merged.get("sources")
+        self.sources = None if sources is None else set(sources)
+        self.deltas = {k: compile_predicate(v) for k, v in (merged.get("deltas") or {}).items()}
+        self.thresholds = {k: int(v) for k, v in (merged.get("thresholds") or {}).items()}
+        self.counts = {k: 0 for k in self.deltas}
+        self.malformed = 0
+        self.offset = 0
+        self.offset_reset: str | None = None
+        self.baseline: dict[str, Any] | None = None
+        self.baseline_path = merged.get("baseline")
+        self.error: str | None = None
+        self.start_ts: str | None = None
+
+        try:
+            self._resolve_start()
+        except GateInputError as e:
+            self.error = str(e)
+            self.start = self.now
+        self.start_t = self.start.timestamp()
+        self.lo = TsWindow(self.start).lo
+
+    def _resolve_start(self) -> None:
+        start_ts = self.spec.get("startTs")
+        if self.baseline_path:
+            path = os.path.expanduser(self.baseline_path)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.baseline = json.load(f)
+            except Exception as e:
+                raise GateInputError(f"baseline_read_failed: {e}")
+            b_start = self.baseline.get("startTs") if isinstance(self.baseline, dict) else None
+            if not isinstance(b_start, str) or not b_start:
+                raise GateInputError("baseline_missing_startTs")
+            start_ts = start_ts or b_start
+            if start_ts == b_start:
+                self.offset, self.offset_reset = resume_offset(self.incidents_path, self.baseline)
+        if start_ts:
+            try:
+                self.start_ts = start_ts
+                self.start = parse_iso(start_ts)
+            except Exception as e:
+                raise GateInputError(f"compute_failed: {e}")
+        elif self.spec.get("window_s") is not None:
+            self.start = datetime.fromtimestamp(self.now.timestamp() - float(self.spec["window_s"]), timezone.utc)
+            self.start_ts = iso_z(self.start)
+        else:
+            raise GateInputError("gate needs baseline, startTs or window_s")
+
+    def add(self, rec: dict[str, Any], n: int = 1) -> None:
+        for k, pred in self.deltas.items():
+            if pred(rec):
+                self.counts[k] += n
+
+    def offer(self, rec: dict[str, Any], n: int = 1) -> None:
+        """Count a decoded record (n times for rollup keys) if it is in the gate's scope."""
+        ts = rec.get("ts")
+        if not isinstance(ts, str) or not ts:
+            return
+        try:
+            t = parse_iso(ts).timestamp()
+        except Exception:
+            return
+        if t < self.start_t or (self.sources is not None and rec.get("source") not in self.sources):
+            return
+        self.add(rec, n)
+
+    def decision(self) -> tuple[str, list[str]]:
+        reasons = [f"{k}={self.counts.get(k, 0)} > {limit}" for k, limit in self.thresholds.items()
+                   if self.counts.get(k, 0) > limit]
+        return ("PASS" if not reasons else "FAIL"), reasons
+
+
+def resume_offset(path: str, baseline: dict[str, Any]) -> tuple[int, str | None]:
+    """(offset, reset) for the baseline mark; offset 0 when it no longer applies."""
+    offset = baseline.get("incidentsOffset")
+    if not isinstance(offset, int) or offset <= 0:
+        return 0, None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return 0, None
+    if st.st_ino != baseline.get("incidentsInode"):
+        return 0, "rotated"
+    if st.st_size < offset:
+        return 0, "truncated"
+    with open(path, "rb") as f:
+        if sig_at(f, offset) != baseline.get("incidentsSig"):
+            return 0, "rewritten"
+    return offset, None
+
+
+def _first_line_since(f, since: datetime, end: int) -> int:
+    """Offset of the first line before `end` that a gate starting at `since` may count."""
+    lo, since_t = TsWindow(since).lo, since.timestamp()
+    f.seek(0)
+    pos = 0
+    for raw in f:
+        if pos + len(raw) > end:
+            break
+        off = pos
+        pos += len(raw)
+        line = raw.strip()
+        if not line:
+            continue
+        key = raw_ts_key(line)
+        if key is not None and lo is not None and key < lo:
+            continue  # dated before the mark, corrupt or not
+        try:
+            rec = json.loads(line)
+        except Exception:
+            if key is None:
+                continue  # undatable; a resumed scan only counts malformed lines after the offset
+            return off
+        ts = rec.get("ts") if isinstance(rec, dict) else None
+        if not isinstance(ts, str) or not ts:
+            continue
+        try:
+            if parse_iso(ts).timestamp() >= since_t:
+                return off
+        except Exception:
+            continue
+    return end
+
+
+def mark(path: str, since: datetime | None = None) -> dict[str, Any]:
+    """Resume offset (+ inode/signature) of `path` for a baseline file.
+
+    since=None: end of the last complete line (the caller sets startTs to now
+    afterwards). Otherwise the first line at or after `since`, so incidents
+    already written since then are still counted.
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return {"incidentsOffset": 0, "incidentsInode": 0, "incidentsSig": ""}
+    with open(path, "rb") as f:
+        size = st.st_size
+        f.seek(max(0, size - (1 << 16)))
+        tail = f.read()
+        nl = tail.rfind(b"\n")
+        offset = size - len(tail) + nl + 1 if nl >= 0 else 0
+        if since is not None and offset:
+            offset = _first_line_since(f, since, offset)
+        sig = sig_at(f, offset) if offset else ""
+    return {"incidentsOffset": offset, "incidentsInode": st.st_ino, "incidentsSig": sig}
+
+
+def evaluate(gates: Iterable[Gate], incidents_path: str) -> dict[str, Any]:
+    """Update every gate from one pass over incidents_path; returns scan stats."""
+    live = [g for g in gates if g.error is None]
+    stats = {"gates": len(live), "start_offset": 0, "lines": 0, "decoded": 0, "prefiltered": 0}
+    if not live or not os.path.exists(incidents_path):
+        return stats
+    lo = min(g.offset for g in live)
+    # Undecoded skip only below every gate's start (None = some gate cannot prefilter).
+    bounds = [g.lo for g in live]
+    min_key = None if any(b is None for b in bounds) else min(bounds)
+    stats["start_offset"] = lo
+    lines = decoded = prefiltered = 0
+    with open(incidents_path, "rb") as f:
+        f.seek(lo)
+        pos = lo
+        for raw in f:
+            off = pos
+            pos += len(raw)
+            line = raw.strip()
+            if not line:
+                continue
+            lines += 1
+            key = raw_ts_key(line)
+            if key is not None and min_key is not None and key < min_key:
+                prefiltered += 1
+                continue
+            try:
+                rec = json.loads(line)
+            except Exception:
+                for g in live:
+                    if off >= g.offset and (key is None or g.lo is None or key >= g.lo):
+                        g.malformed += 1
+                continue
+            decoded += 1
+            if not isinstance(rec, dict):
+                continue
+            ts = rec.get("ts")
+            if not isinstance(ts, str) or not ts:
+                continue
+            try:
+                t = parse_iso(ts).timestamp()
+            except Exception:
+                continue
+            src = rec.get("source")
+            for g in live:
+                if t < g.start_t or off < g.offset:
+                    continue
+                if g.sources is not None and src not in g.sources:
+                    continue
+                g.add(rec)
+    stats.update(lines=lines, decoded=decoded, prefiltered=prefiltered)
+    return stats
+
+
+# -- output formats -----------------------------------------------------------
+
+def uchastkovy_decide(deltas: dict[str, int]) -> tuple[str, list[str]]:
+    reasons: list[str] = []
+    if deltas["delta_critical"] != 0:
+        reasons.append(f"Δcritical={deltas['delta_critical']} (lobster-scoped, excl cron_error)")
+    if deltas["delta_transport"] != 0:
+        reasons.append(f"Δtransport={deltas['delta_transport']}")
+    if deltas["delta_rollback"] != 0:
+        reasons.append(f"Δrollback={deltas['delta_rollback']}")
+    return ("PASS" if not reasons else "FAIL"), reasons
+
+
+def uchastkovy_report(
+    *,
+    baseline_path: str | None,
+    baseline_start: str | None,
+    start_ts: str | None,
+    incidents_path: str,
+    incidents_source: str,
+    sources: Iterable[str],
+    deltas: dict[str, int],
+    meta: dict[str, Any],
+) -> tuple[dict[str, Any], int]:
+    """uchastkovy_gate_calc stdout object and exit code (0 PASS, 2 FAIL)."""
+    status, reasons = uchastkovy_decide(deltas)
+    out = {
+        "ok": True,
+        "module": "uchastkovy_gate_calc",
+        "baselinePath": baseline_path,
+        "baselineStartTs": baseline_start,
+        "startTs": start_ts,
+        "incidentsPath": incidents_path,
+        "incidentsSource": incidents_source,
+        "allowlistSources": sorted(sources),
+        "deltas": deltas,
+        "decision": {
+            "status": status,
+            "reasons": reasons,
+            "rule": "PASS iff Δcritical==0 && Δtransport==0 && Δrollback==0 (lobster-scoped; Δcritical excludes cron_error)",
+        },
+        "meta": meta,
+        "ts": iso_z(datetime.now(timezone.utc)),
+    }
+    return out, 0 if status == "PASS" else 2
+
+
+def _uchastkovy_output(g: Gate) -> tuple[str, int]:
+    if g.error:
+        return json.dumps({"ok": False, "error": g.error}, ensure_ascii=False), 3
+    out, code = uchastkovy_report(
+        baseline_path=g.baseline_path,
+        baseline_start=(g.baseline or {}).get("startTs"),
+        start_ts=g.start_ts,
+        incidents_path=g.incidents_path,
+        incidents_source=g.spec.get("incidents_source", "incidents.jsonl"),
+        sources=g.sources or (),
+        deltas={k: g.counts[k] for k in ("delta_critical", "delta_transport", "delta_rollback")},
+        meta={"malformed_lines_total": g.malformed},
+    )
+    return json.dumps(out, ensure_ascii=False, sort_keys=True), code
+
+
+def read_last_json_line(path: str) -> dict | None:
+    if not os.path.exists(path):
+        return None
+    last = None
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                last = line
+    if not last:
+        return None
+    try:
+        return json.loads(last)
+    except Exception:
+        return None
+
+
+def mekhanik_sanity_output(g: Gate, metrics_path: str | None = None) -> dict[str, Any]:
+    elapsed = int((g.now - g.start).total_seconds())
+    elapsed_valid = True
+    invalid_reason = None
+    if elapsed <= 0:
+        elapsed_valid = False
+        invalid_reason = "elapsed_non_positive"
+    elif elapsed > int(g.spec.get("max_elapsed_s") or 8 * 3600):
+        elapsed_valid = False
+        invalid_reason = "elapsed_exceeds_guardrail"
+
+    guards: dict[str, Any] = {
+        "state_write_failed": None,
+        "restart_loop_blocked": None,
+        "circuit_breaker_triggered": None,
+    }
+    metrics_path = metrics_path or g.spec.get("metrics")
+    if metrics_path:
+        m = read_last_json_line(os.path.expanduser(metrics_path))
+        if isinstance(m, dict):
+            for k in list(guards.keys()):
+                guards[k] = m.get(k)
+
+    return {
+        "nowTs": iso_z(g.now),
+        "startTs": iso_z(g.start),
+        "elapsedSeconds": elapsed,
+        "elapsed_valid": elapsed_valid,
+        "metric_invalid_reason": invalid_reason,
+        "deltas": {k: g.counts[k] for k in ("critical", "transport", "rollback")},
+        "guards": guards,
+    }
+
+
+def _mekhanik_output(g: Gate) -> tuple[str, int]:
+    if g.error:
+        return "baseline.startTs missing or not a string" if g.error == "baseline_missing_startTs" else g.error, 1
+    return json.dumps(mekhanik_sanity_output(g), ensure_ascii=False, indent=2), 0
+
+
+def _generic_output(g: Gate) -> tuple[str, int]:
+    if g.error:
+        return json.dumps({"ok": False, "gate": g.name, "error": g.error}, ensure_ascii=False), 3
+    status, reasons = g.decision()
+    out = {
+        "ok": True,
+        "gate": g.name,
+        "startTs": g.start_ts,
+        "sources": None if g.sources is None else sorted(g.sources),
+        "deltas": dict(g.counts),
+        "decision": {"status": status, "reasons": reasons},
+        "meta": {"malformed_lines_total": g.malformed, "resume_offset": g.offset, "offset_reset": g.offset_reset},
+    }
+    return json.dumps(out, ensure_ascii=False, sort_keys=True), 0 if status == "PASS" else 2
+
+
+FORMATS: dict[str, Callable[[Gate], tuple[str, int]]] = {
+    "uchastkovy_gate_calc": _uchastkovy_output,
+    "mekhanik_cutover_sanity": _mekhanik_output,
+    "generic": _generic_output,
+}
+
+
+def render(g: Gate) -> tuple[str, int]:
+    """(stdout text, exit code) of the gate in its format."""
+    return FORMATS[g.format](g)
+
+
+def load_spec(path: str) -> dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    if not isinstance(spec.get("gates"), list):
+        raise ValueError("spec needs a 'gates' list")
+    return spec
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="Evaluate the gates of a spec in one pass")
+    r.add_argument("--spec", required=True)
+    r.add_argument("--gate", default=None, help="Evaluate one gate and print its tool output")
+    r.add_argument("--incidents", default=None, help="Override the spec's incidents path")
+    m = sub.add_parser("mark", help="Store startTs and the resume offset in a baseline file")
+    m.add_argument("--baseline", required=True)
+    m.add_argument("--incidents", default=INCIDENTS)
+    m.add_argument("--start-ts", default=None, help="startTs to store (default: keep existing, else now)")
+    args = ap.parse_args()
+
+    if args.cmd == "mark":
+        path = os.path.expanduser(args.baseline)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            baseline = {}
+        incidents = os.path.expanduser(args.incidents)
+        start_ts = args.start_ts or baseline.get("startTs")
+        if start_ts:
+            try:
+                since = parse_iso(start_ts)
+            except Exception as e:
+                print(json.dumps({"ok": False, "error": f"bad startTs: {e}"}, ensure_ascii=False))
+                return 3
+            offsets = mark(incidents, since)
+        else:
+            offsets = mark(incidents)  # before now: every line up to the offset predates startTs
+            start_ts = iso_z(datetime.now(timezone.utc))
+        baseline["startTs"] = start_ts
+        baseline.update(offsets)
+        atomic_write(path, json.dumps(baseline, ensure_ascii=False, indent=2) + "\n")
+        print(json.dumps({"ok": True, "baseline": path, **baseline}, ensure_ascii=False))
+        return 0
+
+    spec = load_spec(args.spec)
+    incidents = os.path.expanduser(args.incidents or spec.get("incidents") or INCIDENTS)
+    specs = spec["gates"]
+    if args.gate:
+        specs = [g for g in specs if g.get("name") == args.gate]
+        if not specs:
+            print(json.dumps({"ok": False, "error": f"unknown gate: {args.gate}"}, ensure_ascii=False))
+            return 3
+    now = datetime.now(timezone.utc)
+    gates = [Gate(g, incidents, now) for g in specs]
+    t0 = time.monotonic()
+    stats = evaluate(gates, incidents)
+
+    if args.gate:
+        text, code = render(gates[0])
+        print(text, file=sys.stderr if gates[0].format == "mekhanik_cutover_sanity" and gates[0].error else sys.stdout)
+        return code
+
+    results = {}
+    worst = 0
+    for g in gates:
+        text, code = render(g)
+        try:
+            output: Any = json.loads(text)
+        except ValueError:
+            output = text
+        results[g.name] = {"exit_code": code, "output": output}
+        worst = max(worst, code)
+    stats["duration_ms"] = round((time.monotonic() - t0) * 1000, 1)
+    print(json.dumps({"ok": worst == 0, "gates": results, "scan": stats}, ensure_ascii=False, sort_keys=True))
+    return worst
+
+
+if __name__ == "__main__":
+    sys.exit(main())
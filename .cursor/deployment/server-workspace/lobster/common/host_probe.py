@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""In-process host probes (disk, gateway process, unit state) with shell fallback.
+
+The Участковый probes used to shell out and parse text:
+
+  df -h / | tail -1                                      -> Use% column
+  ps aux | grep -E "openclaw-gateway$" | awk '{print $6}' -> RSS column
+  systemctl --user is-active openclaw-gateway            -> state word
+
+Each of those forks a shell plus a pipeline per tick and breaks on a changed
+column layout or locale. The same numbers are available in-process:
+
+- disk: os.statvfs(path). Use% is computed the way df does it,
+  used / (used + available), rounded up, so thresholds keep their meaning.
+- gateway process: /proc/<pid>/cmdline is matched like the grep above (the
+  command line ends with the name), RSS is VmRSS from /proc/<pid>/status,
+  CPU is utime+stime from /proc/<pid>/stat. cpu_pct is the lifetime average,
+  like the %CPU column of ps.
+- unit state: the unit's cgroup under the user manager
+  (user.slice/user-<uid>.slice/user@<uid>.service/[app.slice/]<unit>) is
+  populated while the unit is active. The path found once is cached in
+  ~/.openclaw/.runtime/host-probe-cgroups.json. An empty or missing cgroup
+  only says "not running" — failed, activating and inactive look the same —
+  so that case asks systemctl for the exact word.
+
+  disk("/")                    # {"pct": 42, "via": "statvfs"}
+  process("openclaw-gateway")  # {"pid", "rss_kb", "cpu_s", "cpu_pct", "via": "proc"} or None
+  unit_state("openclaw-gateway")  # {"state": "active", "via": "cgroup"}
+
+Every probe falls back to the old command (via "df" / "ps" / "systemctl") when
+the in-process source is not usable (no /proc, no cgroup fs, statvfs error).
+Callers with their own way of running commands pass fallback=False (disk,
+process) or use cgroup_active() and handle the miss themselves.
+No DBus binding is installed on the hosts, so DBus is not used.
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import os
+import time
+from typing import Any
+
+from incident_cursor import atomic_write
+from probe_pool import sh
+
+PROC_ROOT = "/proc"
+CGROUP_ROOTS = ("/sys/fs/cgroup", "/sys/fs/cgroup/unified", "/sys/fs/cgroup/systemd")
+CGROUP_CACHE = os.path.expanduser("~/.openclaw/.runtime/host-probe-cgroups.json")
+
+
+class Unavailable(Exception):
+    """The in-process source cannot answer; use the shell fallback."""
+
+
+# --- disk -------------------------------------------------------------------
+
+def statvfs_pct(path: str = "/") -> int:
+    """Use% as printed by df: used / (used + avail), rounded up."""
+    st = os.statvfs(path)
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    avail = st.f_bavail * st.f_frsize
+    total = used + avail
+    if total <= 0:
+        return 0
+    return -(-used * 100 // total)
+
+
+def df_pct(path: str = "/", timeout: float = 10) -> int:
+    rc, out, err = sh(["df", "-P", path], timeout=timeout)
+    if rc != 0:
+        raise RuntimeError(f"df rc={rc}: {err[:200]}")
+    return int(out.splitlines()[-1].split()[4].rstrip("%"))
+
+
+def disk(path: str = "/", fallback: bool = True) -> dict[str, Any]:
+    try:
+        return {"pct": statvfs_pct(path), "via": "statvfs"}
+    except OSError:
+        if not fallback:
+            raise
+        return {"pct": df_pct(path), "via": "df"}
+
+
+# --- processes --------------------------------------------------------------
+
+def _clk_tck() -> int:
+    try:
+        return os.sysconf("SC_CLK_TCK")
+    except (ValueError, OSError, AttributeError):
+        return 100
+
+
+def find_pids(name: str, proc_root: str = PROC_ROOT) -> list[int]:
+    """Pids whose command line ends with `name` (like `ps aux | grep -E "name$"`)."""
+    try:
+        entries = os.listdir(proc_root)
+    except OSError as e:
+        raise Unavailable(f"{proc_root}: {e}") from e
+    me = os.getpid()
+    pids = []
+    for entry in entries:
+        if not entry.isdigit() or int(entry) == me:
+            continue
+        try:
+            with open(os.path.join(proc_root, entry, "cmdline"), "rb") as f:
+                raw = f.read()
+        except OSError:
+            continue  # exited meanwhile or not ours to read
+        args = raw.rstrip(b"\0").replace(b"\0", b" ").decode("utf-8", "replace")
+        if args and args.endswith(name):
+            pids.append(int(entry))
+    return sorted(pids)
+
+
+def proc_stats(pid: int, proc_root: str = PROC_ROOT) -> dict[str, Any]:
+    """RSS (VmRSS, kB) and CPU (utime+stime seconds, lifetime cpu_pct) of one pid."""
+    base = os.path.join(proc_root, str(pid))
+    rss_kb = 0
+    with open(os.path.join(base, "status"), "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                rss_kb = int(line.split()[1])
+                break
+    with open(os.path.join(base, "stat"), "r", encoding="utf-8", errors="replace") as f:
+        stat = f.read()
+    # comm (field 2) may contain spaces and parens; fields 3.. follow the last ')'.
+    rest = stat[stat.rindex(")") + 2:].split()
+    tck = _clk_tck()
+    cpu_s = (int(rest[11]) + int(rest[12])) / tck
+    start_s = int(rest[19]) / tck
+    with open(os.path.join(proc_root, "uptime"), "r", encoding="utf-8") as f:
+        uptime_s = float(f.read().split()[0])
+    elapsed = uptime_s - start_s
+    return {
+        "pid": pid,
+        "rss_kb": rss_kb,
+        "cpu_s": round(cpu_s, 2),
+        "cpu_pct": round(cpu_s * 100 / elapsed, 1) if elapsed > 0 else 0.0,
+    }
+
+
+def ps_stats(name: str, timeout: float = 10) -> dict[str, Any] | None:
+    rc, out, err = sh(["ps", "axo", "pid=,rss=,pcpu=,args="], timeout=timeout)
+    if rc != 0:
+        raise RuntimeError(f"ps rc={rc}: {err[:200]}")
+    me = os.getpid()
+    for line in out.splitlines():
+        parts = line.split(None, 3)
+        if len(parts) == 4 and parts[3].endswith(name) and int(parts[0]) != me:
+            return {"pid": int(parts[0]), "rss_kb": int(parts[1]), "cpu_pct": float(parts[2])}
+    return None
+
+
+def process(name: str, proc_root: str = PROC_ROOT, fallback: bool = True) -> dict[str, Any] | None:
+    """Stats of the first (lowest pid) process matching `name`; None if not running.
+
+    Without /proc this asks ps, or raises Unavailable when fallback=False.
+    """
+    try:
+        for pid in find_pids(name, proc_root):
+            try:
+                return {**proc_stats(pid, proc_root), "via": "proc"}
+            except (OSError, ValueError, IndexError):
+                continue  # exited between listing and reading
+        return None
+    except Unavailable:
+        if not fallback:
+            raise
+        found = ps_stats(name)
+        return {**found, "via": "ps"} if found else None
+
+
+# --- unit state -------------------------------------------------------------
+
+def _load_cache(path: str) -> dict[str, str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(path: str, data: dict[str, str]) -> None:
+    try:
+        atomic_write(path, json.dumps(data, ensure_ascii=False, indent=2))
+    except OSError:
+        pass  # cache only saves the search next time
+
+
+def find_unit_cgroup(unit: str, roots: tuple[str, ...] = CGROUP_ROOTS) -> str | None:
+    uid = os.getuid()
+    svc = unit if "." in unit else unit + ".service"
+    for root in roots:
+        manager = os.path.join(root, "user.slice", f"user-{uid}.slice", f"user@{uid}.service")
+        if not os.path.isdir(manager):
+            continue
+        for cand in [os.path.join(manager, "app.slice", svc), os.path.join(manager, svc)] + sorted(
+            glob.glob(os.path.join(manager, "*", svc))
+        ):
+            if os.path.isdir(cand):
+                return cand
+    return None
+
+
+def _populated(cgroup: str) -> bool:
+    try:
+        with open(os.path.join(cgroup, "cgroup.events"), "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("populated "):
+                    return line.split()[1] == "1"
+    except OSError:
+        pass
+    with open(os.path.join(cgroup, "cgroup.procs"), "r", encoding="utf-8") as f:
+        return bool(f.read().strip())
+
+
+def cgroup_active(
+    unit: str,
+    roots: tuple[str, ...] = CGROUP_ROOTS,
+    cache_path: str = CGROUP_CACHE,
+) -> bool | None:
+    """True if the unit's cgroup has processes; None if that cannot be told from cgroupfs."""
+    cache = _load_cache(cache_path)
+    cgroup = cache.get(unit)
+    if not cgroup or not os.path.isdir(cgroup):
+        cgroup = find_unit_cgroup(unit, roots)
+        if cgroup is None:
+            return None
+        cache[unit] = cgroup
+        _save_cache(cache_path, cache)
+    try:
+        return True if _populated(cgroup) else None
+    except OSError:
+        return None
+
+
+def systemctl_state(unit: str, timeout: float = 10) -> dict[str, Any]:
+    rc, out, err = sh(["systemctl", "--user", "is-active", unit], timeout=timeout)
+    rec: dict[str, Any] = {"state": out or f"rc={rc}", "via": "systemctl"}
+    if err:
+        rec["stderr"] = err[:400]
+    return rec
+
+
+def unit_state(
+    unit: str,
+    roots: tuple[str, ...] = CGROUP_ROOTS,
+    cache_path: str = CGROUP_CACHE,
+) -> dict[str, Any]:
+    """{"state": <is-active word>, "via": "cgroup"|"systemctl"[, "stderr"]}."""
+    if cgroup_active(unit, roots, cache_path):
+        return {"state": "active", "via": "cgroup"}
+    return systemctl_state(unit)
+
+
+if __name__ == "__main__":
+    t = time.monotonic()
+    print(json.dumps({
+        "disk": disk("/"),
+        "gateway": process("openclaw-gateway"),
+        "unit": unit_state("openclaw-gateway"),
+        "elapsed_ms": round((time.monotonic() - t) * 1000, 1),
+    }, ensure_ascii=False, indent=2))
@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+"""Columnar export of incidents.jsonl for analytics scans.
+
+Reports that load the JSONL history into lists of dicts pay for every string
+on every run. This store keeps the history as fixed-width columns plus a blob
+side store, appended incrementally from the incidents cursor:
+
+  <root>/
+    meta.json        {version, rows, blob_bytes, scope, cursor, malformed, undated,
+                      dicts: {type: [...], severity: [...], source: [...], scope: [...], jobId: [...]}}
+    ts.bin           int64  epoch milliseconds
+    type.bin         uint16 dictionary code (0 = missing)
+    severity.bin     uint8
+    source.bin       uint16
+    scope.bin        uint8  (scope of the caller's scope_fn, e.g. Chekist Spec v1)
+    jobId.bin        uint32
+    dedup.bin        int64  hash of the Spec v1 dedup key
+    blob.bin         int64  offset of the row's blob in blobs.jsonl
+    blobs.jsonl      the rest of the record (raw ts string, msg, job, detail, ...)
+
+Columns are appended O(new lines); meta.json is written last, so a crashed
+append is cut back to `rows` on the next sync. A truncated/rewritten source
+or a different scope function rebuilds the store.
+
+Queries are vectorized with numpy when it is installed and fall back to
+array.array + plain loops otherwise (same results). query() applies the
+window at millisecond resolution and re-checks rows in the boundary
+milliseconds against the raw ts string, so it matches a datetime filter.
+
+CLI (scope = Chekist Spec v1, from scripts/chekist_aggregator_v1.py):
+  python3 incident_columnar.py sync|rebuild [--source PATH] [--root DIR]
+  python3 incident_columnar.py stats [--root DIR]
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterator
+
+from incident_cursor import FULL_RESETS, atomic_write, cursor_from_dict, cursor_to_dict, read_delta
+
+try:
+    import numpy as np
+
+    _HAS_NUMPY = True
+except ImportError:
+    np = None
+    _HAS_NUMPY = False
+
+INCIDENTS = os.path.expanduser("~/.openclaw/workspace/data/incidents.jsonl")
+COLUMNAR_DIR = os.path.expanduser("~/.openclaw/.runtime/incidents.col")
+CONSUMER = "incident-columnar"
+
+# column -> array typecode
+COLUMNS = {
+    "ts": "q",
+    "type": "H",
+    "severity": "B",
+    "source": "H",
+    "scope": "B",
+    "jobId": "I",
+    "dedup": "q",
+    "blob": "q",
+}
+DICT_COLUMNS = ("type", "severity", "source", "scope", "jobId")
+_NP_TYPES = {"q": "<i8", "H": "<u2", "B": "u1", "I": "<u4"}
+
+
+def _norm_str(v: Any) -> str | None:
+    return str(v) if v else None
+
+
+def _norm_only_str(v: Any) -> str | None:
+    return v if isinstance(v, str) else None
+
+
+NORMALIZE: dict[str, Callable[[Any], str | None]] = {
+    "type": _norm_str,
+    "severity": _norm_only_str,
+    "source": _norm_str,
+    "jobId": _norm_only_str,
+}
+
+
+def dedup_hash(rec: dict[str, Any]) -> int:
+    """Signed 64-bit hash of the Spec v1 dedup key (see scripts/chekist_aggregator_v1.py)."""
+    ts = str(rec.get("ts") or "")
+    typ = str(rec.get("type") or "")
+    src = str(rec.get("source") or "")
+    job_id = rec.get("jobId")
+    if isinstance(job_id, str) and job_id:
+        k = f"{ts}|{job_id}|{typ}|{src}"
+    else:
+        mh = hashlib.sha256(str(rec.get("msg") or "").encode("utf-8", errors="ignore")).hexdigest()[:16]
+        k = f"{ts}|{typ}|{src}|{mh}"
+    return int.from_bytes(hashlib.sha1(k.encode("utf-8", errors="ignore")).digest()[:8], "little", signed=True)
+
+
+def _parse_aware(ts: Any) -> datetime | None:
+    if not isinstance(ts, str):
+        return None
+    try:
+        dt = datetime.fromisoformat(ts[:-1] + "+00:00" if ts.endswith("Z") else ts)
+    except ValueError:
+        return None
+    return dt if dt.tzinfo is not None else None
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _epoch_ms(dt: datetime) -> int:
+    """floor(epoch milliseconds), exact (no float rounding)."""
+    return (dt - _EPOCH) // timedelta(milliseconds=1)
+
+
+class Columns:
+    """Loaded columns (numpy arrays or array.array) + decoded dictionaries."""
+
+    def __init__(self, store: "ColumnStore", data: dict[str, Any]):
+        self.store = store
+        self.data = data
+        self.rows = store.meta["rows"]
+        self.dicts: dict[str, list[str | None]] = {c: [None] + store.meta["dicts"][c] for c in DICT_COLUMNS}
+
+    def __getitem__(self, col: str) -> Any:
+        return self.data[col]
+
+    def value(self, col: str, row: int) -> str | None:
+        """Decoded value of a dictionary column."""
+        return self.dicts[col][int(self.data[col][row])]
+
+
+class WindowQuery:
+    """Rows of one window: raw count, dedup-kept row indices (file order), grouped counts."""
+
+    def __init__(self, cols: Columns, raw: int, kept: list[int]):
+        self.cols = cols
+        self.raw = raw
+        self.kept = kept
+
+    def group_counts(self, *columns: str) -> list[tuple[tuple[str | None, ...], int]]:
+        """[(decoded values, count)] over kept rows, in order of first occurrence."""
+        data = [self.cols[c] for c in columns]
+        dicts = [self.cols.dicts[c] for c in columns]
+        if _HAS_NUMPY and self.kept:
+            idx = np.asarray(self.kept, dtype=np.int64)
+            key = np.zeros(len(idx), dtype=np.int64)
+            for arr, d in zip(data, dicts):
+                key = key * (len(d) + 1) + arr[idx].astype(np.int64)
+            uniq, first, counts = np.unique(key, return_index=True, return_counts=True)
+            order = np.argsort(first, kind="stable")
+            out = []
+            for j in order:
+                row = int(idx[first[j]])
+                out.append((tuple(d[int(arr[row])] for arr, d in zip(data, dicts)), int(counts[j])))
+            return out
+        acc: dict[tuple[int, ...], int] = {}
+        for row in self.kept:
+            k = tuple(arr[row] for arr in data)
+            acc[k] = acc.get(k, 0) + 1
+        return [(tuple(d[c] for c, d in zip(k, dicts)), n) for k, n in acc.items()]
+
+    def records(self, rows: list[int]) -> list[dict[str, Any]]:
+        return [self.cols.store.record(self.cols, r) for r in rows]
+
+
+class ColumnStore:
+    def __init__(
+        self,
+        root: str = COLUMNAR_DIR,
+        source: str = INCIDENTS,
+        scope_fn: Callable[[dict[str, Any]], str] | None = None,
+        scope_name: str = "",
+    ):
+        self.root = root
+        self.source = source
+        self.scope_fn = scope_fn
+        self.scope_name = scope_name
+        self.meta = self._load_meta()
+
+    # -- layout ---------------------------------------------------------------
+
+    def _col_path(self, col: str) -> str:
+        return os.path.join(self.root, f"{col}.bin")
+
+    def _blobs_path(self) -> str:
+        return os.path.join(self.root, "blobs.jsonl")
+
+    def _meta_path(self) -> str:
+        return os.path.join(self.root, "meta.json")
+
+    def _empty_meta(self) -> dict[str, Any]:
+        return {
+            "version": 1,
+            "rows": 0,
+            "blob_bytes": 0,
+            "scope": self.scope_name,
+            "cursor": {},
+            "malformed": 0,
+            "undated": 0,
+            "dicts": {c: [] for c in DICT_COLUMNS},
+        }
+
+    def _load_meta(self) -> dict[str, Any]:
+        try:
+            with open(self._meta_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return self._empty_meta()
+
+    def malformed_count(self) -> int:
+        return int(self.meta.get("malformed", 0) or 0)
+
+    # -- write path -------------------------------------------------------------
+
+    def _clear(self) -> None:
+        for col in COLUMNS:
+            if os.path.exists(self._col_path(col)):
+                os.remove(self._col_path(col))
+        if os.path.exists(self._blobs_path()):
+            os.remove(self._blobs_path())
+        self.meta = self._empty_meta()
+
+    def _cut_back(self) -> None:
+        """Drop bytes of an append that crashed before meta.json was written."""
+        rows = self.meta["rows"]
+        for col, code in COLUMNS.items():
+            p = self._col_path(col)
+            want = rows * array(code).itemsize
+            if os.path.exists(p) and os.path.getsize(p) != want:
+                os.truncate(p, want)
+        p = self._blobs_path()
+        if os.path.exists(p) and os.path.getsize(p) != self.meta["blob_bytes"]:
+            os.truncate(p, self.meta["blob_bytes"])
+
+    def sync(self) -> dict[str, Any]:
+        """Append rows for lines added to the source since the last sync."""
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, ".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self.meta = self._load_meta()
+            if self.meta.get("scope") != self.scope_name:
+                self._clear()
+            cur = cursor_from_dict(CONSUMER, self.meta.get("cursor") or {})
+            lines = read_delta(self.source, cur)
+            if cur.reset in FULL_RESETS:
+                self._clear()
+            self._cut_back()
+
+            codes = {c: {v: i + 1 for i, v in enumerate(self.meta["dicts"][c])} for c in DICT_COLUMNS}
+            bufs = {col: array(code) for col, code in COLUMNS.items()}
+            blob_parts: list[bytes] = []
+            blob_off = self.meta["blob_bytes"]
+            new_rows = 0
+
+            def code_of(col: str, v: str | None) -> int:
+                if v is None:
+                    return 0
+                c = codes[col].get(v)
+                if c is None:
+                    c = len(codes[col]) + 1
+                    codes[col][v] = c
+                    self.meta["dicts"][col].append(v)
+                return c
+
+            for line in lines:
+                try:
+                    rec = json.loads(line)
+                except Exception:
+                    self.meta["malformed"] += 1
+                    continue
+                if not isinstance(rec, dict):
+                    self.meta["malformed"] += 1
+                    continue
+                dt = _parse_aware(rec.get("ts"))
+                if dt is None:
+                    self.meta["undated"] += 1
+                    continue
+
+                bufs["ts"].append(_epoch_ms(dt))
+                rest = {}
+                for col, norm in NORMALIZE.items():
+                    v = norm(rec.get(col))
+                    bufs[col].append(code_of(col, v))
+                    if col in rec and rec[col] != v:
+                        rest[col] = rec[col]  # keep the raw value when normalizing changed it
+                scope = self.scope_fn(rec) if self.scope_fn else None
+                bufs["scope"].append(code_of("scope", scope))
+                bufs["dedup"].append(dedup_hash(rec))
+                for k, v in rec.items():
+                    if k not in NORMALIZE:
+                        rest[k] = v
+                blob = (json.dumps(rest, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+                bufs["blob"].append(blob_off)
+                blob_off += len(blob)
+                blob_parts.append(blob)
+                new_rows += 1
+
+            for col, buf in bufs.items():
+                with open(self._col_path(col), "ab") as f:
+                    buf.tofile(f)
+            with open(self._blobs_path(), "ab") as f:
+                f.write(b"".join(blob_parts))
+            self.meta["rows"] += new_rows
+            self.meta["blob_bytes"] = blob_off
+            self.meta["cursor"] = cursor_to_dict(cur)
+            atomic_write(self._meta_path(), json.dumps(self.meta, ensure_ascii=False))
+
+        return {"reset": cur.reset, "new_rows": new_rows, "rows": self.meta["rows"], "offset": cur.offset}
+
+    def rebuild(self) -> dict[str, Any]:
+        if os.path.isdir(self.root):
+            shutil.rmtree(self.root)
+        self.meta = self._empty_meta()
+        return self.sync()
+
+    # -- read path --------------------------------------------------------------
+
+    def load(self, columns: tuple[str, ...] = tuple(COLUMNS)) -> Columns:
+        rows = self.meta["rows"]
+        data: dict[str, Any] = {}
+        for col in columns:
+            code = COLUMNS[col]
+            p = self._col_path(col)
+            if _HAS_NUMPY:
+                data[col] = np.fromfile(p, dtype=_NP_TYPES[code], count=rows) if rows else np.zeros(0, _NP_TYPES[code])
+            else:
+                arr = array(code)
+                if rows:
+                    with open(p, "rb") as f:
+                        arr.fromfile(f, rows)
+                data[col] = arr
+        return Columns(self, data)
+
+    def record(self, cols: Columns, row: int) -> dict[str, Any]:
+        """Row as a dict: decoded dictionary columns + its blob (raw values win)."""
+        rec: dict[str, Any] = {}
+        for col in NORMALIZE:
+            v = cols.value(col, row)
+            if v is not None:
+                rec[col] = v
+        with open(self._blobs_path(), "rb") as f:
+            f.seek(int(cols["blob"][row]))
+            rec.update(json.loads(f.readline()))
+        return rec
+
+    def _raw_ts(self, cols: Columns, row: int) -> datetime | None:
+        return _parse_aware(self.record(cols, row).get("ts"))
+
+    def query(self, start: datetime, end: datetime, severity: str | None = "critical") -> WindowQuery:
+        """Rows with start <= ts <= end (and the given severity), deduped by first occurrence."""
+        cols = self.load()
+        lo_ms, hi_ms = _epoch_ms(start), _epoch_ms(end)
+        sev = cols.dicts["severity"].index(severity) if severity in cols.dicts["severity"] else -1
+        if severity is not None and sev < 0:
+            return WindowQuery(cols, 0, [])
+
+        if _HAS_NUMPY:
+            ts = cols["ts"]
+            mask = (ts >= lo_ms) & (ts <= hi_ms)
+            if severity is not None:
+                mask &= cols["severity"] == sev
+            rows = np.nonzero(mask)[0].tolist()
+        else:
+            ts = cols["ts"]
+            sevs = cols["severity"]
+            rows = [
+                i
+                for i in range(cols.rows)
+                if lo_ms <= ts[i] <= hi_ms and (severity is None or sevs[i] == sev)
+            ]
+
+        # boundary milliseconds: exact check against the raw ts string
+        ts = cols["ts"]
+        rows = [
+            r
+            for r in rows
+            if (int(ts[r]) != lo_ms and int(ts[r]) != hi_ms) or (start <= self._raw_ts(cols, r) <= end)
+        ]
+
+        dedup = cols["dedup"]
+        if _HAS_NUMPY and rows:
+            idx = np.asarray(rows, dtype=np.int64)
+            _uniq, first = np.unique(dedup[idx], return_index=True)
+            kept = idx[np.sort(first)].tolist()
+        else:
+            seen: set[int] = set()
+            kept = []
+            for r in rows:
+                h = dedup[r]
+                if h in seen:
+                    continue
+                seen.add(h)
+                kept.append(r)
+        return WindowQuery(cols, len(rows), kept)
+
+
+def _chekist_scope() -> tuple[Callable[[dict[str, Any]], str], str]:
+    import sys
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "scripts"))
+    from chekist_aggregator_v1 import COLUMNAR_SCOPE, scope_map
+
+    return scope_map, COLUMNAR_SCOPE
+
+
+def iter_stats(store: ColumnStore) -> Iterator[tuple[str, Any]]:
+    yield "rows", store.meta["rows"]
+    yield "malformed", store.meta["malformed"]
+    yield "undated", store.meta["undated"]
+    yield "scope", store.meta.get("scope")
+    yield "dict_sizes", {c: len(v) for c, v in store.meta["dicts"].items()}
+    yield "bytes", {
+        fn: os.path.getsize(os.path.join(store.root, fn))
+        for fn in sorted(os.listdir(store.root) if os.path.isdir(store.root) else [])
+        if fn.endswith((".bin", ".jsonl"))
+    }
+    yield "numpy", _HAS_NUMPY
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("cmd", choices=["sync", "rebuild", "stats"])
+    ap.add_argument("--source", default=INCIDENTS)
+    ap.add_argument("--root", default=COLUMNAR_DIR)
+    args = ap.parse_args()
+
+    scope_fn, scope_name = _chekist_scope()
+    store = ColumnStore(os.path.expanduser(args.root), args.source, scope_fn, scope_name)
+    if args.cmd == "sync":
+        out = store.sync()
+    elif args.cmd == "rebuild":
+        out = store.rebuild()
+    else:
+        out = dict(iter_stats(store))
+    print(json.dumps({"ok": True, "cmd": args.cmd, **out}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""Incremental JSONL reader with persisted per-consumer cursors.
+
+Monitoring runners fire every few minutes against an append-only
+incidents.jsonl. Instead of re-reading the file each tick, every consumer keeps
+a small cursor:
+
+  ~/.openclaw/.runtime/cursors/<consumer>.json
+    {version, consumer, path, inode, offset, sig, last_ts, window_s,
+     malformed_total, updated_at}
+
+and, for windowed readers, a rolling buffer with the raw lines that are still
+inside the consumer's time window:
+
+  ~/.openclaw/.runtime/cursors/<consumer>.window.jsonl
+
+Per run only the bytes appended after `offset` are parsed, so the cost tracks
+new lines, not file size.
+
+Never silently miss events:
+- inode changed -> rotation. The remainder of the old file is drained from the
+  rotated copy (<path>.1 / <path>.0) when it is found by inode, then the new file
+  is read from 0 (reset=rotated). If the old copy is gone: reset=rotated_lost.
+- size < offset -> truncation (reset=truncated), full re-read.
+- bytes right before `offset` changed -> in-place rewrite (reset=rewritten),
+  full re-read.
+- a trailing partial line (writer not finished yet) is never consumed; it is
+  picked up on the next run.
+
+Consumers that hold derived state must drop it when reset in FULL_RESETS.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Iterator
+
+from warm_cache import file_stamp
+
+STATE_DIR = os.path.expanduser("~/.openclaw/.runtime/cursors")
+
+# Bytes before `offset` used to detect in-place rewrites of the file.
+SIG_BYTES = 64
+CHUNK_BYTES = 1 << 20
+ROTATED_SUFFIXES = (".1", ".0")
+
+# Reset reasons after which previously derived state is no longer valid.
+FULL_RESETS = {"init", "rotated_lost", "truncated", "rewritten"}
+
+
+def parse_ts(ts: str) -> float:
+    if ts.endswith("Z"):
+        ts = ts[:-1] + "+00:00"
+    return datetime.fromisoformat(ts).timestamp()
+
+
+@dataclass
+class Cursor:
+    consumer: str
+    path: str = ""
+    inode: int = 0
+    offset: int = 0
+    sig: str = ""
+    last_ts: str | None = None
+    window_s: int = 0
+    malformed_total: int = 0
+    # Not persisted: reason of the last read_delta() reset (None = incremental).
+    reset: str | None = field(default=None, compare=False)
+
+
+def _cursor_path(consumer: str, state_dir: str) -> str:
+    return os.path.join(state_dir, f"{consumer}.json")
+
+
+def _buffer_path(consumer: str, state_dir: str) -> str:
+    return os.path.join(state_dir, f"{consumer}.window.jsonl")
+
+
+def atomic_write(path: str, data: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def cursor_from_dict(consumer: str, raw: dict[str, Any]) -> Cursor:
+    return Cursor(
+        consumer=consumer,
+        path=str(raw.get("path") or ""),
+        inode=int(raw.get("inode", 0) or 0),
+        offset=int(raw.get("offset", 0) or 0),
+        sig=str(raw.get("sig") or ""),
+        last_ts=raw.get("last_ts"),
+        window_s=int(raw.get("window_s", 0) or 0),
+        malformed_total=int(raw.get("malformed_total", 0) or 0),
+    )
+
+
+def cursor_to_dict(cur: Cursor) -> dict[str, Any]:
+    rec = asdict(cur)
+    rec.pop("reset", None)
+    return rec
+
+
+def load_cursor(consumer: str, state_dir: str = STATE_DIR) -> Cursor:
+    path = _cursor_path(consumer, state_dir)
+    if not os.path.exists(path):
+        return Cursor(consumer=consumer)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return cursor_from_dict(consumer, json.load(f))
+    except Exception:
+        # Corrupt cursor -> start over (full re-read is always safe).
+        return Cursor(consumer=consumer)
+
+
+def save_cursor(cur: Cursor, state_dir: str = STATE_DIR) -> None:
+    """Atomic cursor write: write *.tmp -> fsync -> rename."""
+    rec = cursor_to_dict(cur)
+    rec["version"] = 1
+    rec["updated_at"] = time.time()
+    atomic_write(_cursor_path(cur.consumer, state_dir), json.dumps(rec, ensure_ascii=False, indent=2))
+
+
+def sig_at(f, offset: int) -> str:
+    start = max(0, offset - SIG_BYTES)
+    f.seek(start)
+    return hashlib.sha1(f.read(offset - start)).hexdigest()[:16]
+
+
+def _find_rotated(path: str, inode: int) -> str | None:
+    for suffix in ROTATED_SUFFIXES:
+        cand = path + suffix
+        try:
+            if os.stat(cand).st_ino == inode:
+                return cand
+        except OSError:
+            continue
+    return None
+
+
+def _iter_lines(path: str, cur: Cursor, start: int, track: bool) -> Iterator[tuple[int, str]]:
+    """Yield (line offset, line) from `start`; advance cur.offset/sig when `track`."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        pos = start
+        pending = b""
+        while True:
+            chunk = f.read(CHUNK_BYTES)
+            if not chunk:
+                break
+            pending += chunk
+            cut = pending.rfind(b"\n")
+            if cut < 0:
+                continue
+            block, pending = pending[: cut + 1], pending[cut + 1 :]
+            line_pos = pos
+            pos += len(block)
+            if track:
+                cur.offset = pos
+                tail = block[-SIG_BYTES:]
+                if len(tail) < SIG_BYTES:
+                    cur.sig = sig_at(f, pos)
+                    f.seek(pos + len(pending))
+                else:
+                    cur.sig = hashlib.sha1(tail).hexdigest()[:16]
+            for raw in block.split(b"\n"):
+                line = raw.decode("utf-8", errors="replace").strip()
+                if line:
+                    yield line_pos, line
+                line_pos += len(raw) + 1
+
+
+def read_delta(path: str, cur: Cursor, offsets: bool = False) -> Iterator[Any]:
+    """Return an iterator over complete lines appended since `cur`.
+
+    The reset decision is taken eagerly and stored in `cur.reset`; the
+    iterator advances `cur.offset` as it goes, so exhaust it before
+    save_cursor(). With offsets=True, items are (inode, byte offset, line);
+    lines drained from a rotated copy carry the old inode.
+    """
+    cur.reset = None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return iter(())
+
+    if cur.path != path or not cur.inode:
+        cur.reset = "init"
+    elif st.st_ino != cur.inode:
+        rotated = _find_rotated(path, cur.inode)
+        cur.reset = "rotated" if rotated else "rotated_lost"
+    elif st.st_size < cur.offset:
+        cur.reset = "truncated"
+    elif cur.offset:
+        with open(path, "rb") as f:
+            if sig_at(f, cur.offset) != cur.sig:
+                cur.reset = "rewritten"
+
+    old_offset = cur.offset
+    old_inode = cur.inode
+    if cur.reset is not None:
+        cur.path = path
+        cur.inode = st.st_ino
+        cur.offset = 0
+        cur.sig = ""
+
+    def gen() -> Iterator[Any]:
+        if cur.reset == "rotated":
+            rotated = _find_rotated(path, old_inode)
+            if rotated:
+                for off, line in _iter_lines(rotated, cur, old_offset, track=False):
+                    yield (old_inode, off, line) if offsets else line
+        for off, line in _iter_lines(path, cur, cur.offset, track=True):
+            yield (cur.inode, off, line) if offsets else line
+
+    return gen()
+
+
+class IncidentWindow:
+    """Rolling in-window view of a JSONL file for one consumer.
+
+    refresh() parses only newly appended lines, merges them with the on-disk
+    buffer, drops records older than `window_s` and persists buffer + cursor.
+    Records are returned in file order. `keep` optionally narrows what is
+    buffered (e.g. only severity=critical). A long-lived instance keeps the
+    buffer in memory and returns the same record dicts across refreshes, so
+    callers treat them as read-only.
+    """
+
+    def __init__(
+        self,
+        consumer: str,
+        path: str,
+        window_s: int,
+        state_dir: str = STATE_DIR,
+        keep: Callable[[dict[str, Any]], bool] | None = None,
+    ):
+        self.consumer = consumer
+        self.path = path
+        self.window_s = int(window_s)
+        self.state_dir = state_dir
+        self.keep = keep
+        self.stats: dict[str, Any] = {}
+        # (file stamp, records) of the buffer as we last wrote it; a long-lived
+        # instance reuses it instead of re-parsing the file it just wrote.
+        self._buffer: tuple[tuple[int, int, int] | None, list[tuple[float, str, dict[str, Any]]]] | None = None
+
+    def _load_buffer(self) -> list[tuple[float, str, dict[str, Any]]]:
+        out = []
+        bpath = _buffer_path(self.consumer, self.state_dir)
+        if not os.path.exists(bpath):
+            return out
+        with open(bpath, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                    out.append((parse_ts(rec["ts"]), line, rec))
+                except Exception:
+                    continue
+        return out
+
+    def refresh(self, now: float | None = None) -> list[dict[str, Any]]:
+        now = time.time() if now is None else now
+        since = now - self.window_s
+
+        cur = load_cursor(self.consumer, self.state_dir)
+        if cur.window_s < self.window_s:
+            # Buffer was built for a narrower window: rebuild from scratch.
+            cur = Cursor(consumer=self.consumer)
+        cur.window_s = self.window_s
+
+        lines = read_delta(self.path, cur)
+        if cur.reset in FULL_RESETS:
+            buffered = []
+            cur.malformed_total = 0
+        elif self._buffer is not None and self._buffer[0] is not None and \
+                self._buffer[0] == file_stamp(_buffer_path(self.consumer, self.state_dir)):
+            buffered = list(self._buffer[1])
+        else:
+            buffered = self._load_buffer()
+        self._buffer = None
+
+        new_lines = 0
+        for line in lines:
+            new_lines += 1
+            try:
+                rec = json.loads(line)
+            except Exception:
+                cur.malformed_total += 1
+                continue
+            if not isinstance(rec, dict):
+                continue
+            ts = rec.get("ts")
+            if not isinstance(ts, str):
+                continue
+            try:
+                t = parse_ts(ts)
+            except Exception:
+                continue
+            if cur.last_ts is None or ts > cur.last_ts:
+                cur.last_ts = ts
+            if t < since:
+                continue
+            if self.keep is not None and not self.keep(rec):
+                continue
+            buffered.append((t, line, rec))
+
+        kept = [b for b in buffered if b[0] >= since]
+        bpath = _buffer_path(self.consumer, self.state_dir)
+        atomic_write(bpath, "".join(line + "\n" for _, line, _ in kept))
+        save_cursor(cur, self.state_dir)
+        self._buffer = (file_stamp(bpath), kept)
+
+        self.stats = {
+            "reset": cur.reset,
+            "new_lines": new_lines,
+            "buffered": len(kept),
+            "offset": cur.offset,
+            "malformed_total": cur.malformed_total,
+        }
+        return [rec for _, _, rec in kept]
@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""Hourly rollup of incident counts, shared by window reports.
+
+monitor_daily_aggregate, the Chekist aggregator, uchastkovy_gate_calc and the
+marta/wendy/git-sync post-check reports all count incidents by type, severity,
+source and scope over some window. Instead of each of them scanning
+incidents.jsonl, this store keeps mergeable hourly buckets maintained from the
+incremental cursor:
+
+  ~/.openclaw/.runtime/incident-rollup/
+    _state.json            {version, cursor, malformed, undated}
+    2026-02-26.json        {"10": bucket, "11": bucket, ...}   (UTC hours)
+    2026-02-26.seen.json   {"10": [dedup hash, ...], ...}     (ingest only)
+
+  bucket = {rows, spans: [[inode, first_offset, end_offset], ...],
+            counts: {key: [raw, unique]}}
+  key    = JSON [type, severity, source, jobId]
+
+Scope is consumer-specific (each report has its own scope rules over type,
+source and jobId), so the bucket keeps those raw dimensions and every consumer
+maps a key to its scope once per key instead of once per row. `unique` counts
+critical rows by first occurrence of the Spec v1 dedup key; the key embeds ts,
+so duplicates always share an hour and per-hour dedup is exact.
+
+A window query merges the buckets of whole hours inside [lo, hi] and returns the
+raw rows of the (at most two) partial edge hours, read back through the byte
+spans; the caller applies its own exact ts filter to those rows.
+
+Ingest is idempotent per line (a line at an offset already covered by its
+bucket's span is skipped), so a crash between bucket and cursor writes cannot
+double count. Truncation/rewrite of the source rebuilds the rollup.
+
+CLI:
+  python3 incident_rollup.py refresh|rebuild [--source PATH] [--root DIR]
+  python3 incident_rollup.py verify [--hours 2,24,168] [--source PATH] [--root DIR]
+    (compares per-key counts of each window ending now against a full scan;
+     exit 1 on mismatch)
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Iterator
+
+from incident_cursor import FULL_RESETS, atomic_write, cursor_from_dict, cursor_to_dict, read_delta
+from jsonl_prefilter import iter_window_lines
+
+INCIDENTS = os.path.expanduser("~/.openclaw/workspace/data/incidents.jsonl")
+ROLLUP_DIR = os.path.expanduser("~/.openclaw/.runtime/incident-rollup")
+CONSUMER = "incident-rollup"
+
+HOUR_S = 3600
+
+
+def _norm_str(v: Any) -> str | None:
+    # str(v) for truthy values keeps `str(rec.get(k) or default)` semantics.
+    return str(v) if v else None
+
+
+def key_fields(rec: dict[str, Any]) -> list[str | None]:
+    sev = rec.get("severity")
+    job_id = rec.get("jobId")
+    return [
+        _norm_str(rec.get("type")),
+        sev if isinstance(sev, str) else None,
+        _norm_str(rec.get("source")),
+        job_id if isinstance(job_id, str) else None,
+    ]
+
+
+def key_record(key: str, hour_ts: str) -> dict[str, Any]:
+    typ, sev, src, job_id = json.loads(key)
+    return {"ts": hour_ts, "type": typ, "severity": sev, "source": src, "jobId": job_id}
+
+
+def dedup_hash(rec: dict[str, Any]) -> str:
+    """Spec v1 dedup key (see scripts/chekist_aggregator_v1.py), hashed."""
+    ts = str(rec.get("ts") or "")
+    typ = str(rec.get("type") or "")
+    src = str(rec.get("source") or "")
+    job_id = rec.get("jobId")
+    if isinstance(job_id, str) and job_id:
+        k = f"{ts}|{job_id}|{typ}|{src}"
+    else:
+        mh = hashlib.sha256(str(rec.get("msg") or "").encode("utf-8", errors="ignore")).hexdigest()[:16]
+        k = f"{ts}|{typ}|{src}|{mh}"
+    return hashlib.sha1(k.encode("utf-8", errors="ignore")).hexdigest()[:16]
+
+
+def _aware_ts(ts: Any) -> float | None:
+    """Epoch seconds of an offset-aware ISO ts; None for naive or unparseable."""
+    if not isinstance(ts, str):
+        return None
+    try:
+        dt = datetime.fromisoformat(ts[:-1] + "+00:00" if ts.endswith("Z") else ts)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        return None
+    return dt.timestamp()
+
+
+def _hour_of(t: float) -> tuple[str, str]:
+    dt = datetime.fromtimestamp(t, timezone.utc)
+    return dt.strftime("%Y-%m-%d"), dt.strftime("%H")
+
+
+def _hour_start(day: str, hour: str) -> float:
+    return datetime.strptime(f"{day}T{hour}", "%Y-%m-%dT%H").replace(tzinfo=timezone.utc).timestamp()
+
+
+def _to_epoch(t: datetime | float | None) -> float | None:
+    if t is None or isinstance(t, (int, float)):
+        return t
+    return t.timestamp()
+
+
+class RollupWindow:
+    """Merged counts of whole hours + raw rows of the partial edge hours."""
+
+    def __init__(self) -> None:
+        self.counts: dict[str, list[int]] = {}
+        self.key_ts: dict[str, str] = {}
+        self.edge_rows: list[dict[str, Any]] = []
+        self.full_hours = 0
+        self.edge_hours = 0
+
+    def merge(self, bucket: dict[str, Any], hour_ts: str) -> None:
+        for key, (raw, unique) in bucket["counts"].items():
+            acc = self.counts.get(key)
+            if acc is None:
+                self.counts[key] = [raw, unique]
+                self.key_ts[key] = hour_ts
+            else:
+                acc[0] += raw
+                acc[1] += unique
+
+    def keys(self) -> Iterator[tuple[dict[str, Any], int, int]]:
+        """(key record, raw, unique) for whole hours; key record ts = an hour inside the window."""
+        for key, (raw, unique) in self.counts.items():
+            yield key_record(key, self.key_ts[key]), raw, unique
+
+    def weighted(self) -> Iterator[tuple[dict[str, Any], int]]:
+        """(record, count) pairs: bucket keys first, then edge rows with count 1."""
+        for rec, raw, _unique in self.keys():
+            yield rec, raw
+        for row in self.edge_rows:
+            yield row, 1
+
+
+class RollupStore:
+    def __init__(self, root: str = ROLLUP_DIR, source: str = INCIDENTS):
+        self.root = root
+        self.source = source
+        self.state = self._load_json(self._state_path(), None) or self._empty_state()
+
+    # -- layout -------------------------------------------------------------
+
+    def _state_path(self) -> str:
+        return os.path.join(self.root, "_state.json")
+
+    def _day_path(self, day: str) -> str:
+        return os.path.join(self.root, f"{day}.json")
+
+    def _seen_path(self, day: str) -> str:
+        return os.path.join(self.root, f"{day}.seen.json")
+
+    @staticmethod
+    def _empty_state() -> dict[str, Any]:
+        return {"version": 1, "cursor": {}, "malformed": 0, "undated": 0}
+
+    @staticmethod
+    def _load_json(path: str, default: Any) -> Any:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return default
+
+    def days(self) -> list[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            fn[: -len(".json")]
+            for fn in os.listdir(self.root)
+            if fn.endswith(".json") and not fn.endswith(".seen.json") and not fn.startswith("_")
+        )
+
+    def malformed_count(self) -> int:
+        return int(self.state.get("malformed", 0) or 0)
+
+    # -- ingest -------------------------------------------------------------
+
+    def refresh(self) -> dict[str, Any]:
+        """Fold lines appended to the source since the last refresh into buckets."""
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, "_lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self.state = self._load_json(self._state_path(), None) or self._empty_state()
+            cur = cursor_from_dict(CONSUMER, self.state.get("cursor") or {})
+            lines = read_delta(self.source, cur, offsets=True)
+            if cur.reset in FULL_RESETS:
+                self._clear()
+
+            days: dict[str, dict[str, Any]] = {}
+            seen: dict[str, dict[str, set[str]]] = {}
+            new_lines = skipped = 0
+            for inode, off, line in lines:
+                new_lines += 1
+                try:
+                    rec = json.loads(line)
+                except Exception:
+                    self.state["malformed"] += 1
+                    continue
+                t = _aware_ts(rec.get("ts") if isinstance(rec, dict) else None)
+                if t is None:
+                    self.state["undated"] += 1
+                    continue
+
+                day, hour = _hour_of(t)
+                if day not in days:
+                    days[day] = self._load_json(self._day_path(day), {})
+                    seen[day] = {h: set(v) for h, v in self._load_json(self._seen_path(day), {}).items()}
+                b = days[day].setdefault(hour, {"rows": 0, "spans": [], "counts": {}})
+                span = next((s for s in b["spans"] if s[0] == inode), None)
+                if span is not None and off < span[2]:
+                    skipped += 1
+                    continue
+                end = off + len(line.encode("utf-8")) + 1
+                if span is None:
+                    b["spans"].append([inode, off, end])
+                else:
+                    span[2] = end
+
+                b["rows"] += 1
+                key = json.dumps(key_fields(rec), ensure_ascii=False, separators=(",", ":"))
+                cnt = b["counts"].setdefault(key, [0, 0])
+                cnt[0] += 1
+                if rec.get("severity") == "critical":
+                    hs = seen[day].setdefault(hour, set())
+                    h = dedup_hash(rec)
+                    if h not in hs:
+                        hs.add(h)
+                        cnt[1] += 1
+
+            for day, buckets in days.items():
+                atomic_write(self._day_path(day), json.dumps(buckets, ensure_ascii=False, separators=(",", ":")))
+                atomic_write(
+                    self._seen_path(day),
+                    json.dumps({h: sorted(v) for h, v in seen[day].items()}, separators=(",", ":")),
+                )
+            self.state["cursor"] = cursor_to_dict(cur)
+            self.state["updated_at"] = time.time()
+            atomic_write(self._state_path(), json.dumps(self.state, ensure_ascii=False))
+
+        return {"reset": cur.reset, "new_lines": new_lines, "skipped": skipped, "days_touched": len(days), "offset": cur.offset}
+
+    def _clear(self) -> None:
+        for day in self.days():
+            for path in (self._day_path(day), self._seen_path(day)):
+                if os.path.exists(path):
+                    os.remove(path)
+        self.state = self._empty_state()
+
+    def rebuild(self) -> dict[str, Any]:
+        if os.path.isdir(self.root):
+            shutil.rmtree(self.root)
+        self.state = self._empty_state()
+        return self.refresh()
+
+    # -- read path ----------------------------------------------------------
+
+    def _open_inode(self, inode: int) -> str | None:
+        for cand in (self.source, self.source + ".1", self.source + ".0"):
+            try:
+                if os.stat(cand).st_ino == inode:
+                    return cand
+            except OSError:
+                continue
+        return None
+
+    def _edge_lines(self, h0: float, bucket: dict[str, Any]) -> Iterator[bytes]:
+        paths = [self._open_inode(inode) for inode, _lo, _hi in bucket["spans"]]
+        if None in paths:
+            # A span's file is gone (rotated away): scan the current source for that hour.
+            # Rows of this hour that only existed in the removed file are dropped.
+            yield from iter_window_lines(self.source, h0, h0 + HOUR_S - 1)
+            return
+        for path, (_inode, lo, hi) in zip(paths, bucket["spans"]):
+            with open(path, "rb") as f:
+                f.seek(lo)
+                yield from f.read(hi - lo).split(b"\n")
+
+    def _edge_rows(self, day: str, hour: str, bucket: dict[str, Any]) -> list[dict[str, Any]]:
+        h0 = _hour_start(day, hour)
+        out: list[dict[str, Any]] = []
+        for line in self._edge_lines(h0, bucket):
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+                t = _aware_ts(rec.get("ts"))
+            except Exception:
+                continue
+            if t is not None and h0 <= t < h0 + HOUR_S:
+                out.append(rec)
+        return out
+
+    def window(self, start: datetime | float | None, end: datetime | float | None = None) -> RollupWindow:
+        """Counts for hours fully inside [start, end] + raw rows of the edge hours."""
+        lo = _to_epoch(start)
+        hi = _to_epoch(end)
+        lo_day = _hour_of(lo)[0] if lo is not None else None
+        hi_day = _hour_of(hi)[0] if hi is not None else None
+        win = RollupWindow()
+        for day in self.days():
+            if (lo_day is not None and day < lo_day) or (hi_day is not None and day > hi_day):
+                continue
+            buckets = self._load_json(self._day_path(day), {})
+            for hour in sorted(buckets):
+                h0 = _hour_start(day, hour)
+                h1 = h0 + HOUR_S
+                if (lo is not None and h1 <= lo) or (hi is not None and h0 > hi):
+                    continue
+                if (lo is None or h0 >= lo) and (hi is None or h1 <= hi):
+                    win.merge(buckets[hour], f"{day}T{hour}:00:00Z")
+                    win.full_hours += 1
+                else:
+                    win.edge_rows.extend(self._edge_rows(day, hour, buckets[hour]))
+                    win.edge_hours += 1
+        return win
+
+
+def window_from_env(
+    start: datetime | float | None,
+    end: datetime | float | None = None,
+    source: str = INCIDENTS,
+) -> RollupWindow | None:
+    """Refreshed rollup window, or None when INCIDENT_ROLLUP_DIR is set to ''."""
+    root = os.environ.get("INCIDENT_ROLLUP_DIR", ROLLUP_DIR)
+    if not root:
+        return None
+    store = RollupStore(os.path.expanduser(root), source)
+    store.refresh()
+    return store.window(start, end)
+
+
+def _scan_counts(source: str, lo: float) -> dict[str, list[int]]:
+    counts: dict[str, list[int]] = {}
+    seen: set[str] = set()
+    for line in iter_window_lines(source, lo, None):
+        try:
+            rec = json.loads(line)
+            t = _aware_ts(rec.get("ts"))
+        except Exception:
+            continue
+        if t is None or t < lo:
+            continue
+        key = json.dumps(key_fields(rec), ensure_ascii=False, separators=(",", ":"))
+        cnt = counts.setdefault(key, [0, 0])
+        cnt[0] += 1
+        if rec.get("severity") == "critical":
+            h = dedup_hash(rec)
+            if h not in seen:
+                seen.add(h)
+                cnt[1] += 1
+    return counts
+
+
+def verify(store: RollupStore, hours: list[float], now: float | None = None) -> dict[str, Any]:
+    now = time.time() if now is None else now
+    out: dict[str, Any] = {"ok": True, "windows": {}}
+    for h in hours:
+        lo = now - h * HOUR_S
+        win = store.window(lo, None)
+        got: dict[str, list[int]] = {k: list(v) for k, v in win.counts.items()}
+        seen: set[str] = set()
+        for rec in win.edge_rows:
+            if _aware_ts(rec.get("ts")) < lo:
+                continue
+            key = json.dumps(key_fields(rec), ensure_ascii=False, separators=(",", ":"))
+            cnt = got.setdefault(key, [0, 0])
+            cnt[0] += 1
+            if rec.get("severity") == "critical":
+                dh = dedup_hash(rec)
+                if dh not in seen:
+                    seen.add(dh)
+                    cnt[1] += 1
+        want = _scan_counts(store.source, lo)
+        diff = {k: {"rollup": got.get(k), "scan": want.get(k)} for k in set(got) | set(want) if got.get(k) != want.get(k)}
+        out["windows"][f"{h:g}h"] = {
+            "keys": len(want),
+            "rows": sum(v[0] for v in want.values()),
+            "full_hours": win.full_hours,
+            "edge_hours": win.edge_hours,
+            "mismatches": len(diff),
+            "sample": dict(list(diff.items())[:5]),
+        }
+        if diff:
+            out["ok"] = False
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("cmd", choices=["refresh", "rebuild", "verify"])
+    ap.add_argument("--source", default=INCIDENTS)
+    ap.add_argument("--root", default=ROLLUP_DIR)
+    ap.add_argument("--hours", default="2,24,168", help="verify: comma list of window lengths ending now")
+    args = ap.parse_args()
+
+    store = RollupStore(os.path.expanduser(args.root), args.source)
+    if args.cmd == "rebuild":
+        res = store.rebuild()
+    else:
+        res = store.refresh()
+    if args.cmd != "verify":
+        print(json.dumps({"ok": True, "cmd": args.cmd, **res}, ensure_ascii=False))
+        return
+    out = verify(store, [float(x) for x in args.hours.split(",") if x.strip()])
+    print(json.dumps({"cmd": "verify", **out}, ensure_ascii=False, indent=2))
+    if not out["ok"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""Time-partitioned incidents store with a sparse timestamp index.
+
+Window queries over incidents.jsonl used to scan the whole file and call
+datetime.fromisoformat on every record. The segmented layout keeps one JSONL
+segment per UTC day (or hour) plus a small sidecar index:
+
+  ~/.openclaw/.runtime/incidents.d/
+    _meta.json                {version, granularity, stride, malformed, undated, unsorted_size, src}
+    _unsorted.jsonl           malformed / ts-less lines, verbatim
+    2026-02-26.jsonl          records whose ts falls on that UTC day
+    2026-02-26.idx.json       {first_ts, last_ts, lines, size, src, blocks: [[offset, min_ts, max_ts, n], ...]}
+    incidents-segments.json   compatibility-shim cursor (see sync())
+
+A block covers `stride` consecutive lines; min/max are epoch seconds, so lines
+inside a segment do not have to be sorted. A window query opens only the
+segments whose [first_ts, last_ts] overlaps and seeks straight to the blocks
+that can contain matching records.
+
+Compatibility shim: writers keep appending to the single incidents.jsonl.
+sync() mirrors newly appended lines into segments using the incremental cursor
+(incident_cursor.read_delta); truncation/rewrite of the source rebuilds the
+store from scratch.
+
+Ingest is idempotent. `size` is the number of segment bytes the index
+describes: bytes past it (a crash between the segment and index writes) are
+never read and are cut off before the next append. `src` is the source
+high-water mark per inode ({inode: last line offset + 1}) saved in the same
+index write, so when a crash between the index and cursor writes replays a
+delta, lines a segment already holds are skipped (_meta.json does the same
+for _unsorted.jsonl).
+
+CLI:
+  python3 incident_segments.py sync [--source PATH] [--root DIR] [--granularity day|hour]
+  python3 incident_segments.py rebuild [--source PATH] [--root DIR] [--granularity day|hour]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from typing import Any, Iterable, Iterator
+
+from incident_cursor import FULL_RESETS, load_cursor, parse_ts, read_delta, save_cursor
+
+INCIDENTS = os.path.expanduser("~/.openclaw/workspace/data/incidents.jsonl")
+SEGMENTS_DIR = os.path.expanduser("~/.openclaw/.runtime/incidents.d")
+
+DEFAULT_STRIDE = 256
+# Flush routed lines every N input lines so a full rebuild stays bounded in memory.
+BATCH_LINES = 50_000
+SYNC_CONSUMER = "incidents-segments"
+UNSORTED = "_unsorted"
+
+_BUCKET_FMT = {"day": "%Y-%m-%d", "hour": "%Y-%m-%dT%H"}
+
+
+def _to_epoch(t: datetime | float | None) -> float | None:
+    if t is None or isinstance(t, (int, float)):
+        return t
+    return t.timestamp()
+
+
+class SegmentStore:
+    def __init__(self, root: str = SEGMENTS_DIR, granularity: str = "day", stride: int = DEFAULT_STRIDE):
+        if granularity not in _BUCKET_FMT:
+            raise ValueError(f"granularity must be one of {sorted(_BUCKET_FMT)}")
+        self.root = root
+        self.meta = self._load_meta(granularity, stride)
+
+    # -- layout -------------------------------------------------------------
+
+    def _meta_path(self) -> str:
+        return os.path.join(self.root, "_meta.json")
+
+    def _load_meta(self, granularity: str, stride: int) -> dict[str, Any]:
+        try:
+            with open(self._meta_path(), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {"version": 1, "granularity": granularity, "stride": stride, "malformed": 0, "undated": 0}
+
+    def _save_json(self, path: str, obj: dict[str, Any]) -> None:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def bucket(self, t: float) -> str:
+        fmt = _BUCKET_FMT[self.meta["granularity"]]
+        return datetime.fromtimestamp(t, timezone.utc).strftime(fmt)
+
+    def segment_path(self, name: str) -> str:
+        return os.path.join(self.root, f"{name}.jsonl")
+
+    def index_path(self, name: str) -> str:
+        return os.path.join(self.root, f"{name}.idx.json")
+
+    def load_index(self, name: str) -> dict[str, Any]:
+        try:
+            with open(self.index_path(name), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return {"first_ts": None, "last_ts": None, "lines": 0, "blocks": []}
+
+    def segments(self) -> list[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            fn[: -len(".jsonl")]
+            for fn in os.listdir(self.root)
+            if fn.endswith(".jsonl") and not fn.startswith("_")
+        )
+
+    def malformed_count(self) -> int:
+        return int(self.meta.get("malformed", 0) or 0)
+
+    # -- write path ---------------------------------------------------------
+
+    def append_lines(self, lines: Iterable[str | tuple[int, int, str]]) -> int:
+        """Route raw JSONL lines into segments; one write per touched segment.
+
+        Items may be (inode, offset, line) as from read_delta(offsets=True): lines
+        below the high-water mark of the file they would go to are skipped.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        routed: dict[str, list[tuple[float, str]]] = {}
+        unsorted: list[str] = []
+        marks: dict[str, dict[str, int]] = {}
+        n = 0
+        for item in lines:
+            n += 1
+            src, line = (None, item) if isinstance(item, str) else ((str(item[0]), item[1]), item[2])
+            try:
+                rec = json.loads(line)
+            except Exception:
+                if not self._covered(marks, UNSORTED, src):
+                    self.meta["malformed"] = self.malformed_count() + 1
+                    unsorted.append(line)
+                continue
+            ts = rec.get("ts") if isinstance(rec, dict) else None
+            try:
+                t = parse_ts(ts)
+            except Exception:
+                if not self._covered(marks, UNSORTED, src):
+                    self.meta["undated"] = int(self.meta.get("undated", 0) or 0) + 1
+                    unsorted.append(line)
+                continue
+            name = self.bucket(t)
+            if not self._covered(marks, name, src):
+                routed.setdefault(name, []).append((t, line))
+            if n % BATCH_LINES == 0:
+                self._flush(routed, unsorted, marks)
+                routed, unsorted = {}, []
+
+        self._flush(routed, unsorted, marks)
+        return n
+
+    def _covered(self, marks: dict[str, dict[str, int]], name: str, src: tuple[str, int] | None) -> bool:
+        """True if `name` already holds the source line at `src`; else advance its mark."""
+        if src is None:
+            return False
+        mark = marks.get(name)
+        if mark is None:
+            mark = marks[name] = dict((self.meta if name == UNSORTED else self.load_index(name)).get("src") or {})
+        inode, off = src
+        if off < mark.get(inode, 0):
+            return True
+        if inode not in mark and len(mark) >= 2:
+            del mark[next(iter(mark))]  # keep the current and the rotated-away inode
+        mark[inode] = off + 1
+        return False
+
+    @staticmethod
+    def _cut_to(path: str, size: int | None) -> int:
+        """Drop bytes past `size` (unindexed tail of an interrupted write); returns the size."""
+        actual = os.path.getsize(path) if os.path.exists(path) else 0
+        if size is None:
+            return actual
+        if actual > size:
+            with open(path, "r+b") as f:
+                f.truncate(size)
+        return min(size, actual)
+
+    def _flush(
+        self,
+        routed: dict[str, list[tuple[float, str]]],
+        unsorted: list[str],
+        marks: dict[str, dict[str, int]],
+    ) -> None:
+        for name, items in routed.items():
+            self._append_segment(name, items, marks.get(name))
+        if unsorted:
+            path = self.segment_path(UNSORTED)
+            size = self._cut_to(path, self.meta.get("unsorted_size"))
+            data = "".join(ln + "\n" for ln in unsorted).encode("utf-8")
+            with open(path, "ab") as f:
+                f.write(data)
+            self.meta["unsorted_size"] = size + len(data)
+        if UNSORTED in marks:
+            self.meta["src"] = marks[UNSORTED]
+        self._save_json(self._meta_path(), self.meta)
+
+    def _append_segment(self, name: str, items: list[tuple[float, str]], src: dict[str, int] | None = None) -> None:
+        path = self.segment_path(name)
+        idx = self.load_index(name)
+        stride = int(self.meta.get("stride") or DEFAULT_STRIDE)
+        offset = self._cut_to(path, idx.get("size"))
+        blocks = idx["blocks"]
+        chunks = []
+        for t, line in items:
+            data = (line + "\n").encode("utf-8")
+            if blocks and blocks[-1][3] < stride:
+                blk = blocks[-1]
+                blk[1] = min(blk[1], t)
+                blk[2] = max(blk[2], t)
+                blk[3] += 1
+            else:
+                blocks.append([offset, t, t, 1])
+            offset += len(data)
+            chunks.append(data)
+            idx["first_ts"] = t if idx["first_ts"] is None else min(idx["first_ts"], t)
+            idx["last_ts"] = t if idx["last_ts"] is None else max(idx["last_ts"], t)
+            idx["lines"] += 1
+        with open(path, "ab") as f:
+            f.write(b"".join(chunks))
+        idx["size"] = offset
+        if src is not None:
+            idx["src"] = src
+        self._save_json(self.index_path(name), idx)
+
+    def clear(self) -> None:
+        granularity = self.meta["granularity"]
+        stride = self.meta.get("stride", DEFAULT_STRIDE)
+        if os.path.isdir(self.root):
+            shutil.rmtree(self.root)
+        self.meta = {"version": 1, "granularity": granularity, "stride": stride, "malformed": 0, "undated": 0}
+
+    def sync(self, source: str = INCIDENTS) -> dict[str, Any]:
+        """Compatibility shim: mirror lines appended to `source` into segments."""
+        cur = load_cursor(SYNC_CONSUMER, self.root)
+        lines = read_delta(source, cur, offsets=True)
+        if cur.reset in FULL_RESETS:
+            self.clear()
+        n = self.append_lines(lines)
+        save_cursor(cur, self.root)
+        return {"reset": cur.reset, "new_lines": n, "offset": cur.offset}
+
+    # -- read path ----------------------------------------------------------
+
+    def query(
+        self,
+        start: datetime | float | None = None,
+        end: datetime | float | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """Yield records with start <= ts <= end (bounds inclusive, None = open).
+
+        Order: by segment (time bucket), then file order inside a segment.
+        """
+        lo = _to_epoch(start)
+        hi = _to_epoch(end)
+        lo_name = self.bucket(lo) if lo is not None else None
+        hi_name = self.bucket(hi) if hi is not None else None
+
+        for name in self.segments():
+            if lo_name is not None and name < lo_name:
+                continue
+            if hi_name is not None and name > hi_name:
+                continue
+            idx = self.load_index(name)
+            if not idx["blocks"]:
+                continue
+            if lo is not None and idx["last_ts"] < lo:
+                continue
+            if hi is not None and idx["first_ts"] > hi:
+                continue
+            yield from self._scan_segment(name, idx, lo, hi)
+
+    def _scan_segment(self, name: str, idx: dict[str, Any], lo: float | None, hi: float | None) -> Iterator[dict[str, Any]]:
+        blocks = idx["blocks"]
+        size = idx.get("size")
+        with open(self.segment_path(name), "rb") as f:
+            for i, (offset, bmin, bmax, _n) in enumerate(blocks):
+                if lo is not None and bmax < lo:
+                    continue
+                if hi is not None and bmin > hi:
+                    continue
+                f.seek(offset)
+                if i + 1 < len(blocks):
+                    data = f.read(blocks[i + 1][0] - offset)
+                else:
+                    data = f.read() if size is None else f.read(size - offset)
+                for raw in data.split(b"\n"):
+                    if not raw.strip():
+                        continue
+                    rec = json.loads(raw)
+                    if lo is None and hi is None:
+                        yield rec
+                        continue
+                    t = parse_ts(rec["ts"])
+                    if lo is not None and t < lo:
+                        continue
+                    if hi is not None and t > hi:
+                        continue
+                    yield rec
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("cmd", choices=["sync", "rebuild"])
+    ap.add_argument("--source", default=INCIDENTS)
+    ap.add_argument("--root", default=SEGMENTS_DIR)
+    ap.add_argument("--granularity", choices=sorted(_BUCKET_FMT), default="day")
+    args = ap.parse_args()
+
+    store = SegmentStore(args.root, granularity=args.granularity)
+    if args.cmd == "rebuild":
+        store.meta["granularity"] = args.granularity
+        store.clear()
+    res = store.sync(args.source)
+    print(json.dumps({"ok": True, "cmd": args.cmd, **res, "segments": len(store.segments())}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
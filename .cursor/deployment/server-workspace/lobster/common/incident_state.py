@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+"""Materialized resolved-state index over incidents.jsonl.
+
+Runners used to rebuild "which incidents are still open" on every tick by
+re-reading a window of incidents.jsonl and re-collecting the resolved ref_ids.
+This module keeps that answer materialized and updates it incrementally from
+the per-consumer cursor (incident_cursor.read_delta):
+
+  ~/.openclaw/.runtime/incident-state.json         (id matching, default)
+  ~/.openclaw/.runtime/incident-state-alias.json   (aliases=True)
+    {version, aliases, gen, cursor, seq, pruned_at, malformed, undated,
+     refs:   {ref_id: resolved_t},
+     open:   {key: entry},
+     closed: {key: entry}}
+  <state>.delta   one {gen, cursor, lines} record per refresh since the snapshot
+
+  entry = {key, state, id, ref_id, type, source, jobId, severity, first_seen, last_seen,
+           last_t, resolved_t, resolved_by, count, aliases, rows}
+
+Identity (one entry per incident):
+- default (id matching, as the runners' window filter): key = id; a `resolved`
+  row closes the entry whose id equals its ref_id. Rows without an id share one
+  entry per "#type:source[:jobId]" that nothing closes; their resolved=true
+  rows are dropped on their own, as the window filter does.
+- aliases=True (opt-in): key = id, else ref_id, else "type:source[:jobId]";
+  aliases = the key plus "type:source" and "type:jobId", and a `resolved` row
+  with ref_id closes every open entry that carries that alias. This covers both
+  the Chekist close_key semantics and the refs written by uchastkovy auto-close.
+- rows with resolved=true, or covered by a resolution with a later/equal ts,
+  are born closed; a new occurrence after the resolution reopens the entry.
+
+Open entries keep their recent occurrence rows ([seq, t, row], bounded by
+ROWS_KEEP_S, and by ROWS_MAX for entries that can be closed) so active() can
+answer in O(open) with the same rows a window scan would have produced.
+Closed entries and refs are pruned after `retention_s`; open entries silent
+for that long expire (id-less entries of the default mode, which nothing can
+close, once their rows are pruned). A full (re)build skips lines dated before
+the retention window without decoding them (jsonl_prefilter): they could only
+feed entries the first prune drops, so the index never holds more than it
+does in steady state.
+
+refresh() appends the lines it applied to the .delta journal instead of
+rewriting the snapshot; the snapshot is rewritten (and the journal dropped)
+when the hourly prune runs, on a source reset, or once the journal passes
+JOURNAL_MAX_BYTES. Loading replays the journal records of the snapshot's
+generation. The cursor travels with the state in both files, and refresh()
+holds an flock so concurrent runners do not interleave. A torn journal append
+is ignored (its lines are read again) and forces the next snapshot.
+Truncation/rewrite of the source rebuilds the index.
+
+CLI:
+  python3 incident_state.py refresh [--source PATH] [--state PATH] [--aliases]
+  python3 incident_state.py rebuild [--source PATH] [--state PATH] [--aliases]
+  python3 incident_state.py active [--hours N] [--critical] [--aliases]
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import json
+import os
+import time
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator
+
+from incident_cursor import (
+    FULL_RESETS,
+    atomic_write,
+    cursor_from_dict,
+    cursor_to_dict,
+    parse_ts,
+    read_delta,
+)
+from jsonl_prefilter import TsWindow
+from warm_cache import file_stamp
+
+INCIDENTS = os.path.expanduser("~/.openclaw/workspace/data/incidents.jsonl")
+STATE_PATH = os.path.expanduser("~/.openclaw/.runtime/incident-state.json")
+ALIAS_STATE_PATH = os.path.expanduser("~/.openclaw/.runtime/incident-state-alias.json")
+CONSUMER = "incident-state"
+
+RETENTION_S = 7 * 86400
+PRUNE_EVERY_S = 3600
+# Occurrence rows kept per open entry (enough for the 4h/24h runner windows).
+ROWS_KEEP_S = 24 * 3600
+ROWS_MAX = 200
+JOURNAL_MAX_BYTES = 4 << 20
+# Lines applied in one refresh beyond which the snapshot is cheaper than a delta.
+JOURNAL_MAX_LINES = 10000
+
+
+def _str(v: Any) -> str | None:
+    return v if isinstance(v, str) and v else None
+
+
+def identity(row: dict[str, Any], aliases: bool = False) -> tuple[str | None, list[str]]:
+    """Return (entry key, close aliases) for an incident row."""
+    typ = _str(row.get("type"))
+    src = _str(row.get("source"))
+    job_id = _str(row.get("jobId"))
+
+    if not aliases:
+        rid = _str(row.get("id"))
+        if rid:
+            return rid, [rid]
+        return f"#{typ or ''}:{src or ''}" + (f":{job_id}" if job_id else ""), []
+
+    out = []
+    for a in (_str(row.get("id")), _str(row.get("ref_id"))):
+        if a:
+            out.append(a)
+    if typ and src:
+        out.append(f"{typ}:{src}")
+    if typ and job_id:
+        out.append(f"{typ}:{job_id}")
+
+    key = _str(row.get("id")) or _str(row.get("ref_id"))
+    if key is None and (typ or src):
+        key = f"{typ or ''}:{src or ''}" + (f":{job_id}" if job_id else "")
+    if key is not None and key not in out:
+        out.append(key)
+    return key, out
+
+
+def _chunks(it: Iterable[str], n: int) -> Iterator[list[str]]:
+    it = iter(it)
+    while chunk := list(islice(it, n)):
+        yield chunk
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _empty_state(aliases: bool = False) -> dict[str, Any]:
+    return {
+        "version": 1,
+        "aliases": aliases,
+        "gen": None,
+        "cursor": {},
+        "seq": 0,
+        "pruned_at": 0.0,
+        "malformed": 0,
+        "undated": 0,
+        "refs": {},
+        "open": {},
+        "closed": {},
+    }
+
+
+class IncidentIndex:
+    def __init__(
+        self,
+        path: str = INCIDENTS,
+        state_path: str | None = None,
+        retention_s: int = RETENTION_S,
+        aliases: bool = False,
+    ):
+        self.path = path
+        self.aliases = aliases
+        self.state_path = state_path or (ALIAS_STATE_PATH if aliases else STATE_PATH)
+        self.journal_path = self.state_path + ".delta"
+        self.retention_s = int(retention_s)
+        self._stamp: tuple[Any, Any] | None = None
+        self._compact = False
+        self._alias: dict[str, set[str]] = {}
+        self._read()
+        self.stats: dict[str, Any] = {}
+
+    # -- persistence --------------------------------------------------------
+
+    def _stamps(self) -> tuple[Any, Any]:
+        return file_stamp(self.state_path), file_stamp(self.journal_path)
+
+    def _load(self) -> dict[str, Any]:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("version") == 1 and state.get("aliases") == self.aliases:  # older files: rebuild
+                return state
+        except Exception:
+            pass
+        return _empty_state(self.aliases)
+
+    def _read(self) -> None:
+        """Load the snapshot and replay the journal records of its generation."""
+        stamp = self._stamps()
+        self.state = self._load()
+        self._reindex()
+        self._compact = False
+        gen = self.state.get("gen")
+        self._stamp = stamp if gen else None
+        if not gen:
+            return
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except Exception:
+                        self._compact = True
+                        break
+                    if rec.get("gen") != gen:
+                        continue
+                    self._apply(rec["lines"])
+                    self.state["cursor"] = rec["cursor"]
+        except OSError:
+            pass
+
+    def _save(self) -> None:
+        """Write a full snapshot under a new generation and drop the journal."""
+        self.state["gen"] = f"{os.getpid()}-{time.time_ns()}"
+        self.state["updated_at"] = time.time()
+        atomic_write(self.state_path, json.dumps(self.state, ensure_ascii=False))
+        try:
+            os.remove(self.journal_path)
+        except FileNotFoundError:
+            pass
+        self._compact = False
+        self._stamp = self._stamps()
+
+    def _append(self, lines: list[str]) -> None:
+        rec = {"gen": self.state["gen"], "cursor": self.state["cursor"], "lines": lines}
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._stamp = self._stamps()
+
+    def _reindex(self) -> None:
+        self._alias = {}
+        for key, e in self.state["open"].items():
+            for a in e.get("aliases") or []:
+                self._alias.setdefault(a, set()).add(key)
+
+    # -- ingest -------------------------------------------------------------
+
+    def _close(self, key: str, t: float, by: str) -> None:
+        e = self.state["open"].pop(key)
+        for a in e.get("aliases") or []:
+            keys = self._alias.get(a)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._alias[a]
+        e["state"] = "resolved"
+        e["resolved_t"] = t
+        e["resolved_by"] = by
+        e["rows"] = []
+        self.state["closed"][key] = e
+
+    def _reopen(self, key: str) -> dict[str, Any]:
+        e = self.state["closed"].pop(key)
+        e["state"] = "open"
+        e["resolved_t"] = None
+        e["resolved_by"] = None
+        e["reopened"] = int(e.get("reopened", 0)) + 1
+        self.state["open"][key] = e
+        for a in e.get("aliases") or []:
+            self._alias.setdefault(a, set()).add(key)
+        return e
+
+    def ingest(self, row: dict[str, Any], t: float) -> None:
+        st = self.state
+        st["seq"] += 1
+        seq = st["seq"]
+
+        if row.get("type") == "resolved":
+            ref = _str(row.get("ref_id"))
+            if ref:
+                st["refs"][ref] = max(t, st["refs"].get(ref, t))
+                for key in list(self._alias.get(ref, ())):
+                    self._close(key, t, ref)
+            return
+
+        key, aliases = identity(row, self.aliases)
+        if key is None:
+            key = f"#{seq}"
+        elif not aliases and row.get("resolved") is True:
+            # An id-less row of the default index: its flag resolves only itself.
+            return
+
+        ts = row.get("ts")
+        e = st["open"].get(key)
+        if e is None and key in st["closed"]:
+            if t > (st["closed"][key].get("resolved_t") or 0):
+                e = self._reopen(key)
+            else:
+                # Late occurrence of an incident that is already resolved.
+                st["closed"][key]["count"] += 1
+                return
+        if e is None:
+            e = {
+                "key": key,
+                "state": "open",
+                "id": _str(row.get("id")),
+                "ref_id": _str(row.get("ref_id")),
+                "type": row.get("type"),
+                "source": row.get("source"),
+                "jobId": row.get("jobId"),
+                "severity": row.get("severity"),
+                "first_seen": ts,
+                "last_seen": ts,
+                "last_t": t,
+                "resolved_t": None,
+                "resolved_by": None,
+                "count": 0,
+                "aliases": [],
+                "rows": [],
+            }
+            st["open"][key] = e
+
+        for a in aliases:
+            if a not in e["aliases"]:
+                e["aliases"].append(a)
+                self._alias.setdefault(a, set()).add(key)
+        if t >= e["last_t"]:
+            e["last_seen"] = ts
+            e["last_t"] = t
+        if row.get("severity") is not None:
+            e["severity"] = row.get("severity")
+        e["count"] += 1
+        rows = e["rows"]
+        rows.append([seq, t, row])
+        drop = 0
+        while drop < len(rows) and rows[drop][1] < t - ROWS_KEEP_S:
+            drop += 1
+        if e["aliases"]:
+            drop = max(drop, len(rows) - ROWS_MAX)
+        if drop:
+            del rows[:drop]
+
+        if row.get("resolved") is True:
+            self._close(key, t, "resolved_flag")
+            return
+        for a in aliases:
+            rt = st["refs"].get(a)
+            if rt is not None and rt >= t:
+                self._close(key, rt, a)
+                return
+
+    def _prune(self, now: float) -> int:
+        st = self.state
+        cutoff = now - self.retention_s
+        rows_cutoff = now - ROWS_KEEP_S
+        st["refs"] = {k: v for k, v in st["refs"].items() if v >= cutoff}
+        st["closed"] = {k: e for k, e in st["closed"].items() if (e.get("resolved_t") or 0) >= cutoff}
+        # an entry without aliases can never be closed; once its rows are gone it is inert
+        expired = [k for k, e in st["open"].items()
+                   if e["last_t"] < cutoff or (not e["aliases"] and e["last_t"] < rows_cutoff)]
+        for k in expired:
+            self._close(k, now, "expired")
+            del st["closed"][k]
+        for e in st["open"].values():
+            if e["rows"] and e["rows"][0][1] < rows_cutoff:
+                e["rows"] = [r for r in e["rows"] if r[1] >= rows_cutoff]
+        st["pruned_at"] = now
+        return len(expired)
+
+    def _apply(self, lines: Iterable[str], window: TsWindow | None = None) -> int:
+        """Ingest raw lines (skipping those `window` rejects); returns the number seen."""
+        st = self.state
+        seen = 0
+        for line in lines:
+            seen += 1
+            if window is not None and window.reject(line.encode()):
+                continue
+            try:
+                row = json.loads(line)
+            except Exception:
+                st["malformed"] += 1
+                continue
+            if not isinstance(row, dict):
+                continue
+            try:
+                t = parse_ts(row["ts"])
+            except Exception:
+                st["undated"] += 1
+                continue
+            self.ingest(row, t)
+        return seen
+
+    def refresh(self, now: float | None = None) -> dict[str, Any]:
+        """Apply lines appended since the last refresh and persist the index."""
+        now = time.time() if now is None else now
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        with open(self.state_path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            # Reload under the lock if another runner advanced the index since our
+            # own load/save (a long-lived instance skips the parse otherwise).
+            reloaded = self._stamp is None or self._stamps() != self._stamp
+            if reloaded:
+                self._read()
+            self._stamp = None  # dirty until written: a failed refresh reloads next time
+            prev = self.state.get("cursor") or {}
+            cur = cursor_from_dict(CONSUMER, prev)
+            lines = read_delta(self.path, cur)
+            window = None
+            if cur.reset in FULL_RESETS:
+                self.state = _empty_state(self.aliases)
+                self._alias = {}
+                window = TsWindow(now - self.retention_s)
+            compact = (
+                self._compact
+                or not self.state.get("gen")
+                or now - float(self.state.get("pruned_at") or 0) >= PRUNE_EVERY_S
+                or _size(self.journal_path) > JOURNAL_MAX_BYTES
+            )
+
+            kept: list[str] | None = None if compact else []
+            new_lines = 0
+            for chunk in _chunks(lines, JOURNAL_MAX_LINES):
+                new_lines += self._apply(chunk, window)
+                if kept is not None:
+                    kept.extend(chunk)
+                    if len(kept) > JOURNAL_MAX_LINES:
+                        kept, compact = None, True
+
+            expired = 0
+            if now - float(self.state.get("pruned_at") or 0) >= PRUNE_EVERY_S:
+                expired = self._prune(now)
+                kept, compact = None, True
+
+            self.state["cursor"] = cursor_to_dict(cur)
+            if compact:
+                self._save()
+            elif new_lines or self.state["cursor"] != prev:
+                self._append(kept)
+            else:
+                self._stamp = self._stamps()
+
+        self.stats = {
+            "reset": cur.reset,
+            "new_lines": new_lines,
+            "open": len(self.state["open"]),
+            "closed": len(self.state["closed"]),
+            "expired": expired,
+            "skipped": window.rejected if window is not None else 0,
+            "snapshot": compact,
+            "offset": cur.offset,
+            "reloaded": reloaded,
+        }
+        return self.stats
+
+    def rebuild(self, now: float | None = None) -> dict[str, Any]:
+        """Drop the index and re-ingest the whole source."""
+        self.state = _empty_state(self.aliases)
+        self._save()
+        return self.refresh(now)
+
+    # -- queries ------------------------------------------------------------
+
+    def open_entries(self) -> list[dict[str, Any]]:
+        """Open incidents (without their row history), oldest first."""
+        out = [{k: v for k, v in e.items() if k != "rows"} for e in self.state["open"].values()]
+        out.sort(key=lambda e: e["last_t"])
+        return out
+
+    def state_of(self, ref: str) -> str | None:
+        """'open' / 'resolved' for a key or alias, None if unknown."""
+        if self._alias.get(ref):
+            return "open"
+        if ref in self.state["open"]:
+            return "open"
+        if ref in self.state["closed"] or ref in self.state["refs"]:
+            return "resolved"
+        return None
+
+    def active(
+        self,
+        since: float | None = None,
+        predicate: Callable[[dict[str, Any]], bool] | None = None,
+    ) -> list[dict[str, Any]]:
+        """Occurrence rows of open incidents with ts >= since, in file order."""
+        picked = []
+        for e in self.state["open"].values():
+            if since is not None and e["last_t"] < since:
+                continue
+            for seq, t, row in e["rows"]:
+                if since is not None and t < since:
+                    continue
+                if predicate is not None and not predicate(row):
+                    continue
+                picked.append((seq, row))
+        picked.sort(key=lambda x: x[0])
+        return [row for _, row in picked]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("cmd", choices=["refresh", "rebuild", "active"])
+    ap.add_argument("--source", default=INCIDENTS)
+    ap.add_argument("--state", default=None, help="Default: incident-state.json, or -alias.json with --aliases")
+    ap.add_argument("--aliases", action="store_true", help="Close by type:source / type:jobId aliases too")
+    ap.add_argument("--hours", type=float, default=None)
+    ap.add_argument("--critical", action="store_true", help="Only severity=critical rows")
+    args = ap.parse_args()
+
+    idx = IncidentIndex(args.source, args.state, aliases=args.aliases)
+    if args.cmd == "rebuild":
+        res = idx.rebuild()
+    else:
+        res = idx.refresh()
+    out: dict[str, Any] = {"ok": True, "cmd": args.cmd, **res}
+    if args.cmd == "active":
+        since = time.time() - args.hours * 3600 if args.hours is not None else None
+        pred = (lambda r: r.get("severity") == "critical") if args.critical else None
+        out["active"] = idx.active(since, pred)
+    print(json.dumps(out, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Group-commit writer for incidents.jsonl.
+
+Writers used to either open the file in append mode once per record or read
+the whole file and write it back (execute_uchastkovy.py), which is O(file size)
+and loses records when two runners fire in the same minute.
+
+IncidentWriter batches records in memory and commits them with:
+- one flock(LOCK_EX) on the incidents file itself (bounded wait; on timeout the
+  write still goes out, O_APPEND keeps it from clobbering other writers),
+- a newline fix-up if a previous writer died mid-line,
+- ONE os.write() of the whole batch on an O_APPEND descriptor,
+- optional fsync (INCIDENTS_FSYNC=1 or fsync=True).
+
+Usage:
+  with IncidentWriter() as w:
+      w.add({...})
+      w.add({...})
+  # committed on exit
+
+  append_incidents([{...}, {...}])
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import time
+from typing import Any, Iterable
+
+INCIDENTS = os.path.expanduser("~/.openclaw/workspace/data/incidents.jsonl")
+
+LOCK_TIMEOUT_S = 10.0
+LOCK_POLL_S = 0.05
+
+
+def _env_fsync() -> bool:
+    return os.environ.get("INCIDENTS_FSYNC", "0") == "1"
+
+
+def _lock(fd: int, timeout_s: float) -> bool:
+    deadline = time.monotonic() + timeout_s
+    while True:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(LOCK_POLL_S)
+
+
+class IncidentWriter:
+    def __init__(self, path: str = INCIDENTS, fsync: bool | None = None, lock_timeout_s: float = LOCK_TIMEOUT_S):
+        self.path = path
+        self.fsync = _env_fsync() if fsync is None else fsync
+        self.lock_timeout_s = lock_timeout_s
+        self.pending: list[str] = []
+        self.stats: dict[str, Any] = {"batches": 0, "records": 0, "bytes": 0, "lock_timeouts": 0}
+
+    def add(self, rec: dict[str, Any]) -> None:
+        self.pending.append(json.dumps(rec, ensure_ascii=False))
+
+    def extend(self, recs: Iterable[dict[str, Any]]) -> None:
+        for rec in recs:
+            self.add(rec)
+
+    def flush(self) -> int:
+        """Commit pending records as one append; returns the number written."""
+        if not self.pending:
+            return 0
+        data = ("\n".join(self.pending) + "\n").encode("utf-8")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            locked = _lock(fd, self.lock_timeout_s)
+            if not locked:
+                self.stats["lock_timeouts"] += 1
+            size = os.fstat(fd).st_size
+            if size and os.pread(fd, 1, size - 1) != b"\n":
+                data = b"\n" + data
+            view = memoryview(data)
+            while view:
+                n = os.write(fd, view)
+                view = view[n:]
+            if self.fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)  # releases the flock
+
+        n = len(self.pending)
+        self.stats["batches"] += 1
+        self.stats["records"] += n
+        self.stats["bytes"] += len(data)
+        self.pending = []
+        return n
+
+    def __enter__(self) -> "IncidentWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.flush()
+
+
+def append_incidents(recs: Iterable[dict[str, Any]], path: str = INCIDENTS, fsync: bool | None = None) -> int:
+    """One-shot helper: write `recs` as a single locked append."""
+    w = IncidentWriter(path, fsync=fsync)
+    w.extend(recs)
+    return w.flush()
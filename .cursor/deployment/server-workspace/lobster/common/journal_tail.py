@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""Cursor-based incremental tailer for a systemd --user unit journal.
+
+The mem0 soak probe read `journalctl --since <window>` into memory every run
+and the Участковый drain check ran a second journalctl over "11 minutes ago"
+just to count one phrase, so the same journal entries were fetched, formatted
+and grepped again on every tick by every consumer. JournalTail keeps one
+persisted journal cursor per unit and a rolling cache of parsed entries that
+all consumers share:
+
+  ~/.openclaw/.runtime/cursors/journal-<unit>.json
+    {version, unit, cursor, cache_size, oldest_t, window_s, entries_total,
+     reset, updated_at}
+  ~/.openclaw/.runtime/cursors/journal-<unit>.events.jsonl
+    {"t": <unix seconds>, "msg": <MESSAGE>, "prio": <PRIORITY>}   one per entry
+
+refresh() runs `journalctl -o json --after-cursor <cursor>`, streamed from
+Popen, and parses each new entry once into an event record; __CURSOR of the
+last complete entry becomes the new cursor. Consumers then read
+events(since_t) / messages(since_t) from the cache instead of calling
+journalctl themselves.
+
+- First run (or a cursor journalctl no longer knows, e.g. after vacuuming):
+  the cache is dropped and the last `window_s` are read with --since @<epoch>
+  (reset=init / cursor_lost).
+- A hung journalctl is killed after `timeout_s`; entries read until then are
+  kept and the cursor points at the last of them.
+- cache_size in the state is the cache length that matches the cursor: bytes
+  past it (a crash between cache append and state write) are cut on the next
+  refresh, so no entry is cached twice.
+- The cache is rewritten without entries older than `window_s` once the oldest
+  one is COMPACT_SLACK_S past the window; until then it is only appended to.
+
+refresh() holds an flock, so concurrent consumers do not interleave.
+
+  tail = JournalTail("openclaw-gateway")
+  tail.refresh()
+  msgs = tail.messages(time.time() - 600)
+
+CLI:
+  python3 journal_tail.py refresh [--unit U]
+  python3 journal_tail.py tail [--unit U] [--minutes N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import json
+import os
+import subprocess
+import threading
+import time
+from typing import Any, Iterator
+
+from incident_cursor import STATE_DIR, atomic_write
+
+JOURNALCTL = os.environ.get("LOBSTER_JOURNALCTL", "journalctl")
+
+try:
+    CACHE_WINDOW_S = int(float(os.environ.get("LOBSTER_JOURNAL_CACHE_MIN", "60")) * 60)
+except ValueError:
+    CACHE_WINDOW_S = 3600
+
+COMPACT_SLACK_S = 600
+TIMEOUT_S = 20.0
+
+
+def _message(raw: Any) -> str:
+    # journald exports non-UTF-8 / binary fields as an array of byte values.
+    if isinstance(raw, str):
+        return raw
+    if isinstance(raw, list):
+        try:
+            return bytes(raw).decode("utf-8", "replace")
+        except (TypeError, ValueError):
+            return ""
+    return ""
+
+
+def parse_entry(line: str) -> tuple[str, dict[str, Any]] | None:
+    """One `journalctl -o json` line -> (cursor, event) or None if unusable."""
+    line = line.strip()
+    if not line.startswith("{"):
+        return None  # e.g. "-- No entries --"
+    try:
+        e = json.loads(line)
+        cursor = e["__CURSOR"]
+        t = int(e["__REALTIME_TIMESTAMP"]) / 1e6
+    except (ValueError, KeyError, TypeError):
+        return None
+    ev: dict[str, Any] = {"t": t, "msg": _message(e.get("MESSAGE"))}
+    try:
+        ev["prio"] = int(e["PRIORITY"])
+    except (KeyError, TypeError, ValueError):
+        pass
+    return cursor, ev
+
+
+class JournalTail:
+    def __init__(
+        self,
+        unit: str,
+        window_s: int = CACHE_WINDOW_S,
+        state_dir: str = STATE_DIR,
+        journalctl: str = JOURNALCTL,
+        timeout_s: float = TIMEOUT_S,
+    ):
+        self.unit = unit
+        self.window_s = int(window_s)
+        self.journalctl = journalctl
+        self.timeout_s = timeout_s
+        base = os.path.join(state_dir, f"journal-{unit}")
+        self.state_path = base + ".json"
+        self.cache_path = base + ".events.jsonl"
+        self.stats: dict[str, Any] = {}
+
+    def _load_state(self) -> dict[str, Any]:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                st = json.load(f)
+            if isinstance(st, dict) and st.get("unit") == self.unit:
+                return st
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _cmd(self, cursor: str | None, since_t: float) -> list[str]:
+        cmd = [self.journalctl, "--user", "-u", self.unit, "-o", "json", "--no-pager"]
+        if cursor:
+            return cmd + ["--after-cursor", cursor]
+        return cmd + ["--since", f"@{int(since_t)}"]
+
+    def _stream(self, cmd: list[str]) -> tuple[list[tuple[str, dict[str, Any]]], int, str, bool]:
+        """Run journalctl; (parsed entries, returncode, stderr, timed_out)."""
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+        timed_out = threading.Event()
+
+        def kill() -> None:
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(self.timeout_s, kill)
+        timer.start()
+        entries = []
+        try:
+            assert proc.stdout is not None
+            for line in proc.stdout:
+                # A line cut short by kill() does not parse and is not consumed.
+                parsed = parse_entry(line)
+                if parsed is not None:
+                    entries.append(parsed)
+            err = proc.stderr.read() if proc.stderr is not None else ""
+            rc = proc.wait()
+        finally:
+            timer.cancel()
+        return entries, rc, err.strip(), timed_out.is_set()
+
+    def refresh(self, now: float | None = None) -> dict[str, Any]:
+        """Fetch entries after the persisted cursor into the cache."""
+        now = time.time() if now is None else now
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        with open(self.state_path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            st = self._load_state()
+            cursor = st.get("cursor")
+            reset = None
+            window_s = self.window_s
+            if not cursor or int(st.get("window_s") or 0) < self.window_s:
+                reset, cursor = "init", None
+            else:
+                window_s = int(st["window_s"])  # keep a wider window another consumer asked for
+            since = now - window_s
+
+            entries, rc, err, timed_out = self._stream(self._cmd(cursor, since))
+            if cursor and rc != 0 and not entries and not timed_out:
+                # Cursor no longer in the journal (vacuumed / machine-id change).
+                reset, cursor = "cursor_lost", None
+                entries, rc, err, timed_out = self._stream(self._cmd(None, since))
+            if rc != 0 and not entries and not timed_out:
+                raise RuntimeError(f"journalctl rc={rc}: {err[:400]}")
+
+            if reset is not None:
+                atomic_write(self.cache_path, "")
+                st = {"oldest_t": None, "entries_total": 0}
+            cache_size = int(st.get("cache_size") or 0)
+            oldest_t = st.get("oldest_t")
+            try:
+                size = os.path.getsize(self.cache_path)
+            except OSError:
+                size = -1
+            if size > cache_size:
+                os.truncate(self.cache_path, cache_size)
+            elif size < cache_size:
+                # Cache removed or cut by hand: start it over from the new entries.
+                atomic_write(self.cache_path, "")
+                cache_size, oldest_t = 0, None
+
+            fresh = [ev for _, ev in entries if ev["t"] >= since]
+            compacted = False
+            if oldest_t is not None and oldest_t < since - COMPACT_SLACK_S:
+                kept = [ev for ev in self._read_cache() if ev["t"] >= since] + fresh
+                data = "".join(json.dumps(ev, ensure_ascii=False) + "\n" for ev in kept)
+                atomic_write(self.cache_path, data)
+                cache_size = len(data.encode("utf-8"))
+                oldest_t = min((ev["t"] for ev in kept), default=None)
+                compacted = True
+            elif fresh:
+                data = "".join(json.dumps(ev, ensure_ascii=False) + "\n" for ev in fresh)
+                with open(self.cache_path, "a", encoding="utf-8") as f:
+                    f.write(data)
+                cache_size += len(data.encode("utf-8"))
+                if oldest_t is None:
+                    oldest_t = min(ev["t"] for ev in fresh)
+
+            if entries:
+                cursor = entries[-1][0]
+            atomic_write(self.state_path, json.dumps({
+                "version": 1,
+                "unit": self.unit,
+                "cursor": cursor,
+                "cache_size": cache_size,
+                "oldest_t": oldest_t,
+                "window_s": window_s,
+                "entries_total": int(st.get("entries_total") or 0) + len(entries),
+                "reset": reset,
+                "updated_at": now,
+            }, ensure_ascii=False, indent=2))
+
+        self.stats = {
+            "reset": reset,
+            "new_entries": len(entries),
+            "timed_out": timed_out,
+            "compacted": compacted,
+            "cache_bytes": cache_size,
+        }
+        return self.stats
+
+    def _read_cache(self) -> Iterator[dict[str, Any]]:
+        try:
+            f = open(self.cache_path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            return
+        with f:
+            for line in f:
+                try:
+                    ev = json.loads(line)
+                except ValueError:
+                    continue  # partial line of a concurrent append
+                if isinstance(ev, dict) and isinstance(ev.get("t"), (int, float)):
+                    yield ev
+
+    def events(self, since_t: float | None = None) -> list[dict[str, Any]]:
+        """Cached events with t >= since_t, in journal order."""
+        return [ev for ev in self._read_cache() if since_t is None or ev["t"] >= since_t]
+
+    def messages(self, since_t: float | None = None) -> list[str]:
+        return [ev.get("msg") or "" for ev in self.events(since_t)]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("cmd", choices=["refresh", "tail"])
+    ap.add_argument("--unit", default="openclaw-gateway")
+    ap.add_argument("--minutes", type=float, default=10)
+    args = ap.parse_args()
+
+    tail = JournalTail(args.unit)
+    res = tail.refresh()
+    if args.cmd == "tail":
+        for ev in tail.events(time.time() - args.minutes * 60):
+            print(json.dumps(ev, ensure_ascii=False))
+        return
+    print(json.dumps({"ok": True, "unit": args.unit, **res}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
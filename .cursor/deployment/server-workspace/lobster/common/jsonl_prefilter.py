@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Timestamp-prefix pre-filter for JSONL readers (lazy decode).
+
+Almost every record our tools write is produced by json.dumps with `ts` as the
+first key, so the raw line starts with
+
+  {"ts": "2026-02-26T10:00:00.123456Z", ...
+
+Window readers used to json.loads every line and then parse the timestamp just
+to drop it. iter_window_lines() instead slices the ts value straight out of the
+raw bytes and compares its first 19 chars (YYYY-MM-DDTHH:MM:SS, UTC) with the
+window bounds. Only lines that may be inside the window are returned for full
+decoding.
+
+A line is rejected without decoding only when ALL of these hold:
+- it starts with {"ts": " or {"ts":" and ends with }
+- the value looks like ISO-8601 UTC: ...-..-..T..:..:.. and ends with Z or +00:00
+- its second is strictly before floor(start) or strictly after floor(end)
+
+Anything else (other key order, other offsets, naive timestamps, odd layout)
+is passed through and handled by the caller's normal parse path, so the result
+of a reader is the same as before.
+
+Malformed lines are counted by the caller's parse path, so the filter must
+not hide them. Decoding a rejected line to find out would cost what the filter
+saves, so the check is structural: a line is only rejected when it has the
+whole shape json.dumps writes (the ts prefix above and the closing brace).
+Truncated or interleaved writes break that shape and are passed through, so
+Spec v1 malformed_json_count still sees them. Damage inside an otherwise
+well-formed line outside the window is not counted.
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import datetime, timezone
+from typing import Iterator
+
+_PREFIXES = (b'{"ts": "', b'{"ts":"')
+
+
+def _bound(t: datetime | float | None) -> bytes | None:
+    """Window bound as 19-byte UTC key; None = open (or naive datetime)."""
+    if t is None:
+        return None
+    if isinstance(t, (int, float)):
+        t = datetime.fromtimestamp(t, timezone.utc)
+    if t.tzinfo is None:
+        return None
+    return t.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S").encode("ascii")
+
+
+def raw_ts_key(line: bytes) -> bytes | None:
+    """19-byte UTC second key of a line's leading ts, or None if not recognized."""
+    if line.startswith(_PREFIXES[0]):
+        start = 8
+    elif line.startswith(_PREFIXES[1]):
+        start = 7
+    else:
+        return None
+    if line[-1:] != b"}":
+        return None
+    end = line.find(b'"', start + 19)
+    if end < start + 20:
+        return None
+    v = line[start:end]
+    if v[4:5] != b"-" or v[7:8] != b"-" or v[10:11] != b"T" or v[13:14] != b":" or v[16:17] != b":":
+        return None
+    if v[-1:] != b"Z" and not v.endswith(b"+00:00"):
+        return None
+    return v[:19]
+
+
+class TsWindow:
+    """[start, end] pre-filter; reject() is True only for lines surely outside."""
+
+    def __init__(self, start: datetime | float | None = None, end: datetime | float | None = None):
+        self.lo = _bound(start)
+        self.hi = _bound(end)
+        self.rejected = 0
+
+    @property
+    def active(self) -> bool:
+        return self.lo is not None or self.hi is not None
+
+    def reject(self, line: bytes) -> bool:
+        key = raw_ts_key(line)
+        if key is None:
+            return False
+        if (self.lo is not None and key < self.lo) or (self.hi is not None and key > self.hi):
+            self.rejected += 1
+            return True
+        return False
+
+
+def _iter_raw(f, byte_range: tuple[int, int] | None) -> Iterator[bytes]:
+    if byte_range is None:
+        yield from f
+        return
+    pos, hi = byte_range
+    f.seek(pos)
+    while pos < hi:
+        line = f.readline()
+        if not line:
+            return
+        pos += len(line)
+        yield line
+
+
+def iter_window_lines(
+    path: str,
+    start: datetime | float | None = None,
+    end: datetime | float | None = None,
+    window: TsWindow | None = None,
+    byte_range: tuple[int, int] | None = None,
+) -> Iterator[bytes]:
+    """Yield stripped, non-empty raw lines of `path` that may fall in [start, end].
+
+    json.loads accepts the returned bytes directly. Pass `window` to read the
+    rejected-line counter afterwards. `byte_range=(lo, hi)` limits the scan to
+    lines starting in [lo, hi); lo must be a line start (see split_ranges).
+    """
+    window = window or TsWindow(start, end)
+    with open(path, "rb") as f:
+        lines = _iter_raw(f, byte_range)
+        if not window.active:
+            for line in lines:
+                line = line.strip()
+                if line:
+                    yield line
+            return
+        lo, hi = window.lo, window.hi
+        rejected = 0
+        try:
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                key = raw_ts_key(line)
+                if key is not None and ((lo is not None and key < lo) or (hi is not None and key > hi)):
+                    rejected += 1
+                    continue
+                yield line
+        finally:
+            window.rejected += rejected
+
+
+def split_ranges(path: str, parts: int) -> list[tuple[int, int]]:
+    """Split `path` into up to `parts` byte ranges [lo, hi) that start on line boundaries."""
+    size = os.path.getsize(path)
+    if parts <= 1 or size == 0:
+        return [(0, size)]
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, parts):
+            f.seek(max(size * i // parts - 1, bounds[-1]))
+            f.readline()
+            pos = f.tell()
+            if bounds[-1] < pos < size:
+                bounds.append(pos)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
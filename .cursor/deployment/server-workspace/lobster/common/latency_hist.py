@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""Mergeable log-bucket latency histograms (for the mem0 soak SLO).
+
+mem0_soak_probe.py used to keep a single p95 per 10-minute window, and p95s
+cannot be combined into a daily or weekly p95. Each run now also appends its
+latency samples as a compact histogram:
+
+  ~/.openclaw/.runtime/mem0-soak-hist.jsonl
+    {ts, start, end, source, hist: {v, alpha, n, sum, min, max, zero, b: {index: count}}}
+
+Bucket i holds values in (gamma^(i-1), gamma^i] with gamma = (1+alpha)/(1-alpha),
+so any quantile read back is within `alpha` (1%) relative error of a true
+sample, for any number of samples and any merge order (same scheme as
+DDSketch / HDR log buckets). Merging is adding counts; min/max/n/sum are
+exact. A run covers (start, end]: samples already covered by the previous run
+are not counted again, so ranges of runs merge without double counting.
+
+  h = LogHistogram()
+  for v in samples: h.add(v)
+  h.summary()        # {count, p50, p95, p99, max}
+
+CLI:
+  python3 latency_hist.py query [--path P] [--hours N | --since ISO] [--until ISO] [--by day|week]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Iterator
+
+HIST_PATH = os.path.expanduser("~/.openclaw/.runtime/mem0-soak-hist.jsonl")
+ALPHA = 0.01
+QUANTILES = (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))
+ALMATY = timezone(timedelta(hours=5))
+
+
+def parse_ts(ts: str) -> float:
+    if ts.endswith("Z"):
+        ts = ts[:-1] + "+00:00"
+    return datetime.fromisoformat(ts).timestamp()
+
+
+class LogHistogram:
+    def __init__(self, alpha: float = ALPHA):
+        self.alpha = alpha
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: dict[int, int] = {}
+        self.zero = 0
+        self.n = 0
+        self.sum = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+
+    def index(self, v: float) -> int:
+        return math.ceil(math.log(v) / self._log_gamma)
+
+    def value(self, i: int) -> float:
+        """Representative value of bucket i (relative error <= alpha)."""
+        return 2 * self.gamma ** i / (self.gamma + 1)
+
+    def add(self, v: float, count: int = 1) -> None:
+        if v > 0:
+            i = self.index(v)
+            self.buckets[i] = self.buckets.get(i, 0) + count
+        else:
+            self.zero += count
+        self.n += count
+        self.sum += v * count
+        self.min = v if self.min is None else min(self.min, v)
+        self.max = v if self.max is None else max(self.max, v)
+
+    def merge(self, other: LogHistogram) -> LogHistogram:
+        if other.alpha != self.alpha:
+            raise ValueError(f"alpha mismatch: {self.alpha} != {other.alpha}")
+        for i, c in other.buckets.items():
+            self.buckets[i] = self.buckets.get(i, 0) + c
+        self.zero += other.zero
+        self.n += other.n
+        self.sum += other.sum
+        for v in (other.min, other.max):
+            if v is not None:
+                self.min = v if self.min is None else min(self.min, v)
+                self.max = v if self.max is None else max(self.max, v)
+        return self
+
+    def quantile(self, q: float) -> float | None:
+        if self.n == 0:
+            return None
+        if q >= 1:
+            return self.max
+        rank = q * (self.n - 1)
+        if rank < self.zero:
+            return self.min if self.min is not None and self.min <= 0 else 0.0
+        cum = self.zero
+        for i in sorted(self.buckets):
+            cum += self.buckets[i]
+            if cum > rank:
+                return min(max(self.value(i), self.min), self.max)
+        return self.max
+
+    def summary(self) -> dict[str, Any]:
+        out: dict[str, Any] = {"count": self.n}
+        for name, q in QUANTILES:
+            v = self.quantile(q)
+            out[name] = None if v is None else round(v, 1)
+        out["max"] = self.max
+        return out
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "v": 1,
+            "alpha": self.alpha,
+            "n": self.n,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max,
+            "zero": self.zero,
+            "b": {str(i): c for i, c in sorted(self.buckets.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]) -> LogHistogram:
+        h = cls(float(d.get("alpha", ALPHA)))
+        h.buckets = {int(i): int(c) for i, c in (d.get("b") or {}).items()}
+        h.zero = int(d.get("zero") or 0)
+        h.n = int(d.get("n") or 0)
+        h.sum = float(d.get("sum") or 0)
+        h.min = d.get("min")
+        h.max = d.get("max")
+        return h
+
+    @classmethod
+    def of(cls, values: Iterable[float], alpha: float = ALPHA) -> LogHistogram:
+        h = cls(alpha)
+        for v in values:
+            h.add(v)
+        return h
+
+
+def iter_records(path: str = HIST_PATH) -> Iterator[dict[str, Any]]:
+    try:
+        f = open(path, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+                rec["_end_t"] = parse_ts(rec["end"])
+            except (ValueError, KeyError, TypeError, AttributeError):
+                continue
+            if isinstance(rec.get("hist"), dict):
+                yield rec
+
+
+def last_end(path: str = HIST_PATH, tail_bytes: int = 65536) -> float | None:
+    """End of the newest run recorded in `path` (reads only the file tail)."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - tail_bytes))
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    for raw in reversed(lines):
+        try:
+            return parse_ts(json.loads(raw)["end"])
+        except (ValueError, KeyError, TypeError, AttributeError):
+            continue
+    return None
+
+
+def period_key(t: float, by: str) -> str:
+    d = datetime.fromtimestamp(t, ALMATY).date()
+    if by == "week":
+        iso = d.isocalendar()
+        return f"{iso[0]}-W{iso[1]:02d}"
+    return d.isoformat()
+
+
+def query(
+    path: str = HIST_PATH,
+    since: float | None = None,
+    until: float | None = None,
+    by: str | None = None,
+) -> dict[str, Any]:
+    """Merge runs whose end falls in [since, until); optionally per Almaty day/week."""
+    total = LogHistogram()
+    groups: dict[str, LogHistogram] = {}
+    runs = 0
+    for rec in iter_records(path):
+        t = rec["_end_t"]
+        if (since is not None and t < since) or (until is not None and t >= until):
+            continue
+        h = LogHistogram.from_dict(rec["hist"])
+        total.merge(h)
+        runs += 1
+        if by:
+            groups.setdefault(period_key(t, by), LogHistogram(h.alpha)).merge(h)
+    out: dict[str, Any] = {"runs": runs, **total.summary()}
+    if by:
+        out["by"] = by
+        out["groups"] = {k: groups[k].summary() for k in sorted(groups)}
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("cmd", choices=["query"])
+    ap.add_argument("--path", default=os.environ.get("MEM0_SOAK_HIST_OUT", HIST_PATH))
+    ap.add_argument("--hours", type=float, default=None)
+    ap.add_argument("--since", default=None, help="ISO timestamp (inclusive)")
+    ap.add_argument("--until", default=None, help="ISO timestamp (exclusive)")
+    ap.add_argument("--by", choices=["day", "week"], default=None, help="Group by Asia/Almaty day or ISO week")
+    args = ap.parse_args()
+
+    since = parse_ts(args.since) if args.since else None
+    if args.hours is not None:
+        since = time.time() - args.hours * 3600
+    until = parse_ts(args.until) if args.until else None
+    print(json.dumps({"ok": True, **query(args.path, since, until, args.by)}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
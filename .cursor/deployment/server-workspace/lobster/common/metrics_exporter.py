@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""Prometheus textfile exporter for lobster metrics, heartbeats, soak and incidents.
+
+Health data is spread over append-only JSONL files:
+
+  ~/.openclaw/.runtime/<runner>-lobster-metrics.jsonl   one record per runner run
+  ~/.openclaw/runtime/monitor-heartbeat.jsonl           heartbeats
+  ~/.openclaw/.runtime/mem0-soak.jsonl (+ -hist.jsonl)  soak summary / latency histograms
+  ~/.openclaw/workspace/data/incidents.jsonl            incidents
+
+Every run consumes only the lines appended since the previous run (one
+incident_cursor cursor per file, kept in the exporter state together with the
+aggregates it feeds), updates the aggregates and rewrites one textfile for
+node_exporter's textfile collector (tmp + rename, so a scrape never sees a
+half-written file). Active criticals come from the alias-matching resolved-state
+index (incident_state.IncidentIndex, one entry per incident), which is itself
+incremental. A run costs a stat per file plus the new bytes, so it can fire
+every minute.
+
+  ~/.openclaw/.runtime/metrics-exporter.json   {version, cursors, runners, heartbeat, incidents, soak, soak_hists}
+
+A source that is truncated / rewritten / rotated without its old copy
+(FULL_RESETS) drops its aggregates and is recounted from the start; counters
+then go down once, which Prometheus treats as a counter reset.
+
+Metrics:
+  lobster_runner_runs_total{runner,mode}                 records seen
+  lobster_runner_field_total{runner,field}               sum of integer counter fields (signals_written, ...)
+  lobster_runner_last_run_timestamp_seconds{runner}
+  lobster_runner_last_duration_seconds{runner}           last run
+  lobster_runner_duration_seconds_sum / _count{runner}   summary over all runs
+  lobster_runner_stage_duration_seconds{runner,stage}    last run
+  lobster_runner_peak_rss_bytes{runner}                  last run
+  lobster_heartbeat_timestamp_seconds{source} / lobster_heartbeat_age_seconds{source}
+  lobster_incidents_total{source,severity}
+  lobster_incidents_active_critical{type}                open critical incidents seen within ACTIVE_WINDOW_S
+  lobster_mem0_soak_* (last window) and lobster_mem0_soak_latency_ms{quantile,window} (merged histograms)
+
+The default output is the Prometheus text format the textfile collector reads;
+--openmetrics writes OpenMetrics (counter families without _total, # EOF).
+
+CLI:
+  python3 metrics_exporter.py [--out PATH] [--openmetrics]
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import glob
+import json
+import os
+import time
+from typing import Any
+
+from incident_cursor import (
+    FULL_RESETS,
+    atomic_write,
+    cursor_from_dict,
+    cursor_to_dict,
+    parse_ts,
+    read_delta,
+)
+from incident_state import IncidentIndex
+from latency_hist import LogHistogram
+
+RUNTIME = os.path.expanduser("~/.openclaw/.runtime")
+METRICS_GLOB = os.path.join(RUNTIME, "*-lobster-metrics.jsonl")
+HEARTBEAT = os.path.expanduser("~/.openclaw/runtime/monitor-heartbeat.jsonl")
+SOAK = os.path.join(RUNTIME, "mem0-soak.jsonl")
+SOAK_HIST = os.path.join(RUNTIME, "mem0-soak-hist.jsonl")
+INCIDENTS = os.path.expanduser("~/.openclaw/workspace/data/incidents.jsonl")
+STATE_PATH = os.path.join(RUNTIME, "metrics-exporter.json")
+OUT_PATH = os.path.expanduser(os.environ.get("LOBSTER_TEXTFILE", "~/.openclaw/.runtime/textfile/lobster.prom"))
+
+ACTIVE_WINDOW_S = 4 * 3600
+SOAK_WINDOWS = (("1h", 3600), ("24h", 86400))
+
+# Integer fields that are levels, not per-run counts (exported elsewhere or not summed).
+NOT_COUNTERS = {
+    "runs_total", "duration_ms", "peak_rss_kb", "tracemalloc_peak_kb", "disk_pct",
+    "active_critical_count", "gateway_active",
+}
+
+
+def _empty_state() -> dict[str, Any]:
+    return {
+        "version": 1,
+        "cursors": {},
+        "runners": {},
+        "heartbeat": {},
+        "incidents": {},
+        "soak": {},
+        "soak_hists": [],
+    }
+
+
+def _rows(path: str, st: dict[str, Any]) -> tuple[list[dict[str, Any]], bool]:
+    """New JSON rows of `path` since its cursor; (rows, full_reset)."""
+    cur = cursor_from_dict("metrics-exporter", st["cursors"].get(path) or {})
+    rows = []
+    for line in read_delta(path, cur):
+        try:
+            row = json.loads(line)
+        except ValueError:
+            cur.malformed_total += 1
+            continue
+        if isinstance(row, dict):
+            rows.append(row)
+    if cur.path:
+        st["cursors"][path] = cursor_to_dict(cur)
+    return rows, cur.reset in FULL_RESETS
+
+
+def _ts(row: dict[str, Any]) -> float | None:
+    try:
+        return parse_ts(row["ts"])
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return None
+
+
+def _runner_name(path: str) -> str:
+    return os.path.basename(path)[: -len("-lobster-metrics.jsonl")]
+
+
+def ingest_runner(agg: dict[str, Any], row: dict[str, Any]) -> None:
+    mode = str(row.get("mode") or "unknown")
+    agg.setdefault("runs", {})
+    agg["runs"][mode] = agg["runs"].get(mode, 0) + 1
+    fields = agg.setdefault("fields", {})
+    for k, v in row.items():
+        if k in NOT_COUNTERS or isinstance(v, bool) or not isinstance(v, int):
+            continue
+        fields[k] = fields.get(k, 0) + v
+    d = row.get("duration_ms")
+    has_duration = isinstance(d, (int, float)) and not isinstance(d, bool)
+    if has_duration:
+        agg["duration_ms_sum"] = agg.get("duration_ms_sum", 0) + d
+        agg["duration_count"] = agg.get("duration_count", 0) + 1
+    t = _ts(row)
+    if t is None or t < float(agg.get("last_t") or 0):
+        return
+    agg["last_t"] = t
+    # Last-run gauges describe the newest record only (a record without them clears them).
+    for key in ("duration_ms", "stages", "peak_rss_kb"):
+        agg.pop(key, None)
+    if has_duration:
+        agg["duration_ms"] = d
+    if isinstance(row.get("stage_duration_ms"), dict):
+        agg["stages"] = {k: v for k, v in row["stage_duration_ms"].items() if isinstance(v, (int, float))}
+    if isinstance(row.get("peak_rss_kb"), int):
+        agg["peak_rss_kb"] = row["peak_rss_kb"]
+
+
+def update(st: dict[str, Any], now: float, metrics_glob: str = METRICS_GLOB, heartbeat: str = HEARTBEAT,
+           soak: str = SOAK, soak_hist: str = SOAK_HIST, incidents: str = INCIDENTS) -> dict[str, int]:
+    """Apply appended lines of every source to the aggregates in `st`."""
+    new = {}
+    for path in sorted(glob.glob(metrics_glob)):
+        name = _runner_name(path)
+        rows, reset = _rows(path, st)
+        if reset:
+            st["runners"][name] = {}
+        agg = st["runners"].setdefault(name, {})
+        for row in rows:
+            ingest_runner(agg, row)
+        new[name] = len(rows)
+
+    rows, reset = _rows(heartbeat, st)
+    if reset:
+        st["heartbeat"] = {}
+    for row in rows:
+        t = _ts(row)
+        src = str(row.get("source") or "unknown")
+        if t is not None and t > float(st["heartbeat"].get(src) or 0):
+            st["heartbeat"][src] = t
+    new["heartbeat"] = len(rows)
+
+    rows, reset = _rows(incidents, st)
+    if reset:
+        st["incidents"] = {}
+    for row in rows:
+        key = f"{row.get('source') or 'unknown'}\t{row.get('severity') or 'unknown'}"
+        st["incidents"][key] = st["incidents"].get(key, 0) + 1
+    new["incidents"] = len(rows)
+
+    rows, reset = _rows(soak, st)
+    if reset:
+        st["soak"] = {}
+    for row in rows:
+        s = st["soak"]
+        s["runs"] = s.get("runs", 0) + 1
+        for k in ("capture_failed_count", "qdrant_400_count"):
+            if isinstance(row.get(k), int):
+                s[k + "_sum"] = s.get(k + "_sum", 0) + row[k]
+        t = _ts(row)
+        if t is not None and t >= float(s.get("last_t") or 0):
+            s["last_t"] = t
+            s["last"] = {k: row.get(k) for k in ("capture_failed_count", "qdrant_400_count", "p95_latency_ms")}
+    new["soak"] = len(rows)
+
+    rows, reset = _rows(soak_hist, st)
+    if reset:
+        st["soak_hists"] = []
+    for row in rows:
+        try:
+            st["soak_hists"].append([parse_ts(row["end"]), row["hist"]])
+        except (KeyError, TypeError, ValueError, AttributeError):
+            continue
+    keep = now - max(w for _, w in SOAK_WINDOWS)
+    st["soak_hists"] = [h for h in st["soak_hists"] if h[0] >= keep]
+    new["soak_hist"] = len(rows)
+    return new
+
+
+def active_criticals(index: IncidentIndex, now: float) -> dict[str, int]:
+    out: dict[str, int] = {}
+    for e in index.open_entries():
+        if e.get("severity") == "critical" and e["last_t"] >= now - ACTIVE_WINDOW_S:
+            typ = str(e.get("type") or "unknown")
+            out[typ] = out.get(typ, 0) + 1
+    return out
+
+
+class Family:
+    def __init__(self, name: str, typ: str, help_: str):
+        self.name = name
+        self.typ = typ
+        self.help = help_
+        self.samples: list[tuple[str, dict[str, str], float]] = []
+
+    def add(self, value: float, suffix: str = "", **labels: Any) -> None:
+        self.samples.append((suffix, {k: str(v) for k, v in labels.items()}, value))
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _num(v: float) -> str:
+    if isinstance(v, int):
+        return str(v)
+    return repr(float(v))
+
+
+def render(families: list[Family], openmetrics: bool = False) -> str:
+    out = []
+    for fam in families:
+        if not fam.samples:
+            continue
+        total = fam.typ == "counter"
+        header = fam.name if openmetrics or not total else fam.name + "_total"
+        out.append(f"# HELP {header} {fam.help}")
+        out.append(f"# TYPE {header} {fam.typ}")
+        for suffix, labels, value in fam.samples:
+            name = fam.name + suffix + ("_total" if total else "")
+            lab = ",".join(f'{k}="{_escape(v)}"' for k, v in sorted(labels.items()))
+            out.append(f"{name}{{{lab}}} {_num(value)}" if lab else f"{name} {_num(value)}")
+    if openmetrics:
+        out.append("# EOF")
+    return "\n".join(out) + "\n"
+
+
+def build(st: dict[str, Any], active: dict[str, int], now: float) -> list[Family]:
+    runs = Family("lobster_runner_runs", "counter", "Runner metrics records seen.")
+    fields = Family("lobster_runner_field", "counter", "Sum of integer counter fields over runner records.")
+    last = Family("lobster_runner_last_run_timestamp_seconds", "gauge", "Time of the newest runner record.")
+    dur_last = Family("lobster_runner_last_duration_seconds", "gauge", "Duration of the newest runner run.")
+    dur = Family("lobster_runner_duration_seconds", "summary", "Runner run durations.")
+    stage = Family("lobster_runner_stage_duration_seconds", "gauge", "Per-stage duration of the newest runner run.")
+    rss = Family("lobster_runner_peak_rss_bytes", "gauge", "Peak RSS of the newest runner run.")
+    for name, agg in sorted(st["runners"].items()):
+        for mode, n in sorted((agg.get("runs") or {}).items()):
+            runs.add(n, runner=name, mode=mode)
+        for field, n in sorted((agg.get("fields") or {}).items()):
+            fields.add(n, runner=name, field=field)
+        if agg.get("last_t"):
+            last.add(agg["last_t"], runner=name)
+        if "duration_ms" in agg:
+            dur_last.add(agg["duration_ms"] / 1000, runner=name)
+        if agg.get("duration_count"):
+            dur.add(agg["duration_ms_sum"] / 1000, "_sum", runner=name)
+            dur.add(agg["duration_count"], "_count", runner=name)
+        for s, ms in sorted((agg.get("stages") or {}).items()):
+            stage.add(ms / 1000, runner=name, stage=s)
+        if "peak_rss_kb" in agg:
+            rss.add(agg["peak_rss_kb"] * 1024, runner=name)
+
+    hb_ts = Family("lobster_heartbeat_timestamp_seconds", "gauge", "Time of the newest heartbeat per source.")
+    hb_age = Family("lobster_heartbeat_age_seconds", "gauge", "Seconds since the newest heartbeat per source.")
+    for src, t in sorted(st["heartbeat"].items()):
+        hb_ts.add(t, source=src)
+        hb_age.add(round(max(0.0, now - t), 3), source=src)
+
+    inc = Family("lobster_incidents", "counter", "Incident records by source and severity.")
+    for key, n in sorted(st["incidents"].items()):
+        src, sev = key.split("\t", 1)
+        inc.add(n, source=src, severity=sev)
+    crit = Family("lobster_incidents_active_critical", "gauge", "Open critical incidents seen in the active window, by type.")
+    for typ, n in sorted(active.items()):
+        crit.add(n, type=typ)
+
+    soak = st["soak"]
+    soak_runs = Family("lobster_mem0_soak_runs", "counter", "mem0 soak probe runs.")
+    soak_sum = Family("lobster_mem0_soak_events", "counter", "mem0 soak events summed over windows.")
+    soak_last = Family("lobster_mem0_soak_last", "gauge", "Values of the newest mem0 soak window.")
+    if soak.get("runs"):
+        soak_runs.add(soak["runs"])
+        for k in ("capture_failed_count", "qdrant_400_count"):
+            soak_sum.add(soak.get(k + "_sum", 0), kind=k[: -len("_count")])
+        for k, v in sorted((soak.get("last") or {}).items()):
+            if isinstance(v, (int, float)) and not isinstance(v, bool):
+                soak_last.add(v, field=k)
+    lat = Family("lobster_mem0_soak_latency_ms", "gauge", "mem0 latency quantiles from merged soak histograms.")
+    for wname, w in SOAK_WINDOWS:
+        h = LogHistogram()
+        for t, d in st["soak_hists"]:
+            if t >= now - w:
+                h.merge(LogHistogram.from_dict(d))
+        if h.n:
+            for q in (0.5, 0.95, 0.99):
+                lat.add(round(h.quantile(q), 1), quantile=q, window=wname)
+            lat.add(h.max, quantile="1", window=wname)
+    return [runs, fields, last, dur_last, dur, stage, rss, hb_ts, hb_age, inc, crit,
+            soak_runs, soak_sum, soak_last, lat]
+
+
+def export(
+    out_path: str = OUT_PATH,
+    state_path: str = STATE_PATH,
+    openmetrics: bool = False,
+    now: float | None = None,
+    index: IncidentIndex | None = None,
+    **sources: str,
+) -> dict[str, Any]:
+    now = time.time() if now is None else now
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    with open(state_path + ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                st = json.load(f)
+            if st.get("version") != 1:
+                st = _empty_state()
+        except (OSError, ValueError):
+            st = _empty_state()
+        new = update(st, now, **sources)
+        atomic_write(state_path, json.dumps(st, ensure_ascii=False))
+
+    if index is None:
+        index = IncidentIndex(sources.get("incidents", INCIDENTS), aliases=True)
+    index.refresh(now)
+    families = build(st, active_criticals(index, now), now)
+    atomic_write(out_path, render(families, openmetrics))
+    return {"new_lines": new, "series": sum(len(f.samples) for f in families), "out": out_path}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", default=OUT_PATH)
+    ap.add_argument("--state", default=STATE_PATH)
+    ap.add_argument("--openmetrics", action="store_true", help="OpenMetrics exposition instead of Prometheus text")
+    args = ap.parse_args()
+    t0 = time.monotonic()
+    res = export(args.out, args.state, args.openmetrics)
+    print(json.dumps({"ok": True, **res, "elapsed_ms": round((time.monotonic() - t0) * 1000, 1)}, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""Process-pool scan of a large JSONL file by newline-aligned byte ranges.
+
+Opt-in for long history investigations (chekist_aggregator_v1 --workers,
+uchastkovy_gate_calc --workers). The file is split with
+jsonl_prefilter.split_ranges, every range is parsed and filtered by `fn` in a
+worker process, and the partial results come back IN RANGE ORDER, so callers
+can merge them exactly as the serial scan would have produced them (dedup
+first-occurrence, sample order).
+
+  fn(path, lo, hi, *args) -> partial     # top-level function (picklable)
+  scan_ranges(fn, path, workers, *args) -> [partial for range 0, range 1, ...]
+
+Small files (or workers <= 1) are scanned in-process as one range.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+from jsonl_prefilter import split_ranges
+
+# Ranges per worker (load balancing) and the smallest range worth a task.
+RANGES_PER_WORKER = 4
+MIN_RANGE_BYTES = 4 * 1024 * 1024
+
+
+def plan_ranges(path: str, workers: int) -> list[tuple[int, int]]:
+    size = os.path.getsize(path)
+    parts = min(max(1, workers) * RANGES_PER_WORKER, max(1, size // MIN_RANGE_BYTES))
+    return split_ranges(path, parts)
+
+
+def _call(task: tuple) -> Any:
+    fn, path, lo, hi, args = task
+    return fn(path, lo, hi, *args)
+
+
+def scan_ranges(fn: Callable[..., Any], path: str, workers: int, *args: Any) -> list[Any]:
+    """Run fn over the byte ranges of `path`; results are returned in file order."""
+    ranges = plan_ranges(path, workers)
+    if workers <= 1 or len(ranges) == 1:
+        return [fn(path, lo, hi, *args) for lo, hi in ranges]
+    tasks = [(fn, path, lo, hi, args) for lo, hi in ranges]
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        return list(pool.map(_call, tasks))
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""Concurrent host probes with per-probe timeouts and a total deadline.
+
+The Участковый tick used to run systemctl, df, git status, journalctl|grep,
+ps|awk and check-config-drift.py one after another, so a tick cost the sum of
+all probes. run_probes() starts every probe in its own daemon thread and
+collects results until all are done, each probe's own timeout passes, or the
+total deadline passes, whichever comes first: a tick costs about as much as the
+slowest probe.
+
+  results = run_probes([
+      sh_probe("gateway", ["systemctl", "--user", "is-active", "openclaw-gateway"], timeout_s=10),
+      sh_probe("disk", ["df", "-P", "/"], timeout_s=10),
+      Probe("cron", lambda: load_jobs(), timeout_s=5),
+  ], deadline_s=20)
+  results["gateway"].value      # (rc, stdout, stderr) for sh_probe
+  probe_summary(results)        # {name: {ok, latency_ms[, timed_out][, error]}} for metrics
+
+sh_probe passes its timeout to subprocess.run, so a hung command is killed
+rather than left behind. A plain callable that overruns is abandoned (its
+daemon thread keeps running until it returns but no longer blocks the tick)
+and reported as timed_out. Probes must be independent of each other.
+
+concurrent=False runs the probes one after another in the calling thread, for
+probes that go through a client not known to be thread-safe. The deadline is
+then checked between probes (the rest are reported as "deadline exceeded"
+without running); a plain callable cannot be cut off, only sh_probe's timeout
+still applies.
+"""
+
+from __future__ import annotations
+
+import queue
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+
+@dataclass
+class Probe:
+    name: str
+    fn: Callable[[], Any]
+    timeout_s: float = 15.0
+
+
+@dataclass
+class ProbeResult:
+    name: str
+    ok: bool
+    value: Any = None
+    error: str | None = None
+    latency_ms: float = 0.0
+    timed_out: bool = False
+
+
+def sh(cmd: list[str], timeout: float = 15) -> tuple[int, str, str]:
+    p = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    return p.returncode, p.stdout.strip(), p.stderr.strip()
+
+
+def sh_probe(name: str, cmd: list[str], timeout_s: float = 15.0) -> Probe:
+    """Probe running `cmd`; value = (returncode, stdout, stderr), stripped."""
+    return Probe(name, lambda: sh(cmd, timeout=timeout_s), timeout_s)
+
+
+def _call(p: Probe) -> ProbeResult:
+    t = time.monotonic()
+    try:
+        res = ProbeResult(p.name, True, value=p.fn())
+    except subprocess.TimeoutExpired:
+        res = ProbeResult(p.name, False, error=f"timeout after {p.timeout_s}s", timed_out=True)
+    except Exception as e:
+        res = ProbeResult(p.name, False, error=f"{type(e).__name__}: {e}"[:400])
+    res.latency_ms = round((time.monotonic() - t) * 1000, 1)
+    return res
+
+
+def run_probes(
+    probes: Iterable[Probe],
+    deadline_s: float | None = None,
+    concurrent: bool = True,
+) -> dict[str, ProbeResult]:
+    """Run probes (concurrently by default); results keyed by name, in the order given."""
+    probes = list(probes)
+    t0 = time.monotonic()
+    end = t0 + deadline_s if deadline_s is not None else float("inf")
+    if not concurrent:
+        out: dict[str, ProbeResult] = {}
+        for p in probes:
+            if time.monotonic() >= end:
+                out[p.name] = ProbeResult(p.name, False, error="deadline exceeded", timed_out=True)
+            else:
+                out[p.name] = _call(p)
+        return out
+
+    done: queue.Queue[ProbeResult] = queue.Queue()
+
+    def call(p: Probe) -> None:
+        done.put(_call(p))
+
+    for p in probes:
+        threading.Thread(target=call, args=(p,), name=f"probe-{p.name}", daemon=True).start()
+
+    own = {p.name: t0 + p.timeout_s for p in probes}
+    limit = {name: min(t, end) for name, t in own.items()}
+
+    results: dict[str, ProbeResult] = {}
+    while len(results) < len(probes):
+        pending = [name for name in limit if name not in results]
+        wait = min(limit[name] for name in pending) - time.monotonic()
+        try:
+            res = done.get(timeout=max(0.0, wait))
+            results.setdefault(res.name, res)
+            continue
+        except queue.Empty:
+            pass
+        now = time.monotonic()
+        for name in pending:
+            if limit[name] <= now and name not in results:
+                results[name] = ProbeResult(
+                    name,
+                    False,
+                    error="deadline exceeded" if limit[name] < own[name] else "timeout",
+                    latency_ms=round((now - t0) * 1000, 1),
+                    timed_out=True,
+                )
+    return {p.name: results[p.name] for p in probes}
+
+
+def probe_summary(results: dict[str, ProbeResult]) -> dict[str, dict[str, Any]]:
+    """Compact per-probe record for heartbeat/metrics lines."""
+    out: dict[str, dict[str, Any]] = {}
+    for name, r in results.items():
+        row: dict[str, Any] = {"ok": r.ok, "latency_ms": r.latency_ms}
+        if r.timed_out:
+            row["timed_out"] = True
+        if r.error:
+            row["error"] = r.error
+        out[name] = row
+    return out
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""Optional resident host for the lobster runners.
+
+Every runner is normally its own cron-launched python3 process, so each tick
+pays interpreter startup, imports and a fresh parse of incidents.jsonl /
+jobs.json. This process imports the existing runner scripts once and calls
+their main() on the same cadences as the cron jobs, in one interpreter:
+
+- warm caches (warm_cache.py) are shared between runners: the IncidentIndex
+  and IncidentWindow instances, ~/.openclaw/cron/jobs.json, model pricing;
+- runners run one at a time, each in a worker thread with a timeout. An
+  exception or SystemExit fails only that run; a run that exceeds its timeout
+  is abandoned (the runner is skipped until its thread ends) and the warm
+  caches are dropped so the stuck thread shares nothing with the others;
+- a runner script is re-imported when its file changes (deploys take effect
+  without restarting the host);
+- runners still write their own metrics/heartbeat records exactly as under
+  cron, so the cutover verifiers work unchanged. The host only adds one record
+  per run to ~/.openclaw/.runtime/lobster-scheduler.jsonl:
+    {ts, runner, ok, duration_ms, timed_out, exit?, error?, cache}
+
+Cadences mirror data/cron-jobs.json; slots are aligned to Asia/Almaty local
+time (every_s, plus offset_s past the slot: git-sync plan-only is "5 */4 * * *").
+Disable the matching cron jobs for the runners hosted here. A single instance
+is enforced with an flock.
+
+CLI:
+  python3 resident_scheduler.py [--only NAME,...] [--once] [--list] [--timeout S]
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import importlib.util
+import json
+import math
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from types import ModuleType
+from typing import Any
+
+import warm_cache
+from bounded_log import BoundedLog
+
+LOBSTER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNTIME = os.path.expanduser("~/.openclaw/.runtime")
+LOG_PATH = os.path.join(RUNTIME, "lobster-scheduler.jsonl")
+LOCK_PATH = os.path.join(RUNTIME, "lobster-scheduler.lock")
+LOG_MAX_LINES = 5000
+TZ_OFFSET_S = 5 * 3600  # Asia/Almaty
+DEFAULT_TIMEOUT_S = 600
+
+
+@dataclass(frozen=True)
+class Runner:
+    name: str
+    script: str  # relative to LOBSTER_DIR
+    every_s: int
+    offset_s: int = 0
+    timeout_s: int = DEFAULT_TIMEOUT_S
+    enabled: bool = True
+
+
+RUNNERS = [
+    Runner("chekist", "chekist/runner_real.py", 3600),
+    Runner("uchastkovy", "uchastkovy/runner_real.py", 3600),
+    Runner("git-sync", "git-sync/runner_real.py", 3600),
+    Runner("git-sync-plan", "git-sync/runner_plan_only.py", 4 * 3600, offset_s=300),
+    Runner("mekhanik", "mekhanik/runner_real.py", 1800),
+    Runner("mekhanik-plan", "mekhanik/runner_plan_only.py", 1800, enabled=False),
+    Runner("economist", "economist/runner_plan_only.py", 4 * 3600),
+    Runner("wendy", "wendy/runner_plan_only.py", 1800),
+    Runner("marta", "marta/runner_plan_only.py", 1800),
+]
+
+
+def iso_now() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def next_due(r: Runner, now: float) -> float:
+    """First slot strictly after `now` (local-time aligned, like the cron schedules)."""
+    local = now + TZ_OFFSET_S - r.offset_s
+    k = math.floor(local / r.every_s) + 1
+    return k * r.every_s + r.offset_s - TZ_OFFSET_S
+
+
+class Scheduler:
+    def __init__(
+        self,
+        runners: list[Runner],
+        lobster_dir: str = LOBSTER_DIR,
+        log_path: str = LOG_PATH,
+        timeout_s: float | None = None,
+    ):
+        self.runners = runners
+        self.lobster_dir = lobster_dir
+        self.log = BoundedLog(log_path, LOG_MAX_LINES)
+        self.timeout_s = timeout_s
+        self._modules: dict[str, tuple[tuple[int, int, int] | None, ModuleType]] = {}
+        self._busy: dict[str, threading.Thread] = {}
+
+    def load(self, r: Runner) -> ModuleType:
+        """Import the runner script once; re-import when the file changes."""
+        path = os.path.join(self.lobster_dir, r.script)
+        stamp = warm_cache.file_stamp(path)
+        hit = self._modules.get(r.name)
+        if hit is not None and hit[0] == stamp:
+            return hit[1]
+        # Runners import siblings from their own directory (mekhanik/runtime_state.py).
+        rdir = os.path.dirname(path)
+        if rdir not in sys.path:
+            sys.path.append(rdir)
+        mod_name = "lobster_runner_" + r.name.replace("-", "_")
+        spec = importlib.util.spec_from_file_location(mod_name, path)
+        if spec is None or spec.loader is None:
+            raise ImportError(f"cannot load {path}")
+        mod = importlib.util.module_from_spec(spec)
+        sys.modules[mod_name] = mod  # dataclasses resolve annotations via sys.modules
+        try:
+            spec.loader.exec_module(mod)
+        except BaseException:
+            sys.modules.pop(mod_name, None)
+            raise
+        if not callable(getattr(mod, "main", None)):
+            raise ImportError(f"{path} has no main()")
+        self._modules[r.name] = (stamp, mod)
+        return mod
+
+    def busy(self, r: Runner) -> bool:
+        th = self._busy.get(r.name)
+        if th is not None and not th.is_alive():
+            del self._busy[r.name]
+            th = None
+        return th is not None
+
+    def run_one(self, r: Runner) -> dict[str, Any]:
+        rec: dict[str, Any] = {"ts": iso_now(), "runner": r.name, "ok": False, "timed_out": False}
+        if self.busy(r):
+            rec["skipped"] = "previous run still running"
+            self.log.append([rec])
+            return rec
+
+        before = dict(warm_cache.stats)
+        t0 = time.monotonic()
+        result: dict[str, Any] = {}
+
+        def target() -> None:
+            try:
+                self.load(r).main()
+                result["ok"] = True
+            except SystemExit as e:
+                result["ok"] = e.code in (None, 0)
+                result["exit"] = e.code if isinstance(e.code, int) or e.code is None else str(e.code)
+            except BaseException as e:
+                result["ok"] = False
+                result["error"] = f"{type(e).__name__}: {e}"[:500]
+                result["traceback"] = traceback.format_exc(limit=8)[-2000:]
+
+        th = threading.Thread(target=target, name=f"lobster-{r.name}", daemon=True)
+        th.start()
+        th.join(self.timeout_s if self.timeout_s is not None else r.timeout_s)
+        rec["duration_ms"] = round((time.monotonic() - t0) * 1000, 1)
+        if th.is_alive():
+            self._busy[r.name] = th
+            warm_cache.clear()
+            rec["timed_out"] = True
+            rec["error"] = "timeout"
+        else:
+            rec.update(result)
+        rec["cache"] = {k: warm_cache.stats[k] - before.get(k, 0) for k in warm_cache.stats}
+        self.log.append([rec])
+        return rec
+
+    def run_all(self) -> list[dict[str, Any]]:
+        return [self.run_one(r) for r in self.runners]
+
+    def serve(self, stop: threading.Event) -> None:
+        due = {r.name: next_due(r, time.time()) for r in self.runners}
+        while not stop.is_set():
+            now = time.time()
+            for r in sorted(self.runners, key=lambda r: due[r.name]):
+                if stop.is_set():
+                    break
+                if due[r.name] <= now:
+                    self.run_one(r)
+                    # Slots missed while other runners ran are skipped, not queued.
+                    due[r.name] = next_due(r, time.time())
+            stop.wait(max(0.0, min(60.0, min(due.values()) - time.time())))
+
+
+def select(only: str | None) -> list[Runner]:
+    if not only:
+        return [r for r in RUNNERS if r.enabled]
+    names = [n.strip() for n in only.split(",") if n.strip()]
+    by_name = {r.name: r for r in RUNNERS}
+    unknown = [n for n in names if n not in by_name]
+    if unknown:
+        raise SystemExit(f"unknown runner(s): {', '.join(unknown)}")
+    return [by_name[n] for n in names]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--only", default=None, help="Comma-separated runner names (default: all enabled)")
+    ap.add_argument("--once", action="store_true", help="Run the selected runners once and exit")
+    ap.add_argument("--list", action="store_true", help="Print the runner table and next slots")
+    ap.add_argument("--timeout", type=float, default=None, help="Override per-runner timeout (seconds)")
+    args = ap.parse_args()
+
+    runners = select(args.only)
+    if args.list:
+        now = time.time()
+        for r in RUNNERS:
+            nxt = datetime.fromtimestamp(next_due(r, now), timezone.utc).isoformat().replace("+00:00", "Z")
+            print(json.dumps({"runner": r.name, "script": r.script, "every_s": r.every_s, "offset_s": r.offset_s,
+                              "enabled": r.enabled, "selected": r in runners, "next": nxt}))
+        return 0
+
+    os.makedirs(RUNTIME, exist_ok=True)
+    lock = open(LOCK_PATH, "a")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        print(json.dumps({"ok": False, "error": "another resident scheduler holds " + LOCK_PATH}))
+        return 1
+
+    sched = Scheduler(runners, timeout_s=args.timeout)
+    if args.once:
+        recs = sched.run_all()
+        print(json.dumps({"ok": all(r["ok"] for r in recs),
+                          "runs": [{k: r.get(k) for k in ("runner", "ok", "duration_ms", "timed_out", "error")}
+                                   for r in recs]}, ensure_ascii=False))
+        return 0 if all(r["ok"] for r in recs) else 1
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    sched.serve(stop)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
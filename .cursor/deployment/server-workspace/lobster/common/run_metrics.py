@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""Per-stage timing and peak memory for lobster runner metrics records.
+
+Every runner appends one record per run to ~/.openclaw/.runtime/*-lobster-metrics.jsonl.
+RunPerf adds where the time went, so a runner that slows down as
+incidents.jsonl grows shows up in its own metrics before it starts
+overlapping its cron slot:
+
+  perf = RunPerf()
+  with perf.stage("read"):
+      events = ...
+  with perf.stage("classify"):
+      ...
+  append_jsonl(METRICS, perf.finish(metrics))
+
+finish() adds to the record (in place, and returns it):
+  stage_duration_ms  {"read": 12.3, "classify": 0.4, ...}  wall time per stage;
+                     a stage entered twice adds up
+  duration_ms        wall time since RunPerf() was created
+  peak_rss_kb        peak resident set of the process (ru_maxrss; None if unavailable)
+
+With LOBSTER_TRACEMALLOC=<N> set, tracemalloc runs from RunPerf() on and
+finish() also adds
+  tracemalloc_peak_kb  peak traced Python allocation
+  tracemalloc_top      N largest live allocation sites [{"where": "file.py:12", "size_kb", "count"}]
+(tracing slows the run down; meant for one-off investigations).
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+try:
+    import resource
+except ImportError:  # non-Unix
+    resource = None
+
+TRACEMALLOC_ENV = "LOBSTER_TRACEMALLOC"
+TRACEMALLOC_DEFAULT_TOP = 10
+
+
+def peak_rss_kb() -> int | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def tracemalloc_top_n() -> int:
+    """Number of allocation sites to report (0 = tracing off)."""
+    raw = os.environ.get(TRACEMALLOC_ENV, "").strip()
+    if not raw or raw == "0":
+        return 0
+    try:
+        return max(0, int(raw))
+    except ValueError:
+        return TRACEMALLOC_DEFAULT_TOP
+
+
+class RunPerf:
+    def __init__(self) -> None:
+        self.t0 = time.perf_counter()
+        self.stages: dict[str, float] = {}
+        self.top_n = tracemalloc_top_n()
+        self._own_trace = False
+        if self.top_n and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_trace = True
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - t) * 1000
+
+    def fields(self) -> dict[str, Any]:
+        out: dict[str, Any] = {
+            "stage_duration_ms": {k: round(v, 1) for k, v in self.stages.items()},
+            "duration_ms": round((time.perf_counter() - self.t0) * 1000, 1),
+            "peak_rss_kb": peak_rss_kb(),
+        }
+        if self.top_n and tracemalloc.is_tracing():
+            _cur, peak = tracemalloc.get_traced_memory()
+            stats = tracemalloc.take_snapshot().statistics("lineno")[: self.top_n]
+            out["tracemalloc_peak_kb"] = peak // 1024
+            out["tracemalloc_top"] = [
+                {
+                    "where": f"{os.path.basename(s.traceback[0].filename)}:{s.traceback[0].lineno}",
+                    "size_kb": round(s.size / 1024, 1),
+                    "count": s.count,
+                }
+                for s in stats
+            ]
+        return out
+
+    def finish(self, rec: dict[str, Any]) -> dict[str, Any]:
+        """Add the timing/memory fields to a metrics record (in place) and return it."""
+        rec.update(self.fields())
+        if self._own_trace:
+            tracemalloc.stop()
+            self._own_trace = False
+        return rec
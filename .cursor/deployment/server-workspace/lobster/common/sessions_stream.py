@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""Streaming reader for the sessions registry (sessions.json).
+
+~/.openclaw/agents/main/sessions/sessions.json is one JSON object keyed by
+session key, and it grows with every cron :run: session. json.load() keeps
+the whole registry (every nested field of every session) in memory at once.
+iter_sessions() walks the top-level object instead and yields one
+(key, session) pair at a time, with the session trimmed to the fields the
+economist tools read:
+
+  for key, s in iter_sessions(SESSIONS_JSON):
+      s.get("updatedAt"), s.get("model"), ...
+
+Peak memory is one read chunk plus one session, whatever the registry size.
+
+Backends:
+- "ijson": ijson's yajl2_c (C) backend, used by "auto" when it is installed
+- "python": chunked text reads; keys go through json's scanstring and values
+  through JSONDecoder.raw_decode (both C-accelerated in CPython). A value that
+  runs past the end of the buffer is retried after the next chunk is read.
+
+Values that are not objects are yielded as they are (callers count them as
+malformed). Invalid JSON, or a top-level value that is not an object, raises
+ValueError like json.load. Unlike json.load, a key that appears twice is
+yielded twice (json.load keeps the last value).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from json.decoder import scanstring
+from typing import Any, Iterable, Iterator
+
+try:
+    import ijson
+
+    _IJSON = ijson.get_backend("yajl2_c")
+except ImportError:
+    ijson = None
+    _IJSON = None
+
+SESSIONS_JSON = os.path.expanduser("~/.openclaw/agents/main/sessions/sessions.json")
+
+# Fields read by economist_collect, economist/runner_plan_only and soak_post_check.
+SESSION_FIELDS = ("updatedAt", "model", "modelProvider", "inputTokens", "outputTokens", "sessionId")
+
+CHUNK_CHARS = 1 << 20
+
+_WS = re.compile(r"[ \t\n\r]*")
+_DECODER = json.JSONDecoder()
+
+
+def _pick(value: Any, fields: Iterable[str] | None) -> Any:
+    if fields is None or not isinstance(value, dict):
+        return value
+    return {k: value[k] for k in fields if k in value}
+
+
+def _iter_python(path: str, chunk_chars: int) -> Iterator[tuple[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        buf, pos, eof = "", 0, False
+
+        def fill(grow: bool = False) -> bool:
+            nonlocal buf, pos, eof
+            if eof:
+                return False
+            # grow: the pending value is longer than the buffer; doubling keeps
+            # the retries linear in its size.
+            data = f.read(max(chunk_chars, len(buf) - pos) if grow else chunk_chars)
+            if not data:
+                eof = True
+                return False
+            buf = buf[pos:] + data
+            pos = 0
+            return True
+
+        def skip_ws() -> None:
+            nonlocal pos
+            while True:
+                pos = _WS.match(buf, pos).end()
+                if pos < len(buf) or not fill():
+                    return
+
+        def decode(fn) -> tuple[Any, int]:
+            # A value ending exactly at the buffer end may be cut (a number, a
+            # key): only accept it once the next chunk or EOF confirms it.
+            while True:
+                try:
+                    value, end = fn()
+                except ValueError:
+                    if fill(grow=True):
+                        continue
+                    raise
+                if end < len(buf) or not fill():
+                    return value, end
+
+        def expect(c: str, what: str) -> None:
+            nonlocal pos
+            if buf[pos:pos + 1] != c:
+                raise ValueError(f"sessions registry: expected {what} at char {pos}")
+            pos += 1
+
+        skip_ws()
+        if buf[pos:pos + 1] != "{":
+            raise ValueError("sessions registry: top-level JSON value is not an object")
+        pos += 1
+        skip_ws()
+        if buf[pos:pos + 1] == "}":
+            pos += 1
+        else:
+            while True:
+                if buf[pos:pos + 1] != '"':
+                    raise ValueError(f"sessions registry: expected a string key at char {pos}")
+                key, pos = decode(lambda: scanstring(buf, pos + 1))
+                skip_ws()
+                expect(":", "':'")
+                skip_ws()
+                value, pos = decode(lambda: _DECODER.raw_decode(buf, pos))
+                yield key, value
+                skip_ws()
+                if buf[pos:pos + 1] == ",":
+                    pos += 1
+                    skip_ws()
+                    continue
+                expect("}", "',' or '}'")
+                break
+        skip_ws()
+        if pos < len(buf):
+            raise ValueError(f"sessions registry: extra data at char {pos}")
+
+
+def _iter_ijson(path: str) -> Iterator[tuple[str, Any]]:
+    with open(path, "rb") as f:
+        head = f.read(4096).lstrip(b" \t\n\r")
+        while not head:
+            chunk = f.read(4096)
+            if not chunk:
+                break
+            head = chunk.lstrip(b" \t\n\r")
+        if head[:1] != b"{":
+            raise ValueError("sessions registry: top-level JSON value is not an object")
+        f.seek(0)
+        try:
+            yield from _IJSON.kvitems(f, "", use_float=True)
+        except ijson.JSONError as e:
+            raise ValueError(f"sessions registry: {e}") from e
+
+
+def iter_sessions(
+    path: str | os.PathLike = SESSIONS_JSON,
+    fields: Iterable[str] | None = SESSION_FIELDS,
+    backend: str = "auto",
+    chunk_chars: int = CHUNK_CHARS,
+) -> Iterator[tuple[str, Any]]:
+    """Yield (key, session) pairs of the registry in file order.
+
+    fields=None keeps whole sessions. backend: "auto" (ijson if installed,
+    else "python"), "ijson" (ImportError if missing) or "python".
+    """
+    if backend == "auto":
+        backend = "ijson" if _IJSON is not None else "python"
+    if backend == "ijson":
+        if _IJSON is None:
+            raise ImportError("ijson with the yajl2_c backend is not installed")
+        pairs = _iter_ijson(os.fspath(path))
+    elif backend == "python":
+        pairs = _iter_python(os.fspath(path), chunk_chars)
+    else:
+        raise ValueError(f"unknown backend: {backend!r}")
+    fields = tuple(fields) if fields is not None else None
+    for key, value in pairs:
+        yield key, _pick(value, fields)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Tests for bounded_log (two-segment rotate-and-drop JSONL log).
+
+Cases:
+- tail: after many small appends tail() == last max_lines records, in order
+- bounded: both segments together never exceed 2 * max_lines lines
+- o_new: an append does not rewrite the active segment (inode and prefix unchanged)
+- stale_idx: an out-of-band write to the active segment forces a recount
+- legacy: a plain JSONL file larger than max_lines is picked up and rotated
+- convert: export -> import round trip keeps the last max_lines records
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+
+from bounded_log import BoundedLog
+
+MAX = 50
+
+
+def lines_of(path: str) -> int:
+    if not os.path.exists(path):
+        return 0
+    with open(path, "r", encoding="utf-8") as f:
+        return sum(1 for ln in f if ln.strip())
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rt", "signals.jsonl")
+        log = BoundedLog(path, MAX)
+        log.touch()
+        assert os.path.exists(path) and log.tail() == []
+
+        seq = 0
+        for batch in range(60):
+            n = batch % 7 + 1
+            inode = os.stat(path).st_ino
+            with open(path, "rb") as f:
+                before = f.read()
+            rotating = lines_of(path) + n > MAX
+            log.append({"i": seq + k} for k in range(n))
+            seq += n
+            if not rotating:
+                assert os.stat(path).st_ino == inode
+                with open(path, "rb") as f:
+                    assert f.read().startswith(before)
+            assert lines_of(path) + lines_of(path + ".1") <= 2 * MAX
+            want = list(range(max(0, seq - MAX), seq))
+            assert [r["i"] for r in log.tail()] == want
+            assert [r["i"] for r in log.tail(5)] == want[-5:]
+
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"i": seq}) + "\n")
+        seq += 1
+        assert log._active_lines() == lines_of(path)
+
+        legacy = os.path.join(tmp, "legacy.jsonl")
+        with open(legacy, "w", encoding="utf-8") as f:
+            for i in range(3 * MAX):
+                f.write(json.dumps({"i": i}) + "\n")
+        llog = BoundedLog(legacy, MAX)
+        llog.append([{"i": 3 * MAX}])
+        assert lines_of(legacy) == 1 and lines_of(legacy + ".1") == 3 * MAX
+        assert [r["i"] for r in llog.tail()] == list(range(2 * MAX + 1, 3 * MAX + 1))
+        llog.append({"i": 3 * MAX + 1 + k} for k in range(2 * MAX))
+        assert [r["i"] for r in llog.tail()] == list(range(4 * MAX + 1, 5 * MAX + 1))
+
+        out = os.path.join(tmp, "export.jsonl")
+        assert log.export_jsonl(out, MAX) == MAX
+        copy = BoundedLog(os.path.join(tmp, "copy.jsonl"), MAX)
+        assert copy.import_jsonl(out) == MAX
+        assert copy.tail() == log.tail()
+        copy.append([{"i": -1}])
+        assert lines_of(copy.path) == 1 and copy.tail()[-1] == {"i": -1}
+
+    print(json.dumps({"ok": True, "checks": ["tail", "bounded", "o_new", "stale_idx", "legacy", "convert"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
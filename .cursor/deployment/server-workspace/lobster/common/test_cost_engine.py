@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""Tests for cost_engine (column-wise cost rollups).
+
+Cases:
+- pricing: per-row costs equal the scalar cost_for() bit for bit; unpriced
+  rows cost 0 and are reported by raw model name
+- masks: since_ms and local_day_ge agree with datetime comparisons (Almaty
+  local dates around midnight)
+- sums: total() and group() equal the exact sums of a per-row loop; labels
+  that merge groups are one exact sum; order of rows does not matter
+- backends: with numpy installed, the numpy and plain-loop paths give the same
+  results (only the plain path runs otherwise)
+- compute_metrics: economist/runner_plan_only matches the old per-session
+  loop to the cent
+- price_keys: with an alias-only pricing entry (gpt-4o-mini), economist_collect
+  leaves the session unpriced in the full scan and the incremental state
+  alike (normalized name only), runner_plan_only prices it (raw fallback)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+
+import cost_engine
+from cost_engine import CostColumns, CostEngine
+from exact_sum import ExactSum
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "economist"))
+sys.path.insert(0, os.path.join(HERE, "..", "..", "scripts"))
+import economist_collect as econ  # noqa: E402
+from runner_plan_only import compute_metrics  # noqa: E402
+
+ALMATY = timezone(timedelta(hours=5))
+PRICING = {"models": {
+    "openai/gpt-4o-mini": {"input_per_1m": 0.15, "output_per_1m": 0.6},
+    "openai/gpt-5.2": {"input_per_1m": 1.75, "output_per_1m": 14.0},
+    "google/gemini-2.5-flash": {"input_per_1m": 0.3, "output_per_1m": 2.5},
+    "free/model": {},
+}}
+MODELS = ["gpt-4o-mini", "openai/gpt-4o-mini", "gpt-5.2", "google/gemini-2.5-flash", "free/model", "mystery/x", " gpt-5.2"]
+JOBS = [None, "job-a", "job-b", "job-c"]
+
+
+def make_rows(rnd: random.Random, n: int, now_ms: int) -> list[tuple]:
+    rows = []
+    for _ in range(n):
+        t = now_ms - rnd.randint(0, 45 * 86_400_000)
+        if rnd.random() < 0.05:
+            t -= t % 86_400_000 + 5 * 3_600_000 - rnd.choice([-1, 0, 1])  # around Almaty midnight
+        rows.append((t, rnd.choice(MODELS), rnd.randint(0, 3_000_000), rnd.choice([0, -3, rnd.randint(0, 90_000)]),
+                     rnd.choice(JOBS), rnd.random() < 0.5))
+    return rows
+
+
+def build(rows: list[tuple]) -> CostEngine:
+    cols = CostColumns()
+    for t, m, i, o, job, run in rows:
+        cols.add(t, m, i, o, job=job, run=run)
+    return CostEngine(cols, PRICING, econ.price_keys)
+
+
+def exact(costs: list[float]) -> float:
+    s = ExactSum()
+    for c in costs:
+        s.add(c)
+    return s.value()
+
+
+def check(rows: list[tuple], now: datetime) -> dict:
+    eng = build(rows)
+    cut_ms = int(now.timestamp() * 1000) - 86_400_000
+    scalar = [econ.cost_for(econ.normalize_model(m), i, o, PRICING) for _, m, i, o, _, _ in rows]
+    got = eng.cost.tolist() if hasattr(eng.cost, "tolist") else eng.cost
+    assert got == [c if ok else 0.0 for c, ok in scalar], "per-row cost differs"
+
+    local = now.astimezone(ALMATY).date()
+    month_start = local.replace(day=1)
+    month = eng.local_day_ge(month_start, 5 * 3600)
+    last24h = eng.since_ms(cut_ms)
+    in_month = [datetime.fromtimestamp(t / 1000, timezone.utc).astimezone(ALMATY).date() >= month_start
+                for t, *_ in rows]
+    in_24h = [t >= cut_ms for t, *_ in rows]
+    assert list(month) == in_month and list(last24h) == in_24h
+
+    sel = [a and b for a, b in zip(in_month, in_24h)]
+    tot = eng.total(month & last24h)
+    assert tot.cost_usd == exact([c if ok else 0.0 for (c, ok), s in zip(scalar, sel) if s])
+    assert (tot.in_tokens, tot.rows) == (sum(r[2] for r, s in zip(rows, sel) if s), sum(sel))
+
+    by_model = eng.group(month, "raw", econ.normalize_model)
+    want: dict[str, list] = {}
+    for r, (c, ok), s in zip(rows, scalar, in_month):
+        if s:
+            want.setdefault(econ.normalize_model(r[1]), []).append((r[2], r[3], c if ok else 0.0))
+    assert set(by_model) == set(want)
+    for m, items in want.items():
+        g = by_model[m]
+        assert (g.in_tokens, g.out_tokens, g.rows) == (sum(x[0] for x in items), sum(x[1] for x in items), len(items))
+        assert g.cost_usd == exact([x[2] for x in items]), m
+
+    jobs = eng.group(eng.runs() | last24h, "job", lambda j: j[-1] in "ab")
+    merged = [c if ok else 0.0 for r, (c, ok) in zip(rows, scalar) if r[4] and r[4][-1] in "ab" and (r[5] or r[0] >= cut_ms)]
+    assert jobs[True].cost_usd == exact(merged) and jobs[True].rows == len(merged)
+    assert set(jobs) == {True, False}
+
+    unknown = eng.unpriced(~month)
+    want_unknown: dict[str, int] = {}
+    for r, (_, ok), s in zip(rows, scalar, in_month):
+        if not s and not ok:
+            want_unknown[r[1]] = want_unknown.get(r[1], 0) + 1
+    assert unknown == want_unknown and set(unknown) == {"mystery/x", "free/model"}
+    return {"total": tot, "by_model": by_model, "jobs": jobs, "unknown": unknown}
+
+
+def main() -> None:
+    rnd = random.Random(11)
+    now = datetime(2026, 10, 2, 7, 30, tzinfo=timezone.utc)
+    rows = make_rows(rnd, 4000, int(now.timestamp() * 1000))
+    res = check(rows, now)
+    shuffled = rows[:]
+    rnd.shuffle(shuffled)
+    assert check(shuffled, now)["total"] == res["total"]
+
+    backends = ["plain"]
+    if cost_engine._HAS_NUMPY:
+        cost_engine._HAS_NUMPY = False
+        try:
+            assert check(rows, now) == res
+        finally:
+            cost_engine._HAS_NUMPY = True
+        backends.append("numpy")
+    empty = build([])
+    assert empty.total(empty.all_rows()) == (0, 0, 0.0, 0) and empty.group(empty.all_rows(), "job") == {}
+
+    sessions = {}
+    for i, (t, m, in_t, out_t, _, _) in enumerate(rows):
+        s = {"sessionId": f"s{i % 900}", "model": m, "inputTokens": in_t, "outputTokens": out_t}
+        if i % 97 == 0:
+            s = rnd.choice([None, {"model": ""}, {"model": "gpt-5.2", "inputTokens": "x"}, {"modelProvider": m}])
+        sessions[f"k{i}"] = s
+    old_total, old_unknown = 0.0, 0
+    for s in sessions.values():
+        if not isinstance(s, dict):
+            continue
+        model_raw = s.get("model") or s.get("modelProvider")
+        try:
+            if not isinstance(model_raw, str) or not model_raw.strip():
+                continue
+            c, ok = econ.cost_for(model_raw, int(s.get("inputTokens") or 0), int(s.get("outputTokens") or 0), PRICING)
+        except ValueError:
+            continue
+        old_total += c
+        old_unknown += not ok
+    met = compute_metrics(sessions, PRICING)
+    assert round(met.computed_total_usd, 2) == round(old_total, 2) and abs(met.computed_total_usd - old_total) < 1e-6
+    assert met.unknown_pricing_count == old_unknown and met.planned_persist_count + met.malformed_session_count == len(rows)
+
+    alias_only = {"models": {"gpt-4o-mini": {"input_per_1m": 1.0, "output_per_1m": 0.0}}}
+    now_ms = int(now.timestamp() * 1000)
+    alias = {"agent:main:chat:1": {"updatedAt": now_ms, "model": "gpt-4o-mini", "inputTokens": 1_000_000}}
+    full = econ.collect(alias, alias_only, now, None, {}, set())[1]
+    inc = econ.collect(alias, alias_only, now, econ.CostState(), {}, set())[1]
+    assert econ.render(full) == econ.render(inc)
+    assert full[0]["period"]["day"]["cost_usd"] == 0.0 and full[0]["unknown_pricing_models"] == ["gpt-4o-mini"]
+    met = compute_metrics(alias, alias_only)
+    assert met.computed_total_usd == 1.0 and met.unknown_pricing_count == 0
+
+    print(json.dumps({"ok": True, "checks": ["pricing", "masks", "sums", "backends", "compute_metrics", "price_keys"],
+                      "backends": backends}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
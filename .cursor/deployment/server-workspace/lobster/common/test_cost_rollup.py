@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""Tests for cost_rollup (daily cost rollup store) fed by economist_collect.
+
+Cases:
+- encoding: encode_units/decode_units round-trip exact sums (zero, negative,
+  subnormal, huge)
+- backfill: rows built from a CostState memo equal its date buckets; day,
+  week and month totals equal the full-scan cost-summary periods bit for bit;
+  group-by model/category/job adds up to the totals
+- incremental: after changed/added/removed sessions, the flushed store equals
+  a fresh backfill (files byte-identical), removed days are deleted
+- crash: a store flushed without the state save, or left mid-flush, is
+  rebuilt on the next attach; a changed cron job name relabels rows
+- repricing: a pricing change re-costs the memo without the sessions and
+  the store matches a rebuild under the new pricing
+- compare: week/month to date vs the same span of the previous period,
+  including a 31st compared with a 30-day month
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import date, datetime, timedelta, timezone
+
+from cost_rollup import CostRollup
+from exact_sum import decode_units, encode_units, to_units
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "..", "scripts"))
+import economist_collect as econ  # noqa: E402
+from test_economist_collect import CRON_JOBS, GEMINI_IDS, MODELS, PRICING, make_sessions  # noqa: E402
+
+
+def snapshot(root: str) -> dict:
+    out = {}
+    for fn in sorted(os.listdir(root)):
+        if fn != "_state.json":
+            with open(os.path.join(root, fn), encoding="utf-8") as f:
+                out[fn] = f.read()
+    return out
+
+
+def rebuilt(state: econ.CostState, root: str, cron_jobs: dict) -> dict:
+    fresh = econ.CostState(json.loads(json.dumps(state.to_dict())))
+    fresh.attach_rollup(CostRollup(root), cron_jobs, rebuild=True)
+    fresh.save_rollup()
+    return snapshot(root)
+
+
+def save(tmp: str, state: econ.CostState) -> econ.Path:
+    path = econ.Path(tmp) / "state.json"
+    econ.save_state(path, state)
+    return path
+
+
+def check_periods(store: CostRollup, sessions: dict, now: datetime, pricing: dict) -> None:
+    summary = econ.collect(sessions, pricing, now, None, CRON_JOBS, GEMINI_IDS)[1][0]
+    for period, start in (("day", econ.local_date_str(now)), ("week", econ.week_start_local(now)),
+                          ("month", econ.month_start_local(now))):
+        got, want = store.total(start, None), summary["period"][period]
+        assert (got["cost_usd"], got["tokens_input"], got["tokens_output"]) == \
+               (want["cost_usd"], want["tokens_input"], want["tokens_output"]), (period, got, want)
+    month = econ.month_start_local(now)
+    by_model = {r["model"]: r for r in store.query(month, None, ["model"])}
+    assert {m: (r["tokens_input"], r["cost_usd"]) for m, r in by_model.items()} == \
+           {m: (t["tokens_input"], t["cost_usd"]) for m, t in summary["by_model"].items()}
+
+
+def main() -> None:
+    rnd = random.Random(3)
+    for units in (0, 1, -1, to_units(0.1), to_units(5e-324), to_units(1.7e308) * 1000, -to_units(123.456)):
+        assert decode_units(encode_units(units)) == units
+    total = sum(to_units(rnd.random() * 100) for _ in range(1000))
+    assert decode_units(encode_units(total)) == total and len(encode_units(total)) < 40
+
+    now = datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)
+    with tempfile.TemporaryDirectory() as tmp:
+        root, ref = os.path.join(tmp, "rollup"), os.path.join(tmp, "ref")
+        sessions = make_sessions(rnd, now, 3000)
+        state = econ.CostState()
+        assert state.attach_rollup(CostRollup(root), CRON_JOBS)  # empty store: backfill (of nothing)
+        econ.collect(sessions, PRICING, now, state, CRON_JOBS, GEMINI_IDS)
+        state.save_rollup()
+
+        store = CostRollup(root)
+        assert store.matches(state.generation, state.rollup_labels)
+        for day, bucket in state.days.items():
+            accs = [acc for _, _, acc in store.rows(day, day)]
+            assert [sum(a[j] for a in accs) for j in range(4)] == \
+                   [bucket["n"], bucket["in"], bucket["out"], bucket["cost"]], day
+        assert store.days() == sorted(state.days)
+        check_periods(store, sessions, now, PRICING)
+        by_job = store.query(None, None, ["category", "job"])
+        assert {r["category"] for r in by_job} >= {"monitoring_uchastkovy", "digest_news", None}
+        assert sum(r["sessions"] for r in by_job) == len(state.memo)
+        assert sum(r["tokens_input"] for r in by_job) == store.total(None, None)["tokens_input"]
+
+        # incremental: changed, added and removed sessions, including a whole day
+        state = econ.load_state(save(tmp, state))
+        assert not state.attach_rollup(CostRollup(root), CRON_JOBS)
+        now_ms = int(now.timestamp() * 1000)
+        keys = [k for k in sessions if not k.startswith("bad:")]
+        for k in rnd.sample(keys, 150):
+            sessions[k]["inputTokens"] += rnd.randint(1, 9000)
+            sessions[k]["model"] = rnd.choice(MODELS)
+        oldest = min(state.days)
+        for k in [k for k, e in state.memo.items() if e[7] == oldest] + rnd.sample(keys, 80):
+            sessions.pop(k, None)
+        sessions.update(make_sessions(random.Random(8), now, 40))
+        sessions["agent:main:cron:0a1b2c3d-9999:run:00000001"] = {"updatedAt": now_ms, "model": "gpt-5.2",
+                                                                  "inputTokens": 10}
+        econ.collect(sessions, PRICING, now, state, CRON_JOBS, GEMINI_IDS)
+        state.save_rollup()
+        assert not os.path.exists(os.path.join(root, f"{oldest}.json"))
+        check_periods(CostRollup(root), sessions, now, PRICING)
+        assert snapshot(root) == rebuilt(state, ref, CRON_JOBS)
+
+        # crash after the rollup flush, before the state save: the next attach rebuilds
+        saved = econ.load_state(save(tmp, state))
+        econ.collect(sessions, PRICING, now + timedelta(hours=1), state, CRON_JOBS, GEMINI_IDS)
+        state.save_rollup()  # state file not saved
+        assert saved.attach_rollup(CostRollup(root), CRON_JOBS)
+        saved.save_rollup()
+        assert snapshot(root) == rebuilt(saved, ref, CRON_JOBS)
+        # crash mid-flush: generation is null until the days are written
+        with open(os.path.join(root, "_state.json"), encoding="utf-8") as f:
+            st = json.load(f)
+        with open(os.path.join(root, "_state.json"), "w", encoding="utf-8") as f:
+            json.dump({**st, "generation": None}, f)
+        assert not CostRollup(root).matches(saved.generation, saved.rollup_labels)
+        # relabel: a cron job renamed into another category
+        renamed = {**CRON_JOBS, "0a1b2c3d-1111": {"name": "Чекист lobster"}}
+        assert saved.attach_rollup(CostRollup(root), renamed)
+        saved.save_rollup()
+        cats = {r["category"] for r in CostRollup(root).query(None, None, ["category"])}
+        assert "monitoring_chekist" in cats and "monitoring_uchastkovy" not in cats
+
+        # repricing without the sessions registry
+        state = econ.load_state(save(tmp, saved))
+        state.attach_rollup(CostRollup(root), renamed)
+        pricing2 = json.loads(json.dumps(PRICING))
+        pricing2["models"]["mystery/model"] = {"input_per_1m": 9.0, "output_per_1m": 9.0}
+        pricing2["models"]["openai/gpt-5.2"]["output_per_1m"] = 12.5
+        repriced = state.reprice(pricing2)
+        assert 0 < repriced < len(state.memo)
+        state.save_rollup()
+        check_periods(CostRollup(root), sessions, now, pricing2)
+        assert snapshot(root) == rebuilt(state, ref, renamed)
+        econ.collect(sessions, pricing2, now, state, CRON_JOBS, GEMINI_IDS)
+        assert state.stats["repriced"] == 0 and state.stats["added"] == 0
+
+        # compare windows
+        cmp_root = os.path.join(tmp, "cmp")
+        store = CostRollup(cmp_root)
+        k = '["openai/gpt-5.2",null,null]'
+        for d in range(60):
+            day = date(2026, 9, 1) + timedelta(days=d)
+            store.add(day.isoformat(), k, 1, day.day, 0, to_units(1.0))
+        store.flush(1, "")
+        store = CostRollup(cmp_root)
+        week = store.compare("week", date(2026, 10, 14))  # Wednesday
+        assert (week["current"]["from"], week["previous"]["from"], week["previous"]["to"]) == \
+               ("2026-10-12", "2026-10-05", "2026-10-07")
+        assert week["current"]["cost_usd"] == week["previous"]["cost_usd"] == 3.0 and week["delta_pct"] == 0.0
+        month = store.compare("month", date(2026, 10, 31))
+        assert (month["previous"]["from"], month["previous"]["to"]) == ("2026-09-01", "2026-09-30")
+        assert month["current"]["cost_usd"] == 30.0 and month["delta_cost_usd"] == 0.0  # data ends on Oct 30
+        assert store.compare("month", date(2026, 9, 15))["delta_pct"] is None
+        day = store.compare("day", date(2026, 10, 2))
+        assert (day["current"]["tokens_input"], day["previous"]["tokens_input"]) == (2, 1)
+
+    print(json.dumps({"ok": True, "checks": ["encoding", "backfill", "incremental", "crash", "repricing", "compare"]},
+                     indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""Tests for gate_engine (declarative cutover gates, one pass).
+
+Cases:
+- predicates: equal/ne/in/not_in/contains, any/all/not; unknown operators rejected
+- parity: uchastkovy_gate_calc and mekhanik_cutover_sanity (CLI) print the same
+  deltas as the old per-tool rules, malformed_lines_total counts every line
+  json.loads rejects (also truncated ones with a valid old ts prefix), and `gate_engine.py run --gate` prints the
+  same JSON and exit code as the tool (PASS 0 / FAIL 2 / input error 3)
+- one_pass: five gates (two presets, three generic rolling windows) from one
+  scan equal five separate evaluations; each line is decoded at most once
+- resume: a marked baseline resumes at its offset with the same result; a
+  rewritten file falls back to a full scan; marking a baseline whose startTs
+  is in the past keeps the incidents written since then (still FAIL)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from gate_engine import Gate, compile_predicate, evaluate, mark
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS = os.path.join(HERE, "..", "..", "scripts")
+
+TYPES = ["cron_error", "gateway_down", "message_transport_failed", "rollback_applied", "git_dirty"]
+SOURCES = ["uchastkovy-lobster", "lobster-uchastkovy", "mekhanik-lobster", "wendy-lobster", "marta-lobster",
+           "git-sync-lobster", "legacy-monitor", "uchastkovy"]
+
+
+def iso(t: datetime) -> str:
+    return t.isoformat().replace("+00:00", "Z")
+
+
+def generate(path: str, end: datetime, n: int, seed: int = 3) -> None:
+    rnd = random.Random(seed)
+    t0 = end.timestamp() - 12 * 3600
+    with open(path, "a", encoding="utf-8") as f:
+        for i in range(n):
+            if i % 97 == 0:
+                f.write('{"ts": "broken\n')
+                continue
+            rec = {
+                "ts": iso(datetime.fromtimestamp(t0 + i * 12 * 3600 / n, timezone.utc)),
+                "type": rnd.choice(TYPES),
+                "source": rnd.choice(SOURCES),
+                "severity": rnd.choice(["critical", "warn", "info"]),
+            }
+            if i % 4 == 0:
+                rec["jobId"] = f"job-{i % 3}"
+            if i % 50 == 0:
+                rec = {"source": rec.pop("source"), **rec}  # ts not first: no raw prefilter
+            if i % 89 == 0:
+                f.write(json.dumps(rec)[:-3] + "\n")  # valid ts prefix, truncated write
+                continue
+            f.write(json.dumps(rec) + "\n")
+
+
+def old_counts(path: str, start: datetime, sources: set[str], exclude_cron: bool) -> tuple[int, int, int]:
+    crit = transport = rollback = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if rec.get("source") not in sources:
+                continue
+            if datetime.fromisoformat(rec["ts"].replace("Z", "+00:00")) < start:
+                continue
+            typ = str(rec.get("type") or "")
+            crit += rec.get("severity") == "critical" and not (exclude_cron and typ == "cron_error")
+            transport += typ == "message_transport_failed"
+            rollback += "rollback" in typ
+    return crit, transport, rollback
+
+
+def malformed_lines(path: str) -> int:
+    n = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                json.loads(line)
+            except ValueError:
+                n += line.strip() != ""
+    return n
+
+
+def run(args: list[str]) -> tuple[dict, int]:
+    p = subprocess.run([sys.executable] + args, capture_output=True, text=True)
+    return json.loads(p.stdout), p.returncode
+
+
+def main() -> None:
+    p = compile_predicate({"type__contains": "roll", "source__in": ["a", "b"], "not": {"severity": "info"}})
+    assert p({"type": "rollback", "source": "a", "severity": "critical"})
+    assert not p({"type": "rollback", "source": "c"}) and not p({"type": "rollback", "source": "b", "severity": "info"})
+    q = compile_predicate({"any": [{"jobId__not_in": ["x"]}, {"all": [{"type": "t"}, {"type__ne": "u"}]}]})
+    assert q({"jobId": "y"}) and q({"jobId": "x", "type": "t"}) and not q({"jobId": "x", "type": "u"})
+    for bad in ({"type__like": "x"}, {}):
+        try:
+            compile_predicate(bad)
+            raise AssertionError(f"expected ValueError for {bad}")
+        except ValueError:
+            pass
+
+    end = datetime.now(timezone.utc).replace(microsecond=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        incidents = os.path.join(tmp, "incidents.jsonl")
+        generate(incidents, end, 6000)
+        start = end - timedelta(hours=3)
+        baseline = os.path.join(tmp, "baseline.json")
+        with open(baseline, "w", encoding="utf-8") as f:
+            json.dump({"startTs": iso(start)}, f)
+        gate_calc = os.path.join(SCRIPTS, "uchastkovy_gate_calc.py")
+        sanity = os.path.join(SCRIPTS, "mekhanik_cutover_sanity.py")
+
+        out, code = run([gate_calc, "--baseline-path", baseline, "--incidents-path", incidents])
+        want = old_counts(incidents, start, {"uchastkovy-lobster", "lobster-uchastkovy"}, exclude_cron=True)
+        got = tuple(out["deltas"][k] for k in ("delta_critical", "delta_transport", "delta_rollback"))
+        assert got == want and min(want) > 0, (got, want)
+        assert code == 2 and out["decision"]["status"] == "FAIL"
+        assert out["meta"]["malformed_lines_total"] == malformed_lines(incidents)
+        out_m, code_m = run([sanity, "--baseline", baseline, "--incidents", incidents])
+        want_m = old_counts(incidents, start, {"mekhanik-lobster", "lobster-mekhanik"}, exclude_cron=False)
+        assert tuple(out_m["deltas"].values()) == want_m and code_m == 0
+
+        spec = os.path.join(tmp, "gates.json")
+        lobster_scope = {"any": [{"source__in": ["wendy-lobster", "lobster-wendy"]}, {"jobId": "job-1"}]}
+        gates = [
+            {"name": "uchastkovy", "preset": "uchastkovy_gate_calc", "baseline": baseline},
+            {"name": "mekhanik", "preset": "mekhanik_cutover_sanity", "baseline": baseline},
+            {"name": "wendy", "window_s": 7200, "sources": None,
+             "deltas": {"incidents_total_delta": {"any": [{"type__ne": ""}, {"type": ""}]},
+                        "incidents_lobster_scoped_delta": lobster_scope},
+             "thresholds": {"incidents_lobster_scoped_delta": 0}},
+            {"name": "marta", "window_s": 7200, "sources": ["marta-lobster"],
+             "deltas": {"critical": {"severity": "critical"}}, "thresholds": {"critical": 10 ** 6}},
+            {"name": "git-sync", "startTs": iso(end - timedelta(hours=1)), "sources": ["git-sync-lobster"],
+             "deltas": {"push_failed": {"type": "git_sync_push_failed"}}, "thresholds": {"push_failed": 0}},
+        ]
+        with open(spec, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "incidents": incidents, "gates": gates}, f)
+        engine = os.path.join(HERE, "gate_engine.py")
+        one, code_one = run([engine, "run", "--spec", spec, "--gate", "uchastkovy"])
+        assert code_one == code and {k: v for k, v in one.items() if k != "ts"} == \
+               {k: v for k, v in out.items() if k != "ts" and k != "baselinePath"} | {"baselinePath": baseline}
+        one_m, _ = run([engine, "run", "--spec", spec, "--gate", "mekhanik"])
+        assert one_m["deltas"] == out_m["deltas"] and one_m["startTs"] == out_m["startTs"]
+
+        allg, code_all = run([engine, "run", "--spec", spec])
+        assert code_all == 2 and set(allg["gates"]) == {g["name"] for g in gates}
+        assert allg["scan"]["decoded"] < allg["scan"]["lines"] == 6000 and allg["scan"]["prefiltered"] > 0
+        assert allg["gates"]["uchastkovy"]["output"]["deltas"] == out["deltas"]
+        assert allg["gates"]["marta"]["exit_code"] == 0 and allg["gates"]["git-sync"]["exit_code"] == 0
+        now = datetime.now(timezone.utc)
+        for g in gates:
+            solo = Gate(g, incidents, now)
+            evaluate([solo], incidents)
+            got = allg["gates"][g["name"]]["output"]
+            assert got["deltas"] == solo.counts, (g["name"], got["deltas"], solo.counts)
+        wendy = allg["gates"]["wendy"]["output"]
+        assert wendy["deltas"]["incidents_total_delta"] > wendy["deltas"]["incidents_lobster_scoped_delta"] > 0
+        assert wendy["decision"]["status"] == "FAIL"
+
+        missing, code_x = run([gate_calc, "--baseline-path", os.path.join(tmp, "nope.json"), "--incidents-path", incidents])
+        assert code_x == 3 and missing["error"].startswith("baseline_read_failed")
+        with open(spec, "w", encoding="utf-8") as f:
+            json.dump({"incidents": incidents, "gates": [{"name": "u", "preset": "uchastkovy_gate_calc",
+                                                          "baseline": os.path.join(tmp, "nope.json")}]}, f)
+        err, code_e = run([engine, "run", "--spec", spec, "--gate", "u"])
+        assert code_e == 3 and err == missing
+
+        marked = os.path.join(tmp, "marked.json")
+        subprocess.run([sys.executable, engine, "mark", "--baseline", marked, "--incidents", incidents,
+                        "--start-ts", iso(end)], check=True, capture_output=True)
+        with open(marked, encoding="utf-8") as f:
+            m = json.load(f)
+        assert m["incidentsOffset"] == os.path.getsize(incidents) and m == {**m, **mark(incidents, end)}
+        generate(incidents, end + timedelta(hours=12), 300, seed=4)  # all after startTs
+        g_resume = Gate({"preset": "uchastkovy_gate_calc", "baseline": marked}, incidents)
+        g_full = Gate({"preset": "uchastkovy_gate_calc", "startTs": iso(end)}, incidents)
+        stats = evaluate([g_resume], incidents)
+        evaluate([g_full], incidents)
+        assert stats["start_offset"] == m["incidentsOffset"] and g_resume.offset_reset is None
+        assert g_resume.counts == g_full.counts and sum(g_resume.counts.values()) > 0
+        assert g_resume.malformed == 7 < g_full.malformed  # only lines after the mark are scanned
+        with open(incidents, "r+b") as f:
+            f.seek(m["incidentsOffset"] - 3)
+            f.write(b"x")
+        g_rw = Gate({"preset": "uchastkovy_gate_calc", "baseline": marked}, incidents)
+        assert g_rw.offset == 0 and g_rw.offset_reset == "rewritten"
+        evaluate([g_rw], incidents)
+        assert g_rw.counts == g_full.counts
+
+        # mark on an existing baseline with an earlier startTs: later incidents are not skipped
+        late = os.path.join(tmp, "late.jsonl")
+        t1 = datetime(2026, 3, 1, 1, 0, tzinfo=timezone.utc)
+        rows = [{"ts": iso(t1 - timedelta(minutes=30)), "type": "gateway_down", "source": "uchastkovy-lobster",
+                 "severity": "critical"},
+                {"ts": iso(t1 + timedelta(hours=1)), "type": "gateway_down", "source": "uchastkovy-lobster",
+                 "severity": "critical"}]
+        with open(late, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r) + "\n" for r in rows))
+        base = os.path.join(tmp, "base.json")
+        with open(base, "w", encoding="utf-8") as f:
+            json.dump({"startTs": iso(t1)}, f)
+        before, code_before = run([gate_calc, "--baseline-path", base, "--incidents-path", late])
+        subprocess.run([sys.executable, engine, "mark", "--baseline", base, "--incidents", late],
+                       check=True, capture_output=True)
+        after, code_after = run([gate_calc, "--baseline-path", base, "--incidents-path", late])
+        with open(base, encoding="utf-8") as f:
+            m_late = json.load(f)
+        assert m_late["startTs"] == iso(t1) and m_late["incidentsOffset"] == len(json.dumps(rows[0])) + 1
+        assert code_before == code_after == 2 and after["deltas"]["delta_critical"] == 1
+        assert {k: v for k, v in after.items() if k != "ts"} == {k: v for k, v in before.items() if k != "ts"}
+
+    print(json.dumps({"ok": True, "checks": ["predicates", "parity", "one_pass", "resume"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Tests for host_probe (in-process disk / process / unit-state probes).
+
+Cases:
+- disk: statvfs Use% equals `df -P /`; a statvfs error falls back to df (via=df)
+- process: a live child whose command line ends with the name is found, RSS/CPU
+  match /proc; our own pid is never matched
+- fake_proc: parsing of a synthetic /proc (comm with spaces and parens, lowest pid wins);
+  a missing /proc raises Unavailable with fallback=False
+- cgroup: populated unit cgroup -> active via cgroup, path cached; empty cgroup ->
+  systemctl fallback (fake systemctl on PATH); no cgroupfs -> None
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import host_probe
+
+
+def write(path: str, data: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(data)
+
+
+def main() -> None:
+    out = subprocess.run(["df", "-P", "/"], check=True, capture_output=True, text=True).stdout
+    assert host_probe.disk("/") == {"pct": int(out.splitlines()[-1].split()[4].rstrip("%")), "via": "statvfs"}
+    real_statvfs = host_probe.os.statvfs
+
+    def broken(path):
+        raise OSError("statvfs unavailable")
+
+    host_probe.os.statvfs = broken
+    try:
+        assert host_probe.disk("/")["via"] == "df"
+        try:
+            host_probe.disk("/", fallback=False)
+            raise AssertionError("expected OSError")
+        except OSError:
+            pass
+    finally:
+        host_probe.os.statvfs = real_statvfs
+
+    name = f"lobster-probe-test-{os.getpid()}"
+    code = "import time; x = b'x' * (8 << 20); print('ready', flush=True); time.sleep(30)"
+    child = subprocess.Popen([sys.executable, "-c", code, name], stdout=subprocess.PIPE, text=True)
+    try:
+        assert child.stdout.readline().strip() == "ready"
+        assert host_probe.find_pids(name) == [child.pid]
+        gw = host_probe.process(name)
+        assert gw["pid"] == child.pid and gw["via"] == "proc"
+        with open(f"/proc/{child.pid}/status", encoding="utf-8") as f:
+            rss = int(next(line for line in f if line.startswith("VmRSS:")).split()[1])
+        assert abs(gw["rss_kb"] - rss) < 2048 and gw["rss_kb"] > 8 * 1024
+        assert gw["cpu_s"] >= 0 and gw["cpu_pct"] >= 0
+    finally:
+        child.kill()
+        child.wait()
+    assert os.getpid() not in host_probe.find_pids(os.path.basename(__file__))
+
+    with tempfile.TemporaryDirectory() as proc:
+        tck = host_probe._clk_tck()
+        write(os.path.join(proc, "uptime"), "1000.00 50.00\n")
+        for pid, args, comm in [(70, "node\0/opt/openclaw-gateway\0", "odd (name) x"), (42, "openclaw-gateway\0", "gw"),
+                                (9, "other\0", "other")]:
+            write(os.path.join(proc, str(pid), "cmdline"), args)
+            write(os.path.join(proc, str(pid), "status"), f"Name:\t{comm}\nVmPeak:\t 999 kB\nVmRSS:\t  {pid * 1000} kB\n")
+            fields = ["S"] + ["0"] * 10 + [str(30 * tck), str(20 * tck)] + ["0"] * 6 + [str(500 * tck)] + ["0"] * 20
+            write(os.path.join(proc, str(pid), "stat"), f"{pid} ({comm}) " + " ".join(fields) + "\n")
+        os.makedirs(os.path.join(proc, "self"))
+        assert host_probe.find_pids("openclaw-gateway", proc) == [42, 70]
+        assert host_probe.process("openclaw-gateway", proc) == {
+            "pid": 42, "rss_kb": 42000, "cpu_s": 50.0, "cpu_pct": 10.0, "via": "proc"}
+        assert host_probe.proc_stats(70, proc)["cpu_s"] == 50.0
+        assert host_probe.process("nothing-like-this", proc) is None
+        try:
+            host_probe.process("openclaw-gateway", os.path.join(proc, "missing"), fallback=False)
+            raise AssertionError("expected Unavailable")
+        except host_probe.Unavailable:
+            pass
+
+    with tempfile.TemporaryDirectory() as tmp:
+        uid = os.getuid()
+        root = os.path.join(tmp, "cgroup")
+        cg = os.path.join(root, "user.slice", f"user-{uid}.slice", f"user@{uid}.service", "app.slice", "openclaw-gateway.service")
+        cache = os.path.join(tmp, "cache.json")
+        write(os.path.join(cg, "cgroup.events"), "populated 1\nfrozen 0\n")
+        assert host_probe.unit_state("openclaw-gateway", (root,), cache) == {"state": "active", "via": "cgroup"}
+        with open(cache, encoding="utf-8") as f:
+            assert json.load(f) == {"openclaw-gateway": cg}
+
+        bin_dir = os.path.join(tmp, "bin")
+        write(os.path.join(bin_dir, "systemctl"), "#!/bin/sh\necho failed\nexit 3\n")
+        os.chmod(os.path.join(bin_dir, "systemctl"), 0o755)
+        old_path = os.environ["PATH"]
+        os.environ["PATH"] = bin_dir + os.pathsep + old_path
+        try:
+            write(os.path.join(cg, "cgroup.events"), "populated 0\nfrozen 0\n")
+            assert host_probe.unit_state("openclaw-gateway", (root,), cache) == {"state": "failed", "via": "systemctl"}
+            os.remove(os.path.join(cg, "cgroup.events"))
+            write(os.path.join(cg, "cgroup.procs"), "4242\n")
+            assert host_probe.cgroup_active("openclaw-gateway", (root,), cache) is True
+        finally:
+            os.environ["PATH"] = old_path
+        assert host_probe.cgroup_active("openclaw-gateway", (os.path.join(tmp, "none"),), os.path.join(tmp, "c2.json")) is None
+
+    print(json.dumps({"ok": True, "checks": ["disk", "process", "fake_proc", "cgroup"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
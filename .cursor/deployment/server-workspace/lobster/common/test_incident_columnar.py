@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Tests for incident_columnar (columnar export + vectorized window scans).
+
+Cases:
+- report: chekist_aggregator_v1 --columnar == serial report (incl. by_type/by_scope
+  order, sample, malformed) for several windows, with duplicates and malformed lines
+- boundary: sub-millisecond ts on the window bounds are included/excluded exactly
+- incremental: appended lines (and a crashed append) give the same columns as a rebuild
+- blob: raw values that were normalized away (non-str jobId, int type) come back in records
+- reset: truncated source or a different scope function rebuilds the store
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from incident_columnar import COLUMNS, ColumnStore
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "..", "scripts"))
+import chekist_aggregator_v1 as agg  # noqa: E402
+
+TYPES = ["cron_error", "gateway_down", "message_transport_failed", "rollback_applied", "chekist_lobster_real_detected_critical"]
+SOURCES = ["uchastkovy-lobster", "chekist-lobster", "mekhanik-lobster", "legacy-monitor", ""]
+
+
+def iso(t: float) -> str:
+    return datetime.fromtimestamp(t, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def write_lines(path: str, end: datetime, n: int, seed: int, mode: str = "w") -> None:
+    rnd = random.Random(seed)
+    t0 = end.timestamp() - 2 * 86400
+    with open(path, mode, encoding="utf-8") as f:
+        prev = None
+        for i in range(n):
+            if i % 97 == 0:
+                f.write('{"ts": "broken\n')
+                continue
+            if prev is not None and i % 23 == 0:
+                f.write(json.dumps(prev) + "\n")
+                continue
+            rec = {
+                "ts": iso(t0 + i * 2 * 86400 / n + rnd.random() / 1000),
+                "type": rnd.choice(TYPES),
+                "source": rnd.choice(SOURCES),
+                "severity": rnd.choice(["critical", "critical", "warn"]),
+                "msg": f"m{i % 11}",
+            }
+            if i % 4 == 0:
+                rec["jobId"] = rnd.choice(sorted(agg.CHEKIST_JOB_IDS | agg.LEGACY_JOB_IDS) + ["job-x"])
+            f.write(json.dumps(rec) + "\n")
+            prev = rec
+
+
+def column_bytes(root: str) -> dict[str, bytes]:
+    out = {}
+    for col in list(COLUMNS) + ["blobs"]:
+        fn = "blobs.jsonl" if col == "blobs" else f"{col}.bin"
+        with open(os.path.join(root, fn), "rb") as f:
+            out[col] = f.read()
+    return out
+
+
+def main() -> None:
+    end = datetime.now(timezone.utc).replace(microsecond=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "incidents.jsonl")
+        root = os.path.join(tmp, "col")
+        agg.INCIDENTS = path
+        write_lines(path, end, 6000, 5)
+
+        for hours in (1, 5, 30, 60):
+            start = end - timedelta(hours=hours)
+            assert agg.aggregate_columnar(start, end, root) == agg.aggregate(start, end), hours
+
+        # boundary: records a fraction of a millisecond around the bounds
+        start = end - timedelta(hours=2)
+        with open(path, "a", encoding="utf-8") as f:
+            for dt in (start - timedelta(microseconds=300), start, end, end + timedelta(microseconds=300)):
+                rec = {"ts": dt.isoformat().replace("+00:00", "Z"), "type": "gateway_down", "severity": "critical", "msg": "edge"}
+                f.write(json.dumps(rec) + "\n")
+        rep = agg.aggregate_columnar(start, end, root)
+        assert rep == agg.aggregate(start, end)
+        assert [r["ts"] for r in rep["sample"] if r["msg"] == "edge"] == [agg.iso_z(start), agg.iso_z(end)]
+
+        # incremental + crashed append == rebuild
+        write_lines(path, end + timedelta(hours=1), 1500, 6, mode="a")
+        store = ColumnStore(root, path, agg.scope_map, agg.COLUMNAR_SCOPE)
+        with open(os.path.join(root, "ts.bin"), "ab") as f:
+            f.write(b"\x01" * 12)  # torn append without meta.json
+        with open(os.path.join(root, "blobs.jsonl"), "ab") as f:
+            f.write(b'{"torn"')
+        out = store.sync()
+        assert out["reset"] is None and out["new_rows"] > 0
+        inc = column_bytes(root)
+        inc_meta = {k: v for k, v in store.meta.items() if k != "cursor"}
+        rebuilt = os.path.join(tmp, "col2")
+        fresh = ColumnStore(rebuilt, path, agg.scope_map, agg.COLUMNAR_SCOPE)
+        fresh.sync()
+        assert column_bytes(rebuilt) == inc
+        assert {k: v for k, v in fresh.meta.items() if k != "cursor"} == inc_meta
+        later = end + timedelta(hours=1)
+        assert agg.aggregate_columnar(later - timedelta(hours=30), later, root) == agg.aggregate(
+            later - timedelta(hours=30), later
+        )
+
+        # blob keeps raw values that normalization dropped
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"ts": iso(later.timestamp()), "type": 7, "severity": "critical", "jobId": 42, "job": "j", "detail": {"a": 1}}) + "\n")
+        store.sync()
+        q = store.query(later, later)
+        assert q.raw == 1 and q.records(q.kept) == [
+            {"ts": iso(later.timestamp()), "type": 7, "severity": "critical", "jobId": 42, "job": "j", "detail": {"a": 1}}
+        ]
+        assert q.group_counts("type", "jobId") == [(("7", None), 1)]
+
+        # reset: truncation and a scope function change rebuild the store
+        write_lines(path, end, 300, 8)
+        assert store.sync()["reset"] == "truncated" and store.meta["rows"] < 300
+        assert agg.aggregate_columnar(end - timedelta(hours=48), end, root) == agg.aggregate(end - timedelta(hours=48), end)
+        other = ColumnStore(root, path, lambda r: "x", "other-scope")
+        assert other.sync()["reset"] == "init" and other.meta["dicts"]["scope"] == ["x"]
+
+    print(json.dumps({"ok": True, "checks": ["report", "boundary", "incremental", "blob", "reset"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Tests for incident_cursor (incremental reads, truncation/rotation/rewrite).
+
+Cases:
+- append: second refresh parses only the new lines
+- partial_line: an unfinished trailing line is picked up on the next run
+- truncated: file shrinks -> full re-read, no stale buffer
+- rotated: old file renamed to .1 with extra tail lines -> tail drained, nothing missed
+- rewritten: same inode/size grows but old bytes changed -> full re-read
+- window: records older than window_s are dropped from the buffer
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from incident_cursor import IncidentWindow
+
+
+def iso(t: float) -> str:
+    return datetime.fromtimestamp(t, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def line(t: float, typ: str) -> str:
+    return json.dumps({"ts": iso(t), "type": typ, "severity": "critical"}) + "\n"
+
+
+def types(records: list[dict]) -> list[str]:
+    return [r["type"] for r in records]
+
+
+def main() -> None:
+    now = time.time()
+    checks = []
+    with tempfile.TemporaryDirectory() as tmp:
+        state = os.path.join(tmp, "state")
+        path = os.path.join(tmp, "incidents.jsonl")
+
+        def window(window_s: int = 3600) -> IncidentWindow:
+            return IncidentWindow("test", path, window_s, state_dir=state)
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(line(now - 10, "a") + "{not-json}\n" + line(now - 9, "b"))
+        w = window()
+        assert types(w.refresh(now)) == ["a", "b"]
+        assert w.stats["reset"] == "init" and w.stats["malformed_total"] == 1
+
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line(now - 5, "c"))
+        w = window()
+        assert types(w.refresh(now)) == ["a", "b", "c"]
+        assert w.stats["reset"] is None and w.stats["new_lines"] == 1
+        checks.append("append")
+
+        partial = line(now - 4, "d")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(partial[:15])
+        w = window()
+        assert types(w.refresh(now)) == ["a", "b", "c"] and w.stats["new_lines"] == 0
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(partial[15:])
+        w = window()
+        assert types(w.refresh(now)) == ["a", "b", "c", "d"]
+        checks.append("partial_line")
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(line(now - 3, "e"))
+        w = window()
+        assert types(w.refresh(now)) == ["e"] and w.stats["reset"] == "truncated"
+        assert w.stats["malformed_total"] == 0
+        checks.append("truncated")
+
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line(now - 2, "f"))
+        os.rename(path, path + ".1")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(line(now - 1, "g"))
+        w = window()
+        assert types(w.refresh(now)) == ["e", "f", "g"] and w.stats["reset"] == "rotated"
+        checks.append("rotated")
+
+        with open(path, "r", encoding="utf-8") as f:
+            body = f.read()
+        with open(path, "r+", encoding="utf-8") as f:
+            f.write(body.replace('"g"', '"h"') + line(now, "i"))
+        w = window()
+        assert types(w.refresh(now)) == ["h", "i"] and w.stats["reset"] == "rewritten"
+        checks.append("rewritten")
+
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line(now - 7200, "old"))
+        w = window()
+        assert types(w.refresh(now + 3600 - 0.5)) == ["i"]
+        checks.append("window")
+
+    print(json.dumps({"ok": True, "checks": checks}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
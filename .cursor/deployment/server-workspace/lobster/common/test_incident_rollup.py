@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Tests for incident_rollup (hourly count buckets).
+
+Cases:
+- verify: per-key raw/unique counts of 2h/24h/7d windows == full scan (dups, naive ts, malformed)
+- edges: whole hours come from buckets, partial hours from raw edge rows
+- incremental: appended lines land in buckets; replay after a lost cursor write does not double count
+- rotated: edge rows of the current file are still found after the source is
+  rotated away (hours that only existed in the removed file have none)
+- truncated: rewriting the source rebuilds the rollup
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import tempfile
+from datetime import datetime, timezone
+
+from incident_rollup import RollupStore, verify
+
+TYPES = ["cron_error", "gateway_down", "message_transport_failed", "rollback_done"]
+SOURCES = ["uchastkovy-lobster", "chekist-lobster", "legacy-monitor", None]
+# Fixed clock, 45 min into an hour: the windows below always have the same edge hours.
+NOW = datetime(2026, 2, 26, 12, 0, tzinfo=timezone.utc).timestamp() + 45 * 60
+
+
+def iso(t: float) -> str:
+    return datetime.fromtimestamp(t, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def write(path: str, rows: list, mode: str = "a") -> None:
+    with open(path, mode, encoding="utf-8") as f:
+        for r in rows:
+            f.write((r if isinstance(r, str) else json.dumps(r)) + "\n")
+
+
+def gen(rnd: random.Random, t0: float, t1: float, n: int) -> list:
+    rows: list = []
+    for i in range(n):
+        rec = {
+            "ts": iso(rnd.uniform(t0, t1)),
+            "type": rnd.choice(TYPES),
+            "severity": rnd.choice(["critical", "warn", "info"]),
+            "source": rnd.choice(SOURCES),
+            "msg": f"m{i % 7}",
+        }
+        if i % 5 == 0:
+            rec["jobId"] = f"job-{i % 3}"
+        rows.append(rec)
+        if i % 50 == 0:
+            rows.append(dict(rec))  # duplicate
+        if i % 97 == 0:
+            rows.append('{"ts": "broken')
+        if i % 131 == 0:
+            rows.append({"ts": "2026-01-01T00:00:00", "type": "naive", "severity": "critical"})
+    return rows
+
+
+def main() -> None:
+    rnd = random.Random(7)
+    now = NOW
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "incidents.jsonl")
+        root = os.path.join(tmp, "rollup")
+        write(src, gen(rnd, now - 8 * 86400, now, 4000), mode="w")
+
+        store = RollupStore(root, src)
+        st = store.refresh()
+        assert st["reset"] == "init" and st["new_lines"] > 4000
+        out = verify(store, [2, 24, 168], now=now)
+        assert out["ok"], out
+        assert store.malformed_count() > 0 and store.state["undated"] > 0
+
+        win = store.window(now - 5.5 * 3600, now - 0.5 * 3600)
+        assert win.full_hours >= 4 and win.edge_hours == 2 and win.edge_rows
+
+        write(src, gen(rnd, now - 3600, now, 300))
+        assert store.refresh()["new_lines"] > 300
+        assert verify(store, [2, 24], now=now)["ok"]
+
+        # crash after bucket writes, before the cursor write: replay must not double count
+        with open(store._state_path(), "r", encoding="utf-8") as f:
+            saved_state = f.read()
+        write(src, gen(rnd, now - 3600, now, 100))
+        store.refresh()
+        counts = {d: store._load_json(store._day_path(d), {}) for d in store.days()}
+        malformed = store.malformed_count()
+        with open(store._state_path(), "w", encoding="utf-8") as f:
+            f.write(saved_state)
+        st = store.refresh()
+        assert st["new_lines"] > 100 and st["skipped"] > 0
+        assert counts == {d: store._load_json(store._day_path(d), {}) for d in store.days()}
+        assert store.malformed_count() == malformed
+        assert verify(store, [2], now=now)["ok"]
+
+        os.rename(src, src + ".1")
+        write(src, gen(rnd, now - 1800, now, 50), mode="w")
+        store.refresh()
+        os.remove(src + ".1")
+        win = store.window(now - 1.5 * 3600, now)  # edges 11:15-12:00 (rotated away) and 12:00-12:45
+        assert win.edge_hours == 2 and win.edge_rows  # fell back to scanning the current file
+        assert all(r["ts"] >= iso(now - 1800) for r in win.edge_rows)
+
+        write(src, gen(rnd, now - 7200, now, 20), mode="w")
+        assert store.refresh()["reset"] in ("truncated", "rewritten")
+        assert verify(store, [24], now=now)["ok"]
+
+    print(json.dumps({"ok": True, "checks": ["verify", "edges", "incremental", "rotated", "truncated"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Tests for incident_state (materialized resolved-state index).
+
+Cases:
+- resolve_by_id: `resolved` row with ref_id=id closes the incident
+- resolve_by_alias: with aliases=True, ref "type:jobId" (uchastkovy auto-close)
+  closes id-less rows; the default index leaves them open
+- born_closed: resolved=true rows and rows covered by an earlier-seen ref never open
+- reopen: a new occurrence after the resolution reopens the incident
+- incremental: second refresh ingests only appended lines
+- window_match: active() == window scan + resolved filter when no resolution is older than the window
+- runner_parity: on a mixed corpus (id-less rows sharing type:source/jobId,
+  alias refs, resolved=true rows) the default index gives the chekist and
+  mekhanik runners the same active criticals as their window filter
+- grouped: the default index keeps one entry per id-less type:source[:jobId];
+  a resolved=true row drops only itself
+- journal: an incremental refresh appends a delta instead of rewriting the
+  snapshot; a fresh instance replays it; a torn append is ignored and the next
+  refresh writes a snapshot
+- truncated: rewriting the source rebuilds the index
+- backlog_skip: a full build skips lines older than the retention window and
+  still matches the window scan inside it
+- expiry: open incidents silent past retention are dropped
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from incident_state import IncidentIndex
+
+
+def iso(t: float) -> str:
+    return datetime.fromtimestamp(t, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def write(path: str, rows: list[dict], mode: str = "a") -> None:
+    with open(path, mode, encoding="utf-8") as f:
+        for r in rows:
+            f.write(json.dumps(r) + "\n")
+
+
+def window_scan(path: str, since: float) -> list[dict]:
+    """Reference: chekist-style resolved filtering over a window scan."""
+    events = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            r = json.loads(line)
+            if datetime.fromisoformat(r["ts"].replace("Z", "+00:00")).timestamp() >= since:
+                events.append(r)
+    resolved = {e["ref_id"] for e in events if e.get("type") == "resolved"}
+    return [
+        e
+        for e in events
+        if e.get("type") != "resolved" and e.get("resolved") is not True and e.get("id") not in resolved
+    ]
+
+
+def main() -> None:
+    now = time.time()
+    checks = []
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "incidents.jsonl")
+        state = os.path.join(tmp, "incident-state.json")
+        alias_state = os.path.join(tmp, "incident-state-alias.json")
+
+        def index(aliases: bool = True) -> IncidentIndex:
+            idx = IncidentIndex(src, alias_state if aliases else state, aliases=aliases)
+            idx.refresh(now)
+            return idx
+
+        write(src, [
+            {"ts": iso(now - 300), "id": "inc-1", "type": "gateway_down", "source": "u", "severity": "critical"},
+            {"ts": iso(now - 290), "type": "cron_error", "source": "u", "jobId": "j-dead", "severity": "critical"},
+            {"ts": iso(now - 280), "type": "cron_error", "source": "u", "jobId": "j-dead", "severity": "critical"},
+        ], mode="w")
+        idx = index()
+        assert idx.stats["reset"] == "init" and idx.stats["open"] == 2
+        assert len(idx.active()) == 3
+
+        write(src, [{"ts": iso(now - 200), "type": "resolved", "ref_id": "inc-1"}])
+        idx = index()
+        assert idx.stats["new_lines"] == 1 and idx.stats["reset"] is None
+        assert idx.state_of("inc-1") == "resolved"
+        checks += ["resolve_by_id", "incremental"]
+
+        write(src, [{"ts": iso(now - 190), "type": "resolved", "ref_id": "cron_error:j-dead"}])
+        idx = index()
+        assert idx.active() == [] and idx.open_entries() == []
+        by_id = index(aliases=False)
+        assert len(by_id.active()) == 2 and by_id.state_of("inc-1") == "resolved"
+        checks.append("resolve_by_alias")
+
+        write(src, [
+            {"ts": iso(now - 180), "type": "resolved", "ref_id": "inc-2"},
+            {"ts": iso(now - 185), "id": "inc-2", "type": "x", "source": "u"},
+            {"ts": iso(now - 170), "type": "y", "source": "u", "resolved": True},
+        ])
+        idx = index()
+        assert idx.active() == [] and idx.state_of("inc-2") == "resolved"
+        checks.append("born_closed")
+
+        write(src, [{"ts": iso(now - 100), "id": "inc-1", "type": "gateway_down", "source": "u", "severity": "critical"}])
+        idx = index()
+        assert [r["ts"] for r in idx.active()] == [iso(now - 100)] and idx.state_of("inc-1") == "open"
+        checks.append("reopen")
+
+        rnd = random.Random(3)
+        rows = []
+        for i in range(2000):
+            t = now - 4 * 3600 + i * 7
+            if i % 10 == 9:
+                rows.append({"ts": iso(t), "type": "resolved", "ref_id": f"w-{rnd.randrange(i)}"})
+            else:
+                rows.append({"ts": iso(t), "id": f"w-{i}", "type": "t", "source": "s", "severity": "critical"})
+        write(src, rows, mode="w")
+        idx = index()
+        assert idx.stats["reset"] in ("truncated", "rewritten")
+        since = now - 4 * 3600
+        assert idx.active(since) == window_scan(src, since)
+        checks += ["truncated", "window_match"]
+
+        short = IncidentIndex(src, os.path.join(tmp, "short.json"), retention_s=3600)
+        short.refresh(now)
+        assert short.stats["skipped"] > 1000 and short.active(now - 3600) == window_scan(src, now - 3600)
+        checks.append("backlog_skip")
+
+        idx = IncidentIndex(src, alias_state, retention_s=3600, aliases=True)
+        idx.refresh(now + 3 * 3600)
+        assert idx.stats["expired"] > 0 and idx.open_entries() == []
+        checks.append("expiry")
+
+        rows, ids = [], 0
+        for i in range(3000):
+            t = now - 4 * 3600 + i * 4
+            kind = rnd.random()
+            if kind < 0.1 and ids:
+                ref = rnd.choice([f"w-{rnd.randrange(ids)}", "cron_error:j-1", "gateway_down:u", "x:ghost"])
+                rows.append({"ts": iso(t), "type": "resolved", "ref_id": ref})
+            elif kind < 0.35:
+                rows.append({"ts": iso(t), "id": f"w-{ids}", "type": "gateway_down", "source": "u",
+                             "severity": rnd.choice(["critical", "warn"])})
+                ids += 1
+            else:
+                row = {"ts": iso(t), "type": rnd.choice(["cron_error", "gateway_down"]), "source": "u",
+                       "severity": rnd.choice(["critical", "critical", "info"])}
+                if rnd.random() < 0.5:
+                    row["jobId"] = "j-1"
+                if rnd.random() < 0.05:
+                    row["resolved"] = True
+                rows.append(row)
+        write(src, rows, mode="w")
+        idx = index(aliases=False)
+        crit = [r for r in window_scan(src, since) if r.get("severity") == "critical"]
+        got = idx.active(since, lambda r: r.get("severity") == "critical")
+        assert got == crit and len(crit) > 1000
+        assert len(index().active(since, lambda r: r.get("severity") == "critical")) < len(crit)
+        checks.append("runner_parity")
+        assert len([e for e in idx.open_entries() if e["key"].startswith("#")]) == 4
+
+        write(src, [
+            {"ts": iso(now - 60), "type": "cron_error", "source": "u", "jobId": "j-2", "severity": "critical"},
+            {"ts": iso(now - 50), "type": "cron_error", "source": "u", "jobId": "j-2", "resolved": True},
+            {"ts": iso(now - 40), "type": "cron_error", "source": "u", "jobId": "j-2", "severity": "critical"},
+        ], mode="w")
+        idx = index(aliases=False)
+        assert [e["key"] for e in idx.open_entries()] == ["#cron_error:u:j-2"]
+        assert [r["ts"] for r in idx.active()] == [iso(now - 60), iso(now - 40)]
+        checks.append("grouped")
+
+        snap = os.stat(state).st_mtime_ns
+        write(src, [{"ts": iso(now - 30), "id": "inc-9", "type": "x", "source": "u"}])
+        idx.refresh(now + 60)
+        assert idx.stats["new_lines"] == 1 and not idx.stats["snapshot"]
+        assert os.stat(state).st_mtime_ns == snap and os.path.getsize(state + ".delta") > 0
+        again = IncidentIndex(src, state)
+        assert again.state == idx.state and len(again.active()) == 3
+        with open(state + ".delta", "a", encoding="utf-8") as f:
+            f.write('{"gen": "torn')
+        again = IncidentIndex(src, state)
+        again.refresh(now + 120)
+        assert again.stats["new_lines"] == 0 and again.stats["snapshot"]
+        assert not os.path.exists(state + ".delta") and len(again.active()) == 3
+        checks.append("journal")
+
+    print(json.dumps({"ok": True, "checks": checks}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Tests for incident_writer (group-commit appends).
+
+Cases:
+- concurrent: 8 processes x 50 batches land intact, each batch contiguous
+- partial_tail: a dangling half line from a crashed writer does not swallow the next batch
+- empty_flush: flush() without records does not touch the file
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from multiprocessing import Process
+
+from incident_writer import IncidentWriter, append_incidents
+
+WORKERS = 8
+BATCHES = 50
+PER_BATCH = 20
+
+
+def worker(path: str, wid: int) -> None:
+    w = IncidentWriter(path)
+    for b in range(BATCHES):
+        for i in range(PER_BATCH):
+            w.add({"ts": "2026-02-26T00:00:00Z", "type": "t", "w": wid, "b": b, "i": i, "pad": "x" * 200})
+        w.flush()
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data", "incidents.jsonl")
+        procs = [Process(target=worker, args=(path, wid)) for wid in range(WORKERS)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+            assert p.exitcode == 0
+
+        with open(path, "r", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f]
+        assert len(rows) == WORKERS * BATCHES * PER_BATCH
+        for start in range(0, len(rows), PER_BATCH):
+            batch = rows[start : start + PER_BATCH]
+            assert len({(r["w"], r["b"]) for r in batch}) == 1
+            assert [r["i"] for r in batch] == list(range(PER_BATCH))
+
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"ts": "2026-02-26T00:00:01Z", "ty')
+        assert append_incidents([{"ts": "2026-02-26T00:00:02Z", "type": "after_crash"}], path=path) == 1
+        with open(path, "r", encoding="utf-8") as f:
+            last = f.read().splitlines()[-1]
+        assert json.loads(last)["type"] == "after_crash"
+
+        size = os.path.getsize(path)
+        assert IncidentWriter(path).flush() == 0 and os.path.getsize(path) == size
+
+    print(json.dumps({"ok": True, "checks": ["concurrent", "partial_tail", "empty_flush"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
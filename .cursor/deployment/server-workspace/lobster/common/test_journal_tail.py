@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""Tests for journal_tail (cursor-based journal tailer with a shared rolling cache).
+
+A fake journalctl (FAKE_JOURNAL=<entries.jsonl>) honours --since @epoch and
+--after-cursor, fails on an unknown cursor like the real one, and logs its argv.
+
+Cases:
+- init: first refresh reads the window with --since, events are cached
+- incremental: next refresh uses --after-cursor and reads only the new entries;
+  binary MESSAGE (byte array) is decoded
+- crash: cache bytes past the state's cache_size are cut, nothing is cached twice
+- cursor_lost: unknown cursor -> cache dropped, window re-read (reset=cursor_lost)
+- compact: entries older than the window are dropped once past the slack
+- timeout: a hung journalctl is killed; entries read until then are kept
+- soak: scripts/mem0_soak_probe.py counts from the tailer (fake journalctl on PATH)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import journal_tail
+from journal_tail import JournalTail
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+FAKE = """#!{python}
+import json, os, sys, time
+args = sys.argv[1:]
+path = os.environ["FAKE_JOURNAL"]
+with open(path + ".args", "a") as f:
+    f.write(json.dumps(args) + "\\n")
+rows = [json.loads(l) for l in open(path) if l.strip()]
+if "--after-cursor" in args:
+    cur = args[args.index("--after-cursor") + 1]
+    idx = [r["__CURSOR"] for r in rows].index(cur) if cur in [r["__CURSOR"] for r in rows] else None
+    if idx is None:
+        sys.stderr.write("Failed to seek to cursor: Invalid argument\\n")
+        sys.exit(1)
+    rows = rows[idx + 1:]
+elif "--since" in args:
+    since = float(args[args.index("--since") + 1].lstrip("@"))
+    rows = [r for r in rows if int(r["__REALTIME_TIMESTAMP"]) / 1e6 >= since]
+hang = os.environ.get("FAKE_JOURNAL_HANG")
+for i, r in enumerate(rows):
+    if hang and i == int(hang):
+        sys.stdout.flush()
+        time.sleep(30)
+    print(json.dumps(r))
+"""
+
+
+class Journal:
+    def __init__(self, path: str):
+        self.path = path
+        self.seq = 0
+        open(path, "w").close()
+
+    def add(self, t: float, msg, prio: int = 6) -> None:
+        self.seq += 1
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "__CURSOR": f"s=abc;i={self.seq:x}",
+                "__REALTIME_TIMESTAMP": str(int(t * 1e6)),
+                "PRIORITY": str(prio),
+                "MESSAGE": msg,
+                "_SYSTEMD_USER_UNIT": "openclaw-gateway.service",
+            }) + "\n")
+
+    def calls(self) -> list[list[str]]:
+        with open(self.path + ".args", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+
+def main() -> None:
+    now = time.time()
+    with tempfile.TemporaryDirectory() as tmp:
+        bin_dir = os.path.join(tmp, "bin")
+        os.makedirs(bin_dir)
+        fake = os.path.join(bin_dir, "journalctl")
+        with open(fake, "w", encoding="utf-8") as f:
+            f.write(FAKE.format(python=sys.executable))
+        os.chmod(fake, 0o755)
+        j = Journal(os.path.join(tmp, "journal.jsonl"))
+        os.environ["FAKE_JOURNAL"] = j.path
+        state = os.path.join(tmp, "state")
+
+        j.add(now - 7200, "too old for the window")
+        j.add(now - 1800, "announce queue drain failed")
+        j.add(now - 300, "announce queue drain failed")
+        j.add(now - 60, "capture failed: Bad Request")
+        tail = JournalTail("openclaw-gateway", window_s=3600, state_dir=state, journalctl=fake)
+        st = tail.refresh(now)
+        assert st["reset"] == "init" and st["new_entries"] == 3, st
+        assert j.calls()[-1][-2:] == ["--since", f"@{int(now - 3600)}"]
+        assert tail.messages(now - 660) == ["announce queue drain failed", "capture failed: Bad Request"]
+        assert tail.events()[0]["prio"] == 6 and len(tail.events()) == 3
+
+        j.add(now + 10, "announce queue drain failed")
+        j.add(now + 20, list("binary ü".encode("utf-8")))
+        st = tail.refresh(now + 30)
+        assert st["reset"] is None and st["new_entries"] == 2, st
+        assert j.calls()[-1][-2:] == ["--after-cursor", "s=abc;i=4"]
+        assert tail.messages(now)[-1] == "binary ü"
+        other = JournalTail("openclaw-gateway", window_s=600, state_dir=state, journalctl=fake)
+        assert sum("drain failed" in m for m in other.messages(now - 660)) == 2
+
+        with open(tail.cache_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"t": now + 10, "msg": "announce queue drain failed"}) + "\n")
+        st = tail.refresh(now + 40)
+        assert st["new_entries"] == 0 and len(tail.events()) == 5
+
+        j.seq = 100
+        j.add(now + 50, "after vacuum")
+        os.rename(j.path, j.path + ".old")
+        with open(j.path + ".old", encoding="utf-8") as src, open(j.path, "w", encoding="utf-8") as dst:
+            dst.write(src.readlines()[-1])
+        st = tail.refresh(now + 60)
+        assert st["reset"] == "cursor_lost" and tail.messages() == ["after vacuum"], (st, tail.messages())
+
+        j.add(now + 2 * 3600, "two hours later")
+        st = tail.refresh(now + 2 * 3600 + 5)
+        assert st["compacted"] and tail.messages() == ["two hours later"], st
+        with open(tail.state_path, encoding="utf-8") as f:
+            saved = json.load(f)
+        assert saved["cache_size"] == os.path.getsize(tail.cache_path) and saved["cursor"] == f"s=abc;i={j.seq:x}"
+
+        for k in range(5):
+            j.add(now + 2 * 3600 + 10 + k, f"burst {k}")
+        os.environ["FAKE_JOURNAL_HANG"] = "2"
+        quick = JournalTail("openclaw-gateway", window_s=3600, state_dir=state, journalctl=fake, timeout_s=1.0)
+        t0 = time.monotonic()
+        st = quick.refresh(now + 2 * 3600 + 20)
+        assert time.monotonic() - t0 < 5 and st["timed_out"] and st["new_entries"] == 2, st
+        del os.environ["FAKE_JOURNAL_HANG"]
+        st = quick.refresh(now + 2 * 3600 + 30)
+        assert st["new_entries"] == 3 and quick.messages(now + 2 * 3600 + 1) == [f"burst {k}" for k in range(5)]
+
+        home = os.path.join(tmp, "home")
+        j2 = Journal(os.path.join(tmp, "soak.jsonl"))
+        j2.add(now - 120, "mem0: capture failed (Bad Request)")
+        j2.add(now - 90, "POST /points/search 400 from qdrant")
+        j2.add(now - 60, "reply first_response_ms=820")
+        j2.add(now - 3000, "capture failed long ago")
+        env = dict(os.environ, HOME=home, FAKE_JOURNAL=j2.path, PATH=bin_dir + os.pathsep + os.environ["PATH"],
+                   MEM0_SOAK_OUT=os.path.join(home, "soak.jsonl"))
+        out = subprocess.run(
+            [sys.executable, os.path.join(HERE, "..", "..", "scripts", "mem0_soak_probe.py")],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        res = json.loads(out.stdout)
+        assert res["source"] == "tailer", res
+        assert (res["capture_failed_count"], res["qdrant_400_count"], res["p95_latency_ms"]) == (1, 1, 820), res
+        assert os.path.exists(os.path.join(home, ".openclaw", ".runtime", "cursors", "journal-openclaw-gateway.json"))
+
+    assert journal_tail.parse_entry("-- No entries --\n") is None
+
+    print(json.dumps({"ok": True, "checks": ["init", "incremental", "crash", "cursor_lost", "compact", "timeout", "soak"]},
+                     indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Tests for jsonl_prefilter (raw ts-prefix window filter).
+
+Cases:
+- no_false_reject: every line inside [start, end] survives the pre-filter
+- layouts: other key order / offsets / naive ts / odd spacing always pass through
+- boundary: same-second lines at both bounds pass (sub-second precision is left to the caller)
+- rejects: valid ts-first ISO-Z lines outside the window are dropped
+- malformed: truncated lines with a well-formed ts prefix outside the window
+  are yielded (counted as malformed by the caller); only whole-shaped lines
+  are rejected
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+from jsonl_prefilter import TsWindow, iter_window_lines
+
+START = datetime(2026, 2, 26, 10, 0, 0, 500000, tzinfo=timezone.utc)
+END = START + timedelta(hours=4)
+
+
+def parse(ts: str) -> datetime:
+    return datetime.fromisoformat(ts.replace("Z", "+00:00"))
+
+
+def main() -> None:
+    rnd = random.Random(11)
+    lines = []
+    for i in range(5000):
+        t = START + timedelta(seconds=rnd.uniform(-8 * 3600, 8 * 3600))
+        ts = t.isoformat().replace("+00:00", "Z")
+        rec = {"ts": ts, "i": i}
+        if i % 7 == 0:
+            lines.append(json.dumps({"i": i, "ts": ts}))
+        elif i % 11 == 0:
+            lines.append(json.dumps({"ts": t.astimezone(timezone(timedelta(hours=5))).isoformat(), "i": i}))
+        elif i % 13 == 0:
+            lines.append(json.dumps(rec, separators=(",", ":")))
+        else:
+            lines.append(json.dumps(rec))
+    edge = [
+        {"ts": "2026-02-26T10:00:00Z", "i": -1},
+        {"ts": "2026-02-26T14:00:00.999999Z", "i": -2},
+        {"ts": "2026-02-26T01:00:00", "i": -3},
+    ]
+    corrupt = '{"ts": "2026-02-26T01:00:00Z", "i": 1, "msg": "cut off'
+    lines += [json.dumps(r) for r in edge] + ['{"ts": "2026-02-26T01:00:00Z", "i": 1', "{not-json}", corrupt]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "x.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n\n")
+
+        window = TsWindow(START, END)
+        kept = list(iter_window_lines(path, window=window))
+        decoded = []
+        for raw in kept:
+            try:
+                decoded.append(json.loads(raw))
+            except Exception:
+                continue
+
+        want = set()
+        for ln in lines:
+            try:
+                r = json.loads(ln)
+                t = parse(r["ts"])
+            except Exception:
+                continue
+            if t.tzinfo is not None and START <= t <= END:
+                want.add(r["i"])
+        got = {r["i"] for r in decoded}
+        assert want <= got
+        assert {-1, -2, -3} <= got
+        assert b"{not-json}" in kept and b'{"ts": "2026-02-26T01:00:00Z", "i": 1' in kept
+        assert corrupt.encode() in kept
+        assert window.rejected > 0 and window.rejected + len(kept) == len(lines)
+        for r in decoded:
+            raw = json.dumps(r)
+            if not raw.startswith('{"ts": "') or not r["ts"].endswith("Z"):
+                continue
+            assert r["ts"][:19] >= "2026-02-26T10:00:00" and r["ts"][:19] <= "2026-02-26T14:00:00"
+
+        assert len(list(iter_window_lines(path))) == len(lines)
+        w = TsWindow(START, END)
+        assert not w.reject(corrupt.encode()) and w.reject(corrupt.encode() + b"}") and w.rejected == 1
+
+    print(json.dumps({"ok": True, "checks": ["no_false_reject", "layouts", "boundary", "rejects", "malformed"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
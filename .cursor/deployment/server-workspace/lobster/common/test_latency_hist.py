@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""Tests for latency_hist (mergeable log-bucket histograms + query).
+
+Cases:
+- accuracy: p50/p95/p99 within alpha (1%) of the sample at that rank; max exact
+- merge: merging per-run histograms equals one histogram of all samples, any order
+- roundtrip: to_dict/from_dict keeps everything; zeros and empty histograms
+- query: range filter on run end and grouping by Asia/Almaty day / ISO week
+- soak: two overlapping mem0_soak_probe runs (fake journalctl) persist histograms
+  that merge without counting a sample twice
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from latency_hist import ALPHA, LogHistogram, last_end, query
+from test_journal_tail import FAKE, Journal
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def iso(t: float) -> str:
+    return datetime.fromtimestamp(t, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def main() -> None:
+    rnd = random.Random(5)
+    vals = [int(rnd.lognormvariate(6, 1.2)) + 1 for _ in range(50000)]
+    h = LogHistogram.of(vals)
+    ordered = sorted(vals)
+    for q in (0.5, 0.95, 0.99):
+        exact = ordered[int(q * (len(ordered) - 1))]
+        assert abs(h.quantile(q) - exact) <= ALPHA * exact + 1e-9, (q, h.quantile(q), exact)
+    assert h.summary()["max"] == max(vals) and h.summary()["count"] == len(vals)
+
+    parts = [LogHistogram.of(vals[i:i + 700]) for i in range(0, len(vals), 700)]
+    rnd.shuffle(parts)
+    merged = LogHistogram()
+    for p in parts:
+        merged.merge(p)
+    a, b = merged.to_dict(), h.to_dict()
+    assert abs(a.pop("sum") - b.pop("sum")) < 1e-6 and a == b
+    try:
+        merged.merge(LogHistogram(0.05))
+        raise AssertionError("expected ValueError")
+    except ValueError:
+        pass
+
+    back = LogHistogram.from_dict(json.loads(json.dumps(h.to_dict())))
+    assert back.to_dict() == h.to_dict() and back.summary() == h.summary()
+    assert LogHistogram().summary() == {"count": 0, "p50": None, "p95": None, "p99": None, "max": None}
+    z = LogHistogram.of([0, 0, 0, 10])
+    assert z.quantile(0.5) == 0.0 and z.quantile(1) == 10 and z.summary()["count"] == 4
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "hist.jsonl")
+        base = datetime(2026, 3, 2, 18, 30, tzinfo=timezone.utc).timestamp()  # 23:30 Almaty, Monday
+        with open(path, "w", encoding="utf-8") as f:
+            for dt, samples in [(0, [100, 200]), (3600, [300]), (86400 * 7, [50]), (600, [])]:
+                t = base + dt
+                f.write(json.dumps({"ts": iso(t), "start": iso(t - 600), "end": iso(t), "source": "tailer",
+                                    "hist": LogHistogram.of(samples).to_dict()}) + "\n")
+            f.write("{broken\n")
+        res = query(path)
+        assert res["runs"] == 4 and res["count"] == 4 and res["max"] == 300
+        res = query(path, since=base + 1, until=base + 86400)
+        assert res["runs"] == 2 and res["count"] == 1 and res["max"] == 300
+        res = query(path, by="day")
+        assert {k: v["count"] for k, v in res["groups"].items()} == {"2026-03-02": 2, "2026-03-03": 1, "2026-03-09": 1}
+        res = query(path, by="week")
+        assert {k: v["count"] for k, v in res["groups"].items()} == {"2026-W10": 3, "2026-W11": 1}
+        assert abs(last_end(path) - (base + 600)) < 1e-6
+        assert last_end(os.path.join(tmp, "missing.jsonl")) is None
+
+        bin_dir = os.path.join(tmp, "bin")
+        os.makedirs(bin_dir)
+        with open(os.path.join(bin_dir, "journalctl"), "w", encoding="utf-8") as f:
+            f.write(FAKE.format(python=sys.executable))
+        os.chmod(os.path.join(bin_dir, "journalctl"), 0o755)
+        j = Journal(os.path.join(tmp, "journal.jsonl"))
+        home = os.path.join(tmp, "home")
+        env = dict(os.environ, HOME=home, FAKE_JOURNAL=j.path, PATH=bin_dir + os.pathsep + os.environ["PATH"])
+        script = os.path.join(HERE, "..", "..", "scripts", "mem0_soak_probe.py")
+        now = time.time()
+        j.add(now - 300, "reply first_response_ms=100")
+        j.add(now - 200, "reply first_response_ms=900")
+        subprocess.run([sys.executable, script], env=env, check=True, capture_output=True)
+        time.sleep(0.05)
+        j.add(time.time() - 0.01, "reply first_response_ms=400")
+        subprocess.run([sys.executable, script], env=env, check=True, capture_output=True)
+        hist_path = os.path.join(home, ".openclaw", ".runtime", "mem0-soak-hist.jsonl")
+        with open(hist_path, encoding="utf-8") as f:
+            runs = [json.loads(line) for line in f]
+        assert [r["hist"]["n"] for r in runs] == [2, 1], runs
+        assert runs[1]["start"] == runs[0]["end"]
+        res = query(hist_path)
+        assert res["count"] == 3 and res["max"] == 900 and abs(res["p50"] - 400) <= 4, res
+        with open(os.path.join(home, ".openclaw", ".runtime", "mem0-soak.jsonl"), encoding="utf-8") as f:
+            summary = [json.loads(line) for line in f]
+        assert summary[1]["p95_latency_ms"] is not None
+
+    print(json.dumps({"ok": True, "checks": ["accuracy", "merge", "roundtrip", "query", "soak"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Tests for metrics_exporter (incremental Prometheus/OpenMetrics textfile).
+
+Cases:
+- export: runner counters/durations/stages/RSS, heartbeat age, incidents by
+  source/severity, active criticals by type (resolved ones excluded), soak values
+  and latency quantiles from merged histograms
+- incremental: a second run reads only appended lines and counters add up
+- reset: a rewritten runner file is recounted from the start
+- openmetrics: counter families without _total, trailing # EOF
+- cheap: with 50k runner records already consumed, a run is a few stats
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from incident_state import IncidentIndex
+from latency_hist import LogHistogram
+from metrics_exporter import export
+
+SAMPLE = re.compile(r'^([a-z0-9_]+)(\{.*\})? (\S+)$')
+
+
+def iso(t: float) -> str:
+    return datetime.fromtimestamp(t, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def append(path: str, *rows: dict) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+
+
+def parse(path: str) -> dict[str, float]:
+    out = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#"):
+                continue
+            m = SAMPLE.match(line.strip())
+            assert m, line
+            out[m.group(1) + (m.group(2) or "")] = float(m.group(3))
+    return out
+
+
+def main() -> None:
+    now = time.time()
+    with tempfile.TemporaryDirectory() as tmp:
+        rt = os.path.join(tmp, "rt")
+        src = {
+            "metrics_glob": os.path.join(rt, "*-lobster-metrics.jsonl"),
+            "heartbeat": os.path.join(tmp, "hb.jsonl"),
+            "soak": os.path.join(rt, "mem0-soak.jsonl"),
+            "soak_hist": os.path.join(rt, "mem0-soak-hist.jsonl"),
+            "incidents": os.path.join(tmp, "incidents.jsonl"),
+        }
+        out = os.path.join(tmp, "textfile", "lobster.prom")
+        state = os.path.join(tmp, "exporter.json")
+        index = IncidentIndex(src["incidents"], os.path.join(tmp, "incident-state.json"), aliases=True)
+        chekist = os.path.join(rt, "chekist-lobster-metrics.jsonl")
+
+        append(chekist,
+               {"ts": iso(now - 600), "mode": "real", "runs_total": 1, "signals_written": 2, "active_critical_count": 3,
+                "duration_ms": 120.0, "stage_duration_ms": {"read": 100.0, "write": 20.0}, "peak_rss_kb": 20000},
+               {"ts": iso(now - 300), "mode": "real", "runs_total": 1, "signals_written": 1, "active_critical_count": 1,
+                "duration_ms": 80.0, "stage_duration_ms": {"read": 60.0, "write": 20.0}, "peak_rss_kb": 21000})
+        append(os.path.join(rt, "marta-lobster-metrics.jsonl"), {"ts": iso(now - 60), "mode": "plan_only", "runs_total": 1})
+        append(src["heartbeat"], {"ts": iso(now - 90), "type": "heartbeat", "source": "chekist-lobster"},
+               {"ts": iso(now - 30), "type": "heartbeat", "source": "uchastkovy-lobster"})
+        append(src["incidents"],
+               {"ts": iso(now - 500), "type": "gateway_down", "source": "uchastkovy-lobster", "severity": "critical"},
+               {"ts": iso(now - 400), "type": "cron_error", "source": "uchastkovy-lobster", "severity": "critical", "jobId": "j1"},
+               {"ts": iso(now - 350), "type": "cron_error", "source": "uchastkovy-lobster", "severity": "critical", "jobId": "j2"},
+               {"ts": iso(now - 300), "type": "resolved", "source": "chekist-lobster", "severity": "info",
+                "ref_id": "gateway_down:uchastkovy-lobster"},
+               {"ts": iso(now - 200), "type": "disk_warn", "source": "uchastkovy-lobster", "severity": "warn"})
+        append(src["soak"], {"ts": iso(now - 600), "capture_failed_count": 2, "qdrant_400_count": 0, "p95_latency_ms": 700},
+               {"ts": iso(now - 30), "capture_failed_count": 1, "qdrant_400_count": 1, "p95_latency_ms": 900})
+        append(src["soak_hist"],
+               {"ts": iso(now - 2 * 86400), "end": iso(now - 2 * 86400), "hist": LogHistogram.of([5000]).to_dict()},
+               {"ts": iso(now - 7200), "end": iso(now - 7200), "hist": LogHistogram.of([100, 200]).to_dict()},
+               {"ts": iso(now - 30), "end": iso(now - 30), "hist": LogHistogram.of([300, 900]).to_dict()})
+
+        res = export(out, state, now=now, index=index, **src)
+        assert res["new_lines"]["chekist"] == 2 and res["new_lines"]["incidents"] == 5, res
+        m = parse(out)
+        assert m['lobster_runner_runs_total{mode="real",runner="chekist"}'] == 2
+        assert m['lobster_runner_field_total{field="signals_written",runner="chekist"}'] == 3
+        assert 'lobster_runner_field_total{field="active_critical_count",runner="chekist"}' not in m
+        assert m['lobster_runner_last_duration_seconds{runner="chekist"}'] == 0.08
+        assert m['lobster_runner_duration_seconds_sum{runner="chekist"}'] == 0.2
+        assert m['lobster_runner_duration_seconds_count{runner="chekist"}'] == 2
+        assert m['lobster_runner_stage_duration_seconds{runner="chekist",stage="read"}'] == 0.06
+        assert m['lobster_runner_peak_rss_bytes{runner="chekist"}'] == 21000 * 1024
+        assert m['lobster_runner_runs_total{mode="plan_only",runner="marta"}'] == 1
+        assert abs(m['lobster_heartbeat_age_seconds{source="chekist-lobster"}'] - 90) < 1
+        assert m['lobster_incidents_total{severity="critical",source="uchastkovy-lobster"}'] == 3
+        assert m['lobster_incidents_active_critical{type="cron_error"}'] == 2
+        assert 'lobster_incidents_active_critical{type="gateway_down"}' not in m
+        assert m['lobster_mem0_soak_runs_total'] == 2
+        assert m['lobster_mem0_soak_events_total{kind="capture_failed"}'] == 3
+        assert m['lobster_mem0_soak_last{field="p95_latency_ms"}'] == 900
+        assert m['lobster_mem0_soak_latency_ms{quantile="1",window="1h"}'] == 900
+        assert m['lobster_mem0_soak_latency_ms{quantile="1",window="24h"}'] == 900
+        assert abs(m['lobster_mem0_soak_latency_ms{quantile="0.5",window="24h"}'] - 200) <= 2
+        with open(out, encoding="utf-8") as f:
+            text = f.read()
+        assert "# TYPE lobster_runner_runs_total counter" in text and "# EOF" not in text
+
+        append(chekist, {"ts": iso(now + 60), "mode": "real", "runs_total": 1, "signals_written": 4, "duration_ms": 50.0})
+        append(src["heartbeat"], {"ts": iso(now + 50), "type": "heartbeat", "source": "chekist-lobster"})
+        res = export(out, state, now=now + 60, index=index, **src)
+        assert res["new_lines"] == {"chekist": 1, "marta": 0, "heartbeat": 1, "incidents": 0, "soak": 0, "soak_hist": 0}, res
+        m = parse(out)
+        assert m['lobster_runner_runs_total{mode="real",runner="chekist"}'] == 3
+        assert m['lobster_runner_field_total{field="signals_written",runner="chekist"}'] == 7
+        assert abs(m['lobster_heartbeat_age_seconds{source="chekist-lobster"}'] - 10) < 1
+        assert m['lobster_runner_last_duration_seconds{runner="chekist"}'] == 0.05
+        assert 'lobster_runner_stage_duration_seconds{runner="chekist",stage="read"}' not in m
+
+        with open(chekist, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"ts": iso(now + 120), "mode": "real", "runs_total": 1, "signals_written": 9}) + "\n")
+        export(out, state, now=now + 120, index=index, **src)
+        m = parse(out)
+        assert m['lobster_runner_runs_total{mode="real",runner="chekist"}'] == 1
+        assert m['lobster_runner_field_total{field="signals_written",runner="chekist"}'] == 9
+
+        export(out, state, openmetrics=True, now=now + 120, index=index, **src)
+        with open(out, encoding="utf-8") as f:
+            text = f.read()
+        assert text.endswith("# EOF\n") and "# TYPE lobster_runner_runs counter" in text
+        assert 'lobster_runner_runs_total{mode="real",runner="chekist"} 1' in text
+
+        big = os.path.join(rt, "wendy-lobster-metrics.jsonl")
+        append(big, *({"ts": iso(now - 86400 + i), "mode": "plan_only", "runs_total": 1, "duration_ms": 1.0}
+                      for i in range(50000)))
+        export(out, state, now=now + 130, index=index, **src)
+        t0 = time.monotonic()
+        res = export(out, state, now=now + 140, index=index, **src)
+        idle_ms = (time.monotonic() - t0) * 1000
+        assert res["new_lines"]["wendy"] == 0 and idle_ms < 300, idle_ms
+        assert parse(out)['lobster_runner_runs_total{mode="plan_only",runner="wendy"}'] == 50000
+
+    print(json.dumps({"ok": True, "checks": ["export", "incremental", "reset", "openmetrics", "cheap"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
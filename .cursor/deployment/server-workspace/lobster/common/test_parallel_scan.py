@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Tests for parallel_scan (process-pool byte-range scans).
+
+Cases:
+- ranges: split_ranges covers the file exactly, every range starts on a line
+- lines: byte-range reads concatenate to the serial read (also without trailing newline)
+- aggregator: chekist_aggregator_v1 --workers == serial report (incl. sample order,
+  duplicates straddling range boundaries, multi-window)
+- gate_calc: uchastkovy_gate_calc --workers == serial deltas and malformed count
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import parallel_scan
+from jsonl_prefilter import iter_window_lines, split_ranges
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "..", "scripts"))
+import chekist_aggregator_v1 as agg  # noqa: E402
+import uchastkovy_gate_calc as gate  # noqa: E402
+
+TYPES = ["cron_error", "gateway_down", "message_transport_failed", "rollback_applied"]
+SOURCES = ["uchastkovy-lobster", "chekist-lobster", "legacy-monitor"]
+
+
+def generate(path: str, end: datetime, n: int) -> None:
+    rnd = random.Random(11)
+    t0 = end.timestamp() - 3 * 86400
+    with open(path, "w", encoding="utf-8") as f:
+        prev = None
+        for i in range(n):
+            if i % 211 == 0:
+                f.write('{"ts": "broken\n')
+                continue
+            if prev is not None and i % 37 == 0:
+                f.write(json.dumps(prev) + "\n")  # duplicate (maybe across a range boundary)
+                continue
+            rec = {
+                "ts": datetime.fromtimestamp(t0 + i * 3 * 86400 / n, timezone.utc).isoformat().replace("+00:00", "Z"),
+                "type": rnd.choice(TYPES),
+                "source": rnd.choice(SOURCES),
+                "severity": rnd.choice(["critical", "warn"]),
+                "msg": f"m{i % 17}",
+            }
+            if i % 3 == 0:
+                rec["jobId"] = f"job-{i % 5}"
+            f.write(json.dumps(rec) + "\n")
+            prev = rec
+
+
+def main() -> None:
+    parallel_scan.MIN_RANGE_BYTES = 1024
+    end = datetime.now(timezone.utc).replace(microsecond=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "incidents.jsonl")
+        generate(path, end, 20000)
+
+        ranges = split_ranges(path, 13)
+        size = os.path.getsize(path)
+        assert ranges[0][0] == 0 and ranges[-1][1] == size and len(ranges) == 13
+        with open(path, "rb") as f:
+            data = f.read()
+        for (lo, hi), (lo2, _hi2) in zip(ranges, ranges[1:]):
+            assert hi == lo2 and data[hi - 1 : hi] == b"\n"
+        serial = list(iter_window_lines(path))
+        assert [ln for lo, hi in ranges for ln in iter_window_lines(path, byte_range=(lo, hi))] == serial
+
+        short = os.path.join(tmp, "short.jsonl")
+        with open(short, "wb") as f:
+            f.write(b"a\nbb\n\nccc")
+        assert [ln for lo, hi in split_ranges(short, 4) for ln in iter_window_lines(short, byte_range=(lo, hi))] == [b"a", b"bb", b"ccc"]
+
+        agg.INCIDENTS = path
+        for start in (end - timedelta(hours=4), end - timedelta(days=4)):
+            assert agg.aggregate_windows_parallel([(start, end)], 4)[0] == agg.aggregate(start, end)
+        windows = [(end - timedelta(hours=h), end) for h in (1, 6, 30, 96)]
+        assert agg.aggregate_windows_parallel(windows, 4) == agg.aggregate_windows(windows)
+        assert agg.aggregate_windows_parallel(windows, 1) == agg.aggregate_windows(windows)
+
+        start_ts = (end - timedelta(days=2)).isoformat().replace("+00:00", "Z")
+        assert gate.compute_deltas(incidents_path=path, start_ts=start_ts, workers=4) == gate.compute_deltas(
+            incidents_path=path, start_ts=start_ts
+        )
+
+    print(json.dumps({"ok": True, "checks": ["ranges", "lines", "aggregator", "gate_calc"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Tests for probe_pool (concurrent host probes).
+
+Cases:
+- concurrent: wall time ~ slowest probe, not the sum; results in the order given
+- timeout: a hung command is killed at its own timeout and reported as timed_out
+- deadline: the total deadline cuts off a slow callable ("deadline exceeded")
+- error: an exception in a probe is captured, other probes still report
+- serial: concurrent=False runs every probe in the calling thread, one at a
+  time, and skips the rest once the deadline has passed
+- runner: uchastkovy runner_real records probe latencies in its metrics and heartbeat
+  (fake systemctl on PATH, HOME pointed at a temp dir)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from probe_pool import Probe, probe_summary, run_probes, sh_probe
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def main() -> None:
+    t = time.monotonic()
+    res = run_probes([Probe(f"p{i}", lambda i=i: (time.sleep(0.3), i)[1], timeout_s=5) for i in range(4)])
+    wall = time.monotonic() - t
+    assert wall < 0.9, wall
+    assert list(res) == ["p0", "p1", "p2", "p3"] and [r.value for r in res.values()] == [0, 1, 2, 3]
+    assert all(r.ok and r.latency_ms >= 290 for r in res.values())
+
+    t = time.monotonic()
+    res = run_probes([sh_probe("hung", ["sleep", "5"], timeout_s=0.3), sh_probe("echo", ["echo", "hi"], timeout_s=5)])
+    assert time.monotonic() - t < 2
+    assert res["hung"].timed_out and not res["hung"].ok
+    assert res["echo"].ok and res["echo"].value == (0, "hi", "")
+
+    t = time.monotonic()
+    res = run_probes([Probe("slow", lambda: time.sleep(2), timeout_s=10), Probe("fast", lambda: "ok")], deadline_s=0.3)
+    assert time.monotonic() - t < 1
+    assert res["slow"].timed_out and res["slow"].error == "deadline exceeded" and res["fast"].value == "ok"
+
+    res = run_probes([Probe("boom", lambda: 1 / 0), Probe("fine", lambda: 1)])
+    summary = probe_summary(res)
+    assert summary["boom"]["ok"] is False and summary["boom"]["error"].startswith("ZeroDivisionError")
+    assert summary["fine"] == {"ok": True, "latency_ms": summary["fine"]["latency_ms"]}
+
+    active, seen = [], []
+
+    def serial_probe(i: int) -> int:
+        active.append(i)
+        assert len(active) == 1 and threading.current_thread() is threading.main_thread()
+        time.sleep(0.1)
+        seen.append(i)
+        active.remove(i)
+        return i
+
+    res = run_probes([Probe(f"s{i}", lambda i=i: serial_probe(i)) for i in range(3)], concurrent=False)
+    assert seen == [0, 1, 2] and [r.value for r in res.values()] == [0, 1, 2]
+    res = run_probes([Probe("a", lambda: time.sleep(0.3)), Probe("b", lambda: seen.append("b"))],
+                     deadline_s=0.1, concurrent=False)
+    assert res["a"].ok and res["b"].error == "deadline exceeded" and "b" not in seen
+
+    with tempfile.TemporaryDirectory() as home:
+        bin_dir = os.path.join(home, "bin")
+        os.makedirs(bin_dir)
+        with open(os.path.join(bin_dir, "systemctl"), "w", encoding="utf-8") as f:
+            f.write("#!/bin/sh\nsleep 0.5\necho active\n")
+        os.chmod(os.path.join(bin_dir, "systemctl"), 0o755)
+        os.makedirs(os.path.join(home, ".openclaw", "cron"))
+        with open(os.path.join(home, ".openclaw", "cron", "jobs.json"), "w", encoding="utf-8") as f:
+            json.dump({"jobs": [{"id": "j1", "name": "ok-job", "state": {"lastStatus": "ok"}}]}, f)
+        env = dict(os.environ, HOME=home, PATH=bin_dir + os.pathsep + os.environ.get("PATH", ""))
+        out = subprocess.run(
+            [sys.executable, os.path.join(HERE, "..", "uchastkovy", "runner_real.py")],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        assert json.loads(out.stdout)["gateway_active"] is True
+        with open(os.path.join(home, ".openclaw", ".runtime", "uchastkovy-lobster-metrics.jsonl"), encoding="utf-8") as f:
+            met = json.loads(f.readline())
+        assert set(met["probes"]) == {"gateway", "disk", "git", "cron"} and met["probes"]["gateway"]["latency_ms"] >= 450
+        assert met["stage_duration_ms"]["probe"] < met["probes"]["gateway"]["latency_ms"] + 400
+        with open(os.path.join(home, ".openclaw", "runtime", "monitor-heartbeat.jsonl"), encoding="utf-8") as f:
+            hb = json.loads(f.readline())
+        assert set(hb["probe_latency_ms"]) == set(met["probes"])
+
+    print(json.dumps({"ok": True, "checks": ["concurrent", "timeout", "deadline", "error", "serial", "runner"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Tests for resident_scheduler (one warm process hosting the runners).
+
+Cases:
+- parity: marta/wendy/mekhanik/chekist run in-process write the same metrics
+  records (same fields, same counters) as a cron-style subprocess run
+- warm: a second round reuses the shared IncidentIndex without reloading its
+  state file and still sees newly appended incidents; cached_json re-parses
+  only after the file changes
+- isolation: an exception, a SystemExit(3) and a hang fail only their own run;
+  the hung runner is skipped while its thread lives and the caches are dropped
+- reload: an edited runner script is re-imported
+- schedule: slots aligned to Asia/Almaty (git-sync plan-only at HH:05 every 4h)
+- log: one lobster-scheduler.jsonl record per run
+(run with HOME pointed at a temp dir)
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import warm_cache
+from resident_scheduler import RUNNERS, Runner, Scheduler, next_due
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LOBSTER = os.path.join(HERE, "..")
+
+FAKE_RUNNERS = {
+    "ok": "import os\nCOUNT = os.environ['OK_OUT']\n\ndef main():\n    with open(COUNT, 'a') as f:\n        f.write('{marker}\\n')\n",
+    "boom": "def main():\n    raise ValueError('bad input')\n",
+    "bye": "def main():\n    raise SystemExit(3)\n",
+    "hang": "import time\n\ndef main():\n    time.sleep(3)\n",
+}
+
+
+def iso(t: float) -> str:
+    return datetime.fromtimestamp(t, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def last_record(home: str, name: str) -> dict:
+    with open(os.path.join(home, ".openclaw", ".runtime", name), encoding="utf-8") as f:
+        return json.loads(f.read().splitlines()[-1])
+
+
+def quiet(fn):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn()
+
+
+def main() -> None:
+    names = ["marta", "wendy", "mekhanik-plan", "chekist", "mekhanik"]
+    metrics = {"marta": "marta-lobster-metrics.jsonl", "wendy": "wendy-lobster-metrics.jsonl",
+               "mekhanik-plan": "mekhanik-lobster-metrics.jsonl", "chekist": "chekist-lobster-metrics.jsonl",
+               "mekhanik": "mekhanik-lobster-metrics.jsonl"}
+    by_name = {r.name: r for r in RUNNERS}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cron_home = os.path.join(tmp, "cron")
+        expected = {}
+        for n in names:
+            script = os.path.join(LOBSTER, by_name[n].script)
+            subprocess.run([sys.executable, script], cwd=os.path.dirname(script),
+                           env=dict(os.environ, HOME=cron_home), check=True, capture_output=True)
+            expected[n] = last_record(cron_home, metrics[n])
+
+        home = os.path.join(tmp, "home")
+        os.environ["HOME"] = home
+        log_path = os.path.join(home, ".openclaw", ".runtime", "lobster-scheduler.jsonl")
+        sched = Scheduler([by_name[n] for n in names], log_path=log_path)
+        for n in names:
+            rec = quiet(lambda: sched.run_one(by_name[n]))
+            assert rec["ok"], rec
+            got = last_record(home, metrics[n])
+            want = expected[n]
+            assert set(got) == set(want), (n, set(got) ^ set(want))
+            assert {k: v for k, v in got.items() if isinstance(v, int) and k != "peak_rss_kb"} == \
+                   {k: v for k, v in want.items() if isinstance(v, int) and k != "peak_rss_kb"}, (n, got, want)
+            assert list(got["stage_duration_ms"]) == list(want["stage_duration_ms"])
+
+        incidents = os.path.join(home, ".openclaw", "workspace", "data", "incidents.jsonl")
+        idx = warm_cache.shared(("index", incidents), lambda: None)
+        assert idx is not None and idx.stats["reloaded"] is False  # mekhanik reused chekist's index
+        os.makedirs(os.path.dirname(incidents), exist_ok=True)
+        with open(incidents, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"ts": iso(time.time()), "type": "gateway_down", "source": "uchastkovy-lobster",
+                                "severity": "critical"}) + "\n")
+        recs = quiet(lambda: sched.run_one(by_name["chekist"]))
+        assert recs["ok"] and recs["cache"]["shared_hits"] >= 1 and recs["cache"]["shared_misses"] == 0, recs
+        assert idx.stats["reloaded"] is False and idx.stats["new_lines"] == 1
+        assert last_record(home, metrics["chekist"])["active_critical_count"] == 1
+
+        doc = os.path.join(tmp, "jobs.json")
+        with open(doc, "w", encoding="utf-8") as f:
+            json.dump({"jobs": [{"id": "a"}]}, f)
+        first = warm_cache.cached_json(doc)
+        assert warm_cache.cached_json(doc) is first
+        with open(doc, "w", encoding="utf-8") as f:
+            json.dump({"jobs": [{"id": "a"}, {"id": "b"}]}, f)
+        assert len(warm_cache.cached_json(doc)["jobs"]) == 2
+        try:
+            warm_cache.cached_json(os.path.join(tmp, "missing.json"))
+            raise AssertionError("expected FileNotFoundError")
+        except FileNotFoundError:
+            pass
+
+        fake_dir = os.path.join(tmp, "lobster")
+        for name, src in FAKE_RUNNERS.items():
+            os.makedirs(os.path.join(fake_dir, name))
+            with open(os.path.join(fake_dir, name, "runner.py"), "w", encoding="utf-8") as f:
+                f.write(src.replace("{marker}", "v1"))
+        os.environ["OK_OUT"] = os.path.join(tmp, "ok.txt")
+        fakes = {n: Runner(n, f"{n}/runner.py", 60, timeout_s=1) for n in FAKE_RUNNERS}
+        sched = Scheduler([fakes[n] for n in ("boom", "ok", "bye", "hang", "ok")], lobster_dir=fake_dir, log_path=log_path)
+        recs = sched.run_all()
+        assert [r["ok"] for r in recs] == [False, True, False, False, True], recs
+        assert recs[0]["error"] == "ValueError: bad input" and "raise ValueError" in recs[0]["traceback"]
+        assert recs[2]["exit"] == 3 and recs[3]["timed_out"] and recs[3]["duration_ms"] < 2000
+        assert warm_cache.shared(("index", incidents), lambda: None) is None  # dropped after the timeout
+        assert sched.run_one(fakes["hang"])["skipped"]
+        with open(os.path.join(fake_dir, "ok", "runner.py"), "w", encoding="utf-8") as f:
+            f.write(FAKE_RUNNERS["ok"].replace("{marker}", "v2-reloaded"))
+        assert sched.run_one(fakes["ok"])["ok"]
+        with open(os.environ["OK_OUT"], encoding="utf-8") as f:
+            assert f.read().split() == ["v1", "v1", "v2-reloaded"]
+
+        t = datetime(2026, 3, 2, 19, 7, tzinfo=timezone.utc).timestamp()  # 00:07 Almaty
+        assert iso(next_due(by_name["git-sync-plan"], t)) == "2026-03-02T23:05:00Z"  # 04:05 Almaty
+        assert iso(next_due(by_name["wendy"], t)) == "2026-03-02T19:30:00Z"
+        assert iso(next_due(by_name["economist"], t - 7 * 60)) == "2026-03-02T23:00:00Z"
+
+        with open(log_path, encoding="utf-8") as f:
+            log = [json.loads(line) for line in f]
+        assert len(log) == len(names) + 1 + 5 + 2, len(log)
+
+    print(json.dumps({"ok": True, "checks": ["parity", "warm", "isolation", "reload", "schedule", "log"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Tests for run_metrics (per-stage timing and peak memory in metrics records).
+
+Cases:
+- stages: each stage is timed, a repeated stage adds up, a raising stage is still recorded
+- record: finish() adds the fields in place and keeps the counters
+- tracemalloc: off by default; LOBSTER_TRACEMALLOC=N adds the top N allocation sites
+- runners: marta/wendy/mekhanik plan-only and chekist/mekhanik real runners write the fields
+  (run with HOME pointed at a temp dir)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import run_metrics
+from run_metrics import RunPerf
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LOBSTER = os.path.join(HERE, "..")
+
+
+def main() -> None:
+    os.environ.pop(run_metrics.TRACEMALLOC_ENV, None)
+    perf = RunPerf()
+    with perf.stage("read"):
+        time.sleep(0.02)
+    with perf.stage("classify"):
+        pass
+    with perf.stage("read"):
+        time.sleep(0.01)
+    try:
+        with perf.stage("write"):
+            raise OSError("disk full")
+    except OSError:
+        pass
+    rec = {"ts": "2026-03-01T00:00:00Z", "runs_total": 1}
+    out = perf.finish(rec)
+    assert out is rec and rec["runs_total"] == 1
+    assert list(rec["stage_duration_ms"]) == ["read", "classify", "write"]
+    assert rec["stage_duration_ms"]["read"] >= 30 and rec["duration_ms"] >= rec["stage_duration_ms"]["read"]
+    assert isinstance(rec["peak_rss_kb"], int) and rec["peak_rss_kb"] > 1000
+    assert "tracemalloc_top" not in rec
+
+    os.environ[run_metrics.TRACEMALLOC_ENV] = "3"
+    perf = RunPerf()
+    with perf.stage("alloc"):
+        blob = [bytes(1024) for _ in range(2000)]
+    rec = perf.finish({})
+    del blob
+    assert len(rec["tracemalloc_top"]) == 3 and rec["tracemalloc_peak_kb"] >= 2000
+    assert rec["tracemalloc_top"][0]["where"].startswith("test_run_metrics.py:")
+    os.environ.pop(run_metrics.TRACEMALLOC_ENV)
+
+    runners = [
+        ("marta/runner_plan_only.py", "marta-lobster-metrics.jsonl", ["plan"]),
+        ("wendy/runner_plan_only.py", "wendy-lobster-metrics.jsonl", ["plan"]),
+        ("mekhanik/runner_plan_only.py", "mekhanik-lobster-metrics.jsonl", ["read", "filter", "classify", "write"]),
+        ("mekhanik/runner_real.py", "mekhanik-lobster-metrics.jsonl", ["read", "classify", "write"]),
+        ("chekist/runner_real.py", "chekist-lobster-metrics.jsonl", ["read", "classify", "write"]),
+    ]
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home)
+        for script, metrics, stages in runners:
+            subprocess.run(
+                [sys.executable, os.path.join(LOBSTER, script)],
+                cwd=os.path.dirname(os.path.join(LOBSTER, script)),
+                env=env,
+                check=True,
+                capture_output=True,
+            )
+            with open(os.path.join(home, ".openclaw", ".runtime", metrics), "r", encoding="utf-8") as f:
+                last = json.loads(f.read().splitlines()[-1])
+            assert list(last["stage_duration_ms"]) == stages, (script, last)
+            assert last["runs_total"] == 1 and last["peak_rss_kb"] > 0 and last["duration_ms"] >= 0
+
+    print(json.dumps({"ok": True, "checks": ["stages", "record", "tracemalloc", "runners"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Tests for sessions_stream (streaming sessions.json reader).
+
+Cases:
+- parity: the python backend yields the same pairs as json.load for every
+  chunk size (tiny chunks cut keys, escapes, numbers and nested values),
+  trimmed to SESSION_FIELDS or whole with fields=None
+- errors: truncated/invalid JSON, extra data and a non-object top level raise
+  ValueError; an empty object yields nothing
+- consumers: runner_plan_only.compute_metrics and economist_collect give the
+  same results from the stream as from the loaded dict
+- memory: peak traced memory stays flat as the registry grows 4x
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime, timezone
+
+from sessions_stream import SESSION_FIELDS, iter_sessions
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "economist"))
+sys.path.insert(0, os.path.join(HERE, "..", "..", "scripts"))
+import economist_collect as econ  # noqa: E402
+from runner_plan_only import compute_metrics  # noqa: E402
+
+
+def session(rnd: random.Random, i: int) -> object:
+    r = rnd.random()
+    if r < 0.03:
+        return rnd.choice([None, 7, "x", [1, {"a": 2}], 1.5e-7, True])
+    s = {
+        "sessionId": f"sid-{i % 500}",
+        "updatedAt": 1_760_000_000_000 + rnd.randint(0, 10 ** 9),
+        "model": rnd.choice(["gpt-5.2", "openai/gpt-4o-mini", "google/gemini-2.5-flash", "", None]),
+        "inputTokens": rnd.randint(0, 10 ** 7),
+        "outputTokens": rnd.choice([rnd.randint(0, 10 ** 5), 0.0, -1, "12"]),
+        "skillsSnapshot": {"prompt": "é\"\\\n " * rnd.randint(0, 30), "list": list(range(rnd.randint(0, 20)))},
+        "label": "сессия 🦞",
+    }
+    if r < 0.2:
+        s["modelProvider"] = s.pop("model")
+    return s
+
+
+def write_registry(path: str, n: int, seed: int = 1, indent: int | None = 2) -> dict:
+    rnd = random.Random(seed)
+    reg = {f"agent:main:cron:{i:08x}:run:{rnd.getrandbits(32):08x}\\\"ü": session(rnd, i) for i in range(n)}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(reg, f, ensure_ascii=rnd.random() < 0.5, indent=indent)
+    return reg
+
+
+def trim(v: object) -> object:
+    return {k: v[k] for k in SESSION_FIELDS if k in v} if isinstance(v, dict) else v
+
+
+def peak_kb(path: str) -> int:
+    tracemalloc.start()
+    n = sum(1 for _ in iter_sessions(path, backend="python", chunk_chars=1 << 14))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert n > 0
+    return peak // 1024
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sessions.json")
+        reg = write_registry(path, 600)
+        with open(path, encoding="utf-8") as f:
+            loaded = json.load(f)
+        assert loaded == reg
+        for chunk in (1, 2, 3, 7, 64, 1000, 1 << 20):
+            got = list(iter_sessions(path, backend="python", chunk_chars=chunk))
+            assert got == [(k, trim(v)) for k, v in loaded.items()], chunk
+        assert list(iter_sessions(path, fields=None, backend="python", chunk_chars=5)) == list(loaded.items())
+        compact = os.path.join(tmp, "compact.json")
+        write_registry(compact, 300, seed=2, indent=None)
+        with open(compact, encoding="utf-8") as f:
+            assert list(iter_sessions(compact, None, "python", 4)) == list(json.load(f).items())
+
+        bad = os.path.join(tmp, "bad.json")
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        for doc in (text[:len(text) // 2], text[:-2], text + " {}", "[1, 2]", "", '{"a": 1,}',
+                    '{"a" 1}', '{"a": 1 "b": 2}', '{"a": tru}', '{"a": 12'):
+            with open(bad, "w", encoding="utf-8") as f:
+                f.write(doc)
+            for chunk in (3, 1 << 20):
+                try:
+                    list(iter_sessions(bad, backend="python", chunk_chars=chunk))
+                    raise AssertionError(f"expected ValueError for {doc[-20:]!r}")
+                except ValueError:
+                    pass
+        with open(bad, "w", encoding="utf-8") as f:
+            f.write(' \n{ }\n')
+        assert list(iter_sessions(bad, backend="python", chunk_chars=1)) == []
+        with open(bad, "w", encoding="utf-8") as f:
+            f.write('{"a": 1, "a": {"model": "m"}, "b": 12}')
+        assert list(iter_sessions(bad, backend="python", chunk_chars=2)) == [("a", 1), ("a", {"model": "m"}), ("b", 12)]
+
+        pricing = {"models": {"openai/gpt-4o-mini": {"input_per_1m": 0.15, "output_per_1m": 0.6},
+                              "openai/gpt-5.2": {"input_per_1m": 1.75, "output_per_1m": 14.0}}}
+        assert compute_metrics(iter_sessions(path, backend="python", chunk_chars=7), pricing) == \
+               compute_metrics(loaded, pricing)
+        now = datetime(2025, 10, 20, tzinfo=timezone.utc)
+        streamed = econ.collect(iter_sessions(path, backend="python"), pricing, now, None, {}, set())[1]
+        assert econ.render(streamed) == econ.render(econ.collect(loaded, pricing, now, None, {}, set())[1])
+
+        small, large = os.path.join(tmp, "small.json"), os.path.join(tmp, "large.json")
+        write_registry(small, 5000, seed=3)
+        write_registry(large, 20000, seed=3)
+        p_small, p_large = peak_kb(small), peak_kb(large)
+        assert p_large < p_small * 1.5 + 64, (p_small, p_large)
+
+    print(json.dumps({"ok": True, "checks": ["parity", "errors", "consumers", "memory"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
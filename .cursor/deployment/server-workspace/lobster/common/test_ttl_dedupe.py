@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Tests for ttl_dedupe (expiring dedupe set).
+
+Cases:
+- window: same semantics as the old WindowDedupe (allow once per window, no refresh on repeat)
+- expiry_front: expired entries are popped from the front, live ones stay
+- persist: entries and values survive save/load across instances (cross-run)
+- keys: tuple and list keys map to the same stored key
+- no_save_on_error: an exception inside `with` does not persist new keys
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+
+from ttl_dedupe import TTLDedupe
+
+
+class OldWindowDedupe:
+    """Reference: previous dry_run_harness_v2.WindowDedupe."""
+
+    def __init__(self, window_s: int):
+        self.window_s = window_s
+        self.seen: dict[tuple, float] = {}
+
+    def allow(self, k: tuple, now: float) -> bool:
+        cut = now - self.window_s
+        self.seen = {kk: ts for kk, ts in self.seen.items() if ts >= cut}
+        if k in self.seen:
+            return False
+        self.seen[k] = now
+        return True
+
+
+def main() -> None:
+    old = OldWindowDedupe(300)
+    new = TTLDedupe(300)
+    t = 1_000_000.0
+    for i in range(2000):
+        t += (i * 7919) % 61
+        k = ("cron_error", f"job{i % 13}", (i // 5) % 9)
+        assert old.allow(k, t) == new.allow(k, t), i
+    assert len(new) == len(old.seen)
+
+    d = TTLDedupe(10)
+    for i in range(5):
+        d.add(f"k{i}", now=100.0 + i)
+    assert d.expire(111.5) == 2 and list(d.entries) == ["k2", "k3", "k4"]
+    assert d.seen("k4", 114.0) and not d.seen("k4", 114.5)
+
+    assert TTLDedupe(10).allow(("a", 1)) and d.allow(["x", 2], 200.0) and not d.allow(("x", 2), 201.0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rt", "dedupe.json")
+        with TTLDedupe.open(path, 3600) as s:
+            assert s.allow("a", value={"id": "inc1"})
+            assert s.allow("b")
+        with TTLDedupe.open(path, 3600) as s:
+            assert not s.allow("a") and not s.allow("b") and s.allow("c")
+            assert s.get("a")[1] == {"id": "inc1"}
+        try:
+            with TTLDedupe.open(path, 3600) as s:
+                s.add("d")
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        with TTLDedupe.open(path, 3600) as s:
+            assert s.seen("c") and not s.seen("d")
+        with open(path, "r", encoding="utf-8") as f:
+            assert [e[0] for e in json.load(f)["entries"]] == ["a", "b", "c"]
+
+    print(json.dumps({"ok": True, "checks": ["window", "expiry_front", "persist", "keys", "no_save_on_error"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Expiring dedupe set, optionally persisted between cron runs.
+
+One structure for "have we already emitted X recently?" checks:
+- Chekist dry-run alert/incident dedupe (WindowDedupe, in memory),
+- Chekist real-runner signal dedupe (persisted, across runs),
+- Economist data-quality incident dedupe (persisted, scan fallback on miss).
+
+Keys live in an OrderedDict in insertion order with their insertion time.
+All keys share one TTL, so the oldest entries are always at the front and
+expiry pops from the front until it reaches a live entry: amortized O(1) per
+check instead of rebuilding the dict. A key is not refreshed when seen again
+(the window starts at the first sighting, as before).
+
+Keys are strings; tuples/lists are stored as their compact JSON form. An
+optional small JSON value can be kept per key (e.g. the incident id).
+
+Persisted form (atomic tmp+rename, flock on <path>.lock while open):
+  {"version": 1, "ttl_s": 10800, "entries": [[key, t, value], ...]}
+
+Usage:
+  d = TTLDedupe(ttl_s=3600)
+  d.allow(("cron_error", job_id, run_ms), now)     # True once per hour
+
+  with TTLDedupe.open(path, ttl_s=5 * 3600) as d:  # load, lock, save on exit
+      if d.allow(key):
+          ...
+"""
+
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from incident_cursor import atomic_write
+
+
+def dedupe_key(k: Hashable) -> str:
+    if isinstance(k, str):
+        return k
+    if isinstance(k, (tuple, list)):
+        return json.dumps(list(k), ensure_ascii=False, separators=(",", ":"))
+    return str(k)
+
+
+class TTLDedupe:
+    def __init__(self, ttl_s: float, path: str | None = None):
+        self.ttl_s = ttl_s
+        self.path = path
+        self.entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.stats: dict[str, int] = {"hits": 0, "added": 0, "expired": 0}
+        self._lock = None
+
+    # -- core ----------------------------------------------------------------
+
+    def expire(self, now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        cut = now - self.ttl_s
+        n = 0
+        while self.entries:
+            _k, (t, _v) = next(iter(self.entries.items()))
+            if t >= cut:
+                break
+            self.entries.popitem(last=False)
+            n += 1
+        self.stats["expired"] += n
+        return n
+
+    def get(self, k: Hashable, now: float | None = None) -> tuple[float, Any] | None:
+        """(insertion time, value) if the key was added within the TTL, else None."""
+        now = time.time() if now is None else now
+        self.expire(now)
+        hit = self.entries.get(dedupe_key(k))
+        if hit is None or hit[0] < now - self.ttl_s:
+            return None
+        return hit
+
+    def seen(self, k: Hashable, now: float | None = None) -> bool:
+        return self.get(k, now) is not None
+
+    def add(self, k: Hashable, now: float | None = None, value: Any = None) -> None:
+        now = time.time() if now is None else now
+        key = dedupe_key(k)
+        self.entries.pop(key, None)
+        self.entries[key] = (now, value)
+        self.stats["added"] += 1
+
+    def allow(self, k: Hashable, now: float | None = None, value: Any = None) -> bool:
+        """True (and remember the key) if it was not seen within the TTL."""
+        now = time.time() if now is None else now
+        if self.get(k, now) is not None:
+            self.stats["hits"] += 1
+            return False
+        self.add(k, now, value)
+        return True
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    # -- persistence ---------------------------------------------------------
+
+    def load(self) -> "TTLDedupe":
+        self.entries = OrderedDict()
+        if not self.path:
+            return self
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            rows = raw.get("entries") or []
+        except Exception:
+            return self
+        # Files are written in insertion order; sort defensively so expiry stays O(1).
+        for k, t, v in sorted((r for r in rows if isinstance(r, list) and len(r) == 3), key=lambda r: r[1]):
+            self.entries[str(k)] = (float(t), v)
+        return self
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        self.expire()
+        rows = [[k, round(t, 3), v] for k, (t, v) in self.entries.items()]
+        atomic_write(
+            self.path,
+            json.dumps({"version": 1, "ttl_s": self.ttl_s, "entries": rows}, ensure_ascii=False, separators=(",", ":")),
+        )
+
+    @classmethod
+    def open(cls, path: str, ttl_s: float) -> "TTLDedupe":
+        return cls(ttl_s, path)
+
+    def __enter__(self) -> "TTLDedupe":
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._lock = open(self.path + ".lock", "a")
+            fcntl.flock(self._lock, fcntl.LOCK_EX)
+        return self.load()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                self.save()
+        finally:
+            if self._lock is not None:
+                self._lock.close()
+                self._lock = None
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Process-wide warm caches for runners hosted by resident_scheduler.py.
+
+A cron-launched runner parses its inputs once and exits, so for it these
+helpers cost one stat and behave exactly like a plain read. Under the resident
+scheduler every runner shares one interpreter, and:
+
+- cached_json(path) returns the parsed document until the file stamp
+  (mtime_ns, size, inode) changes: ~/.openclaw/cron/jobs.json, model pricing;
+- shared(key, factory) hands out one long-lived instance per key: the
+  IncidentIndex and the per-consumer IncidentWindow keep their in-memory state
+  and only re-read their state files when another process replaced them.
+
+Cached objects are shared between runners: callers must not mutate them.
+clear() drops everything (the scheduler calls it when a runner times out, so
+the abandoned thread keeps its own objects and nobody else touches them).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Any, Callable, Hashable
+
+_lock = threading.Lock()
+_json: dict[str, tuple[tuple[int, int, int], Any]] = {}
+_shared: dict[Hashable, Any] = {}
+stats = {"json_hits": 0, "json_misses": 0, "shared_hits": 0, "shared_misses": 0}
+
+
+def file_stamp(path: str) -> tuple[int, int, int] | None:
+    """(mtime_ns, size, inode) of `path`, or None if it cannot be stat'ed."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def cached_json(path: str) -> Any:
+    """json.load(path), re-parsed only when the file changed. Raises like open/json.load."""
+    path = os.fspath(path)
+    stamp = file_stamp(path)
+    with _lock:
+        hit = _json.get(path)
+        if stamp is not None and hit is not None and hit[0] == stamp:
+            stats["json_hits"] += 1
+            return hit[1]
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    with _lock:
+        stats["json_misses"] += 1
+        if stamp is not None:
+            _json[path] = (stamp, data)
+    return data
+
+
+def shared(key: Hashable, factory: Callable[[], Any]) -> Any:
+    """One instance per key for the life of the process (factory() on first use)."""
+    with _lock:
+        if key in _shared:
+            stats["shared_hits"] += 1
+            return _shared[key]
+    obj = factory()
+    with _lock:
+        stats["shared_misses"] += 1
+        return _shared.setdefault(key, obj)
+
+
+def clear() -> None:
+    with _lock:
+        _json.clear()
+        _shared.clear()
@@ -2,10 +2,13 @@
 """Deterministic Economist plan-only soak runner.
 
 - Reads authoritative sessions registry: ~/.openclaw/agents/main/sessions/sessions.json
+  (streamed one session at a time, lobster/common/sessions_stream.py)
 - Reads pricing: data/model-pricing.json
-- Computes computed_total_usd deterministically (rule-first)
+- Computes computed_total_usd deterministically (rule-first; priced column-wise by
+  lobster/common/cost_engine.py, exact sum rounded to 6 decimals)
 - Counts unknown pricing / malformed / duplicate session keys
 - Appends one metrics record to ~/.openclaw/.runtime/economist-lobster-metrics.jsonl
+  (with per-stage duration_ms and peak_rss_kb, lobster/common/run_metrics.py)
 
 No writes to economist-log.jsonl or cost-summary.json.
 """
@@ -14,10 +17,17 @@ from __future__ import annotations
 
 import json
 import os
+import sys
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Iterable, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from cost_engine import CostColumns, CostEngine
+from run_metrics import RunPerf
+from sessions_stream import iter_sessions
+from warm_cache import cached_json
 
 SESSIONS_JSON = Path('/home/openclaw/.openclaw/agents/main/sessions/sessions.json')
 PRICING_JSON = Path('/home/openclaw/.openclaw/workspace/data/model-pricing.json')
@@ -28,11 +38,6 @@ def iso_now_utc() -> str:
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace('+00:00', 'Z')
 
 
-def load_json(path: Path) -> Any:
-    with path.open('r', encoding='utf-8') as f:
-        return json.load(f)
-
-
 def normalize_model(model: str) -> str:
     m = (model or '').strip()
     if m == 'gpt-4o-mini':
@@ -42,16 +47,9 @@ def normalize_model(model: str) -> str:
     return m
 
 
-def cost_for(model: str, in_tokens: int, out_tokens: int, pricing: Dict[str, Any]) -> Tuple[float, bool]:
-    models = pricing.get('models', {})
-    m = normalize_model(model)
-    p = models.get(m) or models.get(model)
-    if not p:
-        return 0.0, False
-    in_per_1m = float(p.get('input_per_1m', 0.0))
-    out_per_1m = float(p.get('output_per_1m', 0.0))
-    cost = (in_tokens * in_per_1m / 1_000_000.0) + (out_tokens * out_per_1m / 1_000_000.0)
-    return cost, True
+def price_keys(model_raw: str) -> Tuple[str, str]:
+    """Pricing names tried for a raw model: normalized, then as written."""
+    return normalize_model(model_raw), model_raw
 
 
 @dataclass
@@ -67,11 +65,14 @@ class Metrics:
     planned_report_count: int = 0
 
 
-def compute_metrics(sessions: Dict[str, Any], pricing: Dict[str, Any]) -> Metrics:
+def compute_metrics(sessions: Dict[str, Any] | Iterable[Tuple[str, Any]], pricing: Dict[str, Any]) -> Metrics:
+    """Metrics over a sessions dict or an iterable of (key, session) pairs."""
     seen_session_ids = set()
-    m = Metrics(total_sessions=len(sessions))
+    m = Metrics()
+    cols = CostColumns()
 
-    for key, s in sessions.items():
+    for key, s in sessions.items() if isinstance(sessions, dict) else sessions:
+        m.total_sessions += 1
         # Prefer explicit sessionId if present; fallback to registry key.
         sid = None
         if isinstance(s, dict) and isinstance(s.get('sessionId'), str) and s.get('sessionId'):
@@ -100,14 +101,15 @@ def compute_metrics(sessions: Dict[str, Any], pricing: Dict[str, Any]) -> Metric
             m.malformed_session_count += 1
             continue
 
-        c, ok = cost_for(model_raw, in_t, out_t, pricing)
-        if not ok:
-            m.unknown_pricing_count += 1
-        m.computed_total_usd += c
-        m.planned_persist_count += 1
+        cols.add(0, model_raw, in_t, out_t)
 
+    eng = CostEngine(cols, pricing, price_keys)
+    rows = eng.all_rows()
+    total = eng.total(rows)
+    m.unknown_pricing_count = sum(eng.unpriced(rows).values())
+    m.planned_persist_count = total.rows
     # stable rounding for reporting
-    m.computed_total_usd = float(f"{m.computed_total_usd:.6f}")
+    m.computed_total_usd = float(f"{total.cost_usd:.6f}")
     return m
 
 
@@ -118,10 +120,13 @@ def append_metrics(rec: dict) -> None:
 
 
 def main() -> None:
-    sessions = load_json(SESSIONS_JSON)
-    pricing = load_json(PRICING_JSON)
+    perf = RunPerf()
+    with perf.stage('read'):
+        pricing = cached_json(PRICING_JSON)
 
-    met = compute_metrics(sessions, pricing)
+    # sessions.json is read while classifying (streamed)
+    with perf.stage('classify'):
+        met = compute_metrics(iter_sessions(SESSIONS_JSON), pricing)
 
     malformed_ratio = (met.malformed_session_count / met.total_sessions) if met.total_sessions else 0.0
     duplicate_ratio = (met.duplicate_sessionid_artifact_count / met.total_sessions) if met.total_sessions else 0.0
@@ -140,7 +145,7 @@ def main() -> None:
         'planned_report_count': 0,
     }
 
-    append_metrics(rec)
+    append_metrics(perf.finish(rec))
     print(json.dumps({'ok': True, **rec}, ensure_ascii=False))
 
 
@@ -5,26 +5,31 @@ from __future__ import annotations
 
 import json
 import os
+import sys
 from datetime import datetime, timedelta, timezone
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from jsonl_prefilter import iter_window_lines
+from sessions_stream import iter_sessions
+from ttl_dedupe import TTLDedupe
+
 METRICS = os.path.expanduser(os.environ.get("ECON_SOAK_METRICS", "~/.openclaw/.runtime/economist-lobster-metrics.jsonl"))
 INCIDENTS = os.path.expanduser(os.environ.get("ECON_SOAK_INCIDENTS", "~/.openclaw/workspace/data/incidents.jsonl"))
 SESSIONS_JSON = os.path.expanduser(os.environ.get("ECON_SOAK_SESSIONS", "~/.openclaw/agents/main/sessions/sessions.json"))
+DQ_DEDUPE = os.path.expanduser(os.environ.get("ECON_SOAK_DEDUPE", "~/.openclaw/.runtime/economist-dq-dedupe.json"))
+DQ_DEDUPE_TTL_S = 48 * 3600
 
 
-def read_jsonl(path: str) -> list[dict]:
+def read_jsonl(path: str, since: datetime | None = None) -> list[dict]:
+    """Parsed rows; with `since`, lines whose raw ts prefix is older are skipped undecoded."""
     if not os.path.exists(path):
         return []
     out = []
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                out.append(json.loads(line))
-            except Exception:
-                continue
+    for line in iter_window_lines(path, since, None):
+        try:
+            out.append(json.loads(line))
+        except Exception:
+            continue
     return out
 
 
@@ -42,38 +47,62 @@ def append_incident(obj: dict) -> str:
     return obj.get('id') or ''
 
 
+def _dq_store_key(date_key: str) -> str:
+    # INCIDENTS is part of the key: tests/backfills point ECON_SOAK_INCIDENTS elsewhere
+    return f"{INCIDENTS}|economist_data_quality_degraded:{date_key}"
+
+
+def remember_dq_incident(date_key: str, inc: dict) -> None:
+    """Record an emitted/found dq incident in the persisted dedupe (best-effort)."""
+    try:
+        with TTLDedupe.open(DQ_DEDUPE, DQ_DEDUPE_TTL_S) as d:
+            d.add(_dq_store_key(date_key), value={k: inc.get(k) for k in ("id", "ts", "dedupe_key")})
+    except Exception:
+        pass
+
+
 def find_recent_dq_incident(date_key: str) -> dict | None:
     """Find latest economist_data_quality_degraded for a given date_key (UTC date).
 
-    Dedupe key: type + date_key.
+    Dedupe key: type + date_key. The persisted TTL dedupe (DQ_DEDUPE) answers
+    without reading incidents; on a miss, incidents written since date_key are
+    scanned and a hit is remembered.
     """
+    try:
+        with TTLDedupe.open(DQ_DEDUPE, DQ_DEDUPE_TTL_S) as d:
+            hit = d.get(_dq_store_key(date_key))
+        if hit is not None:
+            return hit[1] or {"dedupe_key": f"economist_data_quality_degraded:{date_key}"}
+    except Exception:
+        pass
+
     if not os.path.exists(INCIDENTS):
         return None
+    try:
+        since = datetime.fromisoformat(date_key).replace(tzinfo=timezone.utc)
+    except ValueError:
+        since = None
     latest = None
-    with open(INCIDENTS, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line)
-            except Exception:
-                continue
-            if obj.get('type') != 'economist_data_quality_degraded':
-                continue
-            if obj.get('dedupe_key') != f"economist_data_quality_degraded:{date_key}":
-                continue
-            latest = obj
+    for line in iter_window_lines(INCIDENTS, since, None):
+        try:
+            obj = json.loads(line)
+        except Exception:
+            continue
+        if obj.get('type') != 'economist_data_quality_degraded':
+            continue
+        if obj.get('dedupe_key') != f"economist_data_quality_degraded:{date_key}":
+            continue
+        latest = obj
+    if latest is not None:
+        remember_dq_incident(date_key, latest)
     return latest
 
 
 def sample_malformed_keys(limit: int = 5) -> list[str]:
     # Best-effort: find 3–5 examples of sessions missing model/modelProvider.
     try:
-        with open(SESSIONS_JSON, 'r', encoding='utf-8') as f:
-            sessions = json.load(f)
         out = []
-        for k, s in sessions.items():
+        for k, s in iter_sessions(SESSIONS_JSON, fields=("model", "modelProvider")):
             if not isinstance(s, dict):
                 continue
             model = s.get('model') or s.get('modelProvider')
@@ -90,7 +119,7 @@ def main() -> None:
     now = datetime.now(timezone.utc)
     since = now - timedelta(hours=24)
 
-    rows = [r for r in read_jsonl(METRICS) if isinstance(r.get("ts"), str)]
+    rows = [r for r in read_jsonl(METRICS, since) if isinstance(r.get("ts"), str)]
     r24 = []
     for r in rows:
         try:
@@ -159,6 +188,7 @@ def main() -> None:
                 "resolved": False,
             }
             dq_incident_id = append_incident(dq_incident)
+            remember_dq_incident(date_key, dq_incident)
 
     # Default cadence: every 4h => expected 6 runs; accept >=5.
     ready = (
@@ -49,6 +49,7 @@ def run_case(tmp: str, ratio: float) -> dict:
     env['ECON_SOAK_METRICS'] = metrics_path
     env['ECON_SOAK_INCIDENTS'] = incidents_path
     env['ECON_SOAK_SESSIONS'] = sessions_path
+    env['ECON_SOAK_DEDUPE'] = os.path.join(tmp, 'dq-dedupe.json')
 
     p = subprocess.run(
         ['python3', '/home/openclaw/.openclaw/workspace/lobster/economist/soak_post_check.py'],
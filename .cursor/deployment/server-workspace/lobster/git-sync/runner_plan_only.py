@@ -21,6 +21,7 @@ Metrics JSONL fields per run:
 - planned_push (0/1)
 - rebase_conflicts (0/1)
 - remote_unreachable (0/1)
+- stage_duration_ms {lock, remote, status}, duration_ms, peak_rss_kb (lobster/common/run_metrics.py)
 
 Env:
 - GIT_SYNC_REPO (default ~/Clowdbot)
@@ -33,9 +34,13 @@ from __future__ import annotations
 import json
 import os
 import subprocess
+import sys
 import time
 from datetime import datetime, timezone
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from run_metrics import RunPerf
+
 REPO = os.path.expanduser(os.environ.get("GIT_SYNC_REPO", "~/Clowdbot"))
 LOCK_PATH = os.path.expanduser(os.environ.get("GIT_SYNC_LOCK", "~/.openclaw/.runtime/git-sync.lock.json"))
 METRICS_PATH = os.path.expanduser(os.environ.get("GIT_SYNC_METRICS", "~/.openclaw/.runtime/git-sync-lobster-metrics.jsonl"))
@@ -118,10 +123,12 @@ def status_whitelist_dirty() -> bool:
 
 
 def main() -> None:
+    perf = RunPerf()
     now = time.time()
     ts = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
 
-    lock_acquired, stale_recovered = acquire_lock(now)
+    with perf.stage("lock"):
+        lock_acquired, stale_recovered = acquire_lock(now)
     if not lock_acquired:
         rec = {
             "ts": ts,
@@ -136,26 +143,28 @@ def main() -> None:
         }
         os.makedirs(os.path.dirname(METRICS_PATH), exist_ok=True)
         with open(METRICS_PATH, "a", encoding="utf-8") as f:
-            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            f.write(json.dumps(perf.finish(rec), ensure_ascii=False) + "\n")
         print(json.dumps({"ok": True, **rec}, ensure_ascii=False))
         return
 
     remote_unreachable = 0
     rebase_conflicts = 1 if os.path.exists(os.path.join(REPO, ".git", "rebase-merge")) or os.path.exists(os.path.join(REPO, ".git", "rebase-apply")) else 0
 
-    # Remote reachable check (lightweight)
-    rc, _, _ = sh(["git", "ls-remote", "origin", "HEAD"], timeout=25)
-    if rc != 0:
-        remote_unreachable = 1
-
-    # Fetch to measure ahead/behind (still safe)
-    if remote_unreachable == 0:
-        rc, _, _ = sh(["git", "fetch", "origin", "main"], timeout=60)
+    with perf.stage("remote"):
+        # Remote reachable check (lightweight)
+        rc, _, _ = sh(["git", "ls-remote", "origin", "HEAD"], timeout=25)
         if rc != 0:
             remote_unreachable = 1
 
+        # Fetch to measure ahead/behind (still safe)
+        if remote_unreachable == 0:
+            rc, _, _ = sh(["git", "fetch", "origin", "main"], timeout=60)
+            if rc != 0:
+                remote_unreachable = 1
+
     # compute no-op / planned actions
-    planned_commit = 1 if status_whitelist_dirty() else 0
+    with perf.stage("status"):
+        planned_commit = 1 if status_whitelist_dirty() else 0
     planned_push = 1 if planned_commit else 0
     no_op = 1 if (remote_unreachable == 0 and planned_commit == 0 and rebase_conflicts == 0) else 0
 
@@ -173,7 +182,7 @@ def main() -> None:
 
     os.makedirs(os.path.dirname(METRICS_PATH), exist_ok=True)
     with open(METRICS_PATH, "a", encoding="utf-8") as f:
-        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        f.write(json.dumps(perf.finish(rec), ensure_ascii=False) + "\n")
 
     release_lock()
     print(json.dumps({"ok": True, **rec}, ensure_ascii=False))
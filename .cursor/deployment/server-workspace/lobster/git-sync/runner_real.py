@@ -16,7 +16,8 @@ Actions (real sync):
 4) push origin main
 
 Metrics:
-- Append one JSONL line to ~/.openclaw/.runtime/git-sync-lobster-metrics.jsonl (mode=real)
+- Append one JSONL line to ~/.openclaw/.runtime/git-sync-lobster-metrics.jsonl (mode=real),
+  with per-stage duration_ms and peak_rss_kb (lobster/common/run_metrics.py)
 
 Notes:
 - Uses a filesystem lock to avoid concurrent runs.
@@ -27,9 +28,13 @@ from __future__ import annotations
 import json
 import os
 import subprocess
+import sys
 import time
 from datetime import datetime, timezone
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from run_metrics import RunPerf
+
 REPO = os.path.expanduser('~/Clowdbot')
 INCIDENTS = os.path.expanduser('~/.openclaw/workspace/data/incidents.jsonl')
 METRICS = os.path.expanduser('~/.openclaw/.runtime/git-sync-lobster-metrics.jsonl')
@@ -83,6 +88,7 @@ def copy_file(src: str, dst: str) -> None:
 
 
 def main() -> None:
+    perf = RunPerf()
     ts = iso_now()
     t0 = time.time()
 
@@ -100,18 +106,20 @@ def main() -> None:
     }
 
     try:
-        fd = lock_acquire()
+        with perf.stage('lock'):
+            fd = lock_acquire()
         metrics['lock_acquired'] = 1
     except Exception as e:
         # lock busy -> treat as no-op
         metrics['no_op_runs'] = 1
-        append_jsonl(METRICS, metrics)
+        append_jsonl(METRICS, perf.finish(metrics))
         print(json.dumps({'ok': True, 'skipped': 'lock_busy', **metrics}, ensure_ascii=False))
         return
 
     try:
         # Precheck: if dirty tree, do NOT attempt pull --rebase (avoid cascade)
-        st0 = run(['git','status','--porcelain'], cwd=REPO, timeout=60)
+        with perf.stage('status'):
+            st0 = run(['git','status','--porcelain'], cwd=REPO, timeout=60)
         dirty_lines = [ln for ln in (st0.stdout or '').splitlines() if ln.strip()]
         if dirty_lines:
             samples = []
@@ -133,12 +141,13 @@ def main() -> None:
                 'resolved': False,
             })
             metrics['no_op_runs'] = 1
-            append_jsonl(METRICS, metrics)
+            append_jsonl(METRICS, perf.finish(metrics))
             print(json.dumps({'ok': True, 'skipped': 'dirty_tree', **metrics}, ensure_ascii=False))
             return
 
         # Stage 1: pull --rebase
-        p = run(['git','pull','--rebase','origin','main'], cwd=REPO, timeout=300)
+        with perf.stage('pull'):
+            p = run(['git','pull','--rebase','origin','main'], cwd=REPO, timeout=300)
         if p.returncode != 0:
             out = (p.stdout + '\n' + p.stderr).strip()[:1200]
             if 'CONFLICT' in out or 'Resolve all conflicts' in out or 'fix conflicts' in out.lower():
@@ -154,16 +163,18 @@ def main() -> None:
                 'detail': {'out': out},
                 'resolved': False,
             })
-            append_jsonl(METRICS, metrics)
+            append_jsonl(METRICS, perf.finish(metrics))
             raise SystemExit(2)
 
         # Stage 2: snapshot cron jobs
-        if os.path.exists(CRON_JOBS_SRC):
-            copy_file(CRON_JOBS_SRC, CRON_JOBS_DST)
-            copy_file(CRON_JOBS_DST, CRON_JOBS_SNAP)
+        with perf.stage('snapshot'):
+            if os.path.exists(CRON_JOBS_SRC):
+                copy_file(CRON_JOBS_SRC, CRON_JOBS_DST)
+                copy_file(CRON_JOBS_DST, CRON_JOBS_SNAP)
 
         # Stage 3: commit if dirty
-        st = run(['git','status','--porcelain'], cwd=REPO, timeout=60)
+        with perf.stage('status'):
+            st = run(['git','status','--porcelain'], cwd=REPO, timeout=60)
         if st.returncode != 0:
             append_jsonl(INCIDENTS, {
                 'ts': ts,
@@ -174,25 +185,26 @@ def main() -> None:
                 'detail': {'stderr': st.stderr[:400]},
                 'resolved': False,
             })
-            append_jsonl(METRICS, metrics)
+            append_jsonl(METRICS, perf.finish(metrics))
             raise SystemExit(2)
 
         if not st.stdout.strip():
             metrics['no_op_runs'] = 1
-            append_jsonl(METRICS, metrics)
+            append_jsonl(METRICS, perf.finish(metrics))
             print(json.dumps({'ok': True, 'no_op': True, **metrics}, ensure_ascii=False))
             return
 
         # Commit
-        run(['git','add','-A'], cwd=REPO, timeout=120)
-        msg = f"lobster git-sync: snapshot {ts}"
-        c = run(['git','commit','-m', msg], cwd=REPO, timeout=120)
+        with perf.stage('commit'):
+            run(['git','add','-A'], cwd=REPO, timeout=120)
+            msg = f"lobster git-sync: snapshot {ts}"
+            c = run(['git','commit','-m', msg], cwd=REPO, timeout=120)
         if c.returncode != 0:
             out = (c.stdout + '\n' + c.stderr).strip()[:1200]
             # If nothing to commit, treat as no-op
             if 'nothing to commit' in out.lower():
                 metrics['no_op_runs'] = 1
-                append_jsonl(METRICS, metrics)
+                append_jsonl(METRICS, perf.finish(metrics))
                 print(json.dumps({'ok': True, 'no_op': True, **metrics}, ensure_ascii=False))
                 return
             append_jsonl(INCIDENTS, {
@@ -204,12 +216,13 @@ def main() -> None:
                 'detail': {'out': out},
                 'resolved': False,
             })
-            append_jsonl(METRICS, metrics)
+            append_jsonl(METRICS, perf.finish(metrics))
             raise SystemExit(2)
         metrics['planned_commit'] = 1
 
         # Push
-        p2 = run(['git','push','origin','main'], cwd=REPO, timeout=180)
+        with perf.stage('push'):
+            p2 = run(['git','push','origin','main'], cwd=REPO, timeout=180)
         if p2.returncode != 0:
             out = (p2.stdout + '\n' + p2.stderr).strip()[:1200]
             append_jsonl(INCIDENTS, {
@@ -221,11 +234,11 @@ def main() -> None:
                 'detail': {'out': out},
                 'resolved': False,
             })
-            append_jsonl(METRICS, metrics)
+            append_jsonl(METRICS, perf.finish(metrics))
             raise SystemExit(2)
         metrics['planned_push'] = 1
 
-        append_jsonl(METRICS, metrics)
+        append_jsonl(METRICS, perf.finish(metrics))
         print(json.dumps({'ok': True, 'synced': True, 'duration_s': round(time.time()-t0,2), **metrics}, ensure_ascii=False))
 
     finally:
@@ -5,8 +5,12 @@ from __future__ import annotations
 
 import json
 import os
+import sys
 from datetime import datetime, timedelta, timezone
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from incident_rollup import window_from_env
+
 MET = os.path.expanduser('~/.openclaw/.runtime/marta-lobster-metrics.jsonl')
 INCIDENTS = os.path.expanduser('~/.openclaw/workspace/data/incidents.jsonl')
 
@@ -54,8 +58,13 @@ def classify_scope(inc: dict) -> str:
 
 
 def scoped_incident_deltas(incidents: list[dict], since_ts: datetime) -> dict:
+    return scoped_weighted_deltas(((r, 1) for r in incidents), since_ts)
+
+
+def scoped_weighted_deltas(pairs, since_ts: datetime) -> dict:
+    """Same as scoped_incident_deltas over (record, count) pairs (rollup keys or raw rows)."""
     total=lobster=legacy=unknown=0
-    for r in incidents:
+    for r, n in pairs:
         ts=r.get('ts')
         if not isinstance(ts,str):
             continue
@@ -64,14 +73,14 @@ def scoped_incident_deltas(incidents: list[dict], since_ts: datetime) -> dict:
                 continue
         except Exception:
             continue
-        total += 1
+        total += n
         scope = classify_scope(r)
         if scope == 'lobster':
-            lobster += 1
+            lobster += n
         elif scope == 'legacy':
-            legacy += 1
+            legacy += n
         else:
-            unknown += 1
+            unknown += n
     return {
         'incidents_total_delta': total,
         'incidents_lobster_scoped_delta': lobster,
@@ -80,6 +89,20 @@ def scoped_incident_deltas(incidents: list[dict], since_ts: datetime) -> dict:
     }
 
 
+def incident_pairs(since_ts: datetime) -> list[tuple[dict, int]]:
+    """(record, count) pairs since since_ts from the hourly rollup (lobster/common/incident_rollup.py).
+
+    Falls back to a full read of INCIDENTS when INCIDENT_ROLLUP_DIR='' or the rollup fails.
+    """
+    try:
+        win = window_from_env(since_ts, source=INCIDENTS)
+        if win is not None:
+            return list(win.weighted())
+    except Exception:
+        pass
+    return [(r, 1) for r in read_jsonl(INCIDENTS) if isinstance(r.get('ts'), str)]
+
+
 def main() -> None:
     now = datetime.now(timezone.utc)
     since = now - timedelta(hours=24)
@@ -112,8 +135,8 @@ def main() -> None:
 
     ready = (agg['runs'] >= 46 and agg['policy_violations'] == 0 and agg['malformed_input_count'] == 0)
 
-    incidents=[r for r in read_jsonl(INCIDENTS) if isinstance(r.get('ts'),str)]
-    deltas=scoped_incident_deltas(incidents, now - timedelta(hours=2))
+    since_2h = now - timedelta(hours=2)
+    deltas=scoped_weighted_deltas(incident_pairs(since_2h), since_2h)
     gate_status='ok'
     if deltas['incidents_unknown_scoped_delta']>0:
         gate_status='needs_review'
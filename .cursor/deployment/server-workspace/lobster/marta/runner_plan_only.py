@@ -16,9 +16,13 @@ from __future__ import annotations
 
 import json
 import os
+import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from run_metrics import RunPerf
+
 OUT = Path(os.path.expanduser('~/.openclaw/.runtime/marta-lobster-metrics.jsonl'))
 ALLOWED = {'aiganym_morning','aiganym_lunch','aiganym_evening','aiganym_report','smoke'}
 
@@ -28,21 +32,23 @@ def iso_now() -> str:
 
 
 def main() -> None:
+    perf = RunPerf()
     mode = os.environ.get('MARTA_MODE','smoke')
     malformed = 0
     if mode not in ALLOWED:
         malformed = 1
         mode = 'smoke'
 
-    # Planning heuristics:
-    # - check-in modes => planned message only
-    # - report mode => planned message + planned memory read/write candidates + possible git action (after approval)
-    planned_messages = 1
-    planned_memory_writes = 1 if mode == 'aiganym_report' else 0
-    planned_git_actions = 1 if mode == 'aiganym_report' else 0
+    with perf.stage('plan'):
+        # Planning heuristics:
+        # - check-in modes => planned message only
+        # - report mode => planned message + planned memory read/write candidates + possible git action (after approval)
+        planned_messages = 1
+        planned_memory_writes = 1 if mode == 'aiganym_report' else 0
+        planned_git_actions = 1 if mode == 'aiganym_report' else 0
 
-    blocked_actions = 0
-    policy_violations = 0
+        blocked_actions = 0
+        policy_violations = 0
 
     rec = {
         'ts': iso_now(),
@@ -58,7 +64,7 @@ def main() -> None:
 
     OUT.parent.mkdir(parents=True, exist_ok=True)
     with OUT.open('a', encoding='utf-8') as f:
-        f.write(json.dumps(rec, ensure_ascii=False) + '\n')
+        f.write(json.dumps(perf.finish(rec), ensure_ascii=False) + '\n')
 
     print(json.dumps({'ok': True, **rec}, ensure_ascii=False))
 
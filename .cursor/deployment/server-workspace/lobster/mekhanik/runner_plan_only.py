@@ -4,7 +4,8 @@
 - Collects unresolved critical incidents (last 6h) from incidents.jsonl
 - Uses persistent runtime state (restart-guard/circuit-breaker) but DOES NOT execute actions
 - Produces plan counts: planned_safe_auto, planned_risky
-- Records metrics JSONL per run.
+- Records metrics JSONL per run (with per-stage duration_ms and peak_rss_kb,
+  lobster/common/run_metrics.py).
 
 This is designed for controlled cutover phase.
 """
@@ -13,11 +14,15 @@ from __future__ import annotations
 
 import json
 import os
+import sys
 import time
 from datetime import datetime, timedelta, timezone
 
 from runtime_state import load_state, save_state, cleanup_stale
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from run_metrics import RunPerf
+
 INCIDENTS = os.path.expanduser("~/.openclaw/workspace/data/incidents.jsonl")
 OUT_METRICS = os.path.expanduser("~/.openclaw/.runtime/mekhanik-lobster-metrics.jsonl")
 
@@ -49,56 +54,62 @@ def read_jsonl(path: str) -> list[dict]:
 
 
 def main() -> None:
+    perf = RunPerf()
     now = time.time()
     since = now - 6 * 3600
 
-    events = read_jsonl(INCIDENTS)
-    recent = []
-    for e in events:
-        ts = e.get("ts")
-        if not isinstance(ts, str):
-            continue
-        try:
-            if parse_ts(ts) >= since:
-                recent.append(e)
-        except Exception:
-            continue
-
-    # resolved filtering (simplified): collect resolved ref_ids
-    resolved = {e.get("ref_id") for e in recent if e.get("type") == "resolved" and isinstance(e.get("ref_id"), str)}
-
-    active_critical = []
-    for e in recent:
-        if e.get("type") == "resolved":
-            continue
-        if e.get("severity") != "critical":
-            continue
-        if e.get("resolved") is True:
-            continue
-        if isinstance(e.get("id"), str) and e["id"] in resolved:
-            continue
-        active_critical.append(e)
-
-    planned_safe_auto = 0
-    planned_risky = 0
-
-    for e in active_critical:
-        t = e.get("type")
-        if t in SAFE_AUTO_TYPES:
-            planned_safe_auto += 1
-        elif t in RISKY_TYPES:
-            planned_risky += 1
-        else:
-            planned_risky += 1  # treat unknown as risky
+    with perf.stage("read"):
+        events = read_jsonl(INCIDENTS)
+
+    with perf.stage("filter"):
+        recent = []
+        for e in events:
+            ts = e.get("ts")
+            if not isinstance(ts, str):
+                continue
+            try:
+                if parse_ts(ts) >= since:
+                    recent.append(e)
+            except Exception:
+                continue
+
+        # resolved filtering (simplified): collect resolved ref_ids
+        resolved = {e.get("ref_id") for e in recent if e.get("type") == "resolved" and isinstance(e.get("ref_id"), str)}
+
+        active_critical = []
+        for e in recent:
+            if e.get("type") == "resolved":
+                continue
+            if e.get("severity") != "critical":
+                continue
+            if e.get("resolved") is True:
+                continue
+            if isinstance(e.get("id"), str) and e["id"] in resolved:
+                continue
+            active_critical.append(e)
+
+    with perf.stage("classify"):
+        planned_safe_auto = 0
+        planned_risky = 0
+
+        for e in active_critical:
+            t = e.get("type")
+            if t in SAFE_AUTO_TYPES:
+                planned_safe_auto += 1
+            elif t in RISKY_TYPES:
+                planned_risky += 1
+            else:
+                planned_risky += 1  # treat unknown as risky
 
     # persistent state write
-    state_write_failed = 0
-    try:
-        st = load_state()
-        cleanup_stale(st, now)
-        save_state(st)
-    except Exception:
-        state_write_failed = 1
+    with perf.stage("write"):
+        state_write_failed = 0
+        try:
+            st = load_state()
+            cleanup_stale(st, now)
+            save_state(st)
+        except Exception:
+            state_write_failed = 1
 
     # message event accounting (plan-only): count planned messages and mark them suppressed.
     message_events_by_type = {"alert": 0, "escalation": 0, "other": 0}
@@ -131,7 +142,7 @@ def main() -> None:
 
     os.makedirs(os.path.dirname(OUT_METRICS), exist_ok=True)
     with open(OUT_METRICS, "a", encoding="utf-8") as f:
-        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        f.write(json.dumps(perf.finish(rec), ensure_ascii=False) + "\n")
 
     print(json.dumps({"ok": True, **rec}, ensure_ascii=False))
 
@@ -7,10 +7,15 @@ Constraints for controlled cutover:
 - no message() calls (Chekist will alert on incidents)
 
 Behavior:
-- Read last 4h of incidents.jsonl (tail-limited) and detect active critical incidents.
+- Read last 4h of incidents.jsonl incrementally (per-consumer cursor, see
+  lobster/common/incident_cursor.py) and detect active critical incidents.
+  Falls back to a tail-limited read if the cursor state is unusable.
+  Open/resolved state is taken from the materialized index
+  (lobster/common/incident_state.py); the window read is the fallback path.
 - If none: write a heartbeat record only.
 - If any active critical: append ONE lobster-scoped critical incident marker so the cutover verifier can trip stop-loss.
-- Always append metrics to mekhanik-lobster-metrics.jsonl with mode="real".
+- Always append metrics to mekhanik-lobster-metrics.jsonl with mode="real", including
+  per-stage duration_ms and peak_rss_kb (lobster/common/run_metrics.py).
 
 Files:
 - incidents: ~/.openclaw/workspace/data/incidents.jsonl
@@ -22,9 +27,16 @@ from __future__ import annotations
 
 import json
 import os
+import sys
 import time
 from datetime import datetime, timedelta, timezone
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+from incident_cursor import IncidentWindow
+from incident_state import IncidentIndex
+from run_metrics import RunPerf
+from warm_cache import shared
+
 INCIDENTS = os.path.expanduser("~/.openclaw/workspace/data/incidents.jsonl")
 OUT_METRICS = os.path.expanduser("~/.openclaw/.runtime/mekhanik-lobster-metrics.jsonl")
 HEARTBEAT = os.path.expanduser("~/.openclaw/runtime/monitor-heartbeat.jsonl")
@@ -34,6 +46,7 @@ SAFE_AUTO_TYPES = {"gateway_down", "announce_queue_loop", "gateway_memory_high"}
 RISKY_TYPES = {"cron_error", "cron_skip", "snapshot_stale"}
 
 SOURCE = "mekhanik-lobster"
+CURSOR_CONSUMER = "mekhanik-lobster"
 
 
 def iso_now() -> str:
@@ -47,6 +60,14 @@ def parse_ts(ts: str) -> float:
 
 
 def read_recent_incidents(path: str, window_h: int = 4, tail_n: int = 6000) -> list[dict]:
+    try:
+        win = shared(("window", CURSOR_CONSUMER, path, window_h), lambda: IncidentWindow(CURSOR_CONSUMER, path, window_h * 3600))
+        return win.refresh()[-tail_n:]
+    except Exception:
+        return read_recent_incidents_tail(path, window_h=window_h, tail_n=tail_n)
+
+
+def read_recent_incidents_tail(path: str, window_h: int = 4, tail_n: int = 6000) -> list[dict]:
     if not os.path.exists(path):
         return []
 
@@ -103,6 +124,13 @@ def active_critical(events: list[dict]) -> list[dict]:
     return out
 
 
+def active_critical_indexed(window_h: int = 4) -> list[dict]:
+    """Critical rows of still-open incidents in the window, from the state index."""
+    idx = shared(("index", INCIDENTS), lambda: IncidentIndex(INCIDENTS))
+    idx.refresh()
+    return idx.active(since=time.time() - window_h * 3600, predicate=lambda e: e.get("severity") == "critical")
+
+
 def append_jsonl(path: str, rec: dict) -> None:
     os.makedirs(os.path.dirname(path), exist_ok=True)
     with open(path, "a", encoding="utf-8") as f:
@@ -110,47 +138,54 @@ def append_jsonl(path: str, rec: dict) -> None:
 
 
 def main() -> None:
-    events = read_recent_incidents(INCIDENTS, window_h=4, tail_n=6000)
-    crit = active_critical(events)
-
-    planned_safe_auto = 0
-    planned_risky = 0
-    for e in crit:
-        t = e.get("type")
-        if t in SAFE_AUTO_TYPES:
-            planned_safe_auto += 1
-        elif t in RISKY_TYPES:
-            planned_risky += 1
-        else:
-            planned_risky += 1
+    perf = RunPerf()
+    with perf.stage("read"):
+        try:
+            crit = active_critical_indexed(window_h=4)
+        except Exception:
+            events = read_recent_incidents(INCIDENTS, window_h=4, tail_n=6000)
+            crit = active_critical(events)
+
+    with perf.stage("classify"):
+        planned_safe_auto = 0
+        planned_risky = 0
+        for e in crit:
+            t = e.get("type")
+            if t in SAFE_AUTO_TYPES:
+                planned_safe_auto += 1
+            elif t in RISKY_TYPES:
+                planned_risky += 1
+            else:
+                planned_risky += 1
 
     # REAL mode: no actions performed.
     # If any critical is present, write a single marker incident (lobster-scoped) to trip stop-loss.
-    if crit:
-        marker = {
-            "ts": iso_now(),
-            "type": "mekhanik_lobster_real_detected_critical",
-            "source": SOURCE,
-            "severity": "warn",
-            "msg": f"Detected {len(crit)} active critical incidents in last 4h (safe_auto disabled; no actions executed).",
-            "detail_note": "marker severity=warn to avoid self-generated lobster-critical during controlled gate" ,
-            "detail": {
-                "sample": [
-                    {
-                        "type": c.get("type"),
-                        "source": c.get("source"),
-                        "jobId": c.get("jobId"),
-                        "id": c.get("id"),
-                    }
-                    for c in crit[:5]
-                ]
-            },
-            "resolved": False,
-        }
-        append_jsonl(INCIDENTS, marker)
-    else:
-        hb = {"ts": iso_now(), "type": "heartbeat", "source": SOURCE, "status": "ok", "window": "4h-empty"}
-        append_jsonl(HEARTBEAT, hb)
+    with perf.stage("write"):
+        if crit:
+            marker = {
+                "ts": iso_now(),
+                "type": "mekhanik_lobster_real_detected_critical",
+                "source": SOURCE,
+                "severity": "warn",
+                "msg": f"Detected {len(crit)} active critical incidents in last 4h (safe_auto disabled; no actions executed).",
+                "detail_note": "marker severity=warn to avoid self-generated lobster-critical during controlled gate" ,
+                "detail": {
+                    "sample": [
+                        {
+                            "type": c.get("type"),
+                            "source": c.get("source"),
+                            "jobId": c.get("jobId"),
+                            "id": c.get("id"),
+                        }
+                        for c in crit[:5]
+                    ]
+                },
+                "resolved": False,
+            }
+            append_jsonl(INCIDENTS, marker)
+        else:
+            hb = {"ts": iso_now(), "type": "heartbeat", "source": SOURCE, "status": "ok", "window": "4h-empty"}
+            append_jsonl(HEARTBEAT, hb)
 
     metrics = {
         "ts": iso_now(),
@@ -165,7 +200,7 @@ def main() -> None:
         "message_events_by_type": {"alert": 0, "escalation": 0, "other": 0},
         "message_events_suppressed": 0,
     }
-    append_jsonl(OUT_METRICS, metrics)
+    append_jsonl(OUT_METRICS, perf.finish(metrics))
 
     print(json.dumps({"ok": True, **metrics}, ensure_ascii=False))
 
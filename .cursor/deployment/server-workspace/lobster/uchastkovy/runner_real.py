@@ -8,8 +8,21 @@ Design goals:
 - Writes lobster-scoped incidents for critical only.
 
 Outputs:
-- Incidents: ~/.openclaw/workspace/data/incidents.jsonl (append)
+- Incidents: ~/.openclaw/workspace/data/incidents.jsonl (one group-commit append per run,
+  see lobster/common/incident_writer.py)
 - Heartbeat: ~/.openclaw/runtime/monitor-heartbeat.jsonl
+- Metrics: ~/.openclaw/.runtime/uchastkovy-lobster-metrics.jsonl (probe results and latencies,
+  per-stage duration_ms, peak_rss_kb)
+
+Host probes (gateway, disk, git, cron snapshot) are independent and run concurrently
+(lobster/common/probe_pool.py), each with its own timeout, under a total deadline of
+UCHASTKOVY_PROBE_DEADLINE_S (default 20s). A probe that fails or times out is
+recorded in the metrics and produces no incident for its check, except the gateway
+probe: a failed one counts as down (gateway_down, no heartbeat), as a failed
+is-active always did and as the skill (execute_uchastkovy.py) does. Gateway unit
+state and disk usage are read in-process (lobster/common/host_probe.py: cgroupfs,
+os.statvfs) with systemctl / df as the fallback; metrics record which source
+answered (probe_via).
 
 Critical signals to record (severity=critical):
 - gateway_down (gateway not active)
@@ -24,23 +37,33 @@ from __future__ import annotations
 
 import json
 import os
-import subprocess
+import sys
 from datetime import datetime, timezone, timedelta
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+import host_probe
+from incident_state import IncidentIndex
+from incident_writer import IncidentWriter
+from probe_pool import Probe, probe_summary, run_probes, sh_probe
+from run_metrics import RunPerf
+from warm_cache import cached_json, shared
+
 INCIDENTS = os.path.expanduser('~/.openclaw/workspace/data/incidents.jsonl')
 HEARTBEAT = os.path.expanduser('~/.openclaw/runtime/monitor-heartbeat.jsonl')
+METRICS = os.path.expanduser('~/.openclaw/.runtime/uchastkovy-lobster-metrics.jsonl')
+CRON_JOBS = os.path.expanduser('~/.openclaw/cron/jobs.json')
 SOURCE = 'uchastkovy-lobster'
 
+try:
+    PROBE_DEADLINE_S = float(os.environ.get('UCHASTKOVY_PROBE_DEADLINE_S', '20'))
+except ValueError:
+    PROBE_DEADLINE_S = 20.0
+
 
 def iso_now() -> str:
     return datetime.now(timezone.utc).isoformat().replace('+00:00','Z')
 
 
-def sh(cmd: list[str], timeout: int = 15) -> tuple[int,str,str]:
-    p = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
-    return p.returncode, p.stdout.strip(), p.stderr.strip()
-
-
 def append_jsonl(path: str, rec: dict) -> None:
     os.makedirs(os.path.dirname(path), exist_ok=True)
     with open(path,'a',encoding='utf-8') as f:
@@ -54,6 +77,67 @@ def parse_iso(ts: str):
         return None
 
 
+def stale_candidates_indexed(live_ids: set[str], cutoff: datetime) -> list[tuple[str, str, str, str]]:
+    """Open incidents (resolved-state index) with a dead jobId, silent since cutoff.
+
+    One candidate per open incident; incidents closed by an earlier run are
+    already resolved in the index, so they are not closed again.
+    """
+    # auto-close refs are type:jobId for id-less rows: alias matching
+    idx = shared(('index', INCIDENTS, 'aliases'), lambda: IncidentIndex(INCIDENTS, aliases=True))
+    idx.refresh()
+    out = []
+    for e in idx.open_entries():
+        jid = e.get('jobId')
+        if not isinstance(jid, str) or not jid or jid in live_ids:
+            continue
+        if e['last_t'] > cutoff.timestamp():
+            continue
+        typ = e.get('type') or 'unknown'
+        ref = e.get('id') or e.get('ref_id') or f"{typ}:{jid}"
+        out.append((e.get('last_seen'), jid, ref, typ))
+    return out
+
+
+def stale_candidates_scan(live_ids: set[str], cutoff: datetime) -> list[tuple[str, str, str, str]]:
+    """Fallback: single pass over the whole incidents file."""
+    stale_candidates = []
+    with open(INCIDENTS, 'r', encoding='utf-8') as f:
+        for line in f:
+            line=line.strip()
+            if not line:
+                continue
+            try:
+                r=json.loads(line)
+            except Exception:
+                continue
+
+            if r.get('type') == 'resolved':
+                continue
+
+            jid = r.get('jobId')
+            if not isinstance(jid, str) or not jid:
+                continue
+
+            if jid in live_ids:
+                continue
+
+            if r.get('resolved') is True:
+                continue
+
+            ts = r.get('ts')
+            if not isinstance(ts, str):
+                continue
+            t = parse_iso(ts)
+            if not t or t > cutoff:
+                continue
+
+            # Use best-effort reference id
+            ref = r.get('id') or r.get('ref_id') or f"{r.get('type','unknown')}:{jid}"
+            stale_candidates.append((ts, jid, ref, r.get('type','unknown')))
+    return stale_candidates
+
+
 def auto_close_stale_incidents(*, now_ts: str, ttl_hours: int = 24) -> int:
     """Auto-close stale incidents whose jobId is not present in live cron jobs.
 
@@ -66,6 +150,9 @@ def auto_close_stale_incidents(*, now_ts: str, ttl_hours: int = 24) -> int:
     - a 'resolved' record with ref_id
     - an info record type=auto_closed_stale_jobid_ttl
 
+    Candidates come from the resolved-state index (lobster/common/incident_state.py);
+    a full scan of incidents.jsonl is the fallback.
+
     Returns number of auto-closures performed.
     """
     now_dt = parse_iso(now_ts) or datetime.now(timezone.utc)
@@ -74,8 +161,7 @@ def auto_close_stale_incidents(*, now_ts: str, ttl_hours: int = 24) -> int:
     # Load live job ids
     live_ids = set()
     try:
-        with open(os.path.expanduser('~/.openclaw/cron/jobs.json'), 'r', encoding='utf-8') as f:
-            jobs = json.load(f).get('jobs', [])
+        jobs = cached_json(CRON_JOBS).get('jobs', [])
         for j in jobs:
             jid = j.get('id')
             if isinstance(jid, str):
@@ -83,48 +169,18 @@ def auto_close_stale_incidents(*, now_ts: str, ttl_hours: int = 24) -> int:
     except Exception:
         return 0
 
-    # Scan incidents (file is expected to be moderate; keep single pass)
-    stale_candidates = []
     try:
-        with open(INCIDENTS, 'r', encoding='utf-8') as f:
-            for line in f:
-                line=line.strip()
-                if not line:
-                    continue
-                try:
-                    r=json.loads(line)
-                except Exception:
-                    continue
-
-                if r.get('type') == 'resolved':
-                    continue
-
-                jid = r.get('jobId')
-                if not isinstance(jid, str) or not jid:
-                    continue
-
-                if jid in live_ids:
-                    continue
-
-                if r.get('resolved') is True:
-                    continue
-
-                ts = r.get('ts')
-                if not isinstance(ts, str):
-                    continue
-                t = parse_iso(ts)
-                if not t or t > cutoff:
-                    continue
-
-                # Use best-effort reference id
-                ref = r.get('id') or r.get('ref_id') or f"{r.get('type','unknown')}:{jid}"
-                stale_candidates.append((ts, jid, ref, r.get('type','unknown')))
+        stale_candidates = stale_candidates_indexed(live_ids, cutoff)
     except Exception:
-        return 0
+        try:
+            stale_candidates = stale_candidates_scan(live_ids, cutoff)
+        except Exception:
+            return 0
 
     closed = 0
+    writer = IncidentWriter(INCIDENTS)
     for ts0, jid, ref, typ in stale_candidates:
-        append_jsonl(INCIDENTS, {
+        writer.add({
             'ts': now_ts,
             'type': 'resolved',
             'source': SOURCE,
@@ -133,7 +189,7 @@ def auto_close_stale_incidents(*, now_ts: str, ttl_hours: int = 24) -> int:
             'msg': 'auto-closed stale incident (jobId missing in live cron) after TTL',
             'detail': {'jobId': jid, 'orig_ts': ts0, 'orig_type': typ, 'ttl_hours': ttl_hours},
         })
-        append_jsonl(INCIDENTS, {
+        writer.add({
             'ts': now_ts,
             'type': 'auto_closed_stale_jobid_ttl',
             'source': SOURCE,
@@ -145,34 +201,71 @@ def auto_close_stale_incidents(*, now_ts: str, ttl_hours: int = 24) -> int:
         })
         closed += 1
 
+    writer.flush()
     return closed
 
 
+def cron_problems() -> list[dict]:
+    # cron problems (via OpenClaw tool over stdin not available here) -> best-effort via cached jobs.json
+    # We read ~/.openclaw/cron/jobs.json as a snapshot of state (includes lastStatus/consecutiveErrors)
+    problems=[]
+    try:
+        data=cached_json(CRON_JOBS)
+        for j in data.get('jobs',[]):
+            st=(j.get('state') or {})
+            if st.get('lastStatus') in ('error','skipped') or (st.get('consecutiveErrors') or 0) > 0:
+                problems.append({
+                    'id': j.get('id'),
+                    'name': j.get('name'),
+                    'lastStatus': st.get('lastStatus'),
+                    'consecutiveErrors': st.get('consecutiveErrors'),
+                    'lastRunAtMs': st.get('lastRunAtMs'),
+                })
+    except Exception:
+        problems=[]
+    return problems
+
+
+def collect_probes() -> dict:
+    """Independent host probes, run concurrently (tick ~ slowest probe, not the sum)."""
+    return run_probes([
+        Probe('gateway', lambda: host_probe.unit_state('openclaw-gateway'), timeout_s=10),
+        Probe('disk', lambda: host_probe.disk('/'), timeout_s=10),
+        sh_probe('git', ['bash','-lc','cd ~/Clowdbot && git status --porcelain | head -n 20'], timeout_s=15),
+        Probe('cron', cron_problems, timeout_s=10),
+    ], deadline_s=PROBE_DEADLINE_S)
+
+
 def main() -> None:
+    perf = RunPerf()
     ts = iso_now()
-    # gateway status
-    rc,out,err = sh(['systemctl','--user','is-active','openclaw-gateway'], timeout=10)
-    gw_active = (rc==0 and out=='active')
+    # All incidents of this run go out as one locked append.
+    writer = IncidentWriter(INCIDENTS)
+
+    with perf.stage('probe'):
+        probes = collect_probes()
+
+    # gateway status (a failed probe counts as down)
+    gw = probes['gateway'].value if probes['gateway'].ok else None
+    gw_active = gw is not None and gw['state']=='active'
     if not gw_active:
-        append_jsonl(INCIDENTS, {
+        writer.add({
             'ts': ts,
             'type': 'gateway_down',
             'source': SOURCE,
             'severity': 'critical',
-            'msg': f'openclaw-gateway is-active={out or rc}',
-            'detail': {'stderr': err[:400]},
+            'msg': f"openclaw-gateway is-active={gw['state']}" if gw is not None
+                   else f"openclaw-gateway status unknown (probe failed: {probes['gateway'].error})",
+            'detail': {'stderr': gw.get('stderr', ''), 'via': gw['via']} if gw is not None else {'probe_error': probes['gateway'].error},
             'resolved': False,
         })
 
     # disk pct
-    rc2,out2,err2 = sh(['bash','-lc','df -P / | tail -n 1 | awk "{print $5}"'], timeout=10)
     disk_pct = None
-    try:
-        disk_pct = int((out2 or '0').strip().rstrip('%'))
-    except Exception:
-        pass
+    if probes['disk'].ok:
+        disk_pct = probes['disk'].value['pct']
     if disk_pct is not None and disk_pct >= 85:
-        append_jsonl(INCIDENTS, {
+        writer.add({
             'ts': ts,
             'type': 'disk_warn',
             'source': SOURCE,
@@ -182,39 +275,24 @@ def main() -> None:
         })
 
     # git dirty (repo)
-    rc3,out3,_ = sh(['bash','-lc','cd ~/Clowdbot && git status --porcelain | head -n 20'], timeout=15)
-    if rc3==0 and (out3.strip()!=''):
-        append_jsonl(INCIDENTS, {
-            'ts': ts,
-            'type': 'git_dirty',
-            'source': SOURCE,
-            'severity': 'warn',
-            'msg': 'Uncommitted changes (sample)',
-            'detail': {'sample': out3.splitlines()[:20]},
-            'resolved': False,
-        })
-
-    # cron problems (via OpenClaw tool over stdin not available here) -> best-effort via cached jobs.json
-    # We read ~/.openclaw/cron/jobs.json as a snapshot of state (includes lastStatus/consecutiveErrors)
-    problems=[]
-    try:
-        with open(os.path.expanduser('~/.openclaw/cron/jobs.json'),'r',encoding='utf-8') as f:
-            data=json.load(f)
-        for j in data.get('jobs',[]):
-            st=(j.get('state') or {})
-            if st.get('lastStatus') in ('error','skipped') or (st.get('consecutiveErrors') or 0) > 0:
-                problems.append({
-                    'id': j.get('id'),
-                    'name': j.get('name'),
-                    'lastStatus': st.get('lastStatus'),
-                    'consecutiveErrors': st.get('consecutiveErrors'),
-                    'lastRunAtMs': st.get('lastRunAtMs'),
-                })
-    except Exception:
-        problems=[]
-
+    git_dirty = False
+    if probes['git'].ok:
+        rc3,out3,_ = probes['git'].value
+        git_dirty = rc3==0 and (out3.strip()!='')
+        if git_dirty:
+            writer.add({
+                'ts': ts,
+                'type': 'git_dirty',
+                'source': SOURCE,
+                'severity': 'warn',
+                'msg': 'Uncommitted changes (sample)',
+                'detail': {'sample': out3.splitlines()[:20]},
+                'resolved': False,
+            })
+
+    problems = probes['cron'].value if probes['cron'].ok else []
     for p in problems[:25]:
-        append_jsonl(INCIDENTS, {
+        writer.add({
             'ts': ts,
             'type': 'cron_error' if p.get('lastStatus')=='error' or (p.get('consecutiveErrors') or 0)>0 else 'cron_skip',
             'source': SOURCE,
@@ -225,17 +303,39 @@ def main() -> None:
             'resolved': False,
         })
 
+    with perf.stage('write'):
+        writer.flush()
+
     # stale cleanup (TTL-based) — keep noise out of gates
     stale_closed = 0
-    try:
-        stale_closed = auto_close_stale_incidents(now_ts=ts, ttl_hours=24)
-    except Exception:
-        stale_closed = 0
+    with perf.stage('stale_cleanup'):
+        try:
+            stale_closed = auto_close_stale_incidents(now_ts=ts, ttl_hours=24)
+        except Exception:
+            stale_closed = 0
 
+    probe_latency = probe_summary(probes)
     if gw_active and not problems:
-        append_jsonl(HEARTBEAT, {'ts': ts,'type':'heartbeat','source':SOURCE,'status':'ok','window':'now'})
-
-    print(json.dumps({'ok': True, 'ts': ts, 'gateway_active': gw_active, 'problems': len(problems), 'stale_closed': stale_closed}, ensure_ascii=False))
+        append_jsonl(HEARTBEAT, {'ts': ts,'type':'heartbeat','source':SOURCE,'status':'ok','window':'now',
+                                 'probe_latency_ms': {k: v['latency_ms'] for k, v in probe_latency.items()}})
+
+    metrics = {
+        'ts': ts,
+        'mode': 'real',
+        'runs_total': 1,
+        'gateway_active': gw_active,
+        'disk_pct': disk_pct,
+        'git_dirty': int(git_dirty),
+        'problems': len(problems),
+        'stale_closed': stale_closed,
+        'probes_failed': sum(1 for r in probes.values() if not r.ok),
+        'probes': probe_latency,
+        'probe_via': {k: probes[k].value['via'] for k in ('gateway', 'disk') if probes[k].ok},
+    }
+    append_jsonl(METRICS, perf.finish(metrics))
+
+    print(json.dumps({'ok': True, 'ts': ts, 'gateway_active': gw_active, 'problems': len(problems), 'stale_closed': stale_closed,
+                      'probes': probe_latency}, ensure_ascii=False))
 
 
 if __name__=='__main__':
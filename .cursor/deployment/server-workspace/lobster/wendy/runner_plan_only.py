@@ -12,9 +12,13 @@ from __future__ import annotations
 
 import json
 import os
+import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from run_metrics import RunPerf
+
 OUT = Path(os.path.expanduser('~/.openclaw/.runtime/wendy-lobster-metrics.jsonl'))
 
 ALLOWED_MODES = {'morning-briefing','daily-reflection','weekly-insight','goal-check','smoke'}
@@ -25,20 +29,22 @@ def iso_now() -> str:
 
 
 def main() -> None:
+    perf = RunPerf()
     mode = os.environ.get('WENDY_MODE','smoke')
     malformed = 0
     if mode not in ALLOWED_MODES:
         malformed = 1
         mode = 'smoke'
 
-    # Planning rules (approval-heavy):
-    # - planned_messages: Wendy would message user in all modes
-    # - planned_user_writes: Wendy would write Briefing/Reflection logs in some modes
-    planned_messages = 1
-    planned_user_writes = 1 if mode in ('morning-briefing','daily-reflection','smoke') else 0
+    with perf.stage('plan'):
+        # Planning rules (approval-heavy):
+        # - planned_messages: Wendy would message user in all modes
+        # - planned_user_writes: Wendy would write Briefing/Reflection logs in some modes
+        planned_messages = 1
+        planned_user_writes = 1 if mode in ('morning-briefing','daily-reflection','smoke') else 0
 
-    blocked_actions = 0
-    policy_violations = 0  # plan-only runner never sends/writes
+        blocked_actions = 0
+        policy_violations = 0  # plan-only runner never sends/writes
 
     rec = {
         'ts': iso_now(),
@@ -53,7 +59,7 @@ def main() -> None:
 
     OUT.parent.mkdir(parents=True, exist_ok=True)
     with OUT.open('a', encoding='utf-8') as f:
-        f.write(json.dumps(rec, ensure_ascii=False) + '\n')
+        f.write(json.dumps(perf.finish(rec), ensure_ascii=False) + '\n')
 
     print(json.dumps({'ok': True, **rec}, ensure_ascii=False))
 
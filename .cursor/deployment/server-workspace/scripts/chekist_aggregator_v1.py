@@ -35,6 +35,28 @@ Output JSON to stdout.
 Usage:
   python3 chekist_aggregator_v1.py --hours 4
   python3 chekist_aggregator_v1.py --start <isoZ> --end <isoZ>
+  python3 chekist_aggregator_v1.py --windows 1h,4h,24h,7d
+    (one streaming pass, one report per window keyed by label; invariants hold per
+     window; the dedup set and scope mapping are shared across windows)
+  python3 chekist_aggregator_v1.py --hours 4 --cursor chekist-aggregator
+    (incremental: parses only lines appended since the previous run with the
+     same cursor; critical records of the window are buffered on disk and the
+     malformed count is carried in the cursor, see lobster/common/incident_cursor.py)
+  python3 chekist_aggregator_v1.py --start <isoZ> --end <isoZ> --segments ~/.openclaw/.runtime/incidents.d
+    (time-partitioned store, see lobster/common/incident_segments.py: new lines are
+     mirrored from incidents.jsonl first, then only overlapping segments/blocks are read;
+     sample order is by day segment, then file order)
+  python3 chekist_aggregator_v1.py --hours 24 --rollup ~/.openclaw/.runtime/incident-rollup
+    (hourly rollup, see lobster/common/incident_rollup.py: whole hours are merged
+     from bucket counts, only the edge hours are read; sample = edge-hour records)
+  python3 chekist_aggregator_v1.py --hours 720 --workers 8
+    (long history: newline-aligned byte ranges are parsed in a process pool and
+     merged in file order, see lobster/common/parallel_scan.py; output is identical
+     to the serial scan; also works with --windows)
+  python3 chekist_aggregator_v1.py --hours 720 --columnar ~/.openclaw/.runtime/incidents.col
+    (columnar export, see lobster/common/incident_columnar.py: new lines are appended
+     to the column files first, then the window is filtered/deduped/grouped on the
+     int64 ts and dictionary-code columns; output is identical to the serial scan)
 """
 
 from __future__ import annotations
@@ -43,10 +65,24 @@ import argparse
 import hashlib
 import json
 import os
+import sys
+from collections import deque
 from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lobster", "common"))
+from incident_columnar import ColumnStore
+from incident_cursor import IncidentWindow
+from incident_rollup import RollupStore
+from incident_segments import SegmentStore
+from jsonl_prefilter import iter_window_lines
+from parallel_scan import scan_ranges
 
 INCIDENTS = os.path.expanduser("~/.openclaw/workspace/data/incidents.jsonl")
 
+# scope column name in the columnar export; bump when scope_map() changes (forces a rebuild)
+COLUMNAR_SCOPE = "chekist-spec-v1"
+
 CHEKIST_JOB_IDS = {
     "b72fece5-c8f7-4b9b-842a-208b7efcecc2",
     "89db97f7-e05e-4e3b-990b-fefc1815e7d7",
@@ -124,110 +160,315 @@ def dedup_key(rec: dict) -> str:
     return f"{ts}|{typ}|{src}|{mh}"
 
 
-def aggregate(start: datetime, end: datetime) -> dict:
-    malformed = 0
-    raw = 0
+def iter_incidents(
+    path: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    byte_range: tuple[int, int] | None = None,
+):
+    """Yield parsed records; malformed lines are yielded as None.
+
+    With start/end, lines whose raw ts prefix is outside the window are skipped
+    before json.loads (lobster/common/jsonl_prefilter.py).
+    """
+    for line in iter_window_lines(path, start, end, byte_range=byte_range):
+        try:
+            yield json.loads(line)
+        except Exception:
+            yield None
+
+
+def window_records(consumer: str, start: datetime, end: datetime) -> tuple[list[dict], int]:
+    """Critical records of [start, now] from the incremental cursor + malformed total."""
+    window_s = int((end - start).total_seconds()) + 1
+    window = IncidentWindow(
+        consumer,
+        INCIDENTS,
+        window_s,
+        keep=lambda r: r.get("severity") == "critical",
+    )
+    records = window.refresh(end.timestamp())
+    return records, int(window.stats.get("malformed_total", 0))
+
+
+def segment_records(root: str, start: datetime, end: datetime) -> tuple[Iterator[dict], int]:
+    """Window records from the segmented store (synced from INCIDENTS) + malformed total."""
+    store = SegmentStore(root)
+    store.sync(INCIDENTS)
+    return store.query(start, end), store.malformed_count()
+
+
+SAMPLE_KEYS = ["ts", "type", "source", "jobId", "job", "severity", "msg", "_scope"]
+
+
+class WindowReport:
+    """Spec v1 counters for one [start, end] window (fed with deduped records)."""
+
+    def __init__(self, start: datetime, end: datetime):
+        self.start = start
+        self.end = end
+        self.raw = 0
+        self.total = 0
+        self.by_type: dict[str, int] = {}
+        self.by_scope: dict[str, int] = {}
+        self.unknown_count = 0
+        self.transport_failed = 0
+        self.rollback = 0
+        self.critical_without_notification = 0
+        self.protocol_violation = 0
+        self.sample: deque[dict] = deque(maxlen=15)
+
+    def add(self, r: dict, n: int = 1, sample: bool = True) -> None:
+        self.total += n
+        typ = str(r.get("type") or "unknown_type")
+        self.by_type[typ] = self.by_type.get(typ, 0) + n
+
+        sc = str(r.get("_scope") or "unknown")
+        self.by_scope[sc] = self.by_scope.get(sc, 0) + n
+        if sc == "unknown":
+            self.unknown_count += n
+
+        if typ == "message_transport_failed":
+            self.transport_failed += n
+        if typ == "critical_without_notification":
+            self.critical_without_notification += n
+        if typ == "chekist_protocol_violation":
+            self.protocol_violation += n
+        if "rollback" in typ:
+            self.rollback += n
+        if sample:
+            self.sample.append(r)
+
+    def report(self, malformed: int) -> dict:
+        critical_total = self.total
+
+        inv_type = critical_total == sum(self.by_type.values())
+        inv_scope = critical_total == sum(self.by_scope.values())
+
+        aggregation_status = "VALID_AGGREGATION" if (inv_type and inv_scope) else "INVALID_AGGREGATION"
+
+        return {
+            "spec": "Aggregator Spec v1",
+            "window": {"start": iso_z(self.start), "end": iso_z(self.end)},
+            "filter": {"severity": "critical"},
+            "malformed_json_count": malformed,
+            "raw_critical_count": self.raw,
+            "dedup_applied_count": self.raw - critical_total,
+            "critical": {
+                "total": critical_total,
+                "by_type": dict(sorted(self.by_type.items(), key=lambda x: x[1], reverse=True)),
+                "by_scope": dict(sorted(self.by_scope.items(), key=lambda x: x[1], reverse=True)),
+                "unknown_scope_count": self.unknown_count,
+            },
+            "safety": {
+                "transport_failed": self.transport_failed,
+                "critical_without_notification": self.critical_without_notification,
+                "chekist_protocol_violation": self.protocol_violation,
+                "rollback": self.rollback,
+            },
+            "invariants": {
+                "total_equals_sum_by_type": inv_type,
+                "total_equals_sum_by_scope": inv_scope,
+            },
+            "aggregation_status": aggregation_status,
+            "sample": [{k: r.get(k) for k in SAMPLE_KEYS} for r in self.sample],
+        }
+
+
+def aggregate_windows(
+    windows: list[tuple[datetime, datetime]],
+    records: Iterable[dict] | None = None,
+    malformed: int = 0,
+) -> list[dict]:
+    """Build one Spec v1 report per window in a single pass.
+
+    The dedup key embeds ts, so duplicates always fall into the same windows:
+    one shared `seen` set is exact, and each record is hashed and scope-mapped
+    once. records=None scans INCIDENTS; otherwise `records` (in order) are used
+    and `malformed` is taken as the malformed line count of the whole file.
+    """
+    accs = [WindowReport(start, end) for start, end in windows]
+    lo = min(start for start, _ in windows)
+    hi = max(end for _, end in windows)
 
     seen = set()
-    deduped: list[dict] = []
 
-    with open(INCIDENTS, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                rec = json.loads(line)
-            except Exception:
-                malformed += 1
-                continue
+    if records is None:
+        source = iter_incidents(INCIDENTS, lo, hi)
+    else:
+        source = iter(records)
 
-            if rec.get("severity") != "critical":
-                continue
+    for rec in source:
+        if rec is None:
+            malformed += 1
+            continue
 
-            ts = rec.get("ts")
-            if not isinstance(ts, str):
-                continue
+        hits = window_hits(rec, windows, lo, hi)
+        if not hits:
+            continue
+        for i in hits:
+            accs[i].raw += 1
+        k = dedup_key(rec)
+        if k in seen:
+            continue
+        seen.add(k)
+        rec["_scope"] = scope_map(rec)
+        for i in hits:
+            accs[i].add(rec)
 
-            try:
-                t = parse_iso(ts)
-            except Exception:
-                continue
+    return [a.report(malformed) for a in accs]
 
-            if t < start or t > end:
-                continue
 
-            raw += 1
-            k = dedup_key(rec)
-            if k in seen:
-                continue
-            seen.add(k)
-            rec["_scope"] = scope_map(rec)
-            deduped.append(rec)
+def window_hits(rec: dict, windows: list[tuple[datetime, datetime]], lo: datetime, hi: datetime) -> list[int]:
+    """Indices of the windows a critical record falls into ([] = not counted)."""
+    if rec.get("severity") != "critical":
+        return []
 
-    by_type: dict[str, int] = {}
-    by_scope: dict[str, int] = {}
-    unknown_count = 0
+    ts = rec.get("ts")
+    if not isinstance(ts, str):
+        return []
 
-    transport_failed = 0
-    rollback = 0
-    critical_without_notification = 0
-    protocol_violation = 0
+    try:
+        t = parse_iso(ts)
+    except Exception:
+        return []
 
-    for r in deduped:
-        typ = str(r.get("type") or "unknown_type")
-        by_type[typ] = by_type.get(typ, 0) + 1
+    if t < lo or t > hi:
+        return []
 
-        sc = str(r.get("_scope") or "unknown")
-        by_scope[sc] = by_scope.get(sc, 0) + 1
-        if sc == "unknown":
-            unknown_count += 1
+    return [i for i, (start, end) in enumerate(windows) if start <= t <= end]
 
-        if typ == "message_transport_failed":
-            transport_failed += 1
-        if typ == "critical_without_notification":
-            critical_without_notification += 1
-        if typ == "chekist_protocol_violation":
-            protocol_violation += 1
-        if "rollback" in typ:
-            rollback += 1
-
-    critical_total = len(deduped)
-
-    inv_type = critical_total == sum(by_type.values())
-    inv_scope = critical_total == sum(by_scope.values())
-
-    aggregation_status = "VALID_AGGREGATION" if (inv_type and inv_scope) else "INVALID_AGGREGATION"
-
-    return {
-        "spec": "Aggregator Spec v1",
-        "window": {"start": iso_z(start), "end": iso_z(end)},
-        "filter": {"severity": "critical"},
-        "malformed_json_count": malformed,
-        "raw_critical_count": raw,
-        "dedup_applied_count": raw - critical_total,
-        "critical": {
-            "total": critical_total,
-            "by_type": dict(sorted(by_type.items(), key=lambda x: x[1], reverse=True)),
-            "by_scope": dict(sorted(by_scope.items(), key=lambda x: x[1], reverse=True)),
-            "unknown_scope_count": unknown_count,
-        },
-        "safety": {
-            "transport_failed": transport_failed,
-            "critical_without_notification": critical_without_notification,
-            "chekist_protocol_violation": protocol_violation,
-            "rollback": rollback,
-        },
-        "invariants": {
-            "total_equals_sum_by_type": inv_type,
-            "total_equals_sum_by_scope": inv_scope,
-        },
-        "aggregation_status": aggregation_status,
-        "sample": [
-            {k: r.get(k) for k in ["ts", "type", "source", "jobId", "job", "severity", "msg", "_scope"]}
-            for r in deduped[-15:]
-        ],
-    }
+
+def _scan_range(path: str, lo_b: int, hi_b: int, windows: list[tuple[datetime, datetime]]) -> tuple:
+    """Worker: malformed count, raw counts per window, locally-first records in file order."""
+    lo = min(start for start, _ in windows)
+    hi = max(end for _, end in windows)
+    malformed = 0
+    raw = [0] * len(windows)
+    seen = set()
+    firsts = []
+    for rec in iter_incidents(path, lo, hi, byte_range=(lo_b, hi_b)):
+        if rec is None:
+            malformed += 1
+            continue
+        hits = window_hits(rec, windows, lo, hi)
+        if not hits:
+            continue
+        for i in hits:
+            raw[i] += 1
+        k = dedup_key(rec)
+        if k in seen:
+            continue
+        seen.add(k)
+        rec["_scope"] = scope_map(rec)
+        firsts.append((k, hits, tuple(rec.get(f) for f in SAMPLE_KEYS)))
+    return malformed, raw, firsts
+
+
+def aggregate_windows_parallel(windows: list[tuple[datetime, datetime]], workers: int) -> list[dict]:
+    """Same reports as aggregate_windows() over INCIDENTS, scanned by a process pool.
+
+    Ranges are merged in file order: raw counts add up, and a record is counted
+    only if its dedup key was not seen in an earlier range, so totals and the
+    sample order match the serial scan.
+    """
+    accs = [WindowReport(start, end) for start, end in windows]
+    seen = set()
+    malformed = 0
+    for part_malformed, raw, firsts in scan_ranges(_scan_range, INCIDENTS, workers, windows):
+        malformed += part_malformed
+        for acc, n in zip(accs, raw):
+            acc.raw += n
+        for k, hits, vals in firsts:
+            if k in seen:
+                continue
+            seen.add(k)
+            rec = dict(zip(SAMPLE_KEYS, vals))
+            for i in hits:
+                accs[i].add(rec)
+    return [a.report(malformed) for a in accs]
+
+
+def aggregate_rollup(start: datetime, end: datetime, root: str) -> dict:
+    """Spec v1 report from the hourly rollup (lobster/common/incident_rollup.py).
+
+    Whole hours come from bucket counts (dedup already applied per bucket);
+    only the partial edge hours are read and deduped here, so `sample` holds
+    edge-hour records only.
+    """
+    store = RollupStore(root, INCIDENTS)
+    store.refresh()
+    win = store.window(start, end)
+    acc = WindowReport(start, end)
+    for keyrec, raw, unique in win.keys():
+        if keyrec.get("severity") != "critical":
+            continue
+        acc.raw += raw
+        if unique:
+            keyrec["_scope"] = scope_map(keyrec)
+            acc.add(keyrec, n=unique, sample=False)
+    seen = set()
+    for rec in win.edge_rows:
+        if rec.get("severity") != "critical":
+            continue
+        t = parse_iso(rec["ts"])
+        if t < start or t > end:
+            continue
+        acc.raw += 1
+        k = dedup_key(rec)
+        if k in seen:
+            continue
+        seen.add(k)
+        rec["_scope"] = scope_map(rec)
+        acc.add(rec)
+    return acc.report(store.malformed_count())
+
+
+def aggregate_columnar(start: datetime, end: datetime, root: str) -> dict:
+    """Spec v1 report from the columnar export (lobster/common/incident_columnar.py).
+
+    Counts come from grouping the kept rows by (type, scope) in first-occurrence
+    order, so by_type/by_scope key order matches the serial scan; only the
+    sample rows are decoded back into records.
+    """
+    store = ColumnStore(root, INCIDENTS, scope_map, COLUMNAR_SCOPE)
+    store.sync()
+    q = store.query(start, end)
+    acc = WindowReport(start, end)
+    acc.raw = q.raw
+    for (typ, sc), n in q.group_counts("type", "scope"):
+        acc.add({"type": typ, "_scope": sc}, n=n, sample=False)
+    tail = q.kept[-acc.sample.maxlen :]
+    for row, rec in zip(tail, q.records(tail)):
+        rec["_scope"] = q.cols.value("scope", row)
+        acc.sample.append(rec)
+    return acc.report(store.malformed_count())
+
+
+def aggregate(start: datetime, end: datetime, records: Iterable[dict] | None = None, malformed: int = 0) -> dict:
+    """Build the Spec v1 report.
+
+    records=None scans INCIDENTS; otherwise `records` (in order) are used and
+    `malformed` is taken as the malformed line count of the whole file.
+    """
+    return aggregate_windows([(start, end)], records=records, malformed=malformed)[0]
+
+
+_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+
+def parse_windows(spec: str) -> list[tuple[str, timedelta]]:
+    """'1h,4h,24h,7d' -> [(label, timedelta), ...]."""
+    out = []
+    for label in (x.strip() for x in spec.split(",")):
+        if not label:
+            continue
+        if label[-1] not in _UNITS or not label[:-1].isdigit():
+            raise SystemExit(f"bad window {label!r} (expected e.g. 90m, 4h, 7d)")
+        out.append((label, timedelta(seconds=int(label[:-1]) * _UNITS[label[-1]])))
+    if not out:
+        raise SystemExit("--windows is empty")
+    return out
 
 
 def main() -> None:
@@ -235,10 +476,41 @@ def main() -> None:
     ap.add_argument("--hours", type=int, default=None)
     ap.add_argument("--start", type=str, default=None)
     ap.add_argument("--end", type=str, default=None)
+    ap.add_argument("--cursor", type=str, default=None, help="Incremental mode (consumer name); requires --hours")
+    ap.add_argument("--segments", type=str, default=None, help="Read the time-partitioned store at this dir")
+    ap.add_argument("--rollup", type=str, default=None, help="Read counts from the hourly rollup at this dir")
+    ap.add_argument("--columnar", type=str, default=None, help="Read the columnar export at this dir")
+    ap.add_argument("--workers", type=int, default=0, help="Scan INCIDENTS with a process pool of N workers")
+    ap.add_argument("--windows", type=str, default=None, help="Comma list ending at now, e.g. 1h,4h,24h,7d (one pass)")
     args = ap.parse_args()
 
     now = datetime.now(timezone.utc)
 
+    if args.windows:
+        # every window ends at now and is read from INCIDENTS, --segments or --workers
+        flags = ("hours", "start", "end", "cursor", "rollup", "columnar")
+        other = [f"--{k}" for k in flags if getattr(args, k) is not None]
+        if other:
+            raise SystemExit(f"--windows cannot be combined with {', '.join(other)}")
+        if args.segments and args.workers:
+            raise SystemExit("--windows: use either --segments or --workers")
+        labels = parse_windows(args.windows)
+        windows = [(now - span, now) for _, span in labels]
+        if args.segments:
+            records, malformed = segment_records(os.path.expanduser(args.segments), min(w[0] for w in windows), now)
+            reports = aggregate_windows(windows, records=records, malformed=malformed)
+        elif args.workers:
+            reports = aggregate_windows_parallel(windows, args.workers)
+        else:
+            reports = aggregate_windows(windows)
+        out = {
+            "spec": "Aggregator Spec v1",
+            "mode": "multi_window",
+            "windows": {label: rep for (label, _), rep in zip(labels, reports)},
+        }
+        print(json.dumps(out, ensure_ascii=False, indent=2))
+        return
+
     if args.hours is not None:
         start = now - timedelta(hours=args.hours)
         end = now
@@ -248,7 +520,22 @@ def main() -> None:
         start = parse_iso(args.start)
         end = parse_iso(args.end)
 
-    out = aggregate(start=start, end=end)
+    if args.columnar:
+        out = aggregate_columnar(start, end, os.path.expanduser(args.columnar))
+    elif args.rollup:
+        out = aggregate_rollup(start, end, os.path.expanduser(args.rollup))
+    elif args.cursor:
+        if args.hours is None:
+            raise SystemExit("--cursor requires --hours (window must end at now)")
+        records, malformed = window_records(args.cursor, start, end)
+        out = aggregate(start=start, end=end, records=records, malformed=malformed)
+    elif args.segments:
+        records, malformed = segment_records(os.path.expanduser(args.segments), start, end)
+        out = aggregate(start=start, end=end, records=records, malformed=malformed)
+    elif args.workers:
+        out = aggregate_windows_parallel([(start, end)], args.workers)[0]
+    else:
+        out = aggregate(start=start, end=end)
     print(json.dumps(out, ensure_ascii=False, indent=2))
 
 
@@ -12,29 +12,75 @@ Outputs:
 Notes:
 - Pricing is taken from data/model-pricing.json. Unknown models are costed at $0 and listed.
 - Periods are computed in Asia/Almaty (UTC+5) by local calendar date.
+
+Incremental mode (--incremental):
+- ~/.openclaw/.runtime/economist-collect-state.json keeps a per-session memo
+  (updatedAt, model, tokens, cost, local date) and per-local-date buckets
+  (tokens, cost, per-model totals, unknown models) plus per-cron-job tokens.
+- Only sessions whose (updatedAt, model, tokens) changed are re-costed; their
+  old contribution is subtracted from the buckets and the new one added.
+  Sessions gone from sessions.json are subtracted. A pricing change re-costs
+  the memo (no rescan) and applies the differences.
+- day/week/month come from the date buckets, last24h from the memo.
+- Costs are summed exactly (lobster/common/exact_sum.py), so both modes write
+  byte-identical records for the same input.
+  --verify computes both in memory, compares the three records and writes nothing.
+- The same deltas feed the daily cost rollup store (lobster/common/cost_rollup.py,
+  rows per Almaty date x model x cron category x cron job) that answers week/month
+  queries and comparisons without the sessions registry. It is flushed before the
+  state file; when its generation or the cron category labels do not match the
+  state it is rebuilt from the memo (--backfill-rollup forces that).
+
+Full scan (default): session fields are loaded once into column arrays and every
+period and breakdown is a mask + grouped sum (lobster/common/cost_engine.py,
+numpy when installed). Its cost sums are correctly rounded exact sums as well.
+The full scan does not touch the state file.
+
+sessions.json is streamed one session at a time (lobster/common/sessions_stream.py),
+never loaded whole.
 """
 
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
+import os
+import sys
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Iterable, Tuple
 import re
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lobster', 'common'))
+from cost_engine import CostColumns, CostEngine, Rollup
+from cost_rollup import COST_ROLLUP_DIR, CostRollup, row_key
+from exact_sum import from_units, to_units
+from sessions_stream import iter_sessions
+
 SESSIONS_JSON = Path('/home/openclaw/.openclaw/agents/main/sessions/sessions.json')
 PRICING_JSON = Path('/home/openclaw/.openclaw/workspace/data/model-pricing.json')
 COST_SUMMARY_JSON = Path('/home/openclaw/.openclaw/workspace/data/cost-summary.json')
 ECON_LOG_JSONL = Path('/home/openclaw/.openclaw/workspace/data/economist-log.jsonl')
 TOKEN_USAGE_JSONL = Path('/home/openclaw/.openclaw/workspace/data/token-usage.jsonl')
 CRON_SNAPSHOT_JSON = Path('/home/openclaw/.openclaw/workspace/data/cron-jobs-snapshot.json')
+CRON_JOBS_JSON = Path('/home/openclaw/.openclaw/cron/jobs.json')
+STATE_JSON = Path(os.path.expanduser('~/.openclaw/.runtime/economist-collect-state.json'))
+STATE_VERSION = 1
 
 ALMATY_TZ = timezone(timedelta(hours=5))
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+CRON_RUN_RE = re.compile(r'^agent:main:cron:([0-9a-f\-]{8,})(?::run:([0-9a-f\-]{8,}))?$')
+
+
+def iso_utc(dt_utc: datetime) -> str:
+    return dt_utc.replace(microsecond=0).isoformat().replace('+00:00', 'Z')
 
 
 def iso_now_utc() -> str:
-    return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace('+00:00', 'Z')
+    return iso_utc(datetime.now(timezone.utc))
 
 
 def local_date_str(dt_utc: datetime) -> str:
@@ -58,12 +104,33 @@ def month_start_local(dt_utc: datetime) -> str:
 class Totals:
     in_tokens: int = 0
     out_tokens: int = 0
-    cost_usd: float = 0.0
+    cost_units: int = 0  # exact_sum units
+
+    @classmethod
+    def of(cls, r: Rollup) -> 'Totals':
+        # r.cost_usd is the correctly rounded exact sum: to_units() keeps it exact
+        return cls(r.in_tokens, r.out_tokens, to_units(r.cost_usd))
 
     def add(self, in_t: int, out_t: int, cost: float) -> None:
         self.in_tokens += int(in_t or 0)
         self.out_tokens += int(out_t or 0)
-        self.cost_usd += float(cost or 0.0)
+        self.cost_units += to_units(float(cost or 0.0))
+
+    def add_units(self, in_t: int, out_t: int, units: int) -> None:
+        self.in_tokens += in_t
+        self.out_tokens += out_t
+        self.cost_units += units
+
+    @property
+    def cost_usd(self) -> float:
+        return from_units(self.cost_units)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'cost_usd': round(self.cost_usd, 10),
+            'tokens_input': self.in_tokens,
+            'tokens_output': self.out_tokens,
+        }
 
 
 def load_json(path: Path) -> Any:
@@ -87,6 +154,11 @@ def normalize_model(model: str) -> str:
     return m
 
 
+def price_keys(model_raw: str) -> Tuple[str]:
+    """Pricing names for a raw session model: sessions are costed by normalized name only."""
+    return (normalize_model(model_raw),)
+
+
 def cost_for(model: str, in_tokens: int, out_tokens: int, pricing: Dict[str, Any]) -> Tuple[float, bool]:
     models = pricing.get('models', {})
     m = normalize_model(model)
@@ -99,19 +171,45 @@ def cost_for(model: str, in_tokens: int, out_tokens: int, pricing: Dict[str, Any
     return cost, True
 
 
-def main() -> None:
-    now_utc = datetime.now(timezone.utc)
-    today_local = local_date_str(now_utc)
-    week_start = week_start_local(now_utc)
-    month_start = month_start_local(now_utc)
-
-    sessions: Dict[str, Any] = load_json(SESSIONS_JSON)
-    pricing = load_json(PRICING_JSON)
-
-    # Cron metadata for job/category breakdown
+def cron_category(job_name: str) -> str:
+    n = (job_name or '').lower()
+    if 'дайджест' in n and 'мнения' not in n:
+        return 'digest_news'
+    if 'мнения' in n:
+        return 'digest_opinions'
+    if 'участковый' in n:
+        return 'monitoring_uchastkovy'
+    if 'чекист' in n:
+        return 'monitoring_chekist'
+    if 'механик' in n:
+        return 'monitoring_mekhanik'
+    if 'экономист' in n:
+        return 'economist'
+    if 'git sync' in n or 'auto-commit' in n or 'auto-push' in n:
+        return 'git_sync'
+    if 'marta' in n or 'айганым' in n:
+        return 'aiganym_marta'
+    if 'weekly review' in n and 'memory' in n:
+        return 'memory_review'
+    if 'optimizer' in n or 'контекста' in n:
+        return 'context_optimizer'
+    if 'monitor daily summary' in n:
+        return 'monitor_aggregate'
+    return 'other'
+
+
+def parse_cron_key(key: str) -> Tuple[str | None, str | None]:
+    m = CRON_RUN_RE.match(key or '')
+    if not m:
+        return None, None
+    return m.group(1), m.group(2)
+
+
+def load_cron_jobs(path: Path = CRON_JOBS_JSON) -> Dict[str, Dict[str, Any]]:
+    """Cron metadata for job/category breakdown."""
     cron_jobs = {}
     try:
-        cron_jobs_raw = load_json(Path('/home/openclaw/.openclaw/cron/jobs.json'))
+        cron_jobs_raw = load_json(path)
         for j in cron_jobs_raw.get('jobs', []):
             if isinstance(j, dict) and j.get('id'):
                 cron_jobs[j['id']] = {
@@ -120,71 +218,15 @@ def main() -> None:
                 }
     except Exception:
         cron_jobs = {}
+    return cron_jobs
 
-    def cron_category(job_name: str) -> str:
-        n = (job_name or '').lower()
-        if 'дайджест' in n and 'мнения' not in n:
-            return 'digest_news'
-        if 'мнения' in n:
-            return 'digest_opinions'
-        if 'участковый' in n:
-            return 'monitoring_uchastkovy'
-        if 'чекист' in n:
-            return 'monitoring_chekist'
-        if 'механик' in n:
-            return 'monitoring_mekhanik'
-        if 'экономист' in n:
-            return 'economist'
-        if 'git sync' in n or 'auto-commit' in n or 'auto-push' in n:
-            return 'git_sync'
-        if 'marta' in n or 'айганым' in n:
-            return 'aiganym_marta'
-        if 'weekly review' in n and 'memory' in n:
-            return 'memory_review'
-        if 'optimizer' in n or 'контекста' in n:
-            return 'context_optimizer'
-        if 'monitor daily summary' in n:
-            return 'monitor_aggregate'
-        return 'other'
-
-    CRON_RUN_RE = re.compile(r'^agent:main:cron:([0-9a-f\-]{8,})(?::run:([0-9a-f\-]{8,}))?$')
-    def parse_cron_key(key: str) -> Tuple[str | None, str | None]:
-        m = CRON_RUN_RE.match(key or '')
-        if not m:
-            return None, None
-        return m.group(1), m.group(2)
-
-
-    # Compute period windows in local calendar terms.
-    # We include sessions whose updatedAt falls on/after the start date in local time.
-    def in_period(updated_at_ms: int, start_local_date: str) -> bool:
-        if not updated_at_ms:
-            return False
-        dt = datetime.fromtimestamp(updated_at_ms / 1000.0, tz=timezone.utc)
-        return local_date_str(dt) >= start_local_date
-
-    totals_day = Totals()
-    totals_week = Totals()
-    totals_month = Totals()
-    by_model: Dict[str, Totals] = {}
-
-    # Rolling windows
-    totals_last24h = Totals()
-    by_model_last24h: Dict[str, Totals] = {}
 
-    # Cron breakdown (rolling 24h) — only :run: sessions for accuracy
-    by_cron_job_last24h: Dict[str, Totals] = {}
-    by_cron_category_last24h: Dict[str, Totals] = {}
-
-    unknown_models = set()
-
-    last24h_cut = now_utc - timedelta(hours=24)
-
-    # Gemini-cron snapshot (tokens only)
+def load_gemini_cron_ids(path: Path = CRON_SNAPSHOT_JSON) -> set:
+    """Gemini-cron snapshot (tokens only): isolated cron jobs on google/gemini*."""
     gemini_cron_ids = set()
-    if CRON_SNAPSHOT_JSON.exists():
+    if path.exists():
         try:
-            cron_snap = load_json(CRON_SNAPSHOT_JSON)
+            cron_snap = load_json(path)
             for j in cron_snap.get('jobs', []):
                 if not isinstance(j, dict):
                     continue
@@ -196,158 +238,369 @@ def main() -> None:
                     gemini_cron_ids.add(j.get('id'))
         except Exception:
             gemini_cron_ids = set()
+    return gemini_cron_ids
+
+
+def pricing_sig(pricing: Any) -> str:
+    return hashlib.sha1(json.dumps(pricing, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def session_fields(s: Any) -> Tuple[int, str, int, int] | None:
+    """(updatedAt ms, raw model, input tokens, output tokens) of a countable session."""
+    if not isinstance(s, dict):
+        return None
+    updated_at = int(s.get('updatedAt') or 0)
+    if not updated_at:
+        return None
+    model_raw = s.get('model') or s.get('modelProvider')
+    if not isinstance(model_raw, str):
+        return None
+    return updated_at, model_raw, int(s.get('inputTokens') or 0), int(s.get('outputTokens') or 0)
+
+
+def gemini_job_id(key: str) -> str | None:
+    if key.startswith('agent:main:cron:'):
+        parts = key.split(':')
+        if len(parts) >= 4:
+            return parts[3]
+    return None
+
+
+class CostState:
+    """Per-session memo + per-local-date buckets; every total is maintained by +/- deltas.
+
+    memo[key] = [updatedAt, model_raw, model, in, out, cost, priced, local_date]
+    days[date] = {n, in, out, cost (exact units), models: {model: [n, in, out, units]},
+                  unknown: {model_raw: n}}
+    cron_tokens[job_id] = [n, in, out]   (all sessions, for the gemini snapshot)
+
+    With a CostRollup attached, every delta is also applied to its row
+    (local_date, [model, cron category, job_id]); `generation` counts saves.
+    """
+
+    def __init__(self, raw: Dict[str, Any] | None = None):
+        raw = raw or {}
+        self.generation: int = int(raw.get('generation') or 0)
+        self.pricing_sig: str = raw.get('pricing_sig') or ''
+        self.memo: Dict[str, list] = raw.get('memo') or {}
+        self.days: Dict[str, Dict[str, Any]] = raw.get('days') or {}
+        self.cron_tokens: Dict[str, list] = raw.get('cron_tokens') or {}
+        self.stats: Dict[str, int] = {}
+        self.rollup: CostRollup | None = None
+        self.rollup_labels = ''
+        self._categories: Dict[str, str] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': STATE_VERSION,
+            'generation': self.generation,
+            'pricing_sig': self.pricing_sig,
+            'memo': self.memo,
+            'days': self.days,
+            'cron_tokens': self.cron_tokens,
+        }
+
+    def _apply(self, key: str, e: list, sign: int) -> None:
+        _, model_raw, model, in_t, out_t, cost, priced, date = e
+        cost_units = to_units(cost)
+        units = sign * cost_units
+        day = self.days.setdefault(date, {'n': 0, 'in': 0, 'out': 0, 'cost': 0, 'models': {}, 'unknown': {}})
+        day['n'] += sign
+        day['in'] += sign * in_t
+        day['out'] += sign * out_t
+        day['cost'] += units
+        bm = day['models'].setdefault(model, [0, 0, 0, 0])
+        bm[0] += sign
+        bm[1] += sign * in_t
+        bm[2] += sign * out_t
+        bm[3] += units
+        if not bm[0]:
+            del day['models'][model]
+        if not priced:
+            left = day['unknown'].get(model_raw, 0) + sign
+            if left:
+                day['unknown'][model_raw] = left
+            else:
+                day['unknown'].pop(model_raw, None)
+        if not day['n']:
+            del self.days[date]
+        if self.rollup is not None:
+            self.rollup.add(date, self._rollup_key(key, model), sign, in_t, out_t, cost_units)
+
+        job_id = gemini_job_id(key)
+        if job_id is not None:
+            ct = self.cron_tokens.setdefault(job_id, [0, 0, 0])
+            ct[0] += sign
+            ct[1] += sign * in_t
+            ct[2] += sign * out_t
+            if not ct[0]:
+                del self.cron_tokens[job_id]
+
+    def _rollup_key(self, key: str, model: str) -> str:
+        job_id, run_id = parse_cron_key(key)
+        if job_id and run_id:
+            cat = self._categories.get(job_id) or cron_category(job_id)
+            return row_key(model, cat, job_id)
+        return row_key(model, None, None)
+
+    def attach_rollup(self, rollup: CostRollup, cron_jobs: Dict[str, Dict[str, Any]], rebuild: bool = False) -> bool:
+        """Feed `rollup` from now on; rebuild it from the memo unless it matches this state."""
+        self._categories = {j: cron_category(job_name(cron_jobs, j)) for j in cron_jobs}
+        self.rollup_labels = hashlib.sha1(json.dumps(self._categories, sort_keys=True).encode('utf-8')).hexdigest()
+        self.rollup = rollup
+        if not rebuild and rollup.matches(self.generation, self.rollup_labels):
+            return False
+        rollup.clear()
+        for key, e in self.memo.items():
+            rollup.add(e[7], self._rollup_key(key, e[2]), 1, e[3], e[4], to_units(e[5]))
+        return True
+
+    def reprice(self, pricing: Dict[str, Any]) -> int:
+        """Re-cost the memo under new pricing; only entries whose cost changed are re-applied."""
+        repriced = 0
+        for key, e in self.memo.items():
+            cost, priced = cost_for(e[2], e[3], e[4], pricing)
+            if cost != e[5] or priced != e[6]:
+                self._apply(key, e, -1)
+                e[5], e[6] = cost, priced
+                self._apply(key, e, +1)
+                repriced += 1
+        self.pricing_sig = pricing_sig(pricing)
+        return repriced
+
+    def save_rollup(self) -> Dict[str, Any] | None:
+        """Flush the attached rollup as the next generation; save the state right after."""
+        self.generation += 1
+        if self.rollup is None:
+            return None
+        return self.rollup.flush(self.generation, self.rollup_labels)
+
+    def update(self, sessions: Dict[str, Any] | Iterable[Tuple[str, Any]], pricing: Dict[str, Any]) -> Dict[str, int]:
+        repriced = self.reprice(pricing) if pricing_sig(pricing) != self.pricing_sig else 0
+        added = changed = unchanged = removed = 0
+        seen = set()
+        for key, s in sessions.items() if isinstance(sessions, dict) else sessions:
+            f = session_fields(s)
+            if f is None:
+                continue
+            seen.add(key)
+            old = self.memo.get(key)
+            if old is not None and old[0] == f[0] and old[1] == f[1] and old[3] == f[2] and old[4] == f[3]:
+                unchanged += 1
+                continue
+            updated_at, model_raw, in_t, out_t = f
+            model = normalize_model(model_raw)
+            cost, priced = cost_for(model, in_t, out_t, pricing)
+            date = local_date_str(datetime.fromtimestamp(updated_at / 1000.0, tz=timezone.utc))
+            e = [updated_at, model_raw, model, in_t, out_t, cost, priced, date]
+            if old is not None:
+                self._apply(key, old, -1)
+                changed += 1
+            else:
+                added += 1
+            self._apply(key, e, +1)
+            self.memo[key] = e
+        for key in [k for k in self.memo if k not in seen]:
+            self._apply(key, self.memo.pop(key), -1)
+            removed += 1
+        self.stats = {'added': added, 'changed': changed, 'unchanged': unchanged, 'removed': removed,
+                      'repriced': repriced}
+        return self.stats
+
+
+def load_state(path: Path) -> CostState:
+    try:
+        raw = load_json(path)
+        if raw.get('version') == STATE_VERSION:
+            return CostState(raw)
+    except Exception:
+        pass
+    return CostState()
 
-    gemini_cron_in = 0
-    gemini_cron_out = 0
-    gemini_cron_sessions = 0
 
-    for key, s in sessions.items():
-        if not isinstance(s, dict):
-            continue
+def save_state(path: Path, state: CostState) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    tmp.write_text(json.dumps(state.to_dict(), ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
+    os.replace(tmp, path)
 
-        updated_at = int(s.get('updatedAt') or 0)
-        if not updated_at:
-            continue
-        dt_utc = datetime.fromtimestamp(updated_at / 1000.0, tz=timezone.utc)
 
-        model_raw = s.get('model') or s.get('modelProvider')
-        if not isinstance(model_raw, str):
+@dataclass
+class Rollups:
+    """Everything the output records are built from."""
+    last24h: Totals
+    day: Totals
+    week: Totals
+    month: Totals
+    by_model: Dict[str, Totals]
+    by_model_last24h: Dict[str, Totals]
+    by_cron_job_last24h: Dict[str, Totals]
+    by_cron_category_last24h: Dict[str, Totals]
+    unknown_models: set
+    gemini_cron: Tuple[int, int, int]  # input tokens, output tokens, sessions
+
+
+def last24h_cut_us(now_utc: datetime) -> int:
+    return (now_utc - timedelta(hours=24) - EPOCH) // timedelta(microseconds=1)
+
+
+def job_name(cron_jobs: Dict[str, Dict[str, Any]], job_id: str) -> str:
+    return (cron_jobs.get(job_id, {}) or {}).get('name') or job_id
+
+
+def state_rollups(
+    state: CostState,
+    now_utc: datetime,
+    cron_jobs: Dict[str, Dict[str, Any]],
+    gemini_cron_ids: set,
+) -> Rollups:
+    """Rollups from the incremental state (date buckets + memo)."""
+    today_local = local_date_str(now_utc)
+    week_start = week_start_local(now_utc)
+    month_start = month_start_local(now_utc)
+
+    # Period inclusion (calendar): sessions whose updatedAt falls on/after the start date in local time.
+    totals_day = Totals()
+    totals_week = Totals()
+    totals_month = Totals()
+    by_model: Dict[str, Totals] = {}
+    unknown_models = set()
+    # The week may start in the previous month.
+    earliest = min(week_start, month_start)
+    for date, day in state.days.items():
+        if date < earliest:
+            continue
+        for t, start in ((totals_day, today_local), (totals_week, week_start), (totals_month, month_start)):
+            if date >= start:
+                t.add_units(day['in'], day['out'], day['cost'])
+        if date >= month_start:
+            for model, (_, in_t, out_t, units) in day['models'].items():
+                by_model.setdefault(model, Totals()).add_units(in_t, out_t, units)
+        unknown_models.update(day['unknown'])
+
+    # Rolling 24h; cron breakdown only for :run: sessions for accuracy
+    cut_us = last24h_cut_us(now_utc)
+    totals_last24h = Totals()
+    by_model_last24h: Dict[str, Totals] = {}
+    by_cron_job_last24h: Dict[str, Totals] = {}
+    by_cron_category_last24h: Dict[str, Totals] = {}
+    for key, e in state.memo.items():
+        updated_at, model_raw, model, in_t, out_t, cost, priced, _ = e
+        if updated_at * 1000 < cut_us:
+            continue
+        units = to_units(cost)
+        totals_last24h.add_units(in_t, out_t, units)
+        by_model_last24h.setdefault(model, Totals()).add_units(in_t, out_t, units)
+        if not priced:
+            unknown_models.add(model_raw)
+        job_id, run_id = parse_cron_key(key)
+        if job_id and run_id:
+            by_cron_job_last24h.setdefault(job_id, Totals()).add_units(in_t, out_t, units)
+            cat = cron_category(job_name(cron_jobs, job_id))
+            by_cron_category_last24h.setdefault(cat, Totals()).add_units(in_t, out_t, units)
+
+    gemini_cron_in = gemini_cron_out = gemini_cron_sessions = 0
+    for job_id in gemini_cron_ids:
+        ct = state.cron_tokens.get(job_id)
+        if ct:
+            gemini_cron_sessions += ct[0]
+            gemini_cron_in += ct[1]
+            gemini_cron_out += ct[2]
+
+    return Rollups(
+        totals_last24h, totals_day, totals_week, totals_month,
+        by_model, by_model_last24h, by_cron_job_last24h, by_cron_category_last24h,
+        unknown_models, (gemini_cron_in, gemini_cron_out, gemini_cron_sessions),
+    )
+
+
+def engine_rollups(
+    sessions: Dict[str, Any] | Iterable[Tuple[str, Any]],
+    pricing: Dict[str, Any],
+    now_utc: datetime,
+    cron_jobs: Dict[str, Dict[str, Any]],
+    gemini_cron_ids: set,
+) -> Rollups:
+    """Rollups of a full scan: session columns + masks/grouped sums (lobster/common/cost_engine.py)."""
+    cols = CostColumns()
+    for key, s in sessions.items() if isinstance(sessions, dict) else sessions:
+        f = session_fields(s)
+        if f is None:
             continue
-        model = normalize_model(model_raw)
-
-        in_t = int(s.get('inputTokens') or 0)
-        out_t = int(s.get('outputTokens') or 0)
-
-        # Rolling 24h
-        if dt_utc >= last24h_cut:
-            c, ok = cost_for(model, in_t, out_t, pricing)
-            totals_last24h.add(in_t, out_t, c)
-            bm = by_model_last24h.setdefault(model, Totals())
-            bm.add(in_t, out_t, c)
-            if not ok:
-                unknown_models.add(model_raw)
-
-            job_id, run_id = parse_cron_key(key)
-            if job_id and run_id:
-                meta = cron_jobs.get(job_id, {})
-                name = meta.get('name') or job_id
-                cat = cron_category(name)
-                bj = by_cron_job_last24h.setdefault(job_id, Totals())
-                bj.add(in_t, out_t, c)
-                bc = by_cron_category_last24h.setdefault(cat, Totals())
-                bc.add(in_t, out_t, c)
-
-        # Period inclusion (calendar)
-        if in_period(updated_at, today_local):
-            c, ok = cost_for(model, in_t, out_t, pricing)
-            totals_day.add(in_t, out_t, c)
-            if not ok:
-                unknown_models.add(model_raw)
-
-        if in_period(updated_at, week_start):
-            c, ok = cost_for(model, in_t, out_t, pricing)
-            totals_week.add(in_t, out_t, c)
-            if not ok:
-                unknown_models.add(model_raw)
-
-        if in_period(updated_at, month_start):
-            c, ok = cost_for(model, in_t, out_t, pricing)
-            totals_month.add(in_t, out_t, c)
-            if not ok:
-                unknown_models.add(model_raw)
-
-            bm = by_model.setdefault(model, Totals())
-            bm.add(in_t, out_t, c)
-
-        # Gemini cron snapshot (tokens only)
-        if gemini_cron_ids and key.startswith('agent:main:cron:'):
-            parts = key.split(':')
-            if len(parts) >= 4:
-                job_id = parts[3]
-                if job_id in gemini_cron_ids:
-                    gemini_cron_in += in_t
-                    gemini_cron_out += out_t
-                    gemini_cron_sessions += 1
+        job_id, run_id = parse_cron_key(key)
+        cols.add(f[0], f[1], f[2], f[3], job=gemini_job_id(key), run=bool(job_id and run_id))
+    eng = CostEngine(cols, pricing, price_keys)
+
+    local = now_utc.astimezone(ALMATY_TZ).date()
+    offset_s = int(ALMATY_TZ.utcoffset(None).total_seconds())
+    day = eng.local_day_ge(local, offset_s)
+    week = eng.local_day_ge(local - timedelta(days=local.weekday()), offset_s)
+    month = eng.local_day_ge(local.replace(day=1), offset_s)
+    last24h = eng.since_ms(-(-last24h_cut_us(now_utc) // 1000))
+    runs24h = last24h & eng.runs()
+
+    def category(job_id: str) -> str:
+        return cron_category(job_name(cron_jobs, job_id))
+
+    gemini = [r for j, r in eng.group(eng.all_rows(), 'job').items() if j in gemini_cron_ids]
+    return Rollups(
+        Totals.of(eng.total(last24h)),
+        Totals.of(eng.total(day)),
+        Totals.of(eng.total(week)),
+        Totals.of(eng.total(month)),
+        {m: Totals.of(r) for m, r in eng.group(month, 'raw', normalize_model).items()},
+        {m: Totals.of(r) for m, r in eng.group(last24h, 'raw', normalize_model).items()},
+        {j: Totals.of(r) for j, r in eng.group(runs24h, 'job').items()},
+        {c: Totals.of(r) for c, r in eng.group(runs24h, 'job', category).items()},
+        set(eng.unpriced(last24h | week | month)),
+        (sum(r.in_tokens for r in gemini), sum(r.out_tokens for r in gemini), sum(r.rows for r in gemini)),
+    )
+
+
+def build_records(
+    rollups: Rollups,
+    now_utc: datetime,
+    cron_jobs: Dict[str, Dict[str, Any]],
+) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+    """(cost-summary, economist-log record, token-usage record)."""
+    r = rollups
+    now_iso = iso_utc(now_utc)
 
     summary = {
         '_comment': 'Текущий агрегат затрат. Обновляется Экономистом ежедневно. Читается для мгновенных ответов.',
-        'last_updated': iso_now_utc(),
-        'last_session_scan_at': iso_now_utc(),
+        'last_updated': now_iso,
+        'last_session_scan_at': now_iso,
         'period': {
             'last24h': {
                 'window': 'rolling_24h',
-                'from_utc': last24h_cut.replace(microsecond=0).isoformat().replace('+00:00', 'Z'),
-                'to_utc': now_utc.replace(microsecond=0).isoformat().replace('+00:00', 'Z'),
-                'cost_usd': round(totals_last24h.cost_usd, 10),
-                'tokens_input': totals_last24h.in_tokens,
-                'tokens_output': totals_last24h.out_tokens,
-            },
-            'day': {
-                'date': today_local,
-                'cost_usd': round(totals_day.cost_usd, 10),
-                'tokens_input': totals_day.in_tokens,
-                'tokens_output': totals_day.out_tokens,
-            },
-            'week': {
-                'start': week_start,
-                'cost_usd': round(totals_week.cost_usd, 10),
-                'tokens_input': totals_week.in_tokens,
-                'tokens_output': totals_week.out_tokens,
+                'from_utc': iso_utc(now_utc - timedelta(hours=24)),
+                'to_utc': now_iso,
+                **r.last24h.as_dict(),
             },
-            'month': {
-                'start': month_start,
-                'cost_usd': round(totals_month.cost_usd, 10),
-                'tokens_input': totals_month.in_tokens,
-                'tokens_output': totals_month.out_tokens,
-            },
-        },
-        'by_model': {
-            m: {
-                'cost_usd': round(t.cost_usd, 10),
-                'tokens_input': t.in_tokens,
-                'tokens_output': t.out_tokens,
-            }
-            for m, t in sorted(by_model.items(), key=lambda kv: kv[0])
-        },
-        'by_model_last24h': {
-            m: {
-                'cost_usd': round(t.cost_usd, 10),
-                'tokens_input': t.in_tokens,
-                'tokens_output': t.out_tokens,
-            }
-            for m, t in sorted(by_model_last24h.items(), key=lambda kv: kv[0])
+            'day': {'date': local_date_str(now_utc), **r.day.as_dict()},
+            'week': {'start': week_start_local(now_utc), **r.week.as_dict()},
+            'month': {'start': month_start_local(now_utc), **r.month.as_dict()},
         },
+        'by_model': {m: t.as_dict() for m, t in sorted(r.by_model.items(), key=lambda kv: kv[0])},
+        'by_model_last24h': {m: t.as_dict() for m, t in sorted(r.by_model_last24h.items(), key=lambda kv: kv[0])},
         'by_cron_job_last24h': {
-            jid: {
-                'name': (cron_jobs.get(jid, {}) or {}).get('name') or jid,
-                'cost_usd': round(t.cost_usd, 10),
-                'tokens_input': t.in_tokens,
-                'tokens_output': t.out_tokens,
-            }
-            for jid, t in sorted(by_cron_job_last24h.items(), key=lambda kv: kv[0])
+            jid: {'name': job_name(cron_jobs, jid), **t.as_dict()}
+            for jid, t in sorted(r.by_cron_job_last24h.items(), key=lambda kv: kv[0])
         },
         'by_cron_category_last24h': {
-            cat: {
-                'cost_usd': round(t.cost_usd, 10),
-                'tokens_input': t.in_tokens,
-                'tokens_output': t.out_tokens,
-            }
-            for cat, t in sorted(by_cron_category_last24h.items(), key=lambda kv: kv[0])
+            cat: t.as_dict() for cat, t in sorted(r.by_cron_category_last24h.items(), key=lambda kv: kv[0])
         },
         'external_fixed': {
             'hetzner_vps': 5.5,
         },
         # kept for backward compatibility with older logic
         'processed_session_ids': [],
-        'unknown_pricing_models': sorted(set(unknown_models)),
+        'unknown_pricing_models': sorted(set(r.unknown_models)),
         'source': 'sessions.json',
     }
 
-    COST_SUMMARY_JSON.parent.mkdir(parents=True, exist_ok=True)
-    COST_SUMMARY_JSON.write_text(json.dumps(summary, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
-
-    append_jsonl(ECON_LOG_JSONL, {
-        'ts': iso_now_utc(),
+    log_rec = {
+        'ts': now_iso,
         'type': 'daily-collect',
         'source': 'sessions.json',
         'last24h': summary['period']['last24h'],
@@ -356,16 +609,96 @@ def main() -> None:
         'month': summary['period']['month'],
         'unknown_pricing_models': summary['unknown_pricing_models'],
         'by_cron_category_last24h': summary['by_cron_category_last24h'],
-    })
+    }
 
-    append_jsonl(TOKEN_USAGE_JSONL, {
-        'ts': iso_now_utc(),
+    gemini_cron_in, gemini_cron_out, gemini_cron_sessions = r.gemini_cron
+    usage_rec = {
+        'ts': now_iso,
         'type': 'gemini_cron_snapshot',
         'input_tokens': gemini_cron_in,
         'output_tokens': gemini_cron_out,
         'sessions': gemini_cron_sessions,
-    })
+    }
+    return summary, log_rec, usage_rec
+
+
+def render(records: Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]) -> Tuple[str, str, str]:
+    """Exact bytes written: cost-summary.json, economist-log line, token-usage line."""
+    summary, log_rec, usage_rec = records
+    return (
+        json.dumps(summary, ensure_ascii=False, indent=2) + '\n',
+        json.dumps(log_rec, ensure_ascii=False) + '\n',
+        json.dumps(usage_rec, ensure_ascii=False) + '\n',
+    )
+
+
+def collect(
+    sessions: Dict[str, Any] | Iterable[Tuple[str, Any]],
+    pricing: Dict[str, Any],
+    now_utc: datetime,
+    state: CostState | None = None,
+    cron_jobs: Dict[str, Dict[str, Any]] | None = None,
+    gemini_cron_ids: set | None = None,
+) -> Tuple[CostState | None, Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]]:
+    """Output records of a full scan (state=None, cost engine) or of `state` updated from sessions."""
+    cron_jobs = load_cron_jobs(CRON_JOBS_JSON) if cron_jobs is None else cron_jobs
+    gemini_cron_ids = load_gemini_cron_ids(CRON_SNAPSHOT_JSON) if gemini_cron_ids is None else gemini_cron_ids
+    if state is None:
+        rollups = engine_rollups(sessions, pricing, now_utc, cron_jobs, gemini_cron_ids)
+    else:
+        state.update(sessions, pricing)
+        rollups = state_rollups(state, now_utc, cron_jobs, gemini_cron_ids)
+    return state, build_records(rollups, now_utc, cron_jobs)
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--incremental', action='store_true', help='Re-cost only changed sessions (state file memo)')
+    ap.add_argument('--verify', action='store_true', help='Compare incremental vs full scan; write nothing')
+    ap.add_argument('--state', default=str(STATE_JSON))
+    ap.add_argument('--rollup-dir', default=COST_ROLLUP_DIR, help='Daily cost rollup store (incremental mode)')
+    ap.add_argument('--backfill-rollup', action='store_true',
+                    help='Rebuild the daily cost rollup from the state memo (implies --incremental)')
+    args = ap.parse_args()
+
+    now_utc = datetime.now(timezone.utc)
+    state_path = Path(args.state)
+    pricing = load_json(PRICING_JSON)
+    cron_jobs = load_cron_jobs(CRON_JOBS_JSON)
+    gemini_cron_ids = load_gemini_cron_ids(CRON_SNAPSHOT_JSON)
+
+    if args.verify:
+        inc_state = load_state(state_path)
+        rollup = CostRollup(args.rollup_dir)
+        inc_state.attach_rollup(rollup, cron_jobs)  # in memory only, never flushed here
+        _, inc = collect(iter_sessions(SESSIONS_JSON), pricing, now_utc, inc_state, cron_jobs, gemini_cron_ids)
+        _, full = collect(iter_sessions(SESSIONS_JSON), pricing, now_utc, None, cron_jobs, gemini_cron_ids)
+        names = ('cost-summary.json', 'economist-log.jsonl', 'token-usage.jsonl')
+        diff = [n for n, a, b in zip(names, render(inc), render(full)) if a != b]
+        for period, start in (('day', local_date_str(now_utc)), ('week', week_start_local(now_utc)), ('month', month_start_local(now_utc))):
+            want = full[0]['period'][period]
+            got = rollup.total(start, None)  # periods include any later dates, like the summary
+            if (got['cost_usd'], got['tokens_input'], got['tokens_output']) != \
+                    (want['cost_usd'], want['tokens_input'], want['tokens_output']):
+                diff.append(f'cost-rollup:{period}')
+        print(json.dumps({'ok': not diff, 'mismatch': diff, 'sessions': inc_state.stats}, ensure_ascii=False))
+        return 0 if not diff else 1
+
+    state = load_state(state_path) if args.incremental or args.backfill_rollup else None
+    if state is not None:
+        state.attach_rollup(CostRollup(args.rollup_dir), cron_jobs, rebuild=args.backfill_rollup)
+    state, records = collect(iter_sessions(SESSIONS_JSON), pricing, now_utc, state, cron_jobs, gemini_cron_ids)
+    _, log_rec, usage_rec = records
+
+    COST_SUMMARY_JSON.parent.mkdir(parents=True, exist_ok=True)
+    COST_SUMMARY_JSON.write_text(render(records)[0], encoding='utf-8')
+    append_jsonl(ECON_LOG_JSONL, log_rec)
+    append_jsonl(TOKEN_USAGE_JSONL, usage_rec)
+    if state is not None:
+        state.save_rollup()
+        save_state(state_path, state)
+    return 0
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -4,10 +4,29 @@
 Writes one JSONL record per run:
   {ts, capture_failed_count, qdrant_400_count, p95_latency_ms}
 
+and next to it (mem0-soak-hist.jsonl) the run's latency samples as a mergeable
+log-bucket histogram (lobster/common/latency_hist.py) covering (start, end]:
+start is the previous run's end when the windows overlap, so merged ranges
+count every sample once. Daily/weekly p50/p95/p99/max:
+  python3 lobster/common/latency_hist.py query --hours 24 [--by day|week]
+
 Sources:
 - openclaw-gateway systemd journal (capture failed / Bad Request)
 - openclaw-gateway journal for qdrant /points/search 400 (fallback when docker logs not accessible)
 
+The journal is read through the shared cursor-based tailer
+(lobster/common/journal_tail.py): only entries after the persisted cursor are
+fetched, and the window is taken from its rolling cache. A direct
+`journalctl --since` read is the fallback when the tailer fails.
+
+classify() produces all counters and latency samples in one pass over the
+window. Each line goes through cheap literal checks on its lower-cased text
+("capture failed", "bad request", "/points/search" + "400", "latency"/"first")
+and only lines that pass them are regex-searched, so the cost stays flat when
+the gateway gets chatty. Non-ASCII lines take the per-pattern path
+(count_matches / extract_latencies), because re.I folds a few non-ASCII
+characters that str.lower() does not; results equal the per-pattern scans.
+
 Notes:
 - p95_latency_ms is best-effort. If no reliable signal is found, it is null.
 """
@@ -21,12 +40,22 @@ import subprocess
 import sys
 from datetime import datetime, timedelta, timezone
 from statistics import quantiles
+from typing import Iterable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lobster", "common"))
+from journal_tail import CACHE_WINDOW_S, JournalTail
+from latency_hist import LogHistogram, last_end
 
 OUT_PATH = os.environ.get(
     "MEM0_SOAK_OUT",
     os.path.expanduser("~/.openclaw/.runtime/mem0-soak.jsonl"),
 )
 
+HIST_PATH = os.environ.get(
+    "MEM0_SOAK_HIST_OUT",
+    os.path.join(os.path.dirname(OUT_PATH), "mem0-soak-hist.jsonl"),
+)
+
 WINDOW_MIN = int(os.environ.get("MEM0_SOAK_WINDOW_MIN", "10"))
 UNIT = os.environ.get("MEM0_SOAK_UNIT", "openclaw-gateway")
 
@@ -69,6 +98,16 @@ def journal_lines(since_iso: str) -> list[str]:
     return out.splitlines()
 
 
+def window_events(since: datetime) -> tuple[list[tuple[float | None, str]], str]:
+    """Journal (t, MESSAGE) since `since`; source tailer|journalctl (no t)."""
+    try:
+        tail = JournalTail(UNIT, window_s=max(WINDOW_MIN * 60, CACHE_WINDOW_S))
+        tail.refresh()
+        return [(ev["t"], ev.get("msg") or "") for ev in tail.events(since.timestamp())], "tailer"
+    except Exception:
+        return [(None, line) for line in journal_lines(since.strftime("%Y-%m-%d %H:%M:%S"))], "journalctl"
+
+
 def count_matches(lines: list[str], patterns: list[re.Pattern]) -> int:
     c = 0
     for line in lines:
@@ -90,6 +129,31 @@ def extract_latencies(lines: list[str]) -> list[int]:
     return vals
 
 
+def classify(lines: Iterable[str]) -> tuple[int, int, list[int]]:
+    """Single pass: (capture_failed_count, qdrant_400_count, latency samples)."""
+    capture_failed = 0
+    qdrant_400 = 0
+    lat_vals: list[int] = []
+    for line in lines:
+        if not line.isascii():
+            if any(p.search(line) for p in CAPTURE_PATTERNS):
+                capture_failed += 1
+            qdrant_400 += count_matches([line], QDRANT_400_PATTERNS)
+            lat_vals.extend(extract_latencies([line]))
+            continue
+        low = line.lower()
+        if "capture failed" in low or "bad request" in low:
+            capture_failed += 1
+        if "/points/search" in low and "400" in line and QDRANT_400_PATTERNS[1].search(line):
+            qdrant_400 += 1
+        if "latency" in low or "first" in low:
+            for p in LAT_PATTERNS:
+                m = p.search(line)
+                if m:
+                    lat_vals.append(int(m.group(1)))
+    return capture_failed, qdrant_400, lat_vals
+
+
 def p95(values: list[int]) -> int | None:
     if not values:
         return None
@@ -108,22 +172,31 @@ def p95(values: list[int]) -> int | None:
 def main() -> None:
     now = datetime.now(timezone.utc)
     since = now - timedelta(minutes=WINDOW_MIN)
-    since_iso = since.strftime("%Y-%m-%d %H:%M:%S")
-
-    lines = journal_lines(since_iso)
 
-    capture_failed_count = sum(
-        1
-        for line in lines
-        if any(p.search(line) for p in CAPTURE_PATTERNS)
-    )
-
-    # Fallback qdrant 400 detect (when docker logs are unavailable):
-    # count lines that mention /points/search and 400.
-    qdrant_400_count = count_matches(lines, QDRANT_400_PATTERNS)
-
-    lat_vals = extract_latencies(lines)
-    p95_latency_ms = p95(lat_vals)
+    events, source = window_events(since)
+
+    # Histogram covers (start, end]; without journal timestamps (fallback) it is the window.
+    end_t = now.timestamp()
+    start_t = since.timestamp()
+    if source == "tailer":
+        prev_end = last_end(HIST_PATH)
+        if prev_end is not None and start_t < prev_end < end_t:
+            start_t = prev_end
+        hist_lines: list[str] = []
+        rest_lines: list[str] = []
+        for t, line in events:
+            (hist_lines if start_t < t <= end_t else rest_lines).append(line)
+    else:
+        hist_lines, rest_lines = [line for _, line in events], []
+
+    # Each line is classified once; the window totals add the histogram part and the rest.
+    # Qdrant 400 is the fallback detect (when docker logs are unavailable):
+    # lines that mention /points/search and 400.
+    capture_failed_count, qdrant_400_count, hist_vals = classify(hist_lines)
+    rest_capture, rest_qdrant, rest_lat = classify(rest_lines)
+    capture_failed_count += rest_capture
+    qdrant_400_count += rest_qdrant
+    p95_latency_ms = p95(rest_lat + hist_vals)
 
     rec = {
         "ts": now.isoformat().replace("+00:00", "Z"),
@@ -137,7 +210,18 @@ def main() -> None:
     with open(OUT_PATH, "a", encoding="utf-8") as f:
         f.write(json.dumps(rec, ensure_ascii=False) + "\n")
 
-    print(json.dumps({"ok": True, **rec}, ensure_ascii=False))
+    hist_rec = {
+        "ts": rec["ts"],
+        "start": datetime.fromtimestamp(start_t, timezone.utc).isoformat().replace("+00:00", "Z"),
+        "end": rec["ts"],
+        "source": source,
+        "hist": LogHistogram.of(hist_vals).to_dict(),
+    }
+    os.makedirs(os.path.dirname(HIST_PATH), exist_ok=True)
+    with open(HIST_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(hist_rec, ensure_ascii=False) + "\n")
+
+    print(json.dumps({"ok": True, **rec, "source": source}, ensure_ascii=False))
 
 
 if __name__ == "__main__":
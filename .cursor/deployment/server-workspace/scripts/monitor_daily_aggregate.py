@@ -18,9 +18,15 @@ Timezone: Asia/Almaty.
 from __future__ import annotations
 
 import json
+import os
+import sys
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lobster', 'common'))
+from incident_rollup import window_from_env
+from jsonl_prefilter import iter_window_lines
+
 ALMATY = timezone(timedelta(hours=5))
 
 INCIDENTS = Path('/home/openclaw/.openclaw/workspace/data/incidents.jsonl')
@@ -31,18 +37,26 @@ def today_local() -> str:
     return datetime.now(timezone.utc).astimezone(ALMATY).date().isoformat()
 
 
-def parse_jsonl_lines(path: Path):
+def parse_jsonl_lines(path: Path, since: datetime | None = None):
+    # since: lines whose raw ts prefix is older are skipped before json.loads
     if not path.exists():
         return
-    with path.open('r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                yield json.loads(line)
-            except Exception:
-                continue
+    for line in iter_window_lines(str(path), since, None):
+        try:
+            yield json.loads(line)
+        except Exception:
+            continue
+
+
+def incident_pairs(since: datetime):
+    # (record, count) pairs from the hourly rollup; full read if INCIDENT_ROLLUP_DIR='' or it fails
+    try:
+        win = window_from_env(since, source=str(INCIDENTS))
+        if win is not None:
+            return list(win.weighted())
+    except Exception:
+        pass
+    return [(obj, 1) for obj in parse_jsonl_lines(INCIDENTS, since)]
 
 
 def main() -> None:
@@ -67,7 +81,7 @@ def main() -> None:
         'model_replaced': 0,
     }
 
-    for obj in parse_jsonl_lines(INCIDENTS):
+    for obj, n in incident_pairs(since_utc):
         if not isinstance(obj, dict):
             continue
         ts = obj.get('ts')
@@ -83,13 +97,13 @@ def main() -> None:
 
         sev = obj.get('severity')
         if sev == 'critical':
-            counts['critical'] += 1
+            counts['critical'] += n
         elif sev == 'warn':
-            counts['warn'] += 1
+            counts['warn'] += n
 
         t = obj.get('type')
         if t in counts:
-            counts[t] += 1
+            counts[t] += n
 
     record = {
         'ts': datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace('+00:00', 'Z'),
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""Tests for scripts/economist_collect.py (incremental collector) and exact_sum.
+
+Cases:
+- exact_sum: totals do not depend on summation order; add then sub is exact
+- parity: a full scan (cost engine) matches the old per-period loop (tokens
+  equal, costs to 1e-9), including a week that starts in the previous month
+- incremental: a state built from scratch, and one updated after changed,
+  added, removed and malformed sessions, give records byte-identical to a full
+  scan; unchanged sessions are not re-costed; a pricing change re-costs the
+  memo without re-adding sessions
+- cli: --verify exits 0 and writes nothing; the full scan leaves the state
+  file alone; --incremental creates it and writes the same cost-summary.json
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import economist_collect as econ
+from exact_sum import ExactSum  # on sys.path via economist_collect (lobster/common)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+PRICING = {"models": {
+    "openai/gpt-4o-mini": {"input_per_1m": 0.15, "output_per_1m": 0.6},
+    "openai/gpt-5.2": {"input_per_1m": 1.75, "output_per_1m": 14.0},
+    "google/gemini-2.5-flash": {"input_per_1m": 0.3, "output_per_1m": 2.5},
+}}
+MODELS = ["gpt-4o-mini", "gpt-5.2", "openai/gpt-5.2", "google/gemini-2.5-flash", "mystery/model"]
+JOBS = ["0a1b2c3d-1111", "0a1b2c3d-2222", "0a1b2c3d-3333"]
+CRON_JOBS = {JOBS[0]: {"name": "Участковый lobster"}, JOBS[1]: {"name": "Дайджест новостей"}}
+GEMINI_IDS = {JOBS[1], JOBS[2]}
+
+
+def make_sessions(rnd: random.Random, now: datetime, n: int) -> dict:
+    now_ms = int(now.timestamp() * 1000)
+    sessions = {}
+    for i in range(n):
+        if i % 3 == 0:
+            key = f"agent:main:cron:{rnd.choice(JOBS)}:run:{i:08x}"
+        elif i % 3 == 1:
+            key = f"agent:main:cron:{rnd.choice(JOBS)}"  # no :run: suffix
+        else:
+            key = f"agent:main:chat:{i}"
+        sessions[key] = {
+            "updatedAt": now_ms - rnd.randint(0, 40 * 86400 * 1000),
+            "model": rnd.choice(MODELS),
+            "inputTokens": rnd.randint(0, 200000),
+            "outputTokens": rnd.randint(0, 20000),
+        }
+    sessions["bad:list"] = ["not", "a", "dict"]
+    sessions["bad:zero"] = {"updatedAt": 0, "model": "gpt-5.2"}
+    sessions["bad:model"] = {"updatedAt": now_ms, "model": None, "modelProvider": 7}
+    sessions["edge:24h"] = {"updatedAt": now_ms - 86400 * 1000, "model": "gpt-5.2", "inputTokens": 5}
+    return sessions
+
+
+def old_totals(sessions: dict, now: datetime) -> dict:
+    """The pre-incremental per-period loop (float sums)."""
+    starts = {"day": econ.local_date_str(now), "week": econ.week_start_local(now),
+              "month": econ.month_start_local(now)}
+    out = {p: [0, 0, 0.0] for p in ("last24h", *starts)}
+    cut = now - timedelta(hours=24)
+    for s in sessions.values():
+        f = econ.session_fields(s)
+        if f is None:
+            continue
+        dt = datetime.fromtimestamp(f[0] / 1000.0, tz=timezone.utc)
+        c, _ = econ.cost_for(econ.normalize_model(f[1]), f[2], f[3], PRICING)
+        hits = [p for p, start in starts.items() if econ.local_date_str(dt) >= start]
+        if dt >= cut:
+            hits.append("last24h")
+        for p in hits:
+            out[p][0] += f[2]
+            out[p][1] += f[3]
+            out[p][2] += c
+    return out
+
+
+def full(sessions: dict, now: datetime) -> tuple:
+    return econ.render(econ.collect(sessions, PRICING, now, None, CRON_JOBS, GEMINI_IDS)[1])
+
+
+def main() -> None:
+    rnd = random.Random(5)
+    values = [rnd.random() * 10 ** rnd.randint(-9, 3) for _ in range(2000)]
+    a, b = ExactSum(), ExactSum()
+    for v in values:
+        a.add(v)
+    for v in sorted(values, reverse=True):
+        b.add(v)
+    assert a.units == b.units and abs(a.value() - sum(values)) < 1e-9
+    a.add(0.1)
+    a.sub(0.1)
+    assert a.units == b.units
+
+    # 2026-10-01 is a Thursday: the week starts in September.
+    for now in (datetime(2026, 10, 2, 7, 30, 15, 250000, tzinfo=timezone.utc),
+                datetime(2026, 10, 17, 12, 0, tzinfo=timezone.utc)):
+        sessions = make_sessions(rnd, now, 3000)
+        summary = econ.collect(sessions, PRICING, now, None, CRON_JOBS, GEMINI_IDS)[1][0]
+        want = old_totals(sessions, now)
+        for p, (in_t, out_t, cost) in want.items():
+            got = summary["period"][p]
+            assert (got["tokens_input"], got["tokens_output"]) == (in_t, out_t), (p, got, want[p])
+            assert abs(got["cost_usd"] - cost) < 1e-9, (p, got, cost)
+        assert summary["unknown_pricing_models"] == ["mystery/model"]
+        assert summary["by_cron_category_last24h"] and summary["by_cron_job_last24h"]
+    assert summary["period"]["week"]["tokens_input"] > summary["period"]["day"]["tokens_input"]
+
+    state, rebuilt = econ.collect(sessions, PRICING, now, econ.CostState(), CRON_JOBS, GEMINI_IDS)
+    assert econ.render(rebuilt) == full(sessions, now)  # state from scratch == cost engine
+    state = econ.CostState(json.loads(json.dumps(state.to_dict())))  # as saved on disk
+    now_ms = int(now.timestamp() * 1000)
+    keys = [k for k in sessions if not k.startswith("bad:")]
+    for k in rnd.sample(keys, 200):  # changed: newer, more tokens, other model
+        s = sessions[k]
+        s["updatedAt"] = min(now_ms, s["updatedAt"] + rnd.randint(1, 3 * 86400 * 1000))
+        s["inputTokens"] += rnd.randint(1, 5000)
+        if rnd.random() < 0.3:
+            s["model"] = rnd.choice(MODELS)
+    for k in rnd.sample(keys, 100):
+        del sessions[k]
+    sessions.update(make_sessions(random.Random(9), now, 50))
+    sessions[keys[0] + "x"] = {"updatedAt": now_ms, "modelProvider": "mystery/other", "inputTokens": 1}
+    later = now + timedelta(hours=7)
+    _, inc = econ.collect(sessions, PRICING, later, state, CRON_JOBS, GEMINI_IDS)
+    assert econ.render(inc) == full(sessions, later)
+    assert state.stats["removed"] >= 90 and state.stats["changed"] >= 150 and state.stats["added"] > 0
+    assert state.stats["unchanged"] > 1500
+    econ.collect(sessions, PRICING, later, state, CRON_JOBS, GEMINI_IDS)
+    assert state.stats["unchanged"] == len(state.memo) and state.stats["changed"] == 0
+
+    pricing2 = json.loads(json.dumps(PRICING))
+    pricing2["models"]["mystery/model"] = {"input_per_1m": 9.0, "output_per_1m": 9.0}
+    _, inc2 = econ.collect(sessions, pricing2, later, state, CRON_JOBS, GEMINI_IDS)
+    _, full2 = econ.collect(sessions, pricing2, later, None, CRON_JOBS, GEMINI_IDS)
+    assert econ.render(inc2) == econ.render(full2)
+    assert state.stats["added"] == 0 and 0 < state.stats["repriced"] < len(state.memo)
+    assert inc2[0]["unknown_pricing_models"] == ["mystery/other"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data = os.path.join(tmp, ".openclaw", "workspace", "data")
+        os.makedirs(data)
+        sessions_path = os.path.join(tmp, "sessions.json")
+        with open(sessions_path, "w", encoding="utf-8") as f:
+            json.dump(sessions, f)
+        with open(os.path.join(data, "model-pricing.json"), "w", encoding="utf-8") as f:
+            json.dump(PRICING, f)
+        state_path = os.path.join(tmp, "state.json")
+        rollup_dir = os.path.join(tmp, "rollup")
+        code = (
+            "import sys; from pathlib import Path; sys.argv[1:] = sys.argv[2:]\n"
+            "import economist_collect as e\n"
+            f"d = Path({data!r})\n"
+            f"e.SESSIONS_JSON = Path({sessions_path!r})\n"
+            "e.PRICING_JSON = d / 'model-pricing.json'; e.COST_SUMMARY_JSON = d / 'cost-summary.json'\n"
+            "e.ECON_LOG_JSONL = d / 'economist-log.jsonl'; e.TOKEN_USAGE_JSONL = d / 'token-usage.jsonl'\n"
+            "e.CRON_SNAPSHOT_JSON = d / 'none.json'; e.CRON_JOBS_JSON = d / 'none.json'\n"
+            "sys.exit(e.main())\n"
+        )
+
+        def cli(*args: str) -> subprocess.CompletedProcess:
+            return subprocess.run([sys.executable, "-c", code, "-", "--state", state_path,
+                                   "--rollup-dir", rollup_dir, *args],
+                                  cwd=HERE, capture_output=True, text=True)
+
+        p = cli("--verify")
+        assert p.returncode == 0 and json.loads(p.stdout)["ok"] and sorted(os.listdir(data)) == ["model-pricing.json"]
+        assert not os.path.exists(rollup_dir)
+        assert cli().returncode == 0 and not os.path.exists(state_path)  # full scan: no state
+        with open(os.path.join(data, "cost-summary.json"), encoding="utf-8") as f:
+            first = json.load(f)
+        p = cli("--incremental")
+        assert p.returncode == 0 and os.path.exists(state_path), p.stderr
+        with open(os.path.join(data, "cost-summary.json"), encoding="utf-8") as f:
+            second = json.load(f)
+        drop = ("last_updated", "last_session_scan_at")
+        assert {k: v for k, v in first.items() if k not in drop and k != "period"} == \
+               {k: v for k, v in second.items() if k not in drop and k != "period"}
+        assert first["period"]["month"] == second["period"]["month"]
+        with open(os.path.join(data, "economist-log.jsonl"), encoding="utf-8") as f:
+            assert len(f.read().splitlines()) == 2
+        assert cli("--verify").returncode == 0
+
+    print(json.dumps({"ok": True, "checks": ["exact_sum", "parity", "incremental", "cli"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Tests for scripts/mem0_soak_probe.py (single-pass classifier).
+
+Cases:
+- parity: classify() equals the per-pattern scans (capture any-of, qdrant all-of,
+  every latency pattern appending) on a random corpus with case variants,
+  near misses and non-ASCII lines (re.I folds 'ſ' and the Kelvin sign)
+- chatty: on a chatty window (mostly unrelated lines) the single pass still
+  equals the per-pattern scans; its time is checked by the mem0_soak_classify
+  target of lobster/bench/bench_incident_consumers.py
+"""
+
+from __future__ import annotations
+
+import json
+import random
+
+import mem0_soak_probe as soak
+
+PIECES = [
+    "capture failed", "CAPTURE FAILED", "capture  failed", "Bad Request", "bad request", "BadRequest",
+    "POST /points/search", "/POINTS/SEARCH", "/points/searches", "400", "1400", "400ms", "status=400",
+    "first_response_ms=120", "first-token-ms: 35", "FIRSTRESPONSEMS 9", "p95_latency_ms=410", "latency_ms 77",
+    "Latency-MS:=5", "latency", "first", "ms=", "caſture failed", "first_token_Keep", "٣٤",
+    "latency_ms=٣٤", "gateway tick ok", "mem0", "qdrant", "é", "",
+]
+
+
+def reference(lines: list[str]) -> tuple[int, int, list[int]]:
+    capture = sum(1 for line in lines if any(p.search(line) for p in soak.CAPTURE_PATTERNS))
+    return capture, soak.count_matches(lines, soak.QDRANT_400_PATTERNS), soak.extract_latencies(lines)
+
+
+def main() -> None:
+    rnd = random.Random(17)
+    lines = [" ".join(rnd.choice(PIECES) for _ in range(rnd.randint(1, 5))) for _ in range(20000)]
+    lines += ["caſture failed", "BAD REQUEſT", "p95_latency_ms=12 latency_ms=13", "first_response_ms=1 first_token_ms=2"]
+    got = soak.classify(lines)
+    assert got == reference(lines), (got[:2], reference(lines)[:2])
+    assert got[0] > 0 and got[1] > 0 and len(got[2]) > 0
+    assert soak.classify(["BAD REQUEſT"])[0] == 1 and soak.classify(["p95_latency_ms=12"])[2] == [12, 12]
+
+    chatty = [f"gateway: handled request {i} in {i % 50}ms route=/api/chat status=200" for i in range(100000)]
+    chatty[::500] = ["mem0 capture failed: Bad Request"] * len(chatty[::500])
+    one = soak.classify(chatty)
+    assert one == reference(chatty) and one[0] == 200
+
+    print(json.dumps({"ok": True, "checks": ["parity", "chatty"]}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
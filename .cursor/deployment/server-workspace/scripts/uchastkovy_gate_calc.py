@@ -16,6 +16,23 @@ Rules (Spec):
 Output:
 - JSON to stdout (stable keys).
 
+Optional --segments-dir reads the time-partitioned store
+(lobster/common/incident_segments.py) instead of scanning incidents.jsonl:
+new lines are mirrored first, then only segments/blocks after startTs are read.
+
+Optional --rollup-dir reads the hourly rollup (lobster/common/incident_rollup.py):
+whole hours after startTs come from bucket counts, only the first (partial)
+hour is read raw.
+
+Optional --workers N scans --incidents-path with a process pool over
+newline-aligned byte ranges (lobster/common/parallel_scan.py); the partial
+counts are summed, so the output is identical to the serial scan.
+
+The rules live in lobster/common/gate_engine.py (preset "uchastkovy_gate_calc");
+the serial scan is the engine's single pass, which resumes at the baseline's
+incidentsOffset when the baseline was marked (gate_engine.py mark) and startTs
+is not overridden.
+
 Exit codes:
 - 0: PASS
 - 2: FAIL
@@ -31,25 +48,46 @@ import os
 import sys
 from typing import Any, Dict, Iterable, Tuple
 
-ALLOWLIST_SOURCES = {"uchastkovy-lobster", "lobster-uchastkovy"}
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lobster", "common"))
+from gate_engine import PRESETS, Gate, evaluate, uchastkovy_decide, uchastkovy_report
+from incident_rollup import RollupStore
+from incident_segments import SegmentStore
+from jsonl_prefilter import iter_window_lines
+from parallel_scan import scan_ranges
 
+PRESET = "uchastkovy_gate_calc"
+ALLOWLIST_SOURCES = set(PRESETS[PRESET]["sources"])
 
-def _parse_iso_z(s: str) -> dt.datetime:
-    # Accept ISO8601 with Z.
-    return dt.datetime.fromisoformat(s.replace("Z", "+00:00"))
+
+def _gate(start_ts: str, allow_sources: set[str], incidents_path: str, baseline_path: str | None = None) -> Gate:
+    gate = Gate({"name": "uchastkovy", "preset": PRESET, "sources": sorted(allow_sources),
+                 "startTs": start_ts, "baseline": baseline_path}, incidents_path)
+    if gate.error:
+        raise ValueError(gate.error)
+    return gate
+
+
+def _iter_jsonl(path: str, start_dt: dt.datetime | None = None,
+                byte_range: Tuple[int, int] | None = None) -> Iterable[Dict[str, Any]]:
+    # Lines with a raw ts prefix before start_dt are skipped undecoded (jsonl_prefilter).
+    for line in iter_window_lines(path, start_dt, None, byte_range=byte_range):
+        try:
+            yield json.loads(line)
+        except Exception:
+            # ignore malformed lines (counted separately)
+            yield {"__malformed__": True, "raw": line[:400].decode("utf-8", errors="replace")}
 
 
-def _iter_jsonl(path: str) -> Iterable[Dict[str, Any]]:
-    with open(path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                yield json.loads(line)
-            except Exception:
-                # ignore malformed lines (counted separately)
-                yield {"__malformed__": True, "raw": line[:400]}
+def _scan_range(path: str, lo: int, hi: int, start_ts: str, allow_sources: set[str]) -> Tuple[int, Dict[str, int]]:
+    """Worker: (malformed, gate counts) over one byte range."""
+    gate = _gate(start_ts, allow_sources, path)
+    malformed = 0
+    for rec in _iter_jsonl(path, gate.start, byte_range=(lo, hi)):
+        if rec.get("__malformed__"):
+            malformed += 1
+            continue
+        gate.offer(rec)
+    return malformed, gate.counts
 
 
 def compute_deltas(*,
@@ -58,54 +96,46 @@ def compute_deltas(*,
                    allow_sources: set[str] = ALLOWLIST_SOURCES,
                    inject_critical: int = 0,
                    inject_transport: int = 0,
-                   inject_rollback: int = 0) -> Tuple[Dict[str, int], Dict[str, Any]]:
-    start_dt = _parse_iso_z(start_ts)
+                   inject_rollback: int = 0,
+                   segments_dir: str | None = None,
+                   rollup_dir: str | None = None,
+                   workers: int = 0,
+                   baseline_path: str | None = None) -> Tuple[Dict[str, int], Dict[str, Any]]:
+    gate = _gate(start_ts, allow_sources, incidents_path, baseline_path)
+    start_dt = gate.start
 
     malformed = 0
-    delta_critical = 0
-    delta_transport = 0
-    delta_rollback = 0
-
-    for rec in _iter_jsonl(incidents_path):
+    pairs: Iterable[Tuple[Dict[str, Any], int]] = ()
+    if workers and not (rollup_dir or segments_dir):
+        for m, counts in scan_ranges(_scan_range, incidents_path, workers, start_ts, allow_sources):
+            malformed += m
+            for k, n in counts.items():
+                gate.counts[k] += n
+    elif rollup_dir:
+        rollup = RollupStore(rollup_dir, incidents_path)
+        rollup.refresh()
+        pairs = rollup.window(start_dt, None).weighted()
+        malformed = rollup.malformed_count()
+    elif segments_dir:
+        store = SegmentStore(segments_dir)
+        store.sync(incidents_path)
+        pairs = ((r, 1) for r in store.query(start_dt, None))
+        malformed = store.malformed_count()
+    else:
+        evaluate([gate], incidents_path)
+        malformed = gate.malformed
+
+    for rec, n in pairs:
         if rec.get("__malformed__"):
             malformed += 1
             continue
-
-        ts = rec.get("ts")
-        if not ts:
-            continue
-        try:
-            t = _parse_iso_z(ts)
-        except Exception:
-            continue
-        if t < start_dt:
-            continue
-
-        src = rec.get("source")
-        if src not in allow_sources:
-            continue
-
-        typ = str(rec.get("type") or "")
-        sev = rec.get("severity")
-
-        if sev == "critical" and typ != "cron_error":
-            delta_critical += 1
-
-        if typ == "message_transport_failed":
-            delta_transport += 1
-
-        if "rollback" in typ:
-            delta_rollback += 1
+        gate.offer(rec, n)
 
     # Negative-test hooks (do not depend on incidents)
-    delta_critical += max(0, inject_critical)
-    delta_transport += max(0, inject_transport)
-    delta_rollback += max(0, inject_rollback)
-
     deltas = {
-        "delta_critical": delta_critical,
-        "delta_transport": delta_transport,
-        "delta_rollback": delta_rollback,
+        "delta_critical": gate.counts["delta_critical"] + max(0, inject_critical),
+        "delta_transport": gate.counts["delta_transport"] + max(0, inject_transport),
+        "delta_rollback": gate.counts["delta_rollback"] + max(0, inject_rollback),
     }
     meta = {
         "malformed_lines_total": malformed,
@@ -114,16 +144,7 @@ def compute_deltas(*,
 
 
 def decide(deltas: Dict[str, int]) -> Tuple[str, list[str]]:
-    reasons: list[str] = []
-    if deltas["delta_critical"] != 0:
-        reasons.append(f"Δcritical={deltas['delta_critical']} (lobster-scoped, excl cron_error)")
-    if deltas["delta_transport"] != 0:
-        reasons.append(f"Δtransport={deltas['delta_transport']}")
-    if deltas["delta_rollback"] != 0:
-        reasons.append(f"Δrollback={deltas['delta_rollback']}")
-
-    status = "PASS" if not reasons else "FAIL"
-    return status, reasons
+    return uchastkovy_decide(deltas)
 
 
 def main() -> int:
@@ -132,6 +153,9 @@ def main() -> int:
     ap.add_argument("--incidents-path", default=os.path.expanduser("~/.openclaw/workspace/data/incidents.jsonl"))
     ap.add_argument("--start-ts", default=None, help="Override startTs (otherwise taken from baseline JSON)")
     ap.add_argument("--incidents-source", default="incidents.jsonl")
+    ap.add_argument("--segments-dir", default=None, help="Read the time-partitioned store (synced from --incidents-path)")
+    ap.add_argument("--rollup-dir", default=None, help="Read the hourly rollup (refreshed from --incidents-path)")
+    ap.add_argument("--workers", type=int, default=0, help="Scan --incidents-path with a process pool of N workers")
 
     # test hooks
     ap.add_argument("--inject-critical", type=int, default=0)
@@ -160,35 +184,27 @@ def main() -> int:
             inject_critical=args.inject_critical,
             inject_transport=args.inject_transport,
             inject_rollback=args.inject_rollback,
+            segments_dir=os.path.expanduser(args.segments_dir) if args.segments_dir else None,
+            rollup_dir=os.path.expanduser(args.rollup_dir) if args.rollup_dir else None,
+            workers=args.workers,
+            baseline_path=args.baseline_path,
         )
     except Exception as e:
         print(json.dumps({"ok": False, "error": f"compute_failed: {e}"}, ensure_ascii=False))
         return 3
 
-    status, reasons = decide(deltas)
-
-    out: Dict[str, Any] = {
-        "ok": True,
-        "module": "uchastkovy_gate_calc",
-        "baselinePath": args.baseline_path,
-        "baselineStartTs": baseline_start,
-        "startTs": start_ts,
-        "incidentsPath": args.incidents_path,
-        "incidentsSource": args.incidents_source,
-        "allowlistSources": sorted(ALLOWLIST_SOURCES),
-        "deltas": deltas,
-        "decision": {
-            "status": status,
-            "reasons": reasons,
-            "rule": "PASS iff Δcritical==0 && Δtransport==0 && Δrollback==0 (lobster-scoped; Δcritical excludes cron_error)",
-        },
-        "meta": meta,
-        "ts": dt.datetime.now(dt.timezone.utc).isoformat().replace("+00:00", "Z"),
-    }
-
+    out, code = uchastkovy_report(
+        baseline_path=args.baseline_path,
+        baseline_start=baseline_start,
+        start_ts=start_ts,
+        incidents_path=args.incidents_path,
+        incidents_source=args.incidents_source,
+        sources=ALLOWLIST_SOURCES,
+        deltas=deltas,
+        meta=meta,
+    )
     print(json.dumps(out, ensure_ascii=False, sort_keys=True))
-
-    return 0 if status == "PASS" else 2
+    return code
 
 
 if __name__ == "__main__":
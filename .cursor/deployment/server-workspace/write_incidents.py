@@ -2,6 +2,14 @@
 import json
 import hashlib
 import datetime
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "lobster", "common"))
+try:
+    from incident_writer import append_incidents
+except ImportError:
+    append_incidents = None
 
 incidents = []
 current_time = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds') + 'Z'
@@ -55,7 +63,6 @@ incidents.append({
 })
 
 
-output_lines = []
 for incident in incidents:
     incident["ts"] = current_time
     incident["source"] = "uchastkovy"
@@ -65,11 +72,12 @@ for incident in incidents:
     id_string = f"{incident['type']}+{incident['job']}+{incident['ts']}"
     incident_id = hashlib.sha1(id_string.encode('utf-8')).hexdigest()[:8]
     incident["id"] = incident_id
-    
-    output_lines.append(json.dumps(incident, ensure_ascii=False))
 
-with open("/home/openclaw/.openclaw/workspace/data/incidents.jsonl", "a", encoding="utf-8") as f:
-    for line in output_lines:
-        f.write(line + "\n")
+INCIDENTS_PATH = "/home/openclaw/.openclaw/workspace/data/incidents.jsonl"
+if append_incidents is not None:
+    append_incidents(incidents, path=INCIDENTS_PATH)
+else:
+    with open(INCIDENTS_PATH, "a", encoding="utf-8") as f:
+        f.write("".join(json.dumps(incident, ensure_ascii=False) + "\n" for incident in incidents))
 
 print(f"Recorded {len(incidents)} incidents to data/incidents.jsonl")
@@ -7,9 +7,18 @@ import json
 import hashlib
 import os
 import subprocess
+import sys
 from datetime import datetime, timezone
 
 HOME = os.path.expanduser("~")
+
+# Групповая запись инцидентов (flock + один O_APPEND write на пачку)
+sys.path.insert(0, f"{HOME}/.openclaw/workspace/lobster/common")
+try:
+    from incident_writer import IncidentWriter
+except ImportError:
+    IncidentWriter = None
+
 CONFIG_FILE = f"{HOME}/.openclaw/openclaw.json"
 INCIDENTS_FILE = f"{HOME}/.openclaw/workspace/data/incidents.jsonl"
 DROPINS_DIR = f"{HOME}/.config/systemd/user/openclaw-gateway.service.d"
@@ -52,19 +61,34 @@ def get_nested(obj, path):
     return obj
 
 
+_pending_drifts = []
+
+
 def write_drift(severity, msg):
+    """Копит запись config_drift; в файл уходит одной пачкой в flush_drifts()."""
     ts = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
     id_ = hashlib.sha1(f"{msg}{ts}".encode()).hexdigest()[:8]
-    entry = json.dumps({
+    _pending_drifts.append({
         "id": id_, "ts": ts, "type": "config_drift",
         "source": "uchastkovy", "severity": severity,
         "msg": msg, "resolved": False
-    }, ensure_ascii=False)
-    with open(INCIDENTS_FILE, "a") as f:
-        f.write(entry + "\n")
+    })
     print(f"DRIFT [{severity}]: {msg}")
 
 
+def flush_drifts():
+    if not _pending_drifts:
+        return
+    if IncidentWriter is not None:
+        writer = IncidentWriter(INCIDENTS_FILE)
+        writer.extend(_pending_drifts)
+        writer.flush()
+    else:
+        with open(INCIDENTS_FILE, "a") as f:
+            f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in _pending_drifts))
+    _pending_drifts.clear()
+
+
 def check_undocumented_units():
     """Обнаруживает user unit-файлы не из KNOWN_UNITS."""
     drifts = 0
@@ -123,6 +147,13 @@ def check_undocumented_cron():
 
 
 def main():
+    try:
+        run_checks()
+    finally:
+        flush_drifts()
+
+
+def run_checks():
     drifts = 0
 
     try: